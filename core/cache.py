@@ -0,0 +1,117 @@
+"""
+Caché de lectura para datos de referencia (listas de obras, perfiles, usuarios y roles).
+
+Esos datos se vuelven a consultar en cada cambio de pestaña y en cada diálogo aunque casi no cambian.
+Cada caché es un LRU acotado (CACHE_LECTURA_MAX entradas) con vencimiento por TTL (CACHE_LECTURA_TTL)
+y se vacía cuando el event_bus emite alguna de las señales indicadas en `invalidar_con`.
+Los modelos además la invalidan directamente después de sus propias escrituras, así la lectura
+siguiente ya ve el cambio aunque la señal llegue más tarde.
+
+Uso:
+    CACHE_OBRAS = cache_lectura("obras", invalidar_con=("obra_agregada", "pedido_actualizado"))
+
+    def obtener_datos_obras(self):
+        return CACHE_OBRAS.obtener((clave_base(self.db_connection), "datos"), self._consultar_datos_obras)
+
+Las estadísticas de aciertos de todas las cachés (estadisticas_caches()) se muestran en la pestaña
+"Diagnóstico" de Configuración.
+"""
+import threading
+import time
+from collections import OrderedDict
+from PyQt6.QtCore import Qt
+from core.config import CACHE_LECTURA_MAX, CACHE_LECTURA_TTL
+
+class CacheLectura:
+    """
+    LRU con TTL protegido por un lock: las cargas corren tanto en el hilo de la GUI como en los del QThreadPool.
+    Los resultados None no se guardan (una consulta fallida no debe quedar cacheada).
+    """
+    def __init__(self, nombre, ttl=CACHE_LECTURA_TTL, max_entradas=CACHE_LECTURA_MAX):
+        self.nombre = nombre
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        # Se incrementa al invalidar: una carga iniciada antes no guarda su resultado ya viejo
+        self._generacion = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+        self.desalojos = 0
+
+    def obtener(self, clave, cargar):
+        """Devuelve el valor cacheado para `clave` o lo carga con cargar() si no está o venció."""
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and ahora - entrada[0] < self.ttl:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return entrada[1]
+            self.fallos += 1
+            generacion = self._generacion
+        valor = cargar()
+        if valor is None:
+            return valor
+        with self._lock:
+            if generacion == self._generacion:
+                self._entradas[clave] = (ahora, valor)
+                self._entradas.move_to_end(clave)
+                while len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+                    self.desalojos += 1
+        return valor
+
+    def invalidar(self, clave=None):
+        """Descarta una entrada, o todas si clave es None."""
+        with self._lock:
+            if clave is None:
+                self._entradas.clear()
+            else:
+                self._entradas.pop(clave, None)
+            self._generacion += 1
+            self.invalidaciones += 1
+
+    def estadisticas(self):
+        """Dict con nombre, entradas, aciertos, fallos, invalidaciones, desalojos y tasa_aciertos (0..1)."""
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'nombre': self.nombre,
+                'entradas': len(self._entradas),
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'invalidaciones': self.invalidaciones,
+                'desalojos': self.desalojos,
+                'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+            }
+
+def clave_base(db):
+    """Parte de la clave que identifica la base: su nombre si la conexión lo expone, si no la conexión misma."""
+    return getattr(db, 'database', None) or db
+
+_CACHES = {}
+
+def cache_lectura(nombre, invalidar_con=()):
+    """
+    Devuelve la caché registrada con `nombre` (la crea la primera vez) y la conecta a las señales
+    de core.event_bus listadas en `invalidar_con`. La conexión es directa: la invalidación ocurre
+    en el hilo que emite, sin esperar al event loop.
+    """
+    cache = _CACHES.get(nombre)
+    if cache is None:
+        cache = _CACHES[nombre] = CacheLectura(nombre)
+        from core.event_bus import event_bus
+        for senal in invalidar_con:
+            getattr(event_bus, senal).connect(lambda _datos, cache=cache: cache.invalidar(), Qt.ConnectionType.DirectConnection)
+    return cache
+
+def invalidar_caches():
+    """Vacía todas las cachés registradas (por ejemplo tras una importación masiva)."""
+    for cache in list(_CACHES.values()):
+        cache.invalidar()
+
+def estadisticas_caches():
+    """Estadísticas de todas las cachés registradas, ordenadas por nombre."""
+    return [_CACHES[nombre].estadisticas() for nombre in sorted(_CACHES)]
@@ -0,0 +1,241 @@
+"""
+Servicio de conectividad con el servidor SQL: sondeo en segundo plano, latencias y estado en línea.
+
+Antes MainWindow.verificar_estado_conexion_bd abría cada 15 s una conexión pyodbc nueva en el hilo de la
+GUI (timeout 3 s): con el servidor lento la ventana se trababa. Y cada modelo, sin servidor, pagaba su
+propio backoff 1 + 2 + 4 s en BaseDatabaseConnection.conectar. Ahora un solo hilo (como el del motor
+offline) sondea con SELECT 1 por una conexión del pool compartido:
+
+- registra la latencia de cada sondeo y expone p50/p95/p99 de los últimos `muestras`;
+- tras `fallos_para_offline` sondeos fallidos (o más lentos que `timeout`) pasa a fuera de línea y sondea
+  cada `intervalo_sin_conexion` hasta que vuelve;
+- cada cambio de estado se publica en event_bus.conectividad_cambiada (el Sidebar lo muestra);
+- BaseDatabaseConnection consulta servidor_disponible() y, fuera de línea, falla enseguida con
+  ServidorNoDisponibleError en lugar de esperar el timeout y los reintentos. Un error de conexión de un
+  modelo adelanta el próximo sondeo (avisar_fallo_conexion).
+
+Uso:
+    activar_monitor_conectividad()      # main.py, antes del login
+    monitor_conectividad().estado()     # {'en_linea', 'latencia_ms', 'p50_ms', 'p95_ms', 'p99_ms', ...}
+"""
+import atexit
+import math
+import threading
+import time
+from collections import deque
+from core.logger import Logger
+
+class ServidorNoDisponibleError(RuntimeError):
+    """El monitor de conectividad indica que el servidor no responde; la consulta no se intenta."""
+
+def _percentil(valores, p):
+    """Percentil p (0..1) por el método del rango más cercano; None sin datos."""
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p * len(ordenados)) - 1)]
+
+class PoolOcupado(RuntimeError):
+    """Todas las conexiones del pool están en uso: el sondeo se omite (no dice nada del servidor)."""
+
+def sonda_pool(database, espera_pool=None):
+    """
+    Sonda por defecto: SELECT 1 por una conexión del pool de `database` (reutiliza las ociosas).
+    La espera por una conexión libre se limita con `espera_pool` y no cuenta como latencia: la sonda
+    devuelve los ms del SELECT, que es lo que se compara con el timeout del sondeo.
+    """
+    def sondear(timeout):
+        from core.database import obtener_pool
+        from core.db_pool import PoolAgotadoError
+        try:
+            with obtener_pool(database).conexion(timeout=espera_pool) as conn:
+                inicio = time.perf_counter()
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+                return (time.perf_counter() - inicio) * 1000
+        except PoolAgotadoError as e:
+            raise PoolOcupado(str(e)) from e
+    return sondear
+
+def sonda_servidor(servidor, database):
+    """Sonda con una conexión directa (fuera del pool) a `servidor`, p. ej. DB_SERVER_ALTERNATE al arrancar."""
+    def sondear(timeout):
+        import pyodbc
+        from core.database import BaseDatabaseConnection, get_connection_string
+        cadena = get_connection_string(BaseDatabaseConnection.detectar_driver_odbc(), database, servidor)
+        pyodbc.connect(cadena, timeout=max(1, math.ceil(timeout))).close()
+    return sondear
+
+class MonitorConectividad:
+    def __init__(self, sonda=None, database=None, intervalo=15.0, intervalo_sin_conexion=5.0, timeout=3.0,
+                 fallos_para_offline=2, muestras=240, bus=None):
+        """
+        - sonda: callable(timeout) que lanza una excepción si el servidor no responde (por defecto sonda_pool).
+          Si devuelve un número, se toma como la latencia en ms; si lanza PoolOcupado, el sondeo se omite.
+        - intervalo / intervalo_sin_conexion: segundos entre sondeos en línea / fuera de línea.
+        - timeout: un sondeo más lento que esto cuenta como fallido.
+        - muestras: latencias que se conservan para los percentiles.
+        """
+        if sonda is None:
+            from core.config import DB_DEFAULT_DATABASE
+            from core.config import CONECTIVIDAD_ESPERA_POOL
+            sonda = sonda_pool(database or DB_DEFAULT_DATABASE, CONECTIVIDAD_ESPERA_POOL)
+        if bus is None:
+            from core.event_bus import event_bus
+            bus = event_bus
+        self.sonda = sonda
+        self.intervalo = intervalo
+        self.intervalo_sin_conexion = intervalo_sin_conexion
+        self.timeout = timeout
+        self.fallos_para_offline = max(1, fallos_para_offline)
+        self.bus = bus
+        self.en_linea = True
+        self.fallos_consecutivos = 0
+        self.ultimo_error = None
+        self.ultima_latencia_ms = None
+        self.cambios = 0
+        self.sondeos = 0
+        self.desde = time.time()
+        self._latencias = deque(maxlen=muestras)
+        self._lock = threading.Lock()
+        self._primer_sondeo = threading.Event()
+        self._despertar = threading.Event()
+        self._detenido = threading.Event()
+        self._hilo = None
+
+    def sondear(self):
+        """Ejecuta un sondeo, actualiza latencias y estado y devuelve estado()."""
+        inicio = time.perf_counter()
+        error = None
+        medido = None
+        try:
+            medido = self.sonda(self.timeout)
+        except PoolOcupado as e:
+            Logger().info(f"[CONECTIVIDAD] Sondeo omitido: {e}")
+            return self.estado()
+        except Exception as e:
+            error = e
+        ms = medido if isinstance(medido, (int, float)) else (time.perf_counter() - inicio) * 1000
+        if error is None and ms > self.timeout * 1000:
+            error = TimeoutError(f"el servidor tardó {ms:.0f} ms en responder")
+        with self._lock:
+            self.sondeos += 1
+            if error is None:
+                self._latencias.append(ms)
+                self.ultima_latencia_ms = ms
+                self.fallos_consecutivos = 0
+                self.ultimo_error = None
+                en_linea = True
+            else:
+                self.fallos_consecutivos += 1
+                self.ultimo_error = str(error)
+                en_linea = self.en_linea and self.fallos_consecutivos < self.fallos_para_offline
+            cambio = en_linea != self.en_linea
+            if cambio:
+                self.en_linea = en_linea
+                self.cambios += 1
+                self.desde = time.time()
+        self._primer_sondeo.set()
+        estado = self.estado()
+        if cambio:
+            if en_linea:
+                Logger().info(f"[CONECTIVIDAD] Servidor disponible nuevamente ({ms:.0f} ms).")
+            else:
+                Logger().warning(f"[CONECTIVIDAD] Servidor sin respuesta tras {self.fallos_consecutivos} sondeos: {error}")
+            self.bus.conectividad_cambiada.emit(estado)
+        return estado
+
+    def estado(self):
+        """Snapshot del estado: en_linea, latencias (ms), fallos y último error."""
+        with self._lock:
+            latencias = list(self._latencias)
+            return {
+                'en_linea': self.en_linea,
+                'latencia_ms': self.ultima_latencia_ms,
+                'p50_ms': _percentil(latencias, 0.5),
+                'p95_ms': _percentil(latencias, 0.95),
+                'p99_ms': _percentil(latencias, 0.99),
+                'fallos_consecutivos': self.fallos_consecutivos,
+                'ultimo_error': self.ultimo_error,
+                'sondeos': self.sondeos,
+                'cambios': self.cambios,
+                'desde': self.desde,
+            }
+
+    def esperar_primer_sondeo(self, timeout=None):
+        """True cuando ya hubo al menos un sondeo (para el chequeo de arranque)."""
+        return self._primer_sondeo.wait(timeout)
+
+    def sondear_ahora(self):
+        """Adelanta el próximo sondeo del hilo (no bloquea)."""
+        self._despertar.set()
+
+    # --- Hilo de sondeo ---
+    def iniciar(self):
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._detenido.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="MonitorConectividad", daemon=True)
+        self._hilo.start()
+
+    def _bucle(self):
+        while not self._detenido.is_set():
+            self.sondear()
+            self._despertar.wait(self.intervalo if self.en_linea else self.intervalo_sin_conexion)
+            self._despertar.clear()
+
+    def detener(self, timeout=5.0):
+        self._detenido.set()
+        self._despertar.set()
+        if self._hilo is not None and self._hilo is not threading.current_thread():
+            self._hilo.join(timeout)
+        self._hilo = None
+
+_MONITOR = None
+_LOCK_MONITOR = threading.Lock()
+
+def activar_monitor_conectividad(**opciones):
+    """Crea e inicia el monitor de proceso (una sola vez). Las opciones por defecto salen de core.config."""
+    global _MONITOR
+    with _LOCK_MONITOR:
+        if _MONITOR is None:
+            from core.config import (
+                CONECTIVIDAD_INTERVALO, CONECTIVIDAD_INTERVALO_SIN_CONEXION, CONECTIVIDAD_TIMEOUT,
+                CONECTIVIDAD_FALLOS_PARA_OFFLINE,
+            )
+            opciones.setdefault("intervalo", CONECTIVIDAD_INTERVALO)
+            opciones.setdefault("intervalo_sin_conexion", CONECTIVIDAD_INTERVALO_SIN_CONEXION)
+            opciones.setdefault("timeout", CONECTIVIDAD_TIMEOUT)
+            opciones.setdefault("fallos_para_offline", CONECTIVIDAD_FALLOS_PARA_OFFLINE)
+            _MONITOR = MonitorConectividad(**opciones)
+            _MONITOR.iniciar()
+            atexit.register(detener_monitor_conectividad)
+        return _MONITOR
+
+def monitor_conectividad():
+    return _MONITOR
+
+def detener_monitor_conectividad():
+    global _MONITOR
+    with _LOCK_MONITOR:
+        monitor, _MONITOR = _MONITOR, None
+    if monitor is not None:
+        monitor.detener()
+
+def servidor_disponible():
+    """False sólo si hay monitor activo y marca el servidor fuera de línea."""
+    monitor = _MONITOR
+    return monitor is None or monitor.en_linea
+
+def verificar_servidor_disponible(database=None):
+    """Lanza ServidorNoDisponibleError si el monitor marca el servidor fuera de línea (falla rápida)."""
+    if not servidor_disponible():
+        destino = f" '{database}'" if database else ""
+        raise ServidorNoDisponibleError(f"Sin conexión con el servidor de la base de datos{destino}; se reintentará automáticamente.")
+
+def avisar_fallo_conexion():
+    """Un modelo vio un error de conexión: el monitor sondea ya en lugar de esperar el intervalo."""
+    monitor = _MONITOR
+    if monitor is not None:
+        monitor.sondear_ahora()
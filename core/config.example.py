@@ -8,6 +8,10 @@ DB_PASSWORD="mps.1887"
 DB_PORT=1433
 DB_DEFAULT_DATABASE="inventario"
 DB_TIMEOUT=10
+DB_POOL_MAX_SIZE=8
+DB_POOL_MIN_SIZE=1
+DB_POOL_IDLE_TIMEOUT=300
+DB_POOL_MAX_LIFETIME=1800
 
 DEBUG_MODE=False
 FILE_STORAGE_PATH="./storage"
@@ -18,6 +18,49 @@ DB_PORT = int(os.getenv("DB_PORT", 1433))
 DB_DEFAULT_DATABASE = os.getenv("DB_DEFAULT_DATABASE", "inventario")
 DB_TIMEOUT = int(os.getenv("DB_TIMEOUT", 10))
 
+# Pool de conexiones (ver core/db_pool.py)
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 8))
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 1))
+DB_POOL_IDLE_TIMEOUT = int(os.getenv("DB_POOL_IDLE_TIMEOUT", 300))
+DB_POOL_MAX_LIFETIME = int(os.getenv("DB_POOL_MAX_LIFETIME", 1800))
+
+# Escritura de auditoría por lotes (ver modules/auditoria/sink.py)
+AUDITORIA_LOTE_TAMANO = int(os.getenv("AUDITORIA_LOTE_TAMANO", 50))
+AUDITORIA_LOTE_INTERVALO = float(os.getenv("AUDITORIA_LOTE_INTERVALO", 2.0))
+AUDITORIA_SPOOL_PATH = os.getenv("AUDITORIA_SPOOL_PATH", "logs/auditoria_pendiente.jsonl")
+
+# Vencimiento (segundos) de la caché de permisos de UsuariosModel
+PERMISOS_CACHE_TTL = int(os.getenv("PERMISOS_CACHE_TTL", 300))
+
+# Caché de lectura de datos de referencia: obras, perfiles, usuarios y roles (ver core/cache.py)
+CACHE_LECTURA_TTL = int(os.getenv("CACHE_LECTURA_TTL", 120))
+CACHE_LECTURA_MAX = int(os.getenv("CACHE_LECTURA_MAX", 256))
+
+# Modo offline: réplica SQLite local y cola de escrituras diferidas (ver core/offline.py)
+OFFLINE_REPLICA_DIR = os.getenv("OFFLINE_REPLICA_DIR", "data_offline")
+OFFLINE_INTERVALO_SINCRONIZACION = float(os.getenv("OFFLINE_INTERVALO_SINCRONIZACION", 30.0))
+OFFLINE_LOTE_ENVIO = int(os.getenv("OFFLINE_LOTE_ENVIO", 50))
+
+# Instrumentación de consultas y log de consultas lentas (ver core/metricas_sql.py)
+METRICAS_SQL_ACTIVAS = os.getenv("METRICAS_SQL_ACTIVAS", "True") == "True"
+SQL_LENTA_UMBRAL_MS = int(os.getenv("SQL_LENTA_UMBRAL_MS", 500))
+SQL_LENTA_LOG_PATH = os.getenv("SQL_LENTA_LOG_PATH", "logs/consultas_lentas.log")
+METRICAS_SQL_VENTANA = int(os.getenv("METRICAS_SQL_VENTANA", 300))
+METRICAS_SQL_VENTANAS = int(os.getenv("METRICAS_SQL_VENTANAS", 12))
+METRICAS_SQL_MAX_SITIOS = int(os.getenv("METRICAS_SQL_MAX_SITIOS", 1000))
+
+# Monitor de conectividad en segundo plano (ver core/conectividad.py): segundos entre sondeos en línea y
+# fuera de línea, latencia máxima de un sondeo y sondeos fallidos seguidos para pasar a fuera de línea
+CONECTIVIDAD_INTERVALO = float(os.getenv("CONECTIVIDAD_INTERVALO", 15.0))
+CONECTIVIDAD_INTERVALO_SIN_CONEXION = float(os.getenv("CONECTIVIDAD_INTERVALO_SIN_CONEXION", 5.0))
+CONECTIVIDAD_TIMEOUT = float(os.getenv("CONECTIVIDAD_TIMEOUT", 3.0))
+CONECTIVIDAD_FALLOS_PARA_OFFLINE = int(os.getenv("CONECTIVIDAD_FALLOS_PARA_OFFLINE", 2))
+# Segundos que el sondeo espera una conexión libre del pool (aparte del timeout del propio SELECT 1)
+CONECTIVIDAD_ESPERA_POOL = float(os.getenv("CONECTIVIDAD_ESPERA_POOL", 10.0))
+
+# Ventana (ms) en la que se agrupan los eventos de un mismo tópico del bus (ver core/event_bus.py)
+EVENTOS_VENTANA_MS = int(os.getenv("EVENTOS_VENTANA_MS", 150))
+
 # Configuración general de la aplicación
 DEBUG_MODE = os.getenv("DEBUG_MODE", "False") == "True"
 FILE_STORAGE_PATH = os.getenv("FILE_STORAGE_PATH", "./storage")
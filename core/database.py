@@ -1,20 +1,25 @@
 import os
+import threading
 import pyodbc
+from contextlib import contextmanager
 from datetime import datetime
 from core.logger import Logger
 from core.config import DB_SERVER, DB_USERNAME, DB_PASSWORD
+from core.db_pool import ConnectionPool, es_error_de_conexion
+from core.metricas_sql import registrar_consulta
+from core.offline import motor_offline_activo
+from core.conectividad import avisar_fallo_conexion, servidor_disponible, verificar_servidor_disponible
 import logging
 import time
-from core.logger import Logger
 
-def get_connection_string(driver, database):
+def get_connection_string(driver, database, servidor=None):
     """
     Devuelve un string de conexión seguro usando los parámetros de config.py y la base de datos indicada.
-    No expone usuario, contraseña ni IP en el código de los módulos.
+    No expone usuario, contraseña ni IP en el código de los módulos. `servidor` reemplaza a DB_SERVER.
     """
     return (
         f"DRIVER={{{driver}}};"
-        f"SERVER={DB_SERVER};"
+        f"SERVER={servidor or DB_SERVER};"
         f"DATABASE={database};"
         f"UID={DB_USERNAME};"
         f"PWD={DB_PASSWORD};"
@@ -25,6 +30,45 @@ DB_CONN_ERROR_MSG = "No se pudo establecer la conexión a la base de datos."
 DB_CONN_ERROR_DETAIL = "No se pudo conectar a la base de datos.\n\nVerifica el servidor, credenciales y que SQL Server acepte conexiones remotas.\n\nError: "
 DB_QUERY_ERROR_DETAIL = "Error al ejecutar la consulta en la base de datos.\n\n"
 
+# --- Pools compartidos por base de datos ---
+# Todas las instancias de BaseDatabaseConnection/DatabaseConnection que apuntan a la misma
+# base reutilizan el mismo pool, así los controladores concurrentes no pagan el handshake
+# ODBC por consulta ni se serializan sobre una única conexión.
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+def obtener_pool(database, timeout=None):
+    """Devuelve el pool compartido de la base indicada, creándolo la primera vez."""
+    with _POOLS_LOCK:
+        pool = _POOLS.get(database)
+        if pool is None:
+            from core.config import DB_TIMEOUT, DB_POOL_MAX_SIZE, DB_POOL_MIN_SIZE, DB_POOL_IDLE_TIMEOUT, DB_POOL_MAX_LIFETIME
+            connection_string = get_connection_string(BaseDatabaseConnection.detectar_driver_odbc(), database)
+            timeout_conexion = timeout if timeout is not None else int(os.getenv("DB_TIMEOUT", DB_TIMEOUT))
+            pool = ConnectionPool(
+                lambda: pyodbc.connect(connection_string, timeout=timeout_conexion),
+                nombre=database,
+                max_size=DB_POOL_MAX_SIZE,
+                min_size=DB_POOL_MIN_SIZE,
+                idle_timeout=DB_POOL_IDLE_TIMEOUT,
+                max_lifetime=DB_POOL_MAX_LIFETIME,
+            )
+            _POOLS[database] = pool
+        return pool
+
+def cerrar_pools():
+    """Cierra todos los pools (al salir de la aplicación)."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.cerrar()
+
+def estadisticas_pools():
+    """Snapshot de uso de cada pool, para diagnóstico."""
+    with _POOLS_LOCK:
+        return {nombre: pool.estadisticas() for nombre, pool in _POOLS.items()}
+
 class BaseDatabaseConnection:
     def __init__(self, database, timeout=None, max_retries=None):
         self.server = DB_SERVER
@@ -33,11 +77,40 @@ class BaseDatabaseConnection:
         self.database = database
         self.driver = self.detectar_driver_odbc()
         self.logger = Logger()
-        self.connection = None  # Conexión persistente
+        # Conexión de la transacción en curso y la fijada por conectar(), una por hilo:
+        # una conexión pyodbc nunca se comparte entre hilos
+        self._local = threading.local()
         from core.config import DB_TIMEOUT
         self.timeout = timeout if timeout is not None else int(os.getenv("DB_TIMEOUT", DB_TIMEOUT))
         self.max_retries = max_retries if max_retries is not None else int(os.getenv("DB_MAX_RETRIES", 3))
 
+    @property
+    def pool(self):
+        """Pool compartido de la base de esta conexión."""
+        if not self.database:
+            raise RuntimeError(DB_CONN_ERROR_MSG)
+        return obtener_pool(self.database, self.timeout)
+
+    @property
+    def connection(self):
+        """
+        Conexión activa para este hilo: la de la transacción en curso o la fijada con conectar().
+        Es None si las consultas se resuelven tomando conexiones del pool bajo demanda.
+        """
+        return getattr(self._local, "conexion", None) or self._conexion_fija
+
+    @connection.setter
+    def connection(self, valor):
+        self._conexion_fija = valor
+
+    @property
+    def _conexion_fija(self):
+        return getattr(self._local, "fija", None)
+
+    @_conexion_fija.setter
+    def _conexion_fija(self, valor):
+        self._local.fija = valor
+
     @staticmethod
     def detectar_driver_odbc():
         drivers = pyodbc.drivers()
@@ -49,64 +122,138 @@ class BaseDatabaseConnection:
             raise RuntimeError("No se encontró un controlador ODBC compatible. Instala ODBC Driver 17 o 18 para SQL Server.")
 
     def conectar(self):
+        """
+        Fija una conexión del pool al hilo actual (para scripts que usan self.connection.cursor()).
+        Debe devolverse con cerrar_conexion() desde el mismo hilo; en los modelos preferir
+        `with self.pool.conexion() as conn:`.
+        """
+        if self._conexion_fija is not None:
+            return
+        # Con el monitor de conectividad marcando el servidor caído no se intenta: falla enseguida
+        verificar_servidor_disponible(self.database)
         attempt = 0
         last_exception = None
         while attempt < self.max_retries:
             try:
-                connection_string = get_connection_string(self.driver, self.database)
-                self.connection = pyodbc.connect(connection_string, timeout=self.timeout)
+                self._conexion_fija = self.pool.obtener_conexion()
                 self.logger.info(f"Conexión establecida con la base de datos '{self.database}' (intento {attempt+1}).")
                 return
             except pyodbc.OperationalError as e:
                 last_exception = e
                 self.logger.warning(f"Intento {attempt+1} de conexión fallido: {e}")
+                avisar_fallo_conexion()
                 time.sleep(2 ** attempt)  # backoff exponencial
                 attempt += 1
+                if not servidor_disponible():
+                    # El monitor confirmó la caída durante la espera: no tiene sentido seguir reintentando
+                    break
         self.logger.error(f"No se pudo conectar a la base de datos '{self.database}' tras {self.max_retries} intentos.")
         raise RuntimeError("No se pudo conectar a la base de datos tras varios intentos.") from last_exception
 
     def cerrar_conexion(self):
-        if self.connection:
-            self.connection.close()
-            self.logger.info(f"Conexión cerrada con la base de datos '{self.database}'.")
+        conn = self._conexion_fija
+        if conn is not None:
+            self._conexion_fija = None
+            descartar = False
+            try:
+                conn.rollback()
+            except Exception:
+                descartar = True
+            self.pool.liberar_conexion(conn, descartar=descartar)
+            self.logger.info(f"Conexión devuelta al pool de la base de datos '{self.database}'.")
+
+    def _en_transaccion(self):
+        return getattr(self._local, "conexion", None) is not None
+
+    @contextmanager
+    def _conexion_activa(self):
+        """Usa la conexión de la transacción/fijada si existe; si no, toma una del pool y la devuelve al terminar."""
+        conn = self.connection
+        if conn is not None:
+            yield conn
+            return
+        verificar_servidor_disponible(self.database)
+        try:
+            with self.pool.conexion() as conn:
+                yield conn
+        except Exception as e:
+            if es_error_de_conexion(e):
+                avisar_fallo_conexion()
+            raise
+
+    def _resolver_offline(self, query, parametros):
+        # Dentro de una transacción todo va al servidor: sus lecturas validan lo que escribe
+        motor = motor_offline_activo()
+        if motor is None or self._en_transaccion():
+            return None
+        return motor.resolver(self.database, query, parametros)
 
     def ejecutar_query(self, query, parametros=None):
+        """
+        Ejecuta una sentencia y devuelve sus filas si produce resultados (SELECT o UPDATE/INSERT con OUTPUT).
+        - Fuera de una transacción hace commit y, ante error, muestra el popup y devuelve None.
+        - Dentro de una transacción no hace commit y relanza el error para que se haga rollback.
+        - En modo offline (core/offline.py) lee de la réplica local y difiere las escrituras de las tablas replicadas.
+        - La latencia y las filas quedan registradas en core/metricas_sql.py.
+        """
+        inicio = time.perf_counter()
+        filas = None
         try:
-            if not self.connection:
-                raise RuntimeError(DB_CONN_ERROR_MSG)
-            cursor = self.connection.cursor()
-            if parametros:
-                cursor.execute(query, parametros)
-            else:
-                cursor.execute(query)
-            if query.strip().upper().startswith("SELECT"):
-                return cursor.fetchall()
-            self.connection.commit()
-        except pyodbc.OperationalError as e:
-            Logger().log_error_popup(
-                DB_CONN_ERROR_DETAIL + str(e)
-            )
-            return None
+            filas = self._ejecutar_query(query, parametros)
+            return filas
+        finally:
+            registrar_consulta(query, time.perf_counter() - inicio, len(filas) if filas else 0, self.database)
+
+    def _ejecutar_query(self, query, parametros):
+        local = self._resolver_offline(query, parametros)
+        if local is not None:
+            return local.filas
+        try:
+            with self._conexion_activa() as conn:
+                cursor = conn.cursor()
+                if parametros:
+                    cursor.execute(query, parametros)
+                else:
+                    cursor.execute(query)
+                if query.strip().upper().startswith("SELECT"):
+                    return cursor.fetchall()
+                filas = cursor.fetchall() if cursor.description is not None else None
+                if not self._en_transaccion():
+                    conn.commit()
+                return filas
         except Exception as e:
-            Logger().log_error_popup(
-                DB_QUERY_ERROR_DETAIL + str(e)
-            )
+            if self._en_transaccion():
+                self.logger.error(f"Error en consulta dentro de la transacción: {e}")
+                raise
+            detalle = DB_CONN_ERROR_DETAIL if isinstance(e, pyodbc.OperationalError) else DB_QUERY_ERROR_DETAIL
+            Logger().log_error_popup(detalle + str(e))
             return None
+
     def ejecutar_query_return_rowcount(self, query, parametros=None):
         """Ejecuta una query y retorna el número de filas afectadas (para UPDATE/DELETE)."""
+        inicio = time.perf_counter()
+        rowcount = 0
         try:
-            if not self.connection:
-                self.conectar()
-            if not self.connection:
-                raise RuntimeError(DB_CONN_ERROR_MSG)
-            cursor = self.connection.cursor()
-            if parametros:
-                cursor.execute(query, parametros)
-            else:
-                cursor.execute(query)
-            rowcount = cursor.rowcount
-            self.connection.commit()
+            rowcount = self._ejecutar_query_return_rowcount(query, parametros)
             return rowcount
+        finally:
+            registrar_consulta(query, time.perf_counter() - inicio, max(rowcount or 0, 0), self.database)
+
+    def _ejecutar_query_return_rowcount(self, query, parametros):
+        local = self._resolver_offline(query, parametros)
+        if local is not None:
+            return local.rowcount
+        try:
+            with self._conexion_activa() as conn:
+                cursor = conn.cursor()
+                if parametros:
+                    cursor.execute(query, parametros)
+                else:
+                    cursor.execute(query)
+                rowcount = cursor.rowcount
+                if not self._en_transaccion():
+                    conn.commit()
+                return rowcount
         except pyodbc.OperationalError as e:
             Logger().log_error_popup(
                 DB_CONN_ERROR_DETAIL + str(e)
@@ -117,30 +264,155 @@ class BaseDatabaseConnection:
                 DB_QUERY_ERROR_DETAIL + str(e)
             )
             return 0
+    def ejecutar_lote(self, query, filas):
+        """
+        Ejecuta la misma sentencia (INSERT/UPDATE/DELETE) para muchas filas en un solo viaje
+        usando cursor.fast_executemany.
+        - Fuera de una transacción hace commit y, ante error, muestra el popup y devuelve 0.
+        - Dentro de una transacción no hace commit y relanza el error para que se haga rollback.
+        Devuelve la cantidad de filas enviadas.
+        """
+        filas = [tuple(fila) for fila in filas]
+        if not filas:
+            return 0
+        inicio = time.perf_counter()
+        try:
+            with self._conexion_activa() as conn:
+                cursor = conn.cursor()
+                if hasattr(cursor, "fast_executemany"):
+                    cursor.fast_executemany = True
+                cursor.executemany(query, filas)
+                if not self._en_transaccion():
+                    conn.commit()
+                registrar_consulta(query, time.perf_counter() - inicio, len(filas), self.database)
+                return len(filas)
+        except Exception as e:
+            if self._en_transaccion():
+                self.logger.error(f"Error en ejecución por lotes ({len(filas)} filas): {e}")
+                raise
+            detalle = DB_CONN_ERROR_DETAIL if isinstance(e, pyodbc.OperationalError) else DB_QUERY_ERROR_DETAIL
+            Logger().log_error_popup(detalle + str(e))
+            return 0
+
+    def iterar_query(self, query, parametros=None, chunk=500, como_dict=False):
+        """
+        Generador para SELECT grandes: trae las filas de a `chunk` con cursor.fetchmany en lugar de
+        fetchall, de modo que exportaciones y cargas de tablas usan memoria constante.
+        - La conexión (del pool o de la transacción actual) queda ocupada hasta agotar o cerrar el generador;
+          usar `with contextlib.closing(...)` o consumirlo completo para devolverla al pool cuanto antes.
+        - Con como_dict=True cada fila se entrega como dict {columna: valor}.
+        - Ante error muestra el popup (igual que ejecutar_query) y corta la iteración; dentro de una
+          transacción relanza el error para que se haga rollback.
+        """
+        if chunk <= 0:
+            raise ValueError("chunk debe ser mayor que cero.")
+        inicio = time.perf_counter()
+        entregadas = 0
+        try:
+            with self._conexion_activa() as conn:
+                cursor = conn.cursor()
+                if parametros:
+                    cursor.execute(query, parametros)
+                else:
+                    cursor.execute(query)
+                columnas = [columna[0] for columna in cursor.description] if como_dict else None
+                try:
+                    while True:
+                        filas = cursor.fetchmany(chunk)
+                        if not filas:
+                            break
+                        for fila in filas:
+                            entregadas += 1
+                            yield dict(zip(columnas, fila)) if como_dict else fila
+                finally:
+                    cursor.close()
+                    # Incluye el tiempo que el consumidor tuvo la conexión ocupada mientras iteraba
+                    registrar_consulta(query, time.perf_counter() - inicio, entregadas, self.database)
+        except Exception as e:
+            if self._en_transaccion():
+                self.logger.error(f"Error en lectura por bloques dentro de la transacción: {e}")
+                raise
+            detalle = DB_CONN_ERROR_DETAIL if isinstance(e, pyodbc.OperationalError) else DB_QUERY_ERROR_DETAIL
+            Logger().log_error_popup(detalle + str(e))
+
     def begin_transaction(self):
-        if not self.connection:
-            self.conectar()
+        # La transacción fija una conexión al hilo actual hasta commit/rollback. Una transacción anidada
+        # (p. ej. core.stock_ledger dentro de la del llamador) se suma a la actual: sólo la más externa
+        # confirma o revierte
+        if self._en_transaccion():
+            self._local.profundidad += 1
+            return
+        try:
+            if self._conexion_fija is None:
+                verificar_servidor_disponible(self.database)
+            conn = self._conexion_fija or self.pool.obtener_conexion()
+        except Exception as e:
+            self.logger.error(f"No se pudo iniciar la transacción: {e}")
+            if es_error_de_conexion(e):
+                avisar_fallo_conexion()
+            raise
+        self._local.autocommit_previo = conn.autocommit
         # pyodbc: desactivar autocommit para iniciar transacción
-        conn = self.connection
-        if conn is not None:
-            conn.autocommit = False
-            self.logger.debug(f"Transacción iniciada en '{self.database}'.")
+        conn.autocommit = False
+        self._local.conexion = conn
+        self._local.profundidad = 0
+        self._local.solo_rollback = False
+        self._local.al_confirmar = []
+        self.logger.debug(f"Transacción iniciada en '{self.database}'.")
+
+    def _finalizar_transaccion(self, descartar=False):
+        conn = self._local.conexion
+        self._local.conexion = None
+        try:
+            conn.autocommit = self._local.autocommit_previo
+        except Exception:
+            descartar = True
+        if conn is not self._conexion_fija:
+            self.pool.liberar_conexion(conn, descartar=descartar)
+
+    def al_confirmar(self, callback):
+        """
+        Ejecuta `callback` después del commit de la transacción más externa del hilo (se descarta si se
+        revierte); sin transacción activa lo ejecuta enseguida. Para avisos como stock_modificado.
+        """
+        if self._en_transaccion():
+            self._local.al_confirmar.append(callback)
         else:
-            self.logger.error("No se pudo iniciar la transacción porque la conexión es None.")
+            callback()
 
     def commit(self):
-        if self.connection:
-            self.connection.commit()
-            conn = self.connection
-            conn.autocommit = True
+        if self._en_transaccion():
+            if self._local.profundidad:
+                self._local.profundidad -= 1
+                return
+            if self._local.solo_rollback:
+                # Falló una transacción anidada y el llamador siguió: confirmar dejaría la mitad aplicada
+                self.rollback()
+                raise RuntimeError("La transacción se revirtió porque falló una transacción anidada.")
+            self._local.conexion.commit()
+            pendientes = self._local.al_confirmar
+            self._finalizar_transaccion()
             self.logger.debug(f"Transacción confirmada (commit) en '{self.database}'.")
+            for callback in pendientes:
+                callback()
+        elif self._conexion_fija is not None:
+            self._conexion_fija.commit()
 
     def rollback(self):
-        if self.connection:
-            self.connection.rollback()
-            conn = self.connection
-            conn.autocommit = True
+        if self._en_transaccion():
+            if self._local.profundidad:
+                self._local.profundidad -= 1
+                self._local.solo_rollback = True
+                return
+            descartar = False
+            try:
+                self._local.conexion.rollback()
+            except pyodbc.Error:
+                descartar = True
+            self._finalizar_transaccion(descartar=descartar)
             self.logger.debug(f"Transacción revertida (rollback) en '{self.database}'.")
+        elif self._conexion_fija is not None:
+            self._conexion_fija.rollback()
 
     class TransactionContext:
         def __init__(self, db, timeout, retries):
@@ -169,10 +441,15 @@ class BaseDatabaseConnection:
                         else:
                             self.db.rollback()
                             raise
+                # Reintentos agotados: liberar la conexión de la transacción
+                self.db.rollback()
+                raise RuntimeError("No se pudo confirmar la transacción tras varios intentos.")
 
     def transaction(self, timeout=30, retries=2):
         """
         Context manager para transacciones seguras con timeout y reintentos.
+        Anidado dentro de otra transacción del mismo hilo no confirma ni revierte por su cuenta: todo se
+        confirma o revierte con la más externa.
         Uso:
             with db.transaction(timeout=30, retries=2):
                 ...
@@ -211,14 +488,13 @@ class ConfiguracionDatabaseConnection(BaseDatabaseConnection):
     def __init__(self):
         super().__init__("inventario")
 
-class DatabaseConnection:
+class DatabaseConnection(BaseDatabaseConnection):
+    """
+    Conexión cuya base se elige en tiempo de ejecución con conectar_a_base().
+    Hereda consultas, lotes y transacciones de BaseDatabaseConnection y usa los mismos pools.
+    """
     def __init__(self):
-        self.server = DB_SERVER
-        self.username = DB_USERNAME
-        self.password = DB_PASSWORD
-        self.driver = BaseDatabaseConnection.detectar_driver_odbc()
-        self.database = None
-        self.logger = logging.getLogger(__name__)
+        super().__init__(None)
 
     def conectar_a_base(self, database):
         bases_validas = ["inventario", "users", "auditoria"]
@@ -227,33 +503,12 @@ class DatabaseConnection:
         self.database = database
         self.logger.info(f"Conexión establecida con la base de datos '{database}'.")
 
-    def ejecutar_query(self, query, parametros=None):
-        try:
-            if not self.database:
-                raise RuntimeError(DB_CONN_ERROR_MSG)
-            connection_string = get_connection_string(self.driver, self.database)
-            with pyodbc.connect(connection_string, timeout=10) as conn:
-                cursor = conn.cursor()
-                if parametros:
-                    cursor.execute(query, parametros)
-                else:
-                    cursor.execute(query)
-                if query.strip().upper().startswith("SELECT"):
-                    return cursor.fetchall()
-                conn.commit()
-            return None
-        except Exception as e:
-            from core.logger import Logger
-            Logger().log_error_popup(
-                DB_QUERY_ERROR_DETAIL + str(e)
-            )
-            return None
     @staticmethod
     def listar_bases_de_datos():
         try:
-            driver = BaseDatabaseConnection.detectar_driver_odbc()
-            connection_string = get_connection_string(driver, "master")
-            with pyodbc.connect(connection_string) as conn:
+            # Por el pool (y su timeout) en lugar de una conexión nueva sin timeout
+            verificar_servidor_disponible("master")
+            with obtener_pool("master").conexion() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT name FROM sys.databases WHERE state = 0;")
                 return [row[0] for row in cursor.fetchall()]
@@ -366,8 +621,7 @@ class DataAccessLayer:
 
     def obtener_productos(self):
         query = "SELECT * FROM inventario_perfiles"
-        connection_string = get_connection_string(self.db.driver, self.db.database)
-        with pyodbc.connect(connection_string, timeout=10) as conn:
+        with obtener_pool(self.db.database).conexion() as conn:
             cursor = conn.cursor()
             cursor.execute(query)
             resultados = cursor.fetchall()
@@ -0,0 +1,222 @@
+"""
+Pool de conexiones thread-safe compartido por todos los modelos.
+
+- Un pool acotado por base de datos (inventario, users, auditoria, obras).
+- Checkout/devolución explícitos o vía context manager `conexion()`.
+- Health check (SELECT 1) al entregar conexiones que estuvieron ociosas.
+- Desalojo de conexiones ociosas y reciclado por tiempo máximo de vida.
+
+El pool no depende de pyodbc: recibe una `fabrica` que crea conexiones DB-API,
+lo que permite usarlo en tests con sqlite3. El registro de pools por base de
+datos (con la fábrica pyodbc real) vive en core/database.py.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolAgotadoError(RuntimeError):
+    """Se lanza cuando no hay conexiones libres dentro del tiempo de espera."""
+
+
+class _ConexionPool:
+    """Envoltorio interno con los metadatos de una conexión del pool."""
+    __slots__ = ("conexion", "creada", "ultimo_uso")
+
+    def __init__(self, conexion):
+        ahora = time.monotonic()
+        self.conexion = conexion
+        self.creada = ahora
+        self.ultimo_uso = ahora
+
+
+class ConnectionPool:
+    def __init__(self, fabrica, nombre="", max_size=10, min_size=0, timeout_espera=30,
+                 idle_timeout=300, max_lifetime=1800, health_check_after=30, health_check_query="SELECT 1"):
+        """
+        - fabrica: callable sin argumentos que devuelve una conexión DB-API nueva.
+        - max_size: máximo de conexiones abiertas (en uso + ociosas).
+        - min_size: conexiones ociosas que se conservan aunque superen idle_timeout.
+        - timeout_espera: segundos que espera un checkout cuando el pool está lleno.
+        - idle_timeout: segundos ociosa tras los cuales una conexión se cierra.
+        - max_lifetime: segundos de vida tras los cuales una conexión se recicla.
+        - health_check_after: segundos ociosa a partir de los cuales se valida antes de entregarla.
+        """
+        if max_size < 1:
+            raise ValueError("max_size debe ser mayor o igual a 1.")
+        self.fabrica = fabrica
+        self.nombre = nombre
+        self.max_size = max_size
+        self.min_size = min(min_size, max_size)
+        self.timeout_espera = timeout_espera
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+        self.health_check_query = health_check_query
+        self._ociosas = deque()
+        self._en_uso = {}
+        self._reservas = 0
+        self._lock = threading.Condition(threading.Lock())
+        self._cerrado = False
+        self._stats = {"creadas": 0, "recicladas": 0, "descartadas": 0, "esperas": 0, "checkouts": 0}
+
+    # --- API pública ---
+
+    def obtener_conexion(self, timeout=None):
+        """Entrega una conexión sana del pool; crea una nueva si hay capacidad."""
+        limite = time.monotonic() + (self.timeout_espera if timeout is None else timeout)
+        with self._lock:
+            while True:
+                if self._cerrado:
+                    raise RuntimeError(f"El pool '{self.nombre}' está cerrado.")
+                self._desalojar_ociosas()
+                if self._ociosas:
+                    item = self._ociosas.pop()
+                elif self._total() < self.max_size:
+                    item = None
+                else:
+                    item = False
+                if item is not False:
+                    # Reservar el cupo antes de soltar el lock para no exceder max_size
+                    self._reservas += 1
+                    break
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    raise PoolAgotadoError(
+                        f"No hay conexiones libres en el pool '{self.nombre}' (máximo {self.max_size})."
+                    )
+                self._stats["esperas"] += 1
+                self._lock.wait(restante)
+        if item is not None and not self._validar(item):
+            self._cerrar(item)
+            with self._lock:
+                self._stats["descartadas"] += 1
+            item = None
+        if item is None:
+            item = self._crear_reservada()
+        item.ultimo_uso = time.monotonic()
+        with self._lock:
+            self._reservas -= 1
+            self._en_uso[id(item.conexion)] = item
+            self._stats["checkouts"] += 1
+        return item.conexion
+
+    def liberar_conexion(self, conexion, descartar=False):
+        """Devuelve una conexión al pool. Con descartar=True se cierra (p. ej. tras un error de red)."""
+        with self._lock:
+            item = self._en_uso.pop(id(conexion), None)
+            if item is None:
+                return
+            vencida = (time.monotonic() - item.creada) >= self.max_lifetime
+            if descartar or vencida or self._cerrado:
+                self._stats["descartadas" if descartar else "recicladas"] += 1
+                cerrar = True
+            else:
+                item.ultimo_uso = time.monotonic()
+                self._ociosas.append(item)
+                cerrar = False
+            self._lock.notify()
+        if cerrar:
+            self._cerrar(item)
+
+    @contextmanager
+    def conexion(self, timeout=None):
+        """
+        Uso:
+            with pool.conexion() as conn:
+                cursor = conn.cursor()
+        Si el bloque falla con un error de conexión, la conexión se descarta.
+        Al devolverla siempre se hace rollback: lo que no se confirmó con commit (incluida la
+        transacción implícita que abre una lectura) no queda abierto para el próximo que la tome.
+        """
+        conn = self.obtener_conexion(timeout)
+        descartar = False
+        try:
+            yield conn
+        except Exception as e:
+            descartar = es_error_de_conexion(e)
+            raise
+        finally:
+            if not descartar:
+                try:
+                    conn.rollback()
+                except Exception:
+                    descartar = True
+            self.liberar_conexion(conn, descartar=descartar)
+
+    def cerrar(self):
+        """Cierra las conexiones ociosas y marca el pool como cerrado (las en uso se cierran al devolverse)."""
+        with self._lock:
+            self._cerrado = True
+            ociosas = list(self._ociosas)
+            self._ociosas.clear()
+            self._lock.notify_all()
+        for item in ociosas:
+            self._cerrar(item)
+
+    def estadisticas(self):
+        with self._lock:
+            datos = dict(self._stats)
+            datos.update({
+                "nombre": self.nombre,
+                "en_uso": len(self._en_uso),
+                "ociosas": len(self._ociosas),
+                "max_size": self.max_size,
+            })
+        return datos
+
+    # --- Internos ---
+
+    def _total(self):
+        return len(self._en_uso) + len(self._ociosas) + self._reservas
+
+    def _crear_reservada(self):
+        try:
+            item = _ConexionPool(self.fabrica())
+        except Exception:
+            with self._lock:
+                self._reservas -= 1
+                self._lock.notify()
+            raise
+        with self._lock:
+            self._stats["creadas"] += 1
+        return item
+
+    def _desalojar_ociosas(self):
+        """Cierra las ociosas que superaron idle_timeout o max_lifetime (se llama con el lock tomado)."""
+        ahora = time.monotonic()
+        conservar = deque()
+        for item in self._ociosas:
+            vencida = (ahora - item.creada) >= self.max_lifetime
+            ociosa = (ahora - item.ultimo_uso) >= self.idle_timeout and len(conservar) >= self.min_size
+            if vencida or ociosa:
+                self._stats["recicladas"] += 1
+                self._cerrar(item)
+            else:
+                conservar.append(item)
+        self._ociosas = conservar
+
+    def _validar(self, item):
+        if (time.monotonic() - item.ultimo_uso) < self.health_check_after:
+            return True
+        try:
+            cursor = item.conexion.cursor()
+            cursor.execute(self.health_check_query)
+            cursor.fetchall()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _cerrar(item):
+        try:
+            item.conexion.close()
+        except Exception:
+            pass
+
+
+def es_error_de_conexion(error):
+    """True si la excepción indica que la conexión quedó inutilizable (red caída, sesión cerrada)."""
+    nombre = type(error).__name__
+    return nombre in ("OperationalError", "InterfaceError")
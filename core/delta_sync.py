@@ -0,0 +1,134 @@
+"""
+Sincronización incremental de tablas por rowversion.
+
+Cada refresco de obras, inventario o vidrios volvía a bajar la tabla completa. Con ROWVERSION la base
+numera cada fila insertada o modificada con un contador único y creciente, así que alcanza con recordar
+hasta qué versión se mostró (la marca) y pedir sólo las filas con una versión mayor. Las bajas no dejan
+fila: los triggers de scripts/sync_db_inventario.sql anotan el id borrado en bajas_sincronizacion con
+su propia rowversion.
+
+La marca se toma con MIN_ACTIVE_ROWVERSION() - 1: una transacción todavía abierta puede haber reservado
+versiones más bajas que otras ya confirmadas, y saltarla dejaría esos cambios afuera para siempre.
+
+Uso (el modelo guarda el sincronizador; el controlador confirma la marca recién al aplicar en la vista,
+así un resultado descartado por cancelación no adelanta la marca):
+
+    cambios = model.sincronizacion_obras.leer_cambios(COLUMNAS_OBRAS)   # en segundo plano
+    aplicar_cambios_tabla(view.tabla_obras, cambios, valores_fila)      # en el hilo de la GUI
+    model.sincronizacion_obras.confirmar(cambios.hasta)
+
+Si la base no expone rowversion, version_actual() devuelve None y todo se lee completo como antes.
+"""
+from collections import namedtuple
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QTableWidgetItem
+from core.logger import Logger
+
+# filas: [(id, fila)], bajas: [id], hasta: versión leída (None sin rowversion), completo: reemplaza todo
+CambiosDelta = namedtuple("CambiosDelta", "filas bajas hasta completo")
+
+TABLA_BAJAS = "bajas_sincronizacion"
+
+class SincronizadorDelta:
+    def __init__(self, db, tabla, columna_id="id"):
+        self.db = db
+        self.tabla = tabla
+        self.columna_id = columna_id
+        self.marca = None
+
+    @property
+    def activo(self):
+        """True cuando ya se confirmó una lectura y la próxima puede ser incremental."""
+        return self.marca is not None
+
+    def version_actual(self):
+        """Última rowversion visible sin transacciones abiertas por debajo, o None si la base no la expone."""
+        try:
+            filas = self.db.ejecutar_query("SELECT CAST(MIN_ACTIVE_ROWVERSION() AS BIGINT) - 1")
+            return int(filas[0][0]) if filas else None
+        except Exception as e:
+            Logger().warning(f"Sin rowversion para sincronizar {self.tabla}: {e}")
+            return None
+
+    def _seleccionar(self, columnas, condicion="", parametros=()):
+        query = f"SELECT {self.columna_id}, {columnas} FROM {self.tabla} {condicion} ORDER BY {self.columna_id}"
+        filas = self.db.ejecutar_query(query, parametros) if parametros else self.db.ejecutar_query(query)
+        return [(fila[0], tuple(fila[1:])) for fila in (filas or [])]
+
+    def leer_todo(self, columnas="*"):
+        """Todas las filas hasta la versión actual (primera carga o base sin rowversion)."""
+        hasta = self.version_actual()
+        if hasta is None:
+            return CambiosDelta(self._seleccionar(columnas), [], None, True)
+        return CambiosDelta(self._seleccionar(columnas, "WHERE rowversion <= CAST(? AS BINARY(8))", (hasta,)), [], hasta, True)
+
+    def leer_cambios(self, columnas="*"):
+        """Filas nuevas o modificadas y ids borrados desde la marca; sin marca lee todo."""
+        if self.marca is None:
+            return self.leer_todo(columnas)
+        hasta = self.version_actual()
+        if hasta is None:
+            return self.leer_todo(columnas)
+        rango = (self.marca, hasta)
+        filas = self._seleccionar(columnas, "WHERE rowversion > CAST(? AS BINARY(8)) AND rowversion <= CAST(? AS BINARY(8))", rango)
+        bajas = self.db.ejecutar_query(
+            f"SELECT id_registro FROM {TABLA_BAJAS} WHERE tabla = ? AND version > CAST(? AS BINARY(8)) AND version <= CAST(? AS BINARY(8))",
+            (self.tabla,) + rango
+        ) or []
+        return CambiosDelta(filas, [fila[0] for fila in bajas], hasta, False)
+
+    def confirmar(self, hasta):
+        """Adopta `hasta` como marca una vez aplicados los cambios (None vuelve a la lectura completa)."""
+        self.marca = hasta
+
+    def reiniciar(self):
+        self.marca = None
+
+def id_fila(tabla, fila):
+    item = tabla.item(fila, 0)
+    return item.data(Qt.ItemDataRole.UserRole) if item is not None else None
+
+def fijar_id_fila(tabla, fila, id_registro):
+    """Guarda el id de la fila en el UserRole de su primera celda (lo usa aplicar_cambios_tabla)."""
+    item = tabla.item(fila, 0)
+    if item is None:
+        item = QTableWidgetItem("")
+        tabla.setItem(fila, 0, item)
+    item.setData(Qt.ItemDataRole.UserRole, id_registro)
+
+def aplicar_cambios_tabla(tabla, cambios, valores_fila):
+    """
+    Aplica un CambiosDelta sobre un QTableWidget sin vaciarlo: borra las filas dadas de baja, actualiza
+    sólo las celdas cuyo texto cambió y agrega al final las filas nuevas. `valores_fila(fila)` devuelve
+    los valores de las columnas visibles. Con cambios.completo reemplaza el contenido.
+    Devuelve False sin tocar nada si la tabla tiene filas sin id (las llenó otro código): hay que recargarla completa.
+    """
+    if not cambios.completo and any(id_fila(tabla, fila) is None for fila in range(tabla.rowCount())):
+        return False
+    ordenar = tabla.isSortingEnabled()
+    tabla.setSortingEnabled(False)
+    if cambios.completo:
+        tabla.setRowCount(0)
+    bajas = set(cambios.bajas)
+    if bajas:
+        for fila in range(tabla.rowCount() - 1, -1, -1):
+            if id_fila(tabla, fila) in bajas:
+                tabla.removeRow(fila)
+    por_id = {id_fila(tabla, fila): fila for fila in range(tabla.rowCount())}
+    for id_registro, datos in cambios.filas:
+        if id_registro in bajas:
+            continue
+        fila = por_id.get(id_registro)
+        if fila is None:
+            fila = por_id[id_registro] = tabla.rowCount()
+            tabla.insertRow(fila)
+        for columna, valor in enumerate(valores_fila(datos)):
+            texto = "" if valor is None else str(valor)
+            item = tabla.item(fila, columna)
+            if item is None:
+                tabla.setItem(fila, columna, QTableWidgetItem(texto))
+            elif item.text() != texto:
+                item.setText(texto)
+        fijar_id_fila(tabla, fila, id_registro)
+    tabla.setSortingEnabled(ordenar)
+    return True
@@ -1,4 +1,29 @@
-from PyQt6.QtCore import QObject, pyqtSignal
+"""
+Bus de eventos entre módulos y despachador que agrupa ráfagas de eventos.
+
+Las señales de EventBus se emiten una vez por cambio: recibir un pedido de 200 ítems dispara 200
+stock_modificado y cada suscriptor que recarga su tabla la recarga 200 veces. DespachadorEventos se
+conecta al bus, junta los eventos de cada tópico durante una ventana corta (EVENTOS_VENTANA_MS) y
+entrega a cada suscriptor una sola notificación agregada:
+
+    {**último evento, 'topico': ..., 'ids': {ids afectados}, 'ids_obras': {obras afectadas},
+     'eventos': [payloads en orden], 'cantidad': n}
+
+Como conserva las claves del último evento, los slots existentes (datos.get('nombre'), ...) siguen
+funcionando; los que puedan refrescar sólo lo afectado usan 'ids' / 'ids_obras'.
+
+Uso:
+    from core.event_bus import despachador_eventos
+    despachador_eventos.suscribir('pedido_actualizado', self.actualizar_por_pedido)
+
+Con TAREAS_SINCRONICAS=1 (tests y scripts sin event loop, ver core/workers.py) cada evento se entrega
+en el momento, igual agregado.
+"""
+import inspect
+import weakref
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from core.logger import Logger
+from core.workers import ejecucion_sincronica
 
 class EventBus(QObject):
     """
@@ -10,9 +35,139 @@ class EventBus(QObject):
     pedido_cancelado = pyqtSignal(dict)  # <--- SEÑAL PARA CANCELACIÓN EN TIEMPO REAL
     stock_modificado = pyqtSignal(dict)
     vidrio_asignado = pyqtSignal(dict)
+    conectividad_cambiada = pyqtSignal(dict)  # estado de core/conectividad.py al pasar a/desde fuera de línea
     # Agregar aquí otras señales relevantes para integración cruzada
 
 # Instancia global para importar en cualquier módulo
 # Ejemplo de uso: from core.event_bus import event_bus
 
 event_bus = EventBus()
+
+def _ids_evento(topico, datos):
+    """(ids afectados, ids de obras afectadas) de un payload según el tópico."""
+    if topico == 'stock_modificado':
+        ids = set((datos.get('cambios') or {}).keys())
+    elif topico == 'vidrio_asignado':
+        ids = {datos['id_obra']} if datos.get('id_obra') is not None else set()
+    else:
+        ids = {datos['id']} if datos.get('id') is not None else set()
+    if topico == 'obra_agregada':
+        obras = set(ids)
+    else:
+        obras = {datos[clave] for clave in ('obra', 'id_obra') if datos.get(clave) is not None}
+    return ids, obras
+
+def _ventana_por_defecto():
+    try:
+        from core.config import EVENTOS_VENTANA_MS
+        return EVENTOS_VENTANA_MS
+    except Exception:
+        return 150
+
+class DespachadorEventos(QObject):
+    """
+    Agrupa por tópico los eventos de `bus` emitidos dentro de `ventana_ms` y entrega a cada suscriptor
+    un único payload agregado (ver el docstring del módulo). La ventana arranca con el primer evento
+    del tópico; los que llegan durante la ventana se suman a la misma entrega.
+    """
+    # Los eventos pueden emitirse desde hilos del pool (core/workers.py): esta señal los pasa al hilo
+    # del despachador, donde viven los timers y se llama a los suscriptores
+    _recibido = pyqtSignal(str, object)
+
+    def __init__(self, bus=None, ventana_ms=None, parent=None):
+        super().__init__(parent)
+        self.bus = bus if bus is not None else event_bus
+        self.ventana_ms = _ventana_por_defecto() if ventana_ms is None else ventana_ms
+        self._suscriptores = {}
+        self._conexiones = {}
+        self._pendientes = {}
+        self._timers = {}
+        self._recibido.connect(self._acumular)
+
+    def suscribir(self, topico, callback):
+        """
+        Llama a callback(payload_agregado) una vez por ráfaga de eventos `topico` del bus. Los métodos
+        se guardan como referencia débil (como en connect de Qt): una vista destruida deja de recibir.
+        Las funciones, lambdas y partials se guardan con referencia fuerte (una lambda suelta moriría al
+        instante): quien las suscribe tiene que llamar a desuscribir.
+        """
+        if topico not in self._conexiones:
+            conexion = lambda datos, topico=topico: self._recibido.emit(topico, datos)
+            getattr(self.bus, topico).connect(conexion)
+            self._conexiones[topico] = conexion
+            self._suscriptores[topico] = []
+        if callback not in self._callbacks(topico):
+            referencia = weakref.WeakMethod(callback) if inspect.ismethod(callback) else (lambda: callback)
+            self._suscriptores[topico].append(referencia)
+
+    def desuscribir(self, topico, callback):
+        self._suscriptores[topico] = [ref for ref in self._suscriptores.get(topico, []) if ref() not in (None, callback)]
+        self._desconectar_si_vacio(topico)
+
+    def _callbacks(self, topico):
+        return [callback for callback in (ref() for ref in self._suscriptores.get(topico, [])) if callback is not None]
+
+    def _desconectar_si_vacio(self, topico):
+        """Sin suscriptores vivos se suelta la conexión al bus (y lo pendiente del tópico)."""
+        if topico not in self._conexiones or self._callbacks(topico):
+            return
+        getattr(self.bus, topico).disconnect(self._conexiones.pop(topico))
+        self._suscriptores.pop(topico, None)
+        self._pendientes.pop(topico, None)
+        timer = self._timers.pop(topico, None)
+        if timer is not None:
+            timer.stop()
+            timer.deleteLater()
+
+    def _acumular(self, topico, datos):
+        self._pendientes.setdefault(topico, []).append(dict(datos or {}))
+        if self.ventana_ms <= 0 or ejecucion_sincronica():
+            self.vaciar(topico)
+            return
+        timer = self._timers.get(topico)
+        if timer is None:
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            timer.timeout.connect(lambda topico=topico: self.vaciar(topico))
+            self._timers[topico] = timer
+        if not timer.isActive():
+            timer.start(self.ventana_ms)
+
+    def vaciar(self, topico=None):
+        """Entrega ya los eventos pendientes (de un tópico o de todos), p. ej. antes de cerrar la aplicación."""
+        for nombre in ([topico] if topico is not None else list(self._pendientes)):
+            eventos = self._pendientes.pop(nombre, None)
+            timer = self._timers.get(nombre)
+            if timer is not None:
+                timer.stop()
+            if eventos:
+                self._entregar(nombre, eventos)
+
+    @staticmethod
+    def agregar(topico, eventos):
+        """Payload agregado de una lista de payloads del mismo tópico."""
+        agregado = dict(eventos[-1])
+        ids, ids_obras = set(), set()
+        for datos in eventos:
+            ids_evento, obras_evento = _ids_evento(topico, datos)
+            ids |= ids_evento
+            ids_obras |= obras_evento
+        agregado.update(topico=topico, ids=ids, ids_obras=ids_obras, eventos=eventos, cantidad=len(eventos))
+        return agregado
+
+    def _entregar(self, topico, eventos):
+        agregado = self.agregar(topico, eventos)
+        callbacks = self._callbacks(topico)
+        if not callbacks:
+            # Los suscriptores eran métodos de vistas ya destruidas
+            self._desconectar_si_vacio(topico)
+            return
+        for callback in callbacks:
+            try:
+                callback(agregado)
+            except Exception as e:
+                # Un suscriptor con error no debe dejar sin notificar a los demás
+                Logger().error(f"Error en suscriptor de '{topico}' ({getattr(callback, '__name__', callback)}): {e}")
+
+# Instancia global: los módulos que recargan tablas se suscriben acá en lugar de conectarse al bus
+despachador_eventos = DespachadorEventos(event_bus)
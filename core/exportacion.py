@@ -0,0 +1,211 @@
+"""
+Servicio de exportación compartido por los módulos (inventario, auditoría, usuarios, logística,
+mantenimiento, contabilidad).
+
+Antes cada modelo traía todas las filas con fetchall, armaba un DataFrame o un FPDF completo en memoria
+y bloqueaba la ventana. Acá las filas se consumen de a una desde un iterable (normalmente
+db.iterar_query, que lee con fetchmany) y se escriben directamente al archivo:
+- excel: openpyxl en modo write_only (sólo la fila actual en memoria; nueva hoja al llegar al límite de Excel)
+- csv:   csv.writer con separador ';' (el que usa el resto de la aplicación)
+- pdf:   reportlab, tabla paginada con el encabezado repetido en cada hoja
+
+Uso en un modelo:
+    filas = filas_de_query(self.db, "SELECT ... FROM auditorias_sistema")
+    escritas = exportar_filas(filas, "excel", "auditorias.xlsx", columnas, titulo="Auditorías del Sistema")
+
+Uso en un controlador (segundo plano, con avance y cancelación; ver core.workers):
+    ejecutar_en_segundo_plano(self.model.exportar_auditorias, args=(formato,), al_terminar=...,
+                              al_progreso=lambda n, total: mostrar_progreso_exportacion(self.view, n, total),
+                              vista=self.view, mensaje_carga="Exportando...", clave="auditoria.exportar")
+    cancelar_exportacion("auditoria.exportar")
+Este módulo no depende de la capa de tareas: core.workers registra con registrar_avisos_de_tarea cómo
+obtener el avance y la cancelación de la tarea en curso, y exportar_filas los usa por defecto.
+"""
+import csv
+import decimal
+import os
+from core.logger import Logger
+
+FORMATOS = ("excel", "csv", "pdf")
+EXTENSIONES = {"excel": ".xlsx", "csv": ".csv", "pdf": ".pdf"}
+NOMBRES_FORMATO = {"excel": "Excel", "csv": "CSV", "pdf": "PDF"}
+# Cada cuántas filas se informa el avance y se revisa si la exportación fue cancelada
+FILAS_POR_AVISO = 1000
+
+class ExportacionCancelada(Exception):
+    pass
+
+# proveedor() -> (al_progreso, cancelado) de la tarea en curso, o (None, None) fuera de una tarea
+_avisos_de_tarea = None
+
+def registrar_avisos_de_tarea(proveedor):
+    """Registra de dónde toma exportar_filas el avance y la cancelación cuando no se le pasan."""
+    global _avisos_de_tarea
+    _avisos_de_tarea = proveedor
+
+class _EscritorCSV:
+    def __init__(self, ruta, columnas, titulo):
+        self._archivo = open(ruta, "w", newline="", encoding="utf-8-sig")
+        self._writer = csv.writer(self._archivo, delimiter=";")
+        self._writer.writerow(columnas)
+
+    def escribir(self, fila):
+        self._writer.writerow(["" if valor is None else valor for valor in fila])
+
+    def cerrar(self):
+        self._archivo.close()
+
+class _EscritorExcel:
+    MAX_FILAS_HOJA = 1048575  # límite de Excel menos el encabezado
+
+    def __init__(self, ruta, columnas, titulo):
+        from openpyxl import Workbook
+        from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+        self._ruta = ruta
+        self._columnas = list(columnas)
+        self._titulo = (titulo or "Datos")[:28]
+        self._ilegales = ILLEGAL_CHARACTERS_RE
+        self._libro = Workbook(write_only=True)
+        self._hojas = 0
+        self._nueva_hoja()
+
+    def _nueva_hoja(self):
+        self._hojas += 1
+        nombre = self._titulo if self._hojas == 1 else f"{self._titulo} {self._hojas}"
+        self._hoja = self._libro.create_sheet(nombre)
+        self._hoja.append(self._columnas)
+        self._filas_hoja = 0
+
+    def _celda(self, valor):
+        if valor is None or isinstance(valor, (int, float)):
+            return valor
+        if hasattr(valor, "isoformat") or isinstance(valor, decimal.Decimal):
+            return valor
+        return self._ilegales.sub("", str(valor))
+
+    def escribir(self, fila):
+        if self._filas_hoja >= self.MAX_FILAS_HOJA:
+            self._nueva_hoja()
+        self._hoja.append([self._celda(valor) for valor in fila])
+        self._filas_hoja += 1
+
+    def cerrar(self):
+        self._libro.save(self._ruta)
+
+class _EscritorPDF:
+    MARGEN = 28
+    ALTO_FILA = 12
+    TAMANO_LETRA = 7
+
+    def __init__(self, ruta, columnas, titulo):
+        from reportlab.lib.pagesizes import A4, landscape
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+        from reportlab.pdfgen import canvas
+        self._ancho_texto = stringWidth
+        self._columnas = [str(c) for c in columnas]
+        self._titulo = titulo
+        self._ancho, self._alto = landscape(A4)
+        self._canvas = canvas.Canvas(ruta, pagesize=(self._ancho, self._alto))
+        self._ancho_columna = (self._ancho - 2 * self.MARGEN) / max(1, len(self._columnas))
+        self._pagina = 0
+        self._nueva_pagina()
+
+    def _recortar(self, texto, fuente):
+        maximo = self._ancho_columna - 4
+        if self._ancho_texto(texto, fuente, self.TAMANO_LETRA) <= maximo:
+            return texto
+        while texto and self._ancho_texto(texto + "…", fuente, self.TAMANO_LETRA) > maximo:
+            texto = texto[:-1]
+        return texto + "…"
+
+    def _dibujar_fila(self, valores, fuente):
+        self._canvas.setFont(fuente, self.TAMANO_LETRA)
+        for i, valor in enumerate(valores):
+            texto = "" if valor is None else str(valor).replace("\n", " ")
+            self._canvas.drawString(self.MARGEN + i * self._ancho_columna, self._y, self._recortar(texto, fuente))
+        self._y -= self.ALTO_FILA
+
+    def _nueva_pagina(self):
+        if self._pagina:
+            self._canvas.showPage()
+        self._pagina += 1
+        self._y = self._alto - self.MARGEN
+        if self._titulo:
+            self._canvas.setFont("Helvetica-Bold", 11)
+            self._canvas.drawString(self.MARGEN, self._y, self._titulo)
+            self._canvas.setFont("Helvetica", 7)
+            self._canvas.drawRightString(self._ancho - self.MARGEN, self._y, f"Página {self._pagina}")
+            self._y -= 2 * self.ALTO_FILA
+        self._dibujar_fila(self._columnas, "Helvetica-Bold")
+        self._canvas.line(self.MARGEN, self._y + self.ALTO_FILA - 3, self._ancho - self.MARGEN, self._y + self.ALTO_FILA - 3)
+
+    def escribir(self, fila):
+        if self._y < self.MARGEN:
+            self._nueva_pagina()
+        self._dibujar_fila(fila, "Helvetica")
+
+    def cerrar(self):
+        self._canvas.save()
+
+_ESCRITORES = {"excel": _EscritorExcel, "csv": _EscritorCSV, "pdf": _EscritorPDF}
+
+def filas_de_query(db, query, parametros=None, chunk=FILAS_POR_AVISO, como_dict=False):
+    """Iterable de filas de `query`: usa iterar_query (fetchmany) si la conexión lo tiene, si no ejecutar_query."""
+    if hasattr(db, "iterar_query"):
+        return db.iterar_query(query, parametros, chunk=chunk, como_dict=como_dict)
+    datos = db.ejecutar_query(query, parametros) if parametros else db.ejecutar_query(query)
+    return iter(datos or [])
+
+def exportar_filas(filas, formato, nombre_archivo, columnas=None, titulo="", al_progreso=None, cancelado=None,
+                   total=0, cada=FILAS_POR_AVISO):
+    """
+    Escribe `filas` (tuplas o dicts) en `nombre_archivo` con el formato indicado y devuelve la cantidad escrita.
+    - Sin `columnas` se usan las claves de la primera fila (dicts) o col_1..col_n (tuplas).
+    - Si no hay filas no se crea el archivo y devuelve 0.
+    - al_progreso(escritas, total) y cancelado() se consultan cada `cada` filas; por defecto se toman
+      de la tarea de segundo plano actual (registrar_avisos_de_tarea). Al cancelar se borra el archivo
+      parcial y se lanza ExportacionCancelada.
+    """
+    if formato not in _ESCRITORES:
+        raise ValueError(f"Formato no soportado: {formato}")
+    if _avisos_de_tarea is not None and (al_progreso is None or cancelado is None):
+        progreso_tarea, cancelado_tarea = _avisos_de_tarea()
+        al_progreso = al_progreso or progreso_tarea
+        cancelado = cancelado or cancelado_tarea
+    escritor = None
+    escritas = 0
+    try:
+        for fila in filas:
+            if hasattr(fila, "keys"):
+                columnas = columnas or list(fila.keys())
+                fila = list(fila.values())
+            if escritor is None:
+                columnas = columnas or [f"col_{i + 1}" for i in range(len(fila))]
+                escritor = _ESCRITORES[formato](nombre_archivo, columnas, titulo)
+            escritor.escribir(fila)
+            escritas += 1
+            if escritas % cada == 0:
+                if cancelado and cancelado():
+                    raise ExportacionCancelada(f"Exportación cancelada tras {escritas} filas.")
+                if al_progreso:
+                    al_progreso(escritas, total)
+        if escritor is not None:
+            escritor.cerrar()
+            escritor = None
+    except BaseException:
+        if escritor is not None:
+            try:
+                escritor.cerrar()
+            except Exception:
+                pass
+            if os.path.exists(nombre_archivo):
+                os.remove(nombre_archivo)
+        raise
+    finally:
+        # Devuelve al pool la conexión de iterar_query si el recorrido se cortó antes de terminar
+        if hasattr(filas, "close"):
+            filas.close()
+    if al_progreso and escritas:
+        al_progreso(escritas, total)
+    Logger().info(f"[EXPORTACIÓN] {escritas} filas exportadas a {nombre_archivo}")
+    return escritas
@@ -0,0 +1,150 @@
+"""
+Gráficos matplotlib reutilizables para las vistas (Contabilidad, Producción).
+
+Antes cada actualización creaba un Figure nuevo (o, en Producción, un canvas nuevo por llamada) y
+matplotlib se importaba al cargar el módulo de la vista. GraficoCacheado:
+
+- importa matplotlib recién al crear el canvas (la primera vez que se muestra un gráfico);
+- conserva los artistas: si el gráfico nuevo tiene el mismo tipo, cantidad de etiquetas y series que el
+  anterior (p. ej. los 12 meses de otro año) sólo cambia alturas / datos de las barras y líneas existentes
+  y el texto de los ticks (no reconstruye ejes ni leyenda);
+- guarda el render de cada `clave` (p. ej. los filtros elegidos) para el tamaño actual del canvas: volver
+  a un filtro ya visto restaura el bitmap con restore_region + blit, sin volver a rasterizar ni tocar los
+  artistas (se ponen al día recién si hace falta un redibujo completo, p. ej. al redimensionar).
+
+Uso:
+    self.grafico = GraficoCacheado(figsize=(6, 4))
+    layout.addWidget(self.grafico.canvas)
+    self.grafico.mostrar(clave, "Ingresos vs Egresos", etiquetas, [("Ingresos", [...]), ("Egresos", [...])])
+"""
+from collections import OrderedDict
+
+TIPOS_GRAFICO = ("barras", "linea", "torta")
+
+class GraficoCacheado:
+    def __init__(self, figsize=(6, 4), max_renders=32):
+        self.figsize = figsize
+        self.max_renders = max_renders
+        self._canvas = None
+        self._ax = None
+        self._firma = None
+        self._artistas = []
+        self._etiquetas = []
+        self._pendiente = None
+        self._renders = OrderedDict()
+        self.renders = 0
+
+    @property
+    def canvas(self):
+        """FigureCanvasQTAgg del gráfico; matplotlib se importa acá la primera vez."""
+        if self._canvas is None:
+            from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+            from matplotlib.figure import Figure
+            grafico = self
+
+            class Canvas(FigureCanvas):
+                def draw(self):
+                    # Un redibujo completo (p. ej. al redimensionar) muestra lo último pedido a mostrar()
+                    grafico._aplicar_pendiente()
+                    super().draw()
+
+            self._canvas = Canvas(Figure(figsize=self.figsize))
+            self._ax = self._canvas.figure.add_subplot(111)
+        return self._canvas
+
+    @property
+    def figure(self):
+        """El Figure con los datos del último mostrar() (p. ej. para savefig)."""
+        figura = self.canvas.figure
+        self._aplicar_pendiente()
+        return figura
+
+    def invalidar(self):
+        """Descarta los renders guardados (p. ej. cambió el tema o los datos de todas las claves)."""
+        self._renders.clear()
+
+    def mostrar(self, clave, titulo, etiquetas, series, tipo="barras", unidad=""):
+        """
+        Muestra `series` [(nombre, valores)] sobre `etiquetas`. `clave` identifica el estado (filtros y
+        versión de los datos): si ya se dibujó con el mismo tamaño de canvas no se vuelve a rasterizar.
+        """
+        if tipo not in TIPOS_GRAFICO:
+            raise ValueError(f"Tipo de gráfico no soportado: {tipo}")
+        canvas = self.canvas
+        etiquetas = [str(etiqueta) for etiqueta in etiquetas]
+        series = [(nombre, [float(valor or 0) for valor in valores]) for nombre, valores in series]
+        self._pendiente = (tipo, titulo, etiquetas, series, unidad)
+        clave_render = (clave, canvas.get_width_height())
+        region = self._renders.get(clave_render)
+        if region is not None:
+            # Los artistas quedan como estaban: se actualizan recién si hace falta un redibujo completo
+            self._renders.move_to_end(clave_render)
+            canvas.restore_region(region)
+            canvas.blit(canvas.figure.bbox)
+            return False
+        canvas.draw()
+        self.renders += 1
+        self._renders[clave_render] = canvas.copy_from_bbox(canvas.figure.bbox)
+        while len(self._renders) > self.max_renders:
+            self._renders.popitem(last=False)
+        return True
+
+    def _aplicar_pendiente(self):
+        """Lleva los artistas a los datos del último mostrar() (reconstruye sólo si cambió la forma)."""
+        if self._pendiente is None:
+            return
+        tipo, titulo, etiquetas, series, unidad = self._pendiente
+        self._pendiente = None
+        firma = (tipo, len(etiquetas), tuple(nombre for nombre, _valores in series))
+        # La torta no tiene artistas actualizables en el lugar (los ángulos dependen de todos los valores)
+        if firma != self._firma or tipo == "torta":
+            self._construir(tipo, etiquetas, series)
+            self._firma = firma
+        else:
+            self._actualizar(tipo, etiquetas, series)
+        self._ax.set_title(titulo)
+        if tipo != "torta":
+            self._ax.set_ylabel(unidad)
+
+    def _construir(self, tipo, etiquetas, series):
+        ax = self._ax
+        ax.clear()
+        self._artistas = []
+        self._etiquetas = etiquetas
+        if tipo == "torta":
+            valores = series[0][1] if series else []
+            if any(valores):
+                ax.pie(valores, labels=etiquetas, autopct="%1.1f%%")
+            ax.axis("equal")
+            return
+        posiciones = list(range(len(etiquetas)))
+        ancho = 0.8 / max(1, len(series))
+        for indice, (nombre, valores) in enumerate(series):
+            if tipo == "barras":
+                desplazamiento = (indice - (len(series) - 1) / 2) * ancho
+                artista = ax.bar([p + desplazamiento for p in posiciones], valores, width=ancho, label=nombre)
+            else:
+                artista, = ax.plot(posiciones, valores, marker="o", label=nombre)
+            self._artistas.append(artista)
+        ax.set_xticks(posiciones)
+        ax.set_xticklabels(etiquetas, rotation=45 if len(etiquetas) > 6 else 0, ha="right" if len(etiquetas) > 6 else "center")
+        if len(series) > 1:
+            ax.legend()
+        ax.figure.tight_layout()
+
+    def _actualizar(self, tipo, etiquetas, series):
+        if etiquetas != self._etiquetas:
+            self._ax.set_xticklabels(etiquetas)
+            self._etiquetas = etiquetas
+        for artista, (_nombre, valores) in zip(self._artistas, series):
+            if tipo == "barras":
+                for barra, valor in zip(artista.patches, valores):
+                    if barra.get_height() != valor:
+                        barra.set_height(valor)
+            else:
+                artista.set_ydata(valores)
+        # Límites desde los valores: relim() recorre el path de cada barra y era casi todo el costo
+        valores = [valor for _nombre, valores_serie in series for valor in valores_serie] or [0.0]
+        minimo, maximo = min(0.0, min(valores)), max(0.0, max(valores))
+        margen = (maximo - minimo) * 0.05 or 1.0
+        self._ax.set_ylim(minimo - (margen if minimo < 0 else 0), maximo + margen)
@@ -1,6 +1,9 @@
 import logging
 import os
 import logging.handlers
+import queue
+import threading
+import atexit
 from PyQt6.QtWidgets import QMessageBox
 import json
 import uuid
@@ -20,48 +23,101 @@ class JsonFormatter(logging.Formatter):
             log_record['exception'] = self.formatException(record.exc_info)
         return json.dumps(log_record, ensure_ascii=False)
 
+class _QueueHandlerAcotado(logging.handlers.QueueHandler):
+    """QueueHandler que descarta registros si la cola está llena en lugar de bloquear al que loguea."""
+    descartados = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _QueueHandlerAcotado.descartados += 1
+
+# Configuración única por proceso: un QueueHandler en "MPSLogger" y un QueueListener que escribe
+# app.log, app_json.log, audit.log y la consola desde un hilo propio. Así Logger() es barato de
+# instanciar en cualquier parte y el I/O de disco no bloquea la GUI ni las consultas.
+MAX_REGISTROS_EN_COLA = 10000
+_LOCK_CONFIGURACION = threading.Lock()
+_LISTENER = None
+_ATEXIT_REGISTRADO = False
+
+def _crear_handlers(log_file):
+    log_dir = os.path.dirname(log_file)
+    if log_dir and not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+
+    # Formato del log (texto y JSON)
+    text_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    json_formatter = JsonFormatter()
+
+    # Handler para archivo rotativo (texto)
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=5 * 1024 * 1024, backupCount=3
+    )
+    file_handler.setFormatter(text_formatter)
+
+    # Handler para consola (texto)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(text_formatter)
+
+    # Handler para logs en JSON (archivo separado)
+    json_log_file = os.path.join(log_dir, "app_json.log")
+    json_handler = logging.handlers.RotatingFileHandler(
+        json_log_file, maxBytes=5 * 1024 * 1024, backupCount=3
+    )
+    json_handler.setFormatter(json_formatter)
+
+    # Handler para auditoría (archivo separado, texto)
+    audit_log_file = os.path.join(log_dir, "audit.log")
+    audit_handler = logging.handlers.RotatingFileHandler(
+        audit_log_file, maxBytes=2 * 1024 * 1024, backupCount=2
+    )
+    audit_handler.setFormatter(text_formatter)
+    audit_handler.setLevel(logging.INFO)
+
+    return file_handler, console_handler, json_handler, audit_handler
+
+def configurar_logging(log_file="logs/app.log"):
+    """
+    Instala (una sola vez por proceso) el QueueHandler en "MPSLogger" y arranca el QueueListener.
+    Las llamadas siguientes no hacen nada; devuelve el listener activo.
+    """
+    global _LISTENER, _ATEXIT_REGISTRADO
+    with _LOCK_CONFIGURACION:
+        if _LISTENER is not None:
+            return _LISTENER
+        logger = logging.getLogger("MPSLogger")
+        logger.setLevel(logging.DEBUG)
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+        cola = queue.Queue(maxsize=MAX_REGISTROS_EN_COLA)
+        logger.addHandler(_QueueHandlerAcotado(cola))
+        _LISTENER = logging.handlers.QueueListener(cola, *_crear_handlers(log_file), respect_handler_level=True)
+        _LISTENER.start()
+        if not _ATEXIT_REGISTRADO:
+            atexit.register(detener_logging)
+            _ATEXIT_REGISTRADO = True
+        return _LISTENER
+
+def detener_logging():
+    """Vacía la cola, detiene el hilo del listener y cierra los archivos. Se llama al salir del proceso."""
+    global _LISTENER
+    with _LOCK_CONFIGURACION:
+        if _LISTENER is None:
+            return
+        _LISTENER.stop()
+        for handler in _LISTENER.handlers:
+            handler.close()
+        _LISTENER = None
+        logger = logging.getLogger("MPSLogger")
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+
 class Logger:
     def __init__(self, log_file="logs/app.log", correlation_id=None):
-        log_dir = os.path.dirname(log_file)
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-
+        configurar_logging(log_file)
         self._logger = logging.getLogger("MPSLogger")
-        self._logger.setLevel(logging.DEBUG)
-
-        # Formato del log (texto y JSON)
-        text_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        json_formatter = JsonFormatter()
-
-        # Handler para archivo rotativo (texto)
-        file_handler = logging.handlers.RotatingFileHandler(
-            log_file, maxBytes=5 * 1024 * 1024, backupCount=3
-        )
-        file_handler.setFormatter(text_formatter)
-        self._logger.addHandler(file_handler)
-
-        # Handler para consola (texto)
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(text_formatter)
-        self._logger.addHandler(console_handler)
-
-        # Handler para logs en JSON (archivo separado)
-        json_log_file = os.path.join(log_dir, "app_json.log")
-        json_handler = logging.handlers.RotatingFileHandler(
-            json_log_file, maxBytes=5 * 1024 * 1024, backupCount=3
-        )
-        json_handler.setFormatter(json_formatter)
-        self._logger.addHandler(json_handler)
-
-        # Handler para auditoría (archivo separado, texto)
-        audit_log_file = os.path.join(log_dir, "audit.log")
-        audit_handler = logging.handlers.RotatingFileHandler(
-            audit_log_file, maxBytes=2 * 1024 * 1024, backupCount=2
-        )
-        audit_handler.setFormatter(text_formatter)
-        audit_handler.setLevel(logging.INFO)
-        self._logger.addHandler(audit_handler)
-
         self.correlation_id = correlation_id or str(uuid.uuid4())
 
     def _extra(self):
@@ -0,0 +1,212 @@
+"""
+Instrumentación de las consultas de BaseDatabaseConnection.
+
+Cada ejecutar_query / ejecutar_query_return_rowcount / ejecutar_lote / iterar_query registra:
+- la latencia y la cantidad de filas,
+- el sitio que la originó (módulo y Clase.metodo del primer frame fuera de core/database.py),
+- la huella de la consulta: el SQL normalizado, sin literales ni listas de parámetros, así las
+  variantes de una misma consulta se suman juntas.
+
+Se acumula por sitio+huella (consultas, tiempo total, máximo, filas) y por módulo en un histograma de
+latencias con ventanas rotativas (las últimas METRICAS_SQL_VENTANAS ventanas de METRICAS_SQL_VENTANA
+segundos). Las consultas que superan SQL_LENTA_UMBRAL_MS se escriben en SQL_LENTA_LOG_PATH.
+instantanea() devuelve todo para la pestaña "Diagnóstico" de Configuración: ordenando los sitios por
+tiempo total se ve cuáles de los llamados a ejecutar_query dominan el tiempo de espera.
+"""
+import logging
+import logging.handlers
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from core.config import (
+    METRICAS_SQL_ACTIVAS, METRICAS_SQL_MAX_SITIOS, METRICAS_SQL_VENTANA, METRICAS_SQL_VENTANAS,
+    SQL_LENTA_LOG_PATH, SQL_LENTA_UMBRAL_MS,
+)
+
+# Límites superiores (ms) de los casilleros del histograma; el último casillero es "más de 5000"
+LIMITES_HISTOGRAMA_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Archivos cuyo frame no es el que originó la consulta
+_ARCHIVOS_INTERNOS = tuple(os.path.join("core", nombre) for nombre in ("database.py", "metricas_sql.py", "offline.py"))
+
+_RE_LITERAL_TEXTO = re.compile(r"N?'(?:[^']|'')*'")
+_RE_NUMERO = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_RE_LISTA = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_RE_ESPACIOS = re.compile(r"\s+")
+
+def huella_sql(query):
+    """SQL normalizado: literales y números como ?, listas IN (?, ?, ...) como (...) y espacios colapsados."""
+    huella = _RE_LITERAL_TEXTO.sub("?", query)
+    huella = _RE_NUMERO.sub("?", huella)
+    huella = _RE_LISTA.sub("(...)", huella)
+    return _RE_ESPACIOS.sub(" ", huella).strip()
+
+def sitio_llamador(profundidad=1):
+    """(modulo, 'Clase.metodo') del primer frame fuera de la capa de base de datos."""
+    frame = sys._getframe(profundidad)
+    while frame is not None and frame.f_code.co_filename.endswith(_ARCHIVOS_INTERNOS):
+        frame = frame.f_back
+    if frame is None:
+        return "desconocido", "desconocido"
+    codigo = frame.f_code
+    ruta = codigo.co_filename.replace(os.sep, "/")
+    partes = ruta.split("/")
+    if "modules" in partes and partes.index("modules") + 1 < len(partes) - 1:
+        modulo = partes[partes.index("modules") + 1]
+    else:
+        modulo = os.path.splitext(partes[-1])[0]
+    return modulo, getattr(codigo, "co_qualname", codigo.co_name)
+
+class HistogramaLatencias:
+    """Conteos por casillero de latencia en ventanas rotativas de `duracion` segundos (se conservan `ventanas`)."""
+    def __init__(self, duracion=300, ventanas=12):
+        self.duracion = duracion
+        self._ventanas = deque(maxlen=ventanas)
+
+    def _ventana_actual(self, ahora):
+        if not self._ventanas or ahora - self._ventanas[-1][0] >= self.duracion:
+            self._ventanas.append((ahora, [0] * (len(LIMITES_HISTOGRAMA_MS) + 1), [0.0]))
+        return self._ventanas[-1]
+
+    def registrar(self, ms, ahora=None):
+        _inicio, conteos, total = self._ventana_actual(time.monotonic() if ahora is None else ahora)
+        casillero = next((i for i, limite in enumerate(LIMITES_HISTOGRAMA_MS) if ms <= limite), len(LIMITES_HISTOGRAMA_MS))
+        conteos[casillero] += 1
+        total[0] += ms
+
+    def conteos(self, ahora=None):
+        """Conteos sumados de las ventanas vigentes (las más viejas que duracion*ventanas ya rotaron)."""
+        ahora = time.monotonic() if ahora is None else ahora
+        suma = [0] * (len(LIMITES_HISTOGRAMA_MS) + 1)
+        total_ms = 0.0
+        for inicio, conteos, total in self._ventanas:
+            if ahora - inicio < self.duracion * self._ventanas.maxlen:
+                suma = [a + b for a, b in zip(suma, conteos)]
+                total_ms += total[0]
+        return suma, total_ms
+
+    def percentil(self, p, ahora=None):
+        """Límite superior (ms) del casillero donde cae el percentil p (0..1); None sin datos."""
+        conteos, _total = self.conteos(ahora)
+        cantidad = sum(conteos)
+        if not cantidad:
+            return None
+        acumulado = 0
+        for casillero, conteo in enumerate(conteos):
+            acumulado += conteo
+            if acumulado >= p * cantidad:
+                return LIMITES_HISTOGRAMA_MS[casillero] if casillero < len(LIMITES_HISTOGRAMA_MS) else float("inf")
+        return float("inf")
+
+class MetricasSQL:
+    def __init__(self, umbral_lenta_ms=SQL_LENTA_UMBRAL_MS, ruta_lentas=SQL_LENTA_LOG_PATH,
+                 duracion_ventana=METRICAS_SQL_VENTANA, ventanas=METRICAS_SQL_VENTANAS, max_sitios=METRICAS_SQL_MAX_SITIOS):
+        self.umbral_lenta_ms = umbral_lenta_ms
+        self.ruta_lentas = ruta_lentas
+        self.duracion_ventana = duracion_ventana
+        self.ventanas = ventanas
+        self.max_sitios = max_sitios
+        self._lock = threading.Lock()
+        self._sitios = {}
+        self._modulos = {}
+        self._log_lentas = None
+        self._lock_lentas = threading.Lock()
+        self.lentas = 0
+
+    def registrar(self, query, segundos, filas, database=None, sitio=None):
+        """Registra una consulta ya ejecutada. `sitio` es (modulo, metodo); por defecto se busca en la pila."""
+        modulo, metodo = sitio or sitio_llamador()
+        huella = huella_sql(query)
+        ms = segundos * 1000
+        with self._lock:
+            clave = (modulo, metodo, huella)
+            datos = self._sitios.get(clave)
+            if datos is None:
+                if len(self._sitios) >= self.max_sitios:
+                    # Tope alcanzado: lo nuevo se suma en un sitio comodín para no crecer sin límite
+                    clave = (modulo, "(otros)", "(otros)")
+                    datos = self._sitios.get(clave)
+                if datos is None:
+                    datos = self._sitios[clave] = {'consultas': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'filas': 0, 'database': database}
+            datos['consultas'] += 1
+            datos['total_ms'] += ms
+            datos['max_ms'] = max(datos['max_ms'], ms)
+            datos['filas'] += filas
+            histograma = self._modulos.get(modulo)
+            if histograma is None:
+                histograma = self._modulos[modulo] = HistogramaLatencias(self.duracion_ventana, self.ventanas)
+            histograma.registrar(ms)
+        if ms >= self.umbral_lenta_ms:
+            self._registrar_lenta(modulo, metodo, database, ms, filas, huella)
+
+    def _registrar_lenta(self, modulo, metodo, database, ms, filas, huella):
+        try:
+            with self._lock_lentas:
+                self.lentas += 1
+                if self._log_lentas is None:
+                    self._log_lentas = self._crear_log_lentas()
+            self._log_lentas.info(f"{ms:.0f} ms | {filas} filas | {database or '-'} | {modulo}.{metodo} | {huella}")
+        except Exception:
+            # El log de lentas nunca debe romper la consulta que lo originó
+            pass
+
+    def _crear_log_lentas(self):
+        directorio = os.path.dirname(self.ruta_lentas)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        log = logging.getLogger(f"MPSConsultasLentas.{id(self)}")
+        log.propagate = False
+        log.setLevel(logging.INFO)
+        handler = logging.handlers.RotatingFileHandler(self.ruta_lentas, maxBytes=2 * 1024 * 1024, backupCount=2, encoding="utf-8")
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+        log.addHandler(handler)
+        return log
+
+    def instantanea(self, limite=50):
+        """
+        {'modulos': [{modulo, consultas, total_ms, p50_ms, p95_ms, p99_ms, histograma}],
+         'sitios': [{modulo, metodo, huella, database, consultas, total_ms, promedio_ms, max_ms, filas}] (los `limite` de más tiempo total),
+         'lentas': cantidad, 'umbral_lenta_ms': umbral}
+        """
+        with self._lock:
+            sitios = [
+                dict(datos, modulo=modulo, metodo=metodo, huella=huella, promedio_ms=datos['total_ms'] / datos['consultas'])
+                for (modulo, metodo, huella), datos in self._sitios.items()
+            ]
+            modulos = []
+            for modulo, histograma in self._modulos.items():
+                conteos, total_ms = histograma.conteos()
+                modulos.append({
+                    'modulo': modulo,
+                    'consultas': sum(conteos),
+                    'total_ms': total_ms,
+                    'p50_ms': histograma.percentil(0.5),
+                    'p95_ms': histograma.percentil(0.95),
+                    'p99_ms': histograma.percentil(0.99),
+                    'histograma': dict(zip([f"<={limite_ms}" for limite_ms in LIMITES_HISTOGRAMA_MS] + [f">{LIMITES_HISTOGRAMA_MS[-1]}"], conteos)),
+                })
+        sitios.sort(key=lambda datos: datos['total_ms'], reverse=True)
+        modulos.sort(key=lambda datos: datos['total_ms'], reverse=True)
+        return {'modulos': modulos, 'sitios': sitios[:limite], 'lentas': self.lentas, 'umbral_lenta_ms': self.umbral_lenta_ms}
+
+    def reiniciar(self):
+        with self._lock:
+            self._sitios.clear()
+            self._modulos.clear()
+            self.lentas = 0
+
+_METRICAS = MetricasSQL()
+
+def metricas_sql():
+    return _METRICAS
+
+def registrar_consulta(query, segundos, filas=0, database=None):
+    """Punto de entrada de BaseDatabaseConnection; no hace nada si METRICAS_SQL_ACTIVAS es False."""
+    if METRICAS_SQL_ACTIVAS:
+        _METRICAS.registrar(query, segundos, filas, database, sitio_llamador())
+
+def instantanea_metricas_sql(limite=50):
+    return _METRICAS.instantanea(limite)
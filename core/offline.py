@@ -0,0 +1,559 @@
+"""
+Modo offline: réplica SQLite local de las tablas más consultadas y cola de escrituras diferidas.
+
+Con el motor activo, BaseDatabaseConnection.ejecutar_query (fuera de transacciones) pasa por resolver():
+- los SELECT se ejecutan sobre la réplica local (traducidos con traducir_a_sqlite); si la consulta usa
+  tablas no replicadas o sintaxis propia de SQL Server que SQLite no entiende, sigue al servidor como antes;
+- los INSERT/UPDATE/DELETE sobre tablas replicadas se aplican en la réplica y se anotan en la cola
+  (tabla cola_escrituras del mismo archivo SQLite) junto con la rowversion que tenía cada fila afectada.
+
+Un hilo propio (como el sink de auditoría) cada `intervalo` segundos, o antes si se juntó un lote:
+1. envía la cola al servidor en lotes de `tamano_lote` sentencias, una transacción por lote. Antes de cada
+   lote lee en un solo viaje la rowversion actual de las filas afectadas: si alguna cambió o se borró en el
+   servidor, la entrada queda en estado 'conflicto' (no se pisa el cambio ajeno) y se informa;
+2. actualiza la réplica por rowversion con core.delta_sync (sólo filas nuevas, modificadas y bajas).
+Sin conexión ambos pasos fallan, la cola se conserva en disco y se reintenta en el ciclo siguiente.
+
+Las transacciones (core/stock_ledger.py, reservas) siguen yendo al servidor: no se pueden diferir sin
+perder sus validaciones de stock. Las altas hechas sin conexión usan ids locales negativos hasta que
+el envío las reemplaza por la fila real del servidor.
+
+Uso:
+    activar_motor_offline()        # ConfiguracionModel.activar_modo_offline
+    desactivar_motor_offline()     # envía lo pendiente; si queda cola sigue activo hasta vaciarla
+    reanudar_modo_offline()        # al iniciar (main.py): retoma el modo y la cola de la sesión anterior
+"""
+import atexit
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+from core.db_pool import es_error_de_conexion
+from core.logger import Logger
+
+# Tablas replicadas por base de datos y su columna id. Las que no existen en el servidor se omiten.
+TABLAS_REPLICA = {
+    "inventario": {
+        "inventario_perfiles": "id",
+        "obras": "id",
+        "herrajes": "id_herraje",
+        "vidrios": "id_vidrio",
+        "pedidos": "id",
+    },
+    "obras": {"obras": "id"},
+}
+COLUMNA_VERSION = "_version"
+SUFIJO_CARGA = "__carga"
+MARCADOR_ACTIVO = "modo_offline.activo"
+
+ResultadoLocal = namedtuple("ResultadoLocal", "filas rowcount")
+
+_RE_ESCRITURA = re.compile(r"^\s*(INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+\[?(\w+)\]?", re.IGNORECASE)
+_RE_OUTPUT = re.compile(r"\s+OUTPUT\s+INSERTED\.[\w\[\]]+(\s*,\s*INSERTED\.[\w\[\]]+)*", re.IGNORECASE)
+_RE_TOP = re.compile(r"^(\s*SELECT\s+(?:DISTINCT\s+)?)TOP\s*\(?\s*(\d+)\s*\)?\s*", re.IGNORECASE)
+_RE_PAGINA = re.compile(r"OFFSET\s+(\?|\d+)\s+ROWS\s+FETCH\s+(?:NEXT|FIRST)\s+(\?|\d+)\s+ROWS\s+ONLY", re.IGNORECASE)
+_REEMPLAZOS = (
+    (re.compile(r"\[([^\]]+)\]"), r'"\1"'),
+    (re.compile(r"\bGETDATE\(\)", re.IGNORECASE), "CURRENT_TIMESTAMP"),
+    (re.compile(r"\bISNULL\(", re.IGNORECASE), "IFNULL("),
+    (re.compile(r"\bLEN\(", re.IGNORECASE), "LENGTH("),
+)
+
+def traducir_a_sqlite(query, parametros=()):
+    """
+    Adapta las construcciones de T-SQL que usan los modelos: [columna], GETDATE(), ISNULL, LEN, TOP n y
+    OFFSET ? ROWS FETCH NEXT ? ROWS ONLY (que pasa a LIMIT ? OFFSET ? invirtiendo sus parámetros).
+    Devuelve (query, parametros). Lo que no se reconoce se deja igual: si SQLite no lo acepta la consulta va al servidor.
+    """
+    parametros = list(parametros or ())
+    for patron, reemplazo in _REEMPLAZOS:
+        query = patron.sub(reemplazo, query)
+    top = _RE_TOP.match(query)
+    if top:
+        query = top.group(1) + query[top.end():].rstrip().rstrip(";") + f" LIMIT {top.group(2)}"
+    pagina = _RE_PAGINA.search(query)
+    if pagina:
+        desplazamiento, cantidad = pagina.group(1), pagina.group(2)
+        posicion = query[:pagina.start()].count("?")
+        valores = []
+        for marcador in (desplazamiento, cantidad):
+            if marcador == "?":
+                valores.append(parametros.pop(posicion))
+        if cantidad == "?" and desplazamiento == "?":
+            valores.reverse()
+        parametros[posicion:posicion] = valores
+        query = query[:pagina.start()] + f"LIMIT {cantidad} OFFSET {desplazamiento}" + query[pagina.end():]
+    return query, tuple(parametros)
+
+def _valor_local(valor):
+    """Convierte lo que devuelve pyodbc a tipos que SQLite guarda sin adaptadores."""
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, datetime):
+        return valor.isoformat(" ")
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, bool):
+        return int(valor)
+    return valor
+
+def _clausula_where(consulta, parametros):
+    """WHERE de un UPDATE/DELETE y sus parámetros (los últimos de la lista)."""
+    inicio = consulta.upper().rfind(" WHERE ")
+    if inicio < 0:
+        return "", ()
+    where = consulta[inicio:]
+    cantidad = where.count("?")
+    return where, tuple(parametros[len(parametros) - cantidad:]) if cantidad else ()
+
+class _ConsultasRemotas:
+    """ejecutar_query sobre el servidor sin pasar por la réplica ni mostrar popups (lo usa SincronizadorDelta)."""
+    def __init__(self, conexion):
+        self._conexion = conexion
+
+    def ejecutar_query(self, query, parametros=()):
+        with self._conexion() as conn:
+            cursor = conn.cursor()
+            if parametros:
+                cursor.execute(query, parametros)
+            else:
+                cursor.execute(query)
+            return cursor.fetchall() if cursor.description is not None else None
+
+    def columnas(self, tabla):
+        with self._conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT TOP 0 * FROM {tabla}")
+            return [columna[0] for columna in cursor.description]
+
+def _conexion_servidor(database):
+    from core.database import obtener_pool
+    return obtener_pool(database).conexion()
+
+class MotorOffline:
+    def __init__(self, directorio, intervalo=30.0, tamano_lote=50, conexion_remota=None, tablas=None):
+        """
+        - directorio: carpeta de los archivos replica_<base>.db (réplica y cola de cada base).
+        - conexion_remota: callable(database) que devuelve un context manager con una conexión DB-API
+          al servidor; por defecto una conexión del pool de core.database.
+        """
+        self.directorio = directorio
+        self.intervalo = intervalo
+        self.tamano_lote = tamano_lote
+        self.tablas = tablas if tablas is not None else TABLAS_REPLICA
+        self._conexion_remota = conexion_remota or _conexion_servidor
+        self._locales = {}
+        self._lock = threading.RLock()
+        self._lock_sincronizacion = threading.Lock()
+        self._hay_lote = threading.Event()
+        self._detenido = threading.Event()
+        self._hilo = None
+        # Filas ya modificadas por entradas enviadas de esta cola: su rowversion nueva es nuestra, no un conflicto
+        self._propias = set()
+        self._tablas_ausentes = set()
+        self.en_linea = None
+        self.desactivar_al_vaciar = False
+
+    # --- Réplica local ---
+    def _local(self, database):
+        with self._lock:
+            conn = self._locales.get(database)
+            if conn is None:
+                os.makedirs(self.directorio, exist_ok=True)
+                conn = sqlite3.connect(os.path.join(self.directorio, f"replica_{database}.db"), check_same_thread=False)
+                with conn:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS cola_escrituras (id INTEGER PRIMARY KEY AUTOINCREMENT, tabla TEXT, query TEXT, "
+                        "parametros TEXT, versiones TEXT, id_local INTEGER, estado TEXT DEFAULT 'pendiente', detalle TEXT, "
+                        "fecha TEXT DEFAULT CURRENT_TIMESTAMP)"
+                    )
+                    conn.execute("CREATE TABLE IF NOT EXISTS replica_estado (tabla TEXT PRIMARY KEY, columnas TEXT, marca INTEGER)")
+                self._locales[database] = conn
+            return conn
+
+    def resolver(self, database, query, parametros=None):
+        """
+        Resuelve la sentencia localmente si corresponde: devuelve ResultadoLocal(filas, rowcount),
+        o None para que BaseDatabaseConnection la ejecute en el servidor.
+        """
+        tablas = self.tablas.get(database)
+        if not tablas:
+            return None
+        parametros = tuple(parametros or ())
+        if query.lstrip()[:6].upper() == "SELECT":
+            # Las consultas de rowversion (sincronización, bloqueo optimista) necesitan el dato del servidor
+            if "ROWVERSION" in query.upper():
+                return None
+            return self._leer_local(database, query, parametros)
+        escritura = _RE_ESCRITURA.match(query)
+        if escritura is None or escritura.group(2) not in tablas:
+            return None
+        return self._escribir_local(database, escritura.group(2), query, parametros)
+
+    def _leer_local(self, database, query, parametros):
+        consulta, parametros = traducir_a_sqlite(query, parametros)
+        with self._lock:
+            try:
+                filas = self._local(database).execute(consulta, [_valor_local(p) for p in parametros]).fetchall()
+            except sqlite3.Error:
+                return None
+        return ResultadoLocal(filas, len(filas))
+
+    def _escribir_local(self, database, tabla, query, parametros):
+        columna_id = self.tablas[database][tabla]
+        insercion = query.lstrip()[:6].upper() == "INSERT"
+        versiones = id_local = None
+        rowcount = 0
+        with self._lock:
+            conn = self._local(database)
+            try:
+                with conn:
+                    consulta, valores = traducir_a_sqlite(_RE_OUTPUT.sub("", query), parametros)
+                    valores = tuple(_valor_local(v) for v in valores)
+                    if not insercion:
+                        where, valores_where = _clausula_where(consulta, valores)
+                        versiones = {
+                            str(id_registro): version for id_registro, version in
+                            conn.execute(f'SELECT "{columna_id}", {COLUMNA_VERSION} FROM "{tabla}"{where}', valores_where)
+                        }
+                    cursor = conn.execute(consulta, valores)
+                    rowcount = cursor.rowcount
+                    if insercion:
+                        # Id provisorio negativo: no choca con los que asigne el servidor al enviar la cola
+                        id_local = conn.execute(f'SELECT MIN(MIN("{columna_id}"), 0) - 1 FROM "{tabla}"').fetchone()[0]
+                        conn.execute(f'UPDATE "{tabla}" SET "{columna_id}" = ? WHERE rowid = ?', (id_local, cursor.lastrowid))
+            except sqlite3.Error as e:
+                Logger().warning(f"[OFFLINE] No se pudo aplicar en la réplica local ({tabla}), se enviará sin control de conflictos: {e}")
+                versiones = id_local = None
+            with conn:
+                conn.execute(
+                    "INSERT INTO cola_escrituras (tabla, query, parametros, versiones, id_local) VALUES (?, ?, ?, ?, ?)",
+                    (tabla, query, json.dumps(parametros, default=str), json.dumps(versiones) if versiones is not None else None, id_local)
+                )
+                pendientes = conn.execute("SELECT COUNT(*) FROM cola_escrituras WHERE estado = 'pendiente'").fetchone()[0]
+        if pendientes >= self.tamano_lote:
+            self._hay_lote.set()
+        filas = [(id_local,)] if id_local is not None and _RE_OUTPUT.search(query) else None
+        return ResultadoLocal(filas, rowcount)
+
+    def actualizar_replica(self, database):
+        """Trae del servidor los cambios de cada tabla replicada desde su última marca."""
+        for tabla, columna_id in self.tablas.get(database, {}).items():
+            try:
+                self._actualizar_tabla(database, tabla, columna_id)
+            except Exception as e:
+                if es_error_de_conexion(e):
+                    raise
+                if (database, tabla) not in self._tablas_ausentes:
+                    self._tablas_ausentes.add((database, tabla))
+                    Logger().warning(f"[OFFLINE] No se replica {database}.{tabla}: {e}")
+
+    def _actualizar_tabla(self, database, tabla, columna_id):
+        from core.delta_sync import CambiosDelta, SincronizadorDelta
+        remoto = _ConsultasRemotas(lambda: self._conexion_remota(database))
+        columnas = remoto.columnas(tabla)
+        con_version = "rowversion" in columnas
+        columnas = [c for c in columnas if c != "rowversion"]
+        conn = self._local(database)
+        destino = tabla
+        with self._lock:
+            estado = conn.execute("SELECT columnas, marca FROM replica_estado WHERE tabla = ?", (tabla,)).fetchone()
+            recrear = estado is None or json.loads(estado[0]) != columnas
+            if recrear:
+                # Tabla nueva o cambió su esquema: se lee completa en una tabla de carga que reemplaza a la
+                # anterior al final; mientras tanto las lecturas siguen viendo la réplica vieja
+                destino = f"{tabla}{SUFIJO_CARGA}"
+                definicion = ", ".join(f'"{c}" INTEGER PRIMARY KEY' if c == columna_id else f'"{c}"' for c in columnas)
+                with conn:
+                    conn.execute(f'DROP TABLE IF EXISTS "{destino}"')
+                    conn.execute(f'CREATE TABLE "{destino}" ({definicion}, {COLUMNA_VERSION} INTEGER)')
+                estado = (None, None)
+        lista = ", ".join(f"[{c}]" for c in columnas)
+        if con_version:
+            sincronizacion = SincronizadorDelta(remoto, tabla, columna_id)
+            sincronizacion.marca = estado[1]
+            cambios = sincronizacion.leer_cambios(f"{lista}, CAST(rowversion AS BIGINT)")
+        else:
+            filas = remoto.ejecutar_query(f"SELECT {columna_id}, {lista}, NULL FROM {tabla}") or []
+            cambios = CambiosDelta([(fila[0], tuple(fila[1:])) for fila in filas], [], None, True)
+        marcadores = ", ".join("?" * (len(columnas) + 1))
+        nombres = ", ".join(f'"{c}"' for c in columnas)
+        with self._lock, conn:
+            if not conn.in_transaction:
+                conn.execute("BEGIN")  # el DROP y el RENAME del reemplazo van en la misma transacción
+            if cambios.completo and not recrear:
+                # Las altas locales todavía sin enviar (ids negativos) se conservan
+                conn.execute(f'DELETE FROM "{tabla}" WHERE "{columna_id}" >= 0')
+            conn.executemany(f'DELETE FROM "{destino}" WHERE "{columna_id}" = ?', [(id_registro,) for id_registro in cambios.bajas])
+            conn.executemany(
+                f'INSERT OR REPLACE INTO "{destino}" ({nombres}, {COLUMNA_VERSION}) VALUES ({marcadores})',
+                [tuple(_valor_local(valor) for valor in fila) for _id, fila in cambios.filas]
+            )
+            if recrear:
+                self._reemplazar_tabla(conn, tabla, destino, columna_id)
+            conn.execute(
+                "INSERT OR REPLACE INTO replica_estado (tabla, columnas, marca) VALUES (?, ?, ?)",
+                (tabla, json.dumps(columnas), cambios.hasta)
+            )
+
+    @staticmethod
+    def _reemplazar_tabla(conn, tabla, carga, columna_id):
+        """Pasa las altas locales sin enviar (ids negativos) a la tabla de carga y la renombra como `tabla`."""
+        anteriores = {fila[1] for fila in conn.execute(f'PRAGMA table_info("{tabla}")')}
+        if anteriores:
+            comunes = ", ".join(f'"{c}"' for fila in conn.execute(f'PRAGMA table_info("{carga}")')
+                                for c in (fila[1],) if c in anteriores)
+            if columna_id in anteriores:
+                conn.execute(f'INSERT OR IGNORE INTO "{carga}" ({comunes}) SELECT {comunes} FROM "{tabla}" WHERE "{columna_id}" < 0')
+            conn.execute(f'DROP TABLE "{tabla}"')
+        conn.execute(f'ALTER TABLE "{carga}" RENAME TO "{tabla}"')
+
+    # --- Cola de escrituras ---
+    def reproducir_cola(self, database):
+        """Envía las escrituras pendientes de `database` en lotes. Devuelve {'enviadas', 'conflictos', 'errores'}."""
+        resumen = {'enviadas': 0, 'conflictos': 0, 'errores': 0}
+        conn = self._local(database)
+        while True:
+            with self._lock:
+                lote = conn.execute(
+                    "SELECT id, tabla, query, parametros, versiones, id_local FROM cola_escrituras "
+                    "WHERE estado = 'pendiente' ORDER BY id LIMIT ?", (self.tamano_lote,)
+                ).fetchall()
+            if not lote:
+                self._propias.clear()
+                return resumen
+            try:
+                resultados = self._enviar_lote(database, lote)
+            except Exception as e:
+                if es_error_de_conexion(e):
+                    raise
+                resultados = self._enviar_de_a_una(database, lote)
+            for estado in resultados.values():
+                resumen[estado] += 1
+
+    def _enviar_lote(self, database, lote):
+        """Envía un lote en una transacción y lo registra en la cola local. Devuelve {id_entrada: estado}."""
+        resultados = {}
+        conflictos = {}
+        with self._conexion_remota(database) as remota:
+            cursor = remota.cursor()
+            actuales = self._versiones_remotas(cursor, database, lote)
+            tocadas = set()
+            for id_entrada, tabla, query, parametros, versiones, _id_local in lote:
+                versiones = json.loads(versiones) if versiones else {}
+                motivo = self._conflicto(tabla, versiones, actuales, tocadas)
+                if motivo:
+                    conflictos[id_entrada] = motivo
+                    resultados[id_entrada] = 'conflictos'
+                    continue
+                parametros = json.loads(parametros)
+                if parametros:
+                    cursor.execute(query, parametros)
+                else:
+                    cursor.execute(query)
+                tocadas.update((tabla, id_registro) for id_registro in versiones)
+                resultados[id_entrada] = 'enviadas'
+            remota.commit()
+        self._propias.update(tocadas)
+        with self._lock, self._local(database) as conn:
+            for id_entrada, tabla, _query, _parametros, _versiones, id_local in lote:
+                if resultados[id_entrada] == 'enviadas':
+                    conn.execute("DELETE FROM cola_escrituras WHERE id = ?", (id_entrada,))
+                    columna_id = self.tablas.get(database, {}).get(tabla)
+                    if id_local is not None and columna_id is not None:
+                        # La fila real llega con la próxima actualización de la réplica
+                        conn.execute(f'DELETE FROM "{tabla}" WHERE "{columna_id}" = ?', (id_local,))
+                else:
+                    conn.execute("UPDATE cola_escrituras SET estado = 'conflicto', detalle = ? WHERE id = ?", (conflictos[id_entrada], id_entrada))
+                    Logger().warning(f"[OFFLINE] Escritura diferida no enviada por conflicto: {conflictos[id_entrada]}")
+        return resultados
+
+    def _enviar_de_a_una(self, database, lote):
+        """Una sentencia del lote falló: se reenvían de a una para aislarla y marcarla como error."""
+        resultados = {}
+        for entrada in lote:
+            try:
+                resultados.update(self._enviar_lote(database, [entrada]))
+            except Exception as e:
+                if es_error_de_conexion(e):
+                    raise
+                with self._lock, self._local(database) as conn:
+                    conn.execute("UPDATE cola_escrituras SET estado = 'error', detalle = ? WHERE id = ?", (str(e), entrada[0]))
+                Logger().error(f"[OFFLINE] El servidor rechazó una escritura diferida ({entrada[1]}): {e}")
+                resultados[entrada[0]] = 'errores'
+        return resultados
+
+    def _versiones_remotas(self, cursor, database, lote):
+        """{(tabla, id): rowversion} de las filas que tocan las entradas del lote, bloqueadas hasta el commit."""
+        ids = {}
+        for _id_entrada, tabla, _query, _parametros, versiones, _id_local in lote:
+            for id_registro, version in (json.loads(versiones) if versiones else {}).items():
+                if version is not None and int(id_registro) >= 0:
+                    ids.setdefault(tabla, set()).add(int(id_registro))
+        actuales = {}
+        for tabla, conjunto in ids.items():
+            # Una cola de una sesión anterior puede nombrar una tabla que ya no se replica: sin control de versión
+            columna_id = self.tablas.get(database, {}).get(tabla)
+            if columna_id is None:
+                continue
+            conjunto = sorted(conjunto)
+            for inicio in range(0, len(conjunto), 500):
+                trozo = conjunto[inicio:inicio + 500]
+                cursor.execute(
+                    f"SELECT {columna_id}, CAST(rowversion AS BIGINT) FROM {tabla} WITH (UPDLOCK, HOLDLOCK) "
+                    f"WHERE {columna_id} IN ({', '.join('?' * len(trozo))})", trozo
+                )
+                actuales.update({(tabla, str(fila[0])): fila[1] for fila in cursor.fetchall()})
+        return actuales
+
+    def _conflicto(self, tabla, versiones, actuales, tocadas):
+        """Motivo del conflicto si alguna fila afectada cambió en el servidor desde que se leyó, o None."""
+        for id_registro, version in versiones.items():
+            clave = (tabla, id_registro)
+            if version is None or clave in tocadas or clave in self._propias:
+                continue
+            if int(id_registro) < 0:
+                return f"{tabla} {id_registro}: el registro se creó sin conexión y todavía no tiene id en el servidor"
+            if clave not in actuales:
+                return f"{tabla} {id_registro}: el registro fue eliminado en el servidor"
+            if actuales[clave] != version:
+                return f"{tabla} {id_registro}: el registro fue modificado en el servidor por otro usuario"
+        return None
+
+    def pendientes(self):
+        return sum(self._contar(database, "pendiente") for database in self.tablas)
+
+    def conflictos(self):
+        """Entradas que no se enviaron por conflicto o error: [(base, tabla, query, estado, detalle, fecha)]."""
+        entradas = []
+        for database in self.tablas:
+            with self._lock:
+                filas = self._local(database).execute(
+                    "SELECT tabla, query, estado, detalle, fecha FROM cola_escrituras WHERE estado <> 'pendiente' ORDER BY id"
+                ).fetchall()
+            entradas.extend((database,) + tuple(fila) for fila in filas)
+        return entradas
+
+    def _contar(self, database, estado):
+        with self._lock:
+            return self._local(database).execute("SELECT COUNT(*) FROM cola_escrituras WHERE estado = ?", (estado,)).fetchone()[0]
+
+    # --- Ciclo de sincronización ---
+    def sincronizar(self):
+        """
+        Envía la cola y después actualiza la réplica de cada base.
+        Devuelve {'enviadas', 'conflictos', 'errores', 'pendientes', 'en_linea'}.
+        """
+        with self._lock_sincronizacion:
+            resumen = {'enviadas': 0, 'conflictos': 0, 'errores': 0}
+            try:
+                for database in self.tablas:
+                    for clave, cantidad in self.reproducir_cola(database).items():
+                        resumen[clave] += cantidad
+                    self.actualizar_replica(database)
+                self.en_linea = True
+            except Exception as e:
+                self.en_linea = False
+                Logger().warning(f"[OFFLINE] Sin conexión con el servidor, la cola se reintentará: {e}")
+            resumen['pendientes'] = self.pendientes()
+            resumen['en_linea'] = self.en_linea
+            return resumen
+
+    def iniciar(self):
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._detenido.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="MotorOffline", daemon=True)
+        self._hilo.start()
+
+    def _bucle(self):
+        while not self._detenido.is_set():
+            resumen = self.sincronizar()
+            if self.desactivar_al_vaciar and not resumen['pendientes']:
+                _soltar_motor(self)
+                return
+            self._hay_lote.wait(self.intervalo)
+            self._hay_lote.clear()
+
+    def detener(self, timeout=5.0):
+        self._detenido.set()
+        self._hay_lote.set()
+        if self._hilo is not None and self._hilo is not threading.current_thread():
+            self._hilo.join(timeout)
+        self._hilo = None
+        with self._lock:
+            for conn in self._locales.values():
+                conn.close()
+            self._locales.clear()
+
+_MOTOR = None
+_LOCK_MOTOR = threading.Lock()
+
+def _directorio_config():
+    from core.config import OFFLINE_REPLICA_DIR
+    return OFFLINE_REPLICA_DIR
+
+def activar_motor_offline(**opciones):
+    """Crea e inicia el motor de proceso (una sola vez). Las opciones por defecto salen de core.config."""
+    global _MOTOR
+    with _LOCK_MOTOR:
+        if _MOTOR is None:
+            from core.config import OFFLINE_INTERVALO_SINCRONIZACION, OFFLINE_LOTE_ENVIO
+            opciones.setdefault("directorio", _directorio_config())
+            opciones.setdefault("intervalo", OFFLINE_INTERVALO_SINCRONIZACION)
+            opciones.setdefault("tamano_lote", OFFLINE_LOTE_ENVIO)
+            _MOTOR = MotorOffline(**opciones)
+            os.makedirs(_MOTOR.directorio, exist_ok=True)
+            open(os.path.join(_MOTOR.directorio, MARCADOR_ACTIVO), "w").close()
+            _MOTOR.iniciar()
+            atexit.register(detener_motor_offline)
+        _MOTOR.desactivar_al_vaciar = False
+        return _MOTOR
+
+def motor_offline_activo():
+    return _MOTOR
+
+def desactivar_motor_offline():
+    """
+    Envía la cola y apaga el motor. Si quedan escrituras sin enviar (sin conexión) el motor sigue
+    activo hasta vaciarla, para no mezclar escrituras directas con otras más viejas todavía en cola.
+    Devuelve el resumen de sincronizar(), o None si el motor no estaba activo.
+    """
+    motor = _MOTOR
+    if motor is None:
+        return None
+    resumen = motor.sincronizar()
+    if resumen['pendientes']:
+        motor.desactivar_al_vaciar = True
+    else:
+        _soltar_motor(motor)
+    return resumen
+
+def _soltar_motor(motor):
+    global _MOTOR
+    with _LOCK_MOTOR:
+        if _MOTOR is motor:
+            _MOTOR = None
+    try:
+        os.remove(os.path.join(motor.directorio, MARCADOR_ACTIVO))
+    except OSError:
+        pass
+    motor.detener()
+
+def detener_motor_offline():
+    """Detiene el hilo al salir de la aplicación; el modo y la cola quedan para reanudar_modo_offline()."""
+    global _MOTOR
+    with _LOCK_MOTOR:
+        motor, _MOTOR = _MOTOR, None
+    if motor is not None:
+        motor.detener()
+
+def reanudar_modo_offline():
+    """Reactiva el motor si la sesión anterior terminó en modo offline o con escrituras sin enviar."""
+    if os.path.exists(os.path.join(_directorio_config(), MARCADOR_ACTIVO)):
+        return activar_motor_offline()
+    return None
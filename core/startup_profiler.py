@@ -0,0 +1,69 @@
+"""
+Perfilador del arranque de la aplicación.
+
+Registra cuánto tarda cada etapa del arranque (chequeo de dependencias, imports de cada módulo,
+construcción de vistas/controladores) para saber qué retrasa la aparición del login y de la ventana principal.
+
+Uso:
+    from core.startup_profiler import profiler_arranque
+    with profiler_arranque.medir("import", "modules.inventario.view"):
+        from modules.inventario.view import InventarioView
+    modulo = profiler_arranque.importar("modules.logistica.view")   # import medido
+    profiler_arranque.registrar_resumen()                         # escribe el ranking en el log
+
+Con PERFIL_ARRANQUE=1 el resumen también se imprime por consola.
+"""
+import importlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+class StartupProfiler:
+    def __init__(self):
+        self._inicio = time.perf_counter()
+        self._mediciones = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def medir(self, tipo, nombre):
+        """Mide el bloque y lo registra como (tipo, nombre, segundos)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(tipo, nombre, time.perf_counter() - inicio)
+
+    def registrar(self, tipo, nombre, segundos):
+        with self._lock:
+            self._mediciones.append((tipo, nombre, segundos))
+
+    def importar(self, nombre_modulo):
+        """importlib.import_module midiendo el tiempo (el primer import es el que cuesta)."""
+        with self.medir("import", nombre_modulo):
+            return importlib.import_module(nombre_modulo)
+
+    def marcar(self, hito):
+        """Registra el tiempo transcurrido desde que arrancó el proceso hasta `hito`."""
+        self.registrar("hito", hito, time.perf_counter() - self._inicio)
+
+    def mediciones(self, tipo=None):
+        with self._lock:
+            return [m for m in self._mediciones if tipo is None or m[0] == tipo]
+
+    def resumen(self, limite=15):
+        """Las mediciones más lentas (sin hitos), de mayor a menor."""
+        etapas = [m for m in self.mediciones() if m[0] != "hito"]
+        return sorted(etapas, key=lambda m: m[2], reverse=True)[:limite]
+
+    def registrar_resumen(self, limite=15):
+        lineas = [f"{tipo:<12} {nombre:<45} {segundos * 1000:8.1f} ms" for tipo, nombre, segundos in self.resumen(limite)]
+        lineas += [f"{'hito':<12} {nombre:<45} {segundos * 1000:8.1f} ms" for _, nombre, segundos in self.mediciones("hito")]
+        texto = "[ARRANQUE] Perfil de arranque:\n" + "\n".join(lineas)
+        from core.logger import Logger
+        Logger().info(texto)
+        if os.getenv("PERFIL_ARRANQUE", "0").lower() in ("1", "true", "si", "sí"):
+            print(texto, flush=True)
+        return texto
+
+profiler_arranque = StartupProfiler()
@@ -0,0 +1,310 @@
+"""
+Motor de movimientos de stock compartido por perfiles (inventario), herrajes y vidrios.
+
+Antes cada operación leía stock_actual con un SELECT, lo validaba en Python, hacía el UPDATE y después
+el INSERT del movimiento: 3-5 viajes por ítem y una carrera entre el SELECT y el UPDATE cuando dos usuarios
+reservaban el mismo material. Acá el control lo hace la propia sentencia:
+
+    UPDATE herrajes SET stock_actual = stock_actual - ?
+    OUTPUT inserted.id_herraje, deleted.stock_actual, inserted.stock_actual
+    WHERE id_herraje = ? AND stock_actual >= ?
+
+(para varios ítems, el mismo UPDATE contra un JOIN a una lista VALUES). Los ítems que no vuelven en el
+OUTPUT no tenían stock suficiente o no existen: se lanza StockInsuficiente o ItemNoEncontrado y la
+transacción hace rollback, así nunca queda aplicado un lote a medias. Los movimientos, las reservas de la
+obra y los lotes adicionales del llamador se envían con ejecutar_lote en la misma transacción.
+Después del commit se emite event_bus.stock_modificado({'tipo': ..., 'cambios': {id: (anterior, nuevo)}}).
+
+Uso:
+    cambios = aplicar_movimientos(db, "herrajes", [(id_herraje, -3)], usuario)   # {id: (anterior, nuevo)}
+    aplicar_movimientos(db, "perfiles", [(id_perfil, 5, "Rotura")], usuario, tipo_movimiento="ajuste")
+    aplicar_movimientos_por_tipo(db, {"perfiles": [(1, 5)], "vidrios": [(4, 2)]}, usuario)  # una transacción
+    anterior = fijar_stock(db, "herrajes", id_herraje, 10, usuario)             # ajuste absoluto
+    reservar_para_obra(db, "vidrios", id_obra, [(id_vidrio, 2)], usuario)
+    reservar_materiales_obra(id_obra, [(db_inventario, "perfiles", [(1, 5)]), (db_herrajes, "herrajes", [(7, 2)])], usuario)
+
+Entre bases distintas no hay commit distribuido: reservar_materiales_obra confirma una base por vez y, si
+falla un commit cuando otra ya confirmó, lanza ReservaIncompleta indicando qué tipos quedaron reservados.
+"""
+from collections import namedtuple
+from contextlib import ExitStack
+from core.event_bus import event_bus
+
+TablaStock = namedtuple("TablaStock", "tabla columna_id nombre movimientos columna_movimiento reservas")
+
+TABLAS_STOCK = {
+    "perfiles": TablaStock("inventario_perfiles", "id", "perfil", "movimientos_stock", "id_perfil", "reservas_materiales"),
+    "herrajes": TablaStock("herrajes", "id_herraje", "herraje", "movimientos_herrajes", "id_herraje", "herrajes_por_obra"),
+    "vidrios": TablaStock("vidrios", "id_vidrio", "vidrio", "movimientos_vidrios", "id_vidrio", "vidrios_por_obra"),
+}
+
+# Dos parámetros por ítem: 1000 ítems por sentencia quedan debajo del límite de 2100 de SQL Server
+ITEMS_POR_SENTENCIA = 1000
+
+class ErrorStock(ValueError):
+    def __init__(self, mensaje, tipo, ids, stocks=None):
+        super().__init__(mensaje)
+        self.tipo = tipo
+        self.ids = list(ids)
+        self.stocks = stocks or {}
+
+class StockInsuficiente(ErrorStock):
+    pass
+
+class ItemNoEncontrado(ErrorStock):
+    pass
+
+class ReservaIncompleta(RuntimeError):
+    """Falló un commit de reservar_materiales_obra después de que otra base ya había confirmado su parte."""
+    def __init__(self, id_obra, confirmados, causa):
+        super().__init__(f"La reserva de la obra {id_obra} quedó incompleta: se confirmaron {', '.join(confirmados)} "
+                         f"pero falló el resto ({causa}).")
+        self.id_obra = id_obra
+        self.confirmados = list(confirmados)
+
+def _tabla(tipo):
+    if tipo not in TABLAS_STOCK:
+        raise ValueError(f"Tipo de material no soportado: {tipo}")
+    return TABLAS_STOCK[tipo]
+
+def _agrupar(ajustes):
+    """Suma las cantidades repetidas de un mismo ítem: [(id, cantidad), ...] -> {id: cantidad}."""
+    cambios = {}
+    for id_item, cantidad in ajustes:
+        cambios[id_item] = cambios.get(id_item, 0) + cantidad
+    return cambios
+
+def _cantidades_a_reservar(items):
+    cantidades = {}
+    for id_item, cantidad in items:
+        if cantidad is None or cantidad <= 0:
+            raise ValueError("Cantidad inválida")
+        cantidades[id_item] = cantidades.get(id_item, 0) + cantidad
+    return cantidades
+
+def _sentencia_descuento(tabla, cantidad_items):
+    salida = f"OUTPUT inserted.{tabla.columna_id}, deleted.stock_actual, inserted.stock_actual"
+    if cantidad_items == 1:
+        return (f"UPDATE {tabla.tabla} SET stock_actual = stock_actual - ? {salida} "
+                f"WHERE {tabla.columna_id} = ? AND stock_actual >= ?")
+    valores = ", ".join("(?, ?)" for _ in range(cantidad_items))
+    return (f"UPDATE t SET stock_actual = t.stock_actual - v.cantidad {salida} "
+            f"FROM {tabla.tabla} AS t JOIN (VALUES {valores}) AS v (id_item, cantidad) ON t.{tabla.columna_id} = v.id_item "
+            f"WHERE t.stock_actual >= v.cantidad")
+
+def _diagnosticar(db, tipo, tabla, faltantes):
+    """Sólo se consulta cuando el UPDATE dejó ítems afuera: distingue inexistentes de stock insuficiente."""
+    marcadores = ", ".join("?" for _ in faltantes)
+    filas = db.ejecutar_query(
+        f"SELECT {tabla.columna_id}, stock_actual FROM {tabla.tabla} WHERE {tabla.columna_id} IN ({marcadores})", tuple(faltantes)
+    ) or []
+    stocks = {fila[0]: fila[1] for fila in filas}
+    inexistentes = [id_item for id_item in faltantes if id_item not in stocks]
+    if inexistentes:
+        ids = ", ".join(str(id_item) for id_item in inexistentes)
+        raise ItemNoEncontrado(f"{tabla.nombre.capitalize()} no encontrado: {ids}", tipo, inexistentes)
+    ids = ", ".join(str(id_item) for id_item in faltantes)
+    raise StockInsuficiente(f"Stock insuficiente para el {tabla.nombre} {ids}", tipo, faltantes, stocks)
+
+def _movimientos_detallados(ajustes, tipo_movimiento):
+    """
+    Filas (id, tipo_movimiento, cantidad, referencia) de movimiento, una por ajuste, cuando el llamador pasa
+    un tipo de movimiento o referencias; None para el registro por defecto (un Ingreso/Egreso por ítem).
+    Con tipo explícito la cantidad se guarda con signo, como InventarioModel.registrar_movimiento.
+    """
+    if tipo_movimiento is None and all(len(ajuste) < 3 for ajuste in ajustes):
+        return None
+    movimientos = []
+    for ajuste in ajustes:
+        id_item, cantidad = ajuste[0], ajuste[1]
+        referencia = str(ajuste[2]) if len(ajuste) > 2 and ajuste[2] is not None else None
+        if not cantidad:
+            continue
+        if tipo_movimiento is None:
+            movimientos.append((id_item, 'Ingreso' if cantidad > 0 else 'Egreso', abs(cantidad), referencia))
+        else:
+            movimientos.append((id_item, tipo_movimiento, cantidad, referencia))
+    return movimientos
+
+def _registrar_movimientos(db, tabla, movimientos, usuario):
+    columnas = f"{tabla.columna_movimiento}, tipo_movimiento, cantidad, fecha, usuario"
+    # La columna referencia sólo se escribe si algún movimiento la trae (movimientos_stock la tiene)
+    if any(referencia is not None for *_datos, referencia in movimientos):
+        db.ejecutar_lote(
+            f"INSERT INTO {tabla.movimientos} ({columnas}, referencia) VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?, ?)",
+            [(id_item, tipo, cantidad, usuario or "", referencia) for id_item, tipo, cantidad, referencia in movimientos]
+        )
+        return
+    db.ejecutar_lote(
+        f"INSERT INTO {tabla.movimientos} ({columnas}) VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?)",
+        [(id_item, tipo, cantidad, usuario or "") for id_item, tipo, cantidad, _referencia in movimientos]
+    )
+
+def _mover(db, tipo, cambios, usuario, movimientos=None):
+    """
+    Aplica {id: cantidad con signo} con el UPDATE condicionado y registra los movimientos (por defecto un
+    Ingreso/Egreso por ítem, o las filas de `movimientos`). Requiere transacción activa.
+    """
+    tabla = _tabla(tipo)
+    cambios = {id_item: cantidad for id_item, cantidad in cambios.items() if cantidad}
+    if not cambios:
+        return {}
+    resultado = {}
+    # La sentencia descuenta: un ingreso es un descuento negativo y la condición se cumple siempre
+    descuentos = [(id_item, -cantidad) for id_item, cantidad in cambios.items()]
+    for inicio in range(0, len(descuentos), ITEMS_POR_SENTENCIA):
+        bloque = descuentos[inicio:inicio + ITEMS_POR_SENTENCIA]
+        if len(bloque) == 1:
+            id_item, descuento = bloque[0]
+            parametros = (descuento, id_item, descuento)
+        else:
+            parametros = tuple(valor for item in bloque for valor in item)
+        filas = db.ejecutar_query(_sentencia_descuento(tabla, len(bloque)), parametros) or []
+        resultado.update({fila[0]: (fila[1], fila[2]) for fila in filas})
+    faltantes = [id_item for id_item in cambios if id_item not in resultado]
+    if faltantes:
+        _diagnosticar(db, tipo, tabla, faltantes)
+    if movimientos is None:
+        movimientos = [(id_item, 'Ingreso' if cantidad > 0 else 'Egreso', abs(cantidad), None) for id_item, cantidad in cambios.items()]
+    _registrar_movimientos(db, tabla, movimientos, usuario)
+    return resultado
+
+def _registrar_reservas(db, tabla, id_obra, cantidades):
+    if tabla.reservas == "reservas_materiales":
+        # Perfiles: cada reserva es una fila nueva con la obra como referencia
+        db.ejecutar_lote(
+            "INSERT INTO reservas_materiales (id_perfil, cantidad_reservada, referencia_obra, estado) VALUES (?, ?, ?, 'activa')",
+            [(id_item, cantidad, str(id_obra)) for id_item, cantidad in cantidades.items()]
+        )
+        return
+    # Herrajes y vidrios: una fila por obra e ítem que acumula lo reservado (upsert sin leer antes)
+    columna = tabla.columna_movimiento
+    db.ejecutar_lote(
+        f"UPDATE {tabla.reservas} SET cantidad_reservada = cantidad_reservada + ?, estado = 'Reservado' WHERE id_obra = ? AND {columna} = ?",
+        [(cantidad, id_obra, id_item) for id_item, cantidad in cantidades.items()]
+    )
+    db.ejecutar_lote(
+        f"INSERT INTO {tabla.reservas} (id_obra, {columna}, cantidad_reservada, estado) SELECT ?, ?, ?, 'Reservado' "
+        f"WHERE NOT EXISTS (SELECT 1 FROM {tabla.reservas} WHERE id_obra = ? AND {columna} = ?)",
+        [(id_obra, id_item, cantidad, id_obra, id_item) for id_item, cantidad in cantidades.items()]
+    )
+
+def _ejecutar_lotes_adicionales(db, lotes_adicionales):
+    for query, filas in lotes_adicionales or ():
+        db.ejecutar_lote(query, filas)
+
+def _al_confirmar(db, callback):
+    al_confirmar = getattr(db, "al_confirmar", None)
+    if al_confirmar is not None:
+        al_confirmar(callback)
+    else:
+        callback()
+
+def _avisar_stock_modificado(db, tipo, cambios):
+    if not cambios:
+        return
+    datos = {'tipo': tipo, 'cambios': dict(cambios)}
+    # Dentro de una transacción del llamador el aviso espera a su commit (y no sale si se revierte)
+    _al_confirmar(db, lambda: event_bus.stock_modificado.emit(datos))
+
+def aplicar_movimientos(db, tipo, ajustes, usuario=None, lotes_adicionales=None, tipo_movimiento=None):
+    """
+    Suma/resta stock a varios ítems [(id, cantidad con signo), ...] en una transacción.
+    Ningún ítem puede quedar negativo: si uno falla se lanza StockInsuficiente/ItemNoEncontrado y no se aplica nada.
+    Cada ajuste puede traer una referencia (motivo, pedido) como tercer elemento, que se guarda en la columna
+    referencia de su movimiento; con `tipo_movimiento` (p. ej. 'ajuste') se registra un movimiento por ajuste
+    con ese tipo en lugar de un Ingreso/Egreso por ítem.
+    `lotes_adicionales` [(query, filas), ...] se ejecutan con ejecutar_lote dentro de la misma transacción.
+    Devuelve {id: (stock_anterior, stock_nuevo)}.
+    """
+    return aplicar_movimientos_por_tipo(db, {tipo: ajustes}, usuario, lotes_adicionales, tipo_movimiento)[tipo]
+
+def aplicar_movimientos_por_tipo(db, ajustes_por_tipo, usuario=None, lotes_adicionales=None, tipo_movimiento=None):
+    """
+    Como aplicar_movimientos, para varios tipos de material de una misma base {tipo: [(id, cantidad), ...]}
+    en una sola transacción (p. ej. la recepción de un pedido con perfiles, herrajes y vidrios).
+    Devuelve {tipo: {id: (stock_anterior, stock_nuevo)}}.
+    """
+    pendientes = []
+    for tipo, ajustes in ajustes_por_tipo.items():
+        _tabla(tipo)
+        ajustes = list(ajustes)
+        pendientes.append((tipo, _agrupar((ajuste[0], ajuste[1]) for ajuste in ajustes), _movimientos_detallados(ajustes, tipo_movimiento)))
+    resultado = {}
+    with db.transaction(timeout=30, retries=2):
+        for tipo, cambios, movimientos in pendientes:
+            resultado[tipo] = _mover(db, tipo, cambios, usuario, movimientos)
+        _ejecutar_lotes_adicionales(db, lotes_adicionales)
+    for tipo, cambios in resultado.items():
+        _avisar_stock_modificado(db, tipo, cambios)
+    return resultado
+
+def fijar_stock(db, tipo, id_item, cantidad, usuario=None, lotes_adicionales=None):
+    """Ajuste absoluto del stock de un ítem con un solo UPDATE ... OUTPUT. Devuelve el stock anterior."""
+    tabla = _tabla(tipo)
+    with db.transaction(timeout=30, retries=2):
+        filas = db.ejecutar_query(
+            f"UPDATE {tabla.tabla} SET stock_actual = ? OUTPUT deleted.stock_actual WHERE {tabla.columna_id} = ?",
+            (cantidad, id_item)
+        )
+        if not filas:
+            raise ItemNoEncontrado(f"{tabla.nombre.capitalize()} no encontrado: {id_item}", tipo, [id_item])
+        anterior = filas[0][0]
+        db.ejecutar_lote(
+            f"INSERT INTO {tabla.movimientos} ({tabla.columna_movimiento}, tipo_movimiento, cantidad, fecha, usuario) VALUES (?, 'Ajuste', ?, CURRENT_TIMESTAMP, ?)",
+            [(id_item, abs(cantidad - (anterior or 0)), usuario or "")]
+        )
+        _ejecutar_lotes_adicionales(db, lotes_adicionales)
+    _avisar_stock_modificado(db, tipo, {id_item: (anterior, cantidad)})
+    return anterior
+
+def reservar_para_obra(db, tipo, id_obra, items, usuario=None, lotes_adicionales=None):
+    """
+    Reserva varios ítems de un tipo [(id, cantidad), ...] para una obra en una transacción: descuenta el stock
+    con el UPDATE condicionado, registra los egresos y la reserva. Si un ítem no alcanza no se reserva ninguno.
+    Devuelve {id: (stock_anterior, stock_nuevo)}.
+    """
+    return reservar_materiales_obra(id_obra, [(db, tipo, items, lotes_adicionales)], usuario)[tipo]
+
+def reservar_materiales_obra(id_obra, pedidos, usuario=None):
+    """
+    Reserva de una vez todo lo que necesita una obra: `pedidos` es [(db, tipo, [(id, cantidad), ...]), ...]
+    (opcionalmente con un cuarto elemento: lotes adicionales para esa conexión).
+    Cada módulo tiene sus tablas en su propia base, así que se abre una transacción por conexión. Si falla
+    cualquier ítem de cualquier tipo antes de confirmar, se revierten todas. Los commits se hacen uno por
+    conexión cuando ya se movió todo, de modo que entre bases distintas es best-effort: si falla un commit
+    después de que otro se confirmó, se lanza ReservaIncompleta con los tipos que sí quedaron reservados.
+    Devuelve {tipo: {id: (stock_anterior, stock_nuevo)}}.
+    """
+    por_conexion = {}
+    for pedido in pedidos:
+        db, tipo, items = pedido[:3]
+        lotes = pedido[3] if len(pedido) > 3 else None
+        _tabla(tipo)
+        cantidades = _cantidades_a_reservar(items)
+        grupo = por_conexion.setdefault(id(db), (db, [], []))
+        if cantidades:
+            grupo[1].append((tipo, cantidades))
+        grupo[2].extend(lotes or ())
+    resultado = {pedido[1]: {} for pedido in pedidos}
+    confirmados = []
+    movido = False
+    try:
+        with ExitStack() as transacciones:
+            for db, reservas, lotes in por_conexion.values():
+                if not reservas and not lotes:
+                    continue
+                transacciones.enter_context(db.transaction(timeout=30, retries=2))
+                for tipo, cantidades in reservas:
+                    resultado[tipo].update(_mover(db, tipo, {id_item: -cantidad for id_item, cantidad in cantidades.items()}, usuario))
+                    _registrar_reservas(db, TABLAS_STOCK[tipo], id_obra, cantidades)
+                    # Se avisa (y se anota como confirmado) recién cuando commitea esta conexión.
+                    _avisar_stock_modificado(db, tipo, resultado[tipo])
+                    _al_confirmar(db, lambda tipo=tipo: confirmados.append(tipo))
+                _ejecutar_lotes_adicionales(db, lotes)
+            movido = True
+    except Exception as e:
+        if movido and confirmados:
+            raise ReservaIncompleta(id_obra, confirmados, e) from e
+        raise
+    return resultado
@@ -3,6 +3,21 @@ from PyQt6.QtGui import QAction
 from PyQt6.QtCore import Qt, QPoint
 import os, json
 
+def _cantidad_columnas(table):
+    # QTableWidget expone columnCount(); un QTableView lo delega en su modelo
+    if hasattr(table, "columnCount"):
+        return table.columnCount()
+    modelo = table.model()
+    return modelo.columnCount() if modelo is not None else 0
+
+def _nombre_columna(table, i):
+    if hasattr(table, "horizontalHeaderItem"):
+        item = table.horizontalHeaderItem(i)
+        return item.text() if item and hasattr(item, 'text') else f"Columna {i+1}"
+    modelo = table.model()
+    nombre = modelo.headerData(i, Qt.Orientation.Horizontal) if modelo is not None else None
+    return str(nombre) if nombre else f"Columna {i+1}"
+
 class TableResponsiveMixin:
     def make_table_responsive(self, table: QTableWidget, persist_id=None):
         """
@@ -19,7 +34,7 @@ class TableResponsiveMixin:
             horizontal_header.setDefaultSectionSize(120)
             # No usar setStyleSheet aquí. El estilo visual de headers se gestiona por QSS de theme global.
             horizontal_header.setVisible(True)
-            for i in range(table.columnCount()):
+            for i in range(_cantidad_columnas(table)):
                 horizontal_header.setSectionHidden(i, False)
         v_header = table.verticalHeader()
         if v_header is not None:
@@ -32,14 +47,14 @@ class TableResponsiveMixin:
         # Persistencia de columnas ocultas
         config_path = f".table_columns_{persist_id or table.objectName() or id(table)}.json"
         def save_column_config():
-            config = {str(i): not table.isColumnHidden(i) for i in range(table.columnCount())}
+            config = {str(i): not table.isColumnHidden(i) for i in range(_cantidad_columnas(table))}
             with open(config_path, "w", encoding="utf-8") as f:
                 json.dump(config, f)
         def load_column_config():
             if os.path.exists(config_path):
                 with open(config_path, "r", encoding="utf-8") as f:
                     config = json.load(f)
-                for i in range(table.columnCount()):
+                for i in range(_cantidad_columnas(table)):
                     visible = config.get(str(i), True)
                     table.setColumnHidden(i, not visible)
         def show_column_menu(pos):
@@ -47,9 +62,8 @@ class TableResponsiveMixin:
             if header is None:
                 return
             menu = QMenu(table)
-            for i in range(table.columnCount()):
-                item = table.horizontalHeaderItem(i)
-                col_name = item.text() if item and hasattr(item, 'text') else f"Columna {i+1}"
+            for i in range(_cantidad_columnas(table)):
+                col_name = _nombre_columna(table, i)
                 action = QAction(col_name, menu)
                 action.setCheckable(True)
                 action.setChecked(not table.isColumnHidden(i))
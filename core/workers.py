@@ -0,0 +1,272 @@
+"""
+Capa de tareas en segundo plano para consultas a la base de datos.
+
+Las consultas pyodbc bloquean; si se ejecutan en el hilo de la GUI la ventana se congela mientras
+el SQL Server remoto responde. Los controladores deben separar cada carga en dos partes:
+- la consulta (se ejecuta en un hilo del QThreadPool compartido)
+- la actualización de la vista (se ejecuta en el hilo de la GUI al recibir la señal `resultado`)
+
+Uso:
+    ejecutar_en_segundo_plano(
+        self.model.obtener_vidrios,
+        al_terminar=self._mostrar_vidrios,
+        al_error=self._error_refrescar,
+        vista=self.view,                       # muestra/oculta mostrar_feedback_carga
+        mensaje_carga="Cargando vidrios...",
+        clave="vidrios.refrescar",             # cancela una carga anterior con la misma clave
+    )
+
+Las tareas largas (exportaciones) pueden informar avance y consultar si fueron canceladas con
+tarea_actual().informar_progreso(hechos, total) / tarea_actual().cancelada; el avance llega a `al_progreso`.
+core.exportacion.exportar_filas los toma de la tarea en curso sin importar este módulo (ver
+registrar_avisos_de_tarea al final); mostrar_progreso_exportacion y cancelar_exportacion son los
+helpers de los controladores para esas exportaciones, y ExportacionEnSegundoPlanoMixin los reúne para
+los controladores con varias exportaciones.
+
+Con la variable de entorno TAREAS_SINCRONICAS=1 las tareas se ejecutan en línea (tests y scripts sin event loop).
+"""
+import os
+import threading
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from core.exportacion import registrar_avisos_de_tarea
+from core.logger import Logger
+
+class SenalesTarea(QObject):
+    resultado = pyqtSignal(object)
+    error = pyqtSignal(object)
+    finalizada = pyqtSignal()
+    progreso = pyqtSignal(int, int)
+
+class TareaBD(QRunnable):
+    """
+    Ejecuta `funcion(*args, **kwargs)` en un hilo del pool y emite `resultado` o `error`.
+    La cancelación es cooperativa: si la tarea todavía está en cola no se ejecuta; si ya está
+    corriendo, su resultado se descarta y no se emite ninguna señal salvo `finalizada`.
+    """
+    def __init__(self, funcion, args=(), kwargs=None, clave=None):
+        super().__init__()
+        # La referencia Python se mantiene en _TAREAS_ACTIVAS; Qt no debe borrar el objeto
+        self.setAutoDelete(False)
+        self.funcion = funcion
+        self.args = tuple(args)
+        self.kwargs = kwargs or {}
+        self.clave = clave
+        self.resultado = None
+        self.excepcion = None
+        self.senales = SenalesTarea()
+        self._cancelada = threading.Event()
+
+    @property
+    def cancelada(self):
+        return self._cancelada.is_set()
+
+    def cancelar(self):
+        self._cancelada.set()
+        if _pool().tryTake(self):
+            # Nunca llegó a correr: se avisa igual para liberar el feedback de carga
+            self.senales.finalizada.emit()
+
+    def informar_progreso(self, hechos, total=0):
+        """Llamar desde `funcion` (vía tarea_actual()); `total` 0 si no se conoce."""
+        if not self.cancelada:
+            self.senales.progreso.emit(int(hechos), int(total or 0))
+
+    def run(self):
+        _LOCAL.tarea = self
+        try:
+            if self.cancelada:
+                return
+            try:
+                resultado = self.funcion(*self.args, **self.kwargs)
+            except Exception as e:
+                self.excepcion = e
+                if not self.cancelada:
+                    Logger().error(f"Error en tarea de segundo plano '{self.clave or getattr(self.funcion, '__name__', self.funcion)}': {e}")
+                    self.senales.error.emit(e)
+                return
+            self.resultado = resultado
+            if not self.cancelada:
+                self.senales.resultado.emit(resultado)
+        finally:
+            _LOCAL.tarea = None
+            self.senales.finalizada.emit()
+
+_POOL = None
+_LOCK = threading.Lock()
+_TAREAS_ACTIVAS = set()
+_TAREAS_POR_CLAVE = {}
+_CARGAS_POR_VISTA = {}
+_LOCAL = threading.local()
+
+def tarea_actual():
+    """La TareaBD que se está ejecutando en este hilo, o None fuera de una tarea."""
+    return getattr(_LOCAL, "tarea", None)
+
+def _pool():
+    global _POOL
+    with _LOCK:
+        if _POOL is None:
+            _POOL = QThreadPool()
+            try:
+                from core.config import DB_POOL_MAX_SIZE
+                maximo = DB_POOL_MAX_SIZE
+            except Exception:
+                maximo = 4
+            # No tiene sentido tener más hilos que conexiones disponibles en el pool de la base
+            _POOL.setMaxThreadCount(max(1, maximo))
+        return _POOL
+
+def ejecucion_sincronica():
+    return os.getenv("TAREAS_SINCRONICAS", "0").lower() in ("1", "true", "si", "sí")
+
+def _iniciar_carga(vista, mensaje):
+    if vista is None or not mensaje:
+        return
+    clave = id(vista)
+    _CARGAS_POR_VISTA[clave] = _CARGAS_POR_VISTA.get(clave, 0) + 1
+    if _CARGAS_POR_VISTA[clave] > 1:
+        return
+    try:
+        if hasattr(vista, "mostrar_feedback_carga"):
+            vista.mostrar_feedback_carga(mensaje)
+        elif hasattr(vista, "mostrar_progreso"):
+            vista.mostrar_progreso(True)
+    except Exception as e:
+        Logger().warning(f"No se pudo mostrar el feedback de carga: {e}")
+
+def _terminar_carga(vista, mensaje):
+    if vista is None or not mensaje:
+        return
+    clave = id(vista)
+    pendientes = _CARGAS_POR_VISTA.get(clave, 0) - 1
+    if pendientes > 0:
+        _CARGAS_POR_VISTA[clave] = pendientes
+        return
+    _CARGAS_POR_VISTA.pop(clave, None)
+    try:
+        if hasattr(vista, "ocultar_feedback_carga"):
+            vista.ocultar_feedback_carga()
+        elif hasattr(vista, "mostrar_progreso"):
+            vista.mostrar_progreso(False)
+    except Exception as e:
+        Logger().warning(f"No se pudo ocultar el feedback de carga: {e}")
+
+def ejecutar_en_segundo_plano(funcion, args=(), kwargs=None, al_terminar=None, al_error=None,
+                              vista=None, mensaje_carga="Cargando...", clave=None, al_progreso=None):
+    """
+    Encola `funcion` en el QThreadPool compartido y devuelve la TareaBD.
+    - al_terminar(resultado), al_error(excepcion) y al_progreso(hechos, total) se ejecutan en el hilo de la GUI.
+    - Si `vista` tiene mostrar_feedback_carga (o mostrar_progreso) se muestra mientras la tarea corre.
+    - `clave` identifica cargas equivalentes: una nueva cancela la anterior (p. ej. varios refrescos seguidos).
+    """
+    tarea = TareaBD(funcion, args, kwargs, clave)
+    if al_progreso:
+        tarea.senales.progreso.connect(al_progreso)
+    if ejecucion_sincronica():
+        tarea.run()
+        if tarea.excepcion is not None:
+            if al_error:
+                al_error(tarea.excepcion)
+        elif al_terminar:
+            al_terminar(tarea.resultado)
+        return tarea
+
+    if clave is not None:
+        anterior = _TAREAS_POR_CLAVE.get(clave)
+        if anterior is not None:
+            anterior.cancelar()
+        _TAREAS_POR_CLAVE[clave] = tarea
+    if al_terminar:
+        tarea.senales.resultado.connect(al_terminar)
+    if al_error:
+        tarea.senales.error.connect(al_error)
+
+    def _al_finalizar():
+        _TAREAS_ACTIVAS.discard(tarea)
+        if clave is not None and _TAREAS_POR_CLAVE.get(clave) is tarea:
+            del _TAREAS_POR_CLAVE[clave]
+        _terminar_carga(vista, mensaje_carga)
+
+    tarea.senales.finalizada.connect(_al_finalizar)
+    _TAREAS_ACTIVAS.add(tarea)
+    _iniciar_carga(vista, mensaje_carga)
+    _pool().start(tarea)
+    return tarea
+
+def cancelar_tareas(clave=None):
+    """Cancela la tarea con esa clave, o todas las pendientes si no se indica clave."""
+    tareas = [_TAREAS_POR_CLAVE.get(clave)] if clave is not None else list(_TAREAS_ACTIVAS)
+    for tarea in tareas:
+        if tarea is not None:
+            tarea.cancelar()
+
+def esperar_tareas(timeout_ms=5000):
+    """Espera a que terminen las tareas en curso (al cerrar la aplicación). Devuelve True si terminaron."""
+    if _POOL is None:
+        return True
+    return _POOL.waitForDone(timeout_ms)
+
+def mostrar_progreso_exportacion(vista, escritas, total=0):
+    """Muestra el avance en la barra de progreso de la vista (si tiene) o en su label."""
+    barra = getattr(vista, "progress_bar", None)
+    texto = f"Exportando... {escritas} de {total} filas" if total else f"Exportando... {escritas} filas"
+    try:
+        if barra is not None:
+            if total:
+                barra.setRange(0, total)
+                barra.setValue(escritas)
+            barra.setFormat(texto)
+        elif hasattr(vista, "label"):
+            vista.label.setText(texto)
+    except RuntimeError:
+        # La barra pertenece a un diálogo de carga que ya se cerró
+        pass
+
+def cancelar_exportacion(clave):
+    """Cancela la exportación en curso lanzada con esa clave (ver ejecutar_en_segundo_plano)."""
+    cancelar_tareas(clave)
+
+class ExportacionEnSegundoPlanoMixin:
+    """
+    Para controladores con varias exportaciones: _exportar_en_segundo_plano corre model.exportar_* en el pool
+    con avance en la vista, deja el mensaje final en view.label y lo registra con _registrar_evento_auditoria.
+    Cada tarea usa la clave f"{MODULO_EXPORTACION}.{accion}", que es la que cancela cancelar_exportacion(accion).
+    """
+    MODULO_EXPORTACION = ""
+    EXPORTACION_POR_DEFECTO = ""
+
+    def _estado_exportacion(self, mensaje):
+        """Estado que se audita cuando la exportación terminó con `mensaje`."""
+        return "éxito"
+
+    def _exportar_en_segundo_plano(self, exportar, formato, accion):
+        """Corre la exportación (streaming, ver core.exportacion) en un hilo del pool, con avance en la vista."""
+        def al_terminar(mensaje):
+            self.view.label.setText(mensaje)
+            self._registrar_evento_auditoria(accion, estado=self._estado_exportacion(mensaje))
+
+        def al_error(e):
+            self.view.label.setText(f"Error al exportar: {e}")
+            self._registrar_evento_auditoria(accion, estado="error")
+
+        return ejecutar_en_segundo_plano(
+            exportar,
+            args=(formato,),
+            al_terminar=al_terminar,
+            al_error=al_error,
+            al_progreso=lambda escritas, total: mostrar_progreso_exportacion(self.view, escritas, total),
+            vista=self.view,
+            mensaje_carga="Exportando...",
+            clave=f"{self.MODULO_EXPORTACION}.{accion}",
+        )
+
+    def cancelar_exportacion(self, accion=None):
+        cancelar_tareas(f"{self.MODULO_EXPORTACION}.{accion or self.EXPORTACION_POR_DEFECTO}")
+
+def _avisos_tarea_actual():
+    tarea = tarea_actual()
+    if tarea is None:
+        return None, None
+    return tarea.informar_progreso, lambda: tarea.cancelada
+
+registrar_avisos_de_tarea(_avisos_tarea_actual)
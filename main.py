@@ -68,7 +68,9 @@ import subprocess
 import os
 import platform
 import importlib.metadata as importlib_metadata  # Sustituye pkg_resources (deprecado)
-from core.event_bus import event_bus
+from core.event_bus import event_bus, despachador_eventos
+from core.conectividad import activar_monitor_conectividad, monitor_conectividad
+from core.startup_profiler import profiler_arranque
 
 # Forzar la codificación de salida estándar a UTF-8 para evitar errores con caracteres Unicode.
 # Solución compatible con Windows
@@ -262,9 +264,11 @@ def verificar_dependencias():
     faltantes_secundarios = chequear_dependencias(requeridos_secundarios, "[LOG 2.2.1]")
     manejar_dependencias_faltantes(faltantes_criticos, faltantes_secundarios)
 # Verificar e instalar dependencias críticas
-_verificar_e_instalar_dependencias()
+with profiler_arranque.medir("arranque", "instalar dependencias"):
+    _verificar_e_instalar_dependencias()
 # Ahora verificar dependencias instaladas y requeridas
-verificar_dependencias()
+with profiler_arranque.medir("arranque", "verificar dependencias"):
+    verificar_dependencias()
 import os
 # Refuerzo para evitar errores de OpenGL/Skia/Chromium en Windows
 os.environ['QT_OPENGL'] = 'software'
@@ -295,44 +299,12 @@ from core.startup_update_checker import check_and_update_critical_packages
 from core.splash_screen import SplashScreen
 
 # Verificar y actualizar paquetes críticos antes de continuar
-check_and_update_critical_packages()
-
-# Importar vistas
-from modules.inventario.view import InventarioView
-from modules.obras.view import ObrasView
-from modules.obras.produccion.view import ProduccionView  # Importar desde el módulo correcto
-from modules.logistica.view import LogisticaView
-from modules.compras.pedidos.view import PedidosView as ComprasPedidosView
-from modules.pedidos.view import PedidosView as PedidosIndependienteView
-from modules.usuarios.view import UsuariosView
-from modules.auditoria.view import AuditoriaView
-from modules.configuracion.view import ConfiguracionView
-from modules.mantenimiento.view import MantenimientoView
-from modules.contabilidad.view import ContabilidadView
-from modules.herrajes.view import HerrajesView
-
-# Importar controladores
-from modules.inventario.controller import InventarioController
-from modules.obras.controller import ObrasController
-from modules.obras.produccion.controller import ProduccionController  # Importar desde el módulo correcto
-from modules.logistica.controller import LogisticaController
-from modules.compras.pedidos.controller import ComprasPedidosController
-from modules.pedidos.controller import PedidosController
-from modules.usuarios.controller import UsuariosController
-from modules.auditoria.controller import AuditoriaController
-from modules.configuracion.controller import ConfiguracionController
-from modules.herrajes.controller import HerrajesController
-
-# Importar modelos
-from modules.inventario.model import InventarioModel
-from modules.obras.model import ObrasModel
-from modules.obras.produccion.model import ProduccionModel  # Importar desde el módulo correcto
-from modules.logistica.model import LogisticaModel
-from modules.compras.pedidos.model import PedidosModel  # Importar desde el módulo correcto
-from modules.usuarios.model import UsuariosModel
-from modules.auditoria.model import AuditoriaModel
-from modules.configuracion.model import ConfiguracionModel
-from modules.herrajes.model import HerrajesModel
+with profiler_arranque.medir("arranque", "actualizar paquetes críticos"):
+    check_and_update_critical_packages()
+
+# Las vistas, controladores y modelos de cada módulo NO se importan acá: se importan y construyen
+# la primera vez que se selecciona el módulo en la barra lateral (ver MainWindow._asegurar_modulo).
+# Importarlos todos al inicio (pandas, matplotlib, QWebEngine, reportlab...) demoraba varios segundos la ventana.
 
 # Importar componentes
 from components.sidebar_button import SidebarButton
@@ -378,13 +350,14 @@ class MainWindow(QMainWindow):
         self._controllers = {}
         # Inicializar modelos, vistas, controladores y layout principal
         self.logger = Logger()
-        self._init_models()
-        self._init_views_and_controllers(usuario)
+        self.usuario = usuario
+        with profiler_arranque.medir("ventana", "modelos"):
+            self._init_models()
         self._setup_main_layout()
         self._filter_modules_and_setup_sidebar(usuario, modulos_permitidos)
         self._connect_module_signals()
-        self._integrate_order_status_in_works()
         self._setup_conexion_checker()
+        profiler_arranque.marcar("ventana principal construida")
 
     def mostrar_mensaje(self, mensaje, tipo="info", duracion=4000):
         """
@@ -458,83 +431,177 @@ class MainWindow(QMainWindow):
         # Si producción está en inventario, se reutiliza
         return self.get_inventario_connection()
 
+    # Módulo -> (ruta del modelo, clase, conexión). Los modelos se crean al pedirlos con _modelo().
+    _MODELOS = {
+        'inventario': ('modules.inventario.model', 'InventarioModel', 'inventario'),
+        'obras': ('modules.obras.model', 'ObrasModel', 'inventario'),
+        'produccion': ('modules.obras.produccion.model', 'ProduccionModel', 'produccion'),
+        'logistica': ('modules.logistica.model', 'LogisticaModel', 'inventario'),
+        'pedidos': ('modules.compras.pedidos.model', 'PedidosModel', 'pedidos'),
+        'configuracion': ('modules.configuracion.model', 'ConfiguracionModel', 'configuracion'),
+        'herrajes': ('modules.herrajes.model', 'HerrajesModel', 'inventario'),
+        'vidrios': ('modules.vidrios.model', 'VidriosModel', 'inventario'),
+        'usuarios': ('modules.usuarios.model', 'UsuariosModel', 'usuarios'),
+        'auditoria': ('modules.auditoria.model', 'AuditoriaModel', 'auditoria'),
+    }
+
+    # Orden de las vistas en module_stack: el MISMO que sidebar_sections
+    MODULOS_STACK = [
+        'obras', 'inventario', 'herrajes', 'vidrios', 'produccion', 'logistica',
+        'compras_pedidos', 'contabilidad', 'auditoria', 'mantenimiento', 'usuarios', 'configuracion'
+    ]
+
+    def _conexion(self, nombre):
+        return getattr(self, f"get_{nombre}_connection")()
+
+    def _modelo(self, nombre):
+        if nombre not in self._models:
+            ruta, clase, conexion = self._MODELOS[nombre]
+            modulo = profiler_arranque.importar(ruta)
+            with profiler_arranque.medir("modelo", nombre):
+                self._models[nombre] = getattr(modulo, clase)(self._conexion(conexion))
+        return self._models[nombre]
+
     def _init_models(self):
-        self._models['inventario'] = InventarioModel(db_connection=self.get_inventario_connection())
-        self._models['obras'] = ObrasModel(db_connection=self.get_inventario_connection())
-        self._models['produccion'] = ProduccionModel(db_connection=self.get_produccion_connection())
-        self._models['logistica'] = LogisticaModel(db_connection=self.get_inventario_connection())
-        self._models['pedidos'] = PedidosModel(db_connection=self.get_pedidos_connection())
-        self._models['configuracion'] = ConfiguracionModel(db_connection=self.get_configuracion_connection())
-        self._models['herrajes'] = HerrajesModel(self.get_inventario_connection())
-        self._models['usuarios'] = UsuariosModel(db_connection=self.get_usuarios_connection())
-        self._models['auditoria'] = AuditoriaModel(db_connection=self.get_auditoria_connection())
-
-    def _init_views_and_controllers(self, usuario):
-        usuario_str = usuario['usuario'] if isinstance(usuario, dict) and 'usuario' in usuario else str(usuario)
-        self._views['inventario'] = InventarioView(db_connection=self.get_inventario_connection(), usuario_actual=usuario_str)
-        self._controllers['inventario'] = InventarioController(
-            model=self._models['inventario'],
-            view=self._views['inventario'],
+        # Sólo usuarios se necesita antes de mostrar la ventana (permisos y sidebar)
+        self._modelo('usuarios')
+
+    def _asegurar_modulo(self, nombre):
+        """
+        Importa y construye la vista y el controlador del módulo la primera vez que se necesitan.
+        Si el módulo ocupa un lugar en module_stack, reemplaza el placeholder por la vista real.
+        """
+        if nombre in self._views:
+            return self._views[nombre]
+        with profiler_arranque.medir("construccion", nombre):
+            vista, controller = getattr(self, f"_construir_{nombre}")()
+        self._views[nombre] = vista
+        self._controllers[nombre] = controller
+        self._al_construir_modulo(nombre)
+        if nombre in self.MODULOS_STACK and hasattr(self, 'module_stack'):
+            idx = self.MODULOS_STACK.index(nombre)
+            placeholder = self.module_stack.widget(idx)
+            actual = self.module_stack.currentIndex()
+            self.module_stack.removeWidget(placeholder)
+            placeholder.deleteLater()
+            self.module_stack.insertWidget(idx, vista)
+            self.module_stack.setCurrentIndex(actual)
+        return vista
+
+    def _construir_inventario(self):
+        from modules.inventario.view import InventarioView
+        from modules.inventario.controller import InventarioController
+        usuario_str = self.usuario['usuario'] if isinstance(self.usuario, dict) and 'usuario' in self.usuario else str(self.usuario)
+        vista = InventarioView(db_connection=self.get_inventario_connection(), usuario_actual=usuario_str)
+        controller = InventarioController(
+            model=self._modelo('inventario'),
+            view=vista,
             db_connection=self.get_inventario_connection(),
-            usuario_actual=usuario
+            usuario_actual=self.usuario,
+            usuarios_model=self._modelo('usuarios')
         )
-        self._views['obras'] = ObrasView()
-        self._controllers['obras'] = ObrasController(
-            model=self._models['obras'], view=self._views['obras'], db_connection=self.get_inventario_connection(), usuarios_model=self._models['usuarios'], logistica_controller=None
+        return vista, controller
+
+    def _construir_obras(self):
+        from modules.obras.view import ObrasView
+        from modules.obras.controller import ObrasController
+        vista = ObrasView()
+        controller = ObrasController(
+            model=self._modelo('obras'), view=vista, db_connection=self.get_inventario_connection(), usuarios_model=self._modelo('usuarios'), logistica_controller=self._controllers.get('logistica')
         )
-        self.obras_controller = self._controllers['obras']
-        self._views['produccion'] = ProduccionView()
-        self._controllers['produccion'] = ProduccionController(
-            model=self._models['produccion'], view=self._views['produccion'], db_connection=self.get_produccion_connection()
+        return vista, controller
+
+    def _construir_produccion(self):
+        from modules.obras.produccion.view import ProduccionView
+        from modules.obras.produccion.controller import ProduccionController
+        vista = ProduccionView()
+        controller = ProduccionController(
+            model=self._modelo('produccion'), view=vista, db_connection=self.get_produccion_connection()
         )
-        self._views['logistica'] = LogisticaView()
-        self._controllers['logistica'] = LogisticaController(
-            model=self._models['logistica'], view=self._views['logistica'], db_connection=self.get_inventario_connection(), usuarios_model=self._models['usuarios']
+        return vista, controller
+
+    def _construir_logistica(self):
+        # LogisticaView carga QWebEngine: es la vista más costosa de construir
+        from modules.logistica.view import LogisticaView
+        from modules.logistica.controller import LogisticaController
+        vista = LogisticaView()
+        controller = LogisticaController(
+            model=self._modelo('logistica'), view=vista, db_connection=self.get_inventario_connection(), usuarios_model=self._modelo('usuarios')
         )
-        self._controllers['obras'].logistica_controller = self._controllers['logistica']
-        self._views['compras_pedidos'] = ComprasPedidosView()
-        self._controllers['compras_pedidos'] = ComprasPedidosController(
-            self._models['pedidos'], self._views['compras_pedidos'], self.get_pedidos_connection(), self._models['usuarios']
+        return vista, controller
+
+    def _construir_compras_pedidos(self):
+        from modules.compras.pedidos.view import PedidosView as ComprasPedidosView
+        from modules.compras.pedidos.controller import ComprasPedidosController
+        vista = ComprasPedidosView()
+        controller = ComprasPedidosController(
+            self._modelo('pedidos'), vista, self.get_pedidos_connection(), self._modelo('usuarios')
         )
-        self._controllers['compras_pedidos'].cargar_pedidos()
-        self._views['pedidos'] = PedidosIndependienteView()
-        self._controllers['pedidos'] = PedidosController(self._views['pedidos'], self.get_pedidos_connection())
-        self._views['usuarios'] = UsuariosView()
-        self._controllers['usuarios'] = UsuariosController(
-            model=self._models['usuarios'], view=self._views['usuarios'], db_connection=self.get_usuarios_connection()
+        controller.cargar_pedidos()
+        return vista, controller
+
+    def _construir_usuarios(self):
+        from modules.usuarios.view import UsuariosView
+        from modules.usuarios.controller import UsuariosController
+        vista = UsuariosView()
+        controller = UsuariosController(
+            model=self._modelo('usuarios'), view=vista, db_connection=self.get_usuarios_connection()
         )
-        self._views['auditoria'] = AuditoriaView()
-        self._controllers['auditoria'] = AuditoriaController(
-            model=self._models['auditoria'], view=self._views['auditoria'], db_connection=self.get_auditoria_connection()
+        return vista, controller
+
+    def _construir_auditoria(self):
+        from modules.auditoria.view import AuditoriaView
+        from modules.auditoria.controller import AuditoriaController
+        vista = AuditoriaView()
+        controller = AuditoriaController(
+            model=self._modelo('auditoria'), view=vista, db_connection=self.get_auditoria_connection()
         )
-        self._views['configuracion'] = ConfiguracionView()
-        self._controllers['configuracion'] = ConfiguracionController(
-            model=self._models['configuracion'], view=self._views['configuracion'], db_connection=self.get_configuracion_connection(), usuarios_model=self._models['usuarios']
+        return vista, controller
+
+    def _construir_configuracion(self):
+        from modules.configuracion.view import ConfiguracionView
+        from modules.configuracion.controller import ConfiguracionController
+        vista = ConfiguracionView()
+        controller = ConfiguracionController(
+            model=self._modelo('configuracion'), view=vista, db_connection=self.get_configuracion_connection(), usuarios_model=self._modelo('usuarios')
         )
-        
-        self.mantenimiento_view = MantenimientoView()
+        return vista, controller
+
+    def _construir_mantenimiento(self):
+        from modules.mantenimiento.view import MantenimientoView
         from modules.mantenimiento.controller import MantenimientoController
-        self.mantenimiento_controller = MantenimientoController(
-            model=self.mantenimiento_view, view=self.mantenimiento_view, db_connection=self.get_inventario_connection(), usuarios_model=self._models['usuarios']
+        vista = MantenimientoView()
+        controller = MantenimientoController(
+            model=vista, view=vista, db_connection=self.get_inventario_connection(), usuarios_model=self._modelo('usuarios')
         )
-        
-        self.contabilidad_view = ContabilidadView()
+        return vista, controller
+
+    def _construir_contabilidad(self):
+        from modules.contabilidad.view import ContabilidadView
         from modules.contabilidad.controller import ContabilidadController
-        self.contabilidad_controller = ContabilidadController(
-            model=self.contabilidad_view, view=self.contabilidad_view, db_connection=self.get_inventario_connection(), usuarios_model=self._models['usuarios']
+        vista = ContabilidadView()
+        controller = ContabilidadController(
+            model=vista, view=vista, db_connection=self.get_inventario_connection(), usuarios_model=self._modelo('usuarios')
         )
-        
-        self.herrajes_view = HerrajesView()
-        self.herrajes_controller = HerrajesController(
-            self._models['herrajes'], self.herrajes_view, db_connection=self.get_inventario_connection(), usuarios_model=self._models['usuarios']
+        return vista, controller
+
+    def _construir_herrajes(self):
+        from modules.herrajes.view import HerrajesView
+        from modules.herrajes.controller import HerrajesController
+        vista = HerrajesView()
+        controller = HerrajesController(
+            self._modelo('herrajes'), vista, db_connection=self.get_inventario_connection(), usuarios_model=self._modelo('usuarios')
         )
-        
+        return vista, controller
+
+    def _construir_vidrios(self):
         from modules.vidrios.view import VidriosView
         from modules.vidrios.controller import VidriosController
-        self.vidrios_view = VidriosView()
-        self.vidrios_controller = VidriosController(
-            model=self.vidrios_view, view=self.vidrios_view, db_connection=self.get_inventario_connection()
+        vista = VidriosView()
+        controller = VidriosController(
+            model=vista, view=vista, db_connection=self.get_inventario_connection()
         )
+        return vista, controller
 
     def _setup_main_layout(self):
         main_layout = QHBoxLayout()
@@ -552,19 +619,12 @@ class MainWindow(QMainWindow):
 
         self.module_stack = QStackedWidget()
         
-        # Agregar vistas al stack en el MISMO orden que sidebar_sections
-        self.module_stack.addWidget(self._views['obras'])            # 0 Obras
-        self.module_stack.addWidget(self._views['inventario'])       # 1 Inventario
-        self.module_stack.addWidget(self._views['herrajes'])         # 2 Herrajes
-        self.module_stack.addWidget(self._views['vidrios'])          # 3 Vidrios
-        self.module_stack.addWidget(self._views['produccion'])       # 4 Producción
-        self.module_stack.addWidget(self._views['logistica'])        # 5 Logística
-        self.module_stack.addWidget(self._views['compras_pedidos'])  # 6 Compras / Pedidos
-        self.module_stack.addWidget(self._views['contabilidad'])     # 7 Contabilidad
-        self.module_stack.addWidget(self._views['auditoria'])        # 8 Auditoría
-        self.module_stack.addWidget(self._views['mantenimiento'])    # 9 Mantenimiento
-        self.module_stack.addWidget(self._views['usuarios'])         # 10 Usuarios
-        self.module_stack.addWidget(self._views['configuracion'])    # 11 Configuración
+        # Un placeholder por módulo en el MISMO orden que sidebar_sections (ver MODULOS_STACK);
+        # la vista real se construye al seleccionarlo por primera vez (_asegurar_modulo)
+        for nombre in self.MODULOS_STACK:
+            placeholder = QWidget()
+            placeholder.setObjectName(f"placeholder_{nombre}")
+            self.module_stack.addWidget(placeholder)
         main_area_layout.addWidget(self.module_stack)
 
         main_layout.addLayout(main_area_layout)
@@ -590,7 +650,7 @@ class MainWindow(QMainWindow):
 
         if secciones_filtradas_sidebar:
             self.sidebar.select_button_visually(initial_sidebar_idx_to_select)
-            self.module_stack.setCurrentIndex(initial_stack_idx_to_select)
+            self._mostrar_modulo_en_stack(initial_stack_idx_to_select)
         else:
             self._mostrar_widget_error_stack()
 
@@ -600,7 +660,7 @@ class MainWindow(QMainWindow):
 
     def _obtener_modulos_a_usar(self, usuario, modulos_permitidos_param):
         try:
-            modulos_permitidos_obtenidos = self._models['usuarios'].obtener_modulos_permitidos(usuario)
+            modulos_permitidos_obtenidos = self._models['usuarios'].precargar_permisos(usuario)
             if not modulos_permitidos_obtenidos:
                 self.logger.error(f"[PERMISOS] No se encontraron módulos permitidos para el usuario: {usuario}")
         except Exception as e:
@@ -676,55 +736,63 @@ class MainWindow(QMainWindow):
         self.module_stack.setCurrentIndex(self.module_stack.count() - 1)
 
     def _update_controllers_with_user(self, usuario):
-        self._controllers['inventario'].usuario_actual = usuario
-        self._controllers['obras'].usuario_actual = usuario
-        self._controllers['produccion'].usuario_actual = usuario
-        self._controllers['logistica'].usuario_actual = usuario
-        self._controllers['compras_pedidos'].usuario_actual = usuario
-        self._controllers['pedidos'].usuario_actual = usuario
-        self._controllers['usuarios'].usuario_actual = usuario
-        self._controllers['auditoria'].usuario_actual = usuario
-        self._controllers['configuracion'].usuario_actual = usuario
-        self.herrajes_controller.usuario_actual = usuario
-        # self.vidrios_controller no tiene usuario_actual actualmente, si se necesita, añadirlo.
+        self.usuario = usuario
+        # Sólo existen los controladores de los módulos ya abiertos
+        for controller in self._controllers.values():
+            if hasattr(controller, 'usuario_actual'):
+                controller.usuario_actual = usuario
 
     def _connect_module_signals(self):
-        if hasattr(self._views['obras'], 'obra_agregada'):
-            if hasattr(self._controllers['inventario'], 'actualizar_por_obra'):
-                self._views['obras'].obra_agregada.connect(self._controllers['inventario'].actualizar_por_obra)
-            if hasattr(self.vidrios_controller, 'actualizar_por_obra'):
-                self._views['obras'].obra_agregada.connect(self.vidrios_controller.actualizar_por_obra)
-        
-        if hasattr(self._controllers['inventario'], 'actualizar_por_pedido'):
-            event_bus.pedido_actualizado.connect(self._controllers['inventario'].actualizar_por_pedido)
-        if hasattr(self._controllers['obras'], 'actualizar_por_pedido'):
-            event_bus.pedido_actualizado.connect(self._controllers['obras'].actualizar_por_pedido)
-        
-        if hasattr(self._controllers['inventario'], 'actualizar_por_pedido_cancelado'):
-            event_bus.pedido_cancelado.connect(self._controllers['inventario'].actualizar_por_pedido_cancelado)
-        if hasattr(self._controllers['obras'], 'actualizar_por_pedido_cancelado'):
-            event_bus.pedido_cancelado.connect(self._controllers['obras'].actualizar_por_pedido_cancelado)
-        
+        # Los eventos se reenvían sólo a los módulos ya construidos; un módulo que se abre después
+        # carga sus datos actualizados al construirse. Las ráfagas (p. ej. una recepción de 200 ítems) llegan
+        # agrupadas por despachador_eventos: una sola recarga por módulo
+        despachador_eventos.suscribir('pedido_actualizado', partial(self._reenviar_evento, 'actualizar_por_pedido', ('inventario', 'obras')))
+        despachador_eventos.suscribir('pedido_cancelado', partial(self._reenviar_evento, 'actualizar_por_pedido_cancelado', ('inventario', 'obras')))
+
         if hasattr(self, 'sidebar'): # Asegurarse que el sidebar existe
             self.sidebar.pageChanged.connect(self._on_sidebar_page_changed)
 
+    def _reenviar_evento(self, metodo, modulos, *args):
+        for nombre in modulos:
+            controller = self._controllers.get(nombre)
+            if controller is not None and hasattr(controller, metodo):
+                getattr(controller, metodo)(*args)
+
+    def _al_construir_modulo(self, nombre):
+        if nombre == 'obras':
+            if hasattr(self._views['obras'], 'obra_agregada'):
+                self._views['obras'].obra_agregada.connect(partial(self._reenviar_evento, 'actualizar_por_obra', ('inventario', 'vidrios')))
+            # Después de mostrar la vista: no demorar la aparición de la ventana
+            QTimer.singleShot(0, self._integrate_order_status_in_works)
+        if nombre == 'logistica' and 'obras' in self._controllers:
+            self._controllers['obras'].logistica_controller = self._controllers['logistica']
+
     def _integrate_order_status_in_works(self):
+        if 'obras' not in self._controllers:
+            return
         try:
-            self.obras_controller.mostrar_estado_pedidos_en_tabla(
-                inventario_controller=self._controllers['inventario'],
-                vidrios_controller=self.vidrios_controller,
-                herrajes_controller=self.herrajes_controller
+            # Sólo se necesitan los modelos (obtener_estados_pedidos_por_obras), no las vistas de cada módulo:
+            # se crean recién acá, con _modelo, y se reutilizan cuando se abra el módulo
+            self._controllers['obras'].mostrar_estado_pedidos_en_tabla(
+                inventario_model=self._modelo('inventario'),
+                vidrios_model=self._modelo('vidrios'),
+                herrajes_model=self._modelo('herrajes')
             )
         except Exception as e:
             self.logger.error(f"[INTEGRACIÓN] Error al poblar estado de pedidos en Obras: {e}")
 
+    def _mostrar_modulo_en_stack(self, stack_idx):
+        if 0 <= stack_idx < len(self.MODULOS_STACK):
+            self._asegurar_modulo(self.MODULOS_STACK[stack_idx])
+        self.module_stack.setCurrentIndex(stack_idx)
+
     def _on_sidebar_page_changed(self, sidebar_idx):
         # sidebar_idx es el índice dentro de las secciones_filtradas del sidebar.
         # Usar el mapeo para obtener el índice correcto en el module_stack original.
         if hasattr(self, 'map_sidebar_idx_to_stack_idx') and 0 <= sidebar_idx < len(self.map_sidebar_idx_to_stack_idx):
             stack_idx = self.map_sidebar_idx_to_stack_idx[sidebar_idx]
             if 0 <= stack_idx < self.module_stack.count():
-                self.module_stack.setCurrentIndex(stack_idx)
+                self._mostrar_modulo_en_stack(stack_idx)
                 # Asegurar que el botón del sidebar también se actualice visualmente si el cambio no vino de un clic directo
                 if hasattr(self, 'sidebar') and hasattr(self.sidebar, 'select_button_visually'):
                     self.sidebar.select_button_visually(sidebar_idx) # type: ignore
@@ -751,46 +819,32 @@ class MainWindow(QMainWindow):
 
     def _setup_conexion_checker(self):
         """
-        Inicializa un QTimer que verifica el estado de la conexión a la base de datos periódicamente
-        y actualiza el indicador visual del Sidebar.
+        Conecta el indicador del Sidebar al monitor de conectividad (core/conectividad.py), que sondea el
+        servidor en su propio hilo por el pool compartido: la GUI ya no abre conexiones para chequear.
         """
-        self._estado_bd_online = True  # Estado inicial asumido
-        self._timer_conexion = QTimer(self)
-        self._timer_conexion.setInterval(15000)  # 15 segundos (ajustable)
-        self._timer_conexion.timeout.connect(self.verificar_estado_conexion_bd)
-        self._timer_conexion.start()
-        # Chequeo inicial inmediato
-        QTimer.singleShot(1000, self.verificar_estado_conexion_bd)
+        monitor = activar_monitor_conectividad()
+        self._estado_bd_online = monitor.en_linea
+        if hasattr(self, 'sidebar'):
+            self.sidebar.set_estado_online(self._estado_bd_online)
+        # La señal se emite desde el hilo del monitor; el slot (método de la ventana) corre en el de la GUI
+        event_bus.conectividad_cambiada.connect(self._al_cambiar_conectividad)
+
+    def _al_cambiar_conectividad(self, estado):
+        online = bool(estado.get('en_linea'))
+        if online == self._estado_bd_online:
+            return
+        self._estado_bd_online = online
+        if hasattr(self, 'sidebar'):
+            self.sidebar.set_estado_online(online)
 
     def verificar_estado_conexion_bd(self):
         """
-        Intenta una conexión rápida a la base de datos y actualiza el Sidebar.
-        No bloquea la UI ni cierra la app si falla, solo actualiza el estado visual.
+        Pide al monitor de conectividad un sondeo inmediato. No bloquea: el resultado llega por
+        event_bus.conectividad_cambiada si el estado cambia.
         """
-        import pyodbc
-        from core.config import DB_SERVER, DB_USERNAME, DB_PASSWORD, DB_DEFAULT_DATABASE
-        # La constante DB_DRIVER_SQL_SERVER ya está definida globalmente
-        try:
-            connection_string = (
-                f"DRIVER={{{DB_DRIVER_SQL_SERVER}}};"
-                f"SERVER={DB_SERVER};"
-                f"DATABASE={DB_DEFAULT_DATABASE};"
-                f"UID={DB_USERNAME};"
-                f"PWD={DB_PASSWORD};"
-                f"TrustServerCertificate=yes;"
-            )
-            # No se usa la variable conn, se puede quitar el with y el as conn
-            pyodbc.connect(connection_string, timeout=3).close() # Cerrar conexión inmediatamente
-            if not self._estado_bd_online:
-                self.sidebar.set_estado_online(True)
-                self._estado_bd_online = True
-            return
-        except Exception:
-            if self._estado_bd_online:
-                self.sidebar.set_estado_online(False)
-                self._estado_bd_online = False
-            # Aquí termina el manejo de excepción, no hay que concatenar ni repetir código
-            return
+        monitor = monitor_conectividad()
+        if monitor is not None:
+            monitor.sondear_ahora()
 
 def chequear_conexion_bd():
     import pyodbc
@@ -818,39 +872,55 @@ def chequear_conexion_bd():
         print("Verifica usuario, contraseña, servidor y que SQL Server acepte autenticación SQL.")
         sys.exit(1)
 
+def _sondear_servidor_alternativo(servidor):
+    """Prueba una conexión directa al servidor alternativo en un hilo aparte; devuelve el error o None."""
+    import threading
+    from PyQt6.QtWidgets import QApplication
+    from core.config import DB_DEFAULT_DATABASE, DB_TIMEOUT
+    from core.conectividad import sonda_servidor
+    resultado = {}
+    def sondear():
+        try:
+            sonda_servidor(servidor, DB_DEFAULT_DATABASE)(DB_TIMEOUT)
+        except Exception as e:
+            resultado['error'] = e
+    hilo = threading.Thread(target=sondear, name="SondeoServidorAlternativo", daemon=True)
+    hilo.start()
+    while hilo.is_alive():
+        QApplication.processEvents()
+        hilo.join(0.05)
+    return resultado.get('error')
+
 def chequear_conexion_bd_gui():
     from PyQt6.QtWidgets import QApplication, QMessageBox
-    from core.config import DB_SERVER, DB_SERVER_ALTERNATE, DB_USERNAME, DB_PASSWORD, DB_DEFAULT_DATABASE, DB_TIMEOUT
-    import traceback
-    servidores = [DB_SERVER, DB_SERVER_ALTERNATE]
-    # print(f"[LOG 3.2] ✅ Conexión exitosa a la base de datos: {db_server_actual}")  # Esta línea se debe mover al lugar correcto si es necesario
-    # Renombrar variable para cumplir convención
-    for db_server_actual in servidores:
-        try:
-            print(f"[LOG 3.1] Intentando conexión a BD: {db_server_actual} ...")
-            connection_string = (
-                f"DRIVER={{{DB_DRIVER_SQL_SERVER}}};"
-                f"SERVER={db_server_actual};"
-                f"DATABASE={DB_DEFAULT_DATABASE};"
-                f"UID={DB_USERNAME};"
-                f"PWD={DB_PASSWORD};"
-                f"TrustServerCertificate=yes;"
-            )
-            import pyodbc
-            # No se usa la variable conn, se puede quitar el with y el as conn
-            pyodbc.connect(connection_string, timeout=DB_TIMEOUT).close() # Cerrar conexión inmediatamente
-            print(f"[LOG 3.2] ✅ Conexión exitosa a la base de datos: {db_server_actual}")
+    from core.config import DB_SERVER, DB_SERVER_ALTERNATE
+    # El primer sondeo del monitor de conectividad corre en su hilo, por el pool compartido (la conexión
+    # queda para el login); mientras tanto la GUI sigue procesando eventos (splash)
+    print(f"[LOG 3.1] Intentando conexión a BD: {DB_SERVER} ...")
+    monitor = activar_monitor_conectividad()
+    while not monitor.esperar_primer_sondeo(0.05):
+        QApplication.processEvents()
+    estado = monitor.estado()
+    if estado['en_linea'] and not estado['fallos_consecutivos']:
+        print(f"[LOG 3.2] ✅ Conexión exitosa a la base de datos: {DB_SERVER} ({estado['latencia_ms']:.0f} ms)")
+        return
+    print(f"[LOG 3.3] ❌ Error de conexión a la base de datos ({DB_SERVER}): {estado['ultimo_error']}")
+    errores = [f"{DB_SERVER}: {estado['ultimo_error']}"]
+    if DB_SERVER_ALTERNATE:
+        print(f"[LOG 3.1] Intentando conexión a BD: {DB_SERVER_ALTERNATE} ...")
+        error = _sondear_servidor_alternativo(DB_SERVER_ALTERNATE)
+        if error is None:
+            print(f"[LOG 3.2] ✅ Conexión exitosa a la base de datos: {DB_SERVER_ALTERNATE}")
             return
-        except Exception as e:
-            print(f"[LOG 3.3] ❌ Error de conexión a la base de datos ({db_server_actual}): {e}\n{traceback.format_exc()}")
+        print(f"[LOG 3.3] ❌ Error de conexión a la base de datos ({DB_SERVER_ALTERNATE}): {error}")
+        errores.append(f"{DB_SERVER_ALTERNATE}: {error}")
     print("[LOG 3.4] ❌ No se pudo conectar a ninguna base de datos. Mostrando error GUI.")
-    # No es necesario crear una nueva instancia de QApplication si ya existe
-    # app = QApplication.instance() or QApplication(sys.argv)
     msg = QMessageBox()
     msg.setIcon(QMessageBox.Icon.Critical)
     msg.setWindowTitle("Error de conexión a la base de datos")
     msg.setText("❌ No se pudo conectar a la base de datos.")
-    msg.setInformativeText(f"Verifica usuario, contraseña, servidor (puede ser IP o nombre) y que SQL Server acepte autenticación SQL.\n\nIntentado con: {DB_SERVER} y {DB_SERVER_ALTERNATE}")
+    detalle = "\n".join(errores)
+    msg.setInformativeText(f"Verifica usuario, contraseña, servidor (puede ser IP o nombre) y que SQL Server acepte autenticación SQL.\n\nIntentado con:\n{detalle}")
     # El estilo visual de QMessageBox puede personalizarse con setStyleSheet SOLO aquí, si se requiere una excepción visual.
     msg.exec()
     sys.exit(1)
@@ -871,16 +941,16 @@ def diagnostico_entorno_dependencias():
         log(f"[DIAG 1] sys.executable: {sys.executable}")
         log(f"[DIAG 2] sys.version: {sys.version}")
         log(f"[DIAG 3] sys.path: {sys.path}")
-        try:
-            import pandas
-            log(f"[DIAG 4] pandas importado correctamente. Versión: {pandas.__version__}")
-        except Exception as e:
-            log(f"[DIAG 4] ❌ Error importando pandas: {e}\n{traceback.format_exc()}")
-        try:
-            import reportlab
-            log("[DIAG 5] reportlab importado correctamente.")
-        except Exception as e:
-            log(f"[DIAG 5] ❌ Error importando reportlab: {e}\n{traceback.format_exc()}")
+        # Se verifica que estén instalados sin importarlos: importar pandas/reportlab acá costaba segundos de arranque
+        import importlib.util
+        for num, paquete in ((4, "pandas"), (5, "reportlab")):
+            try:
+                if importlib.util.find_spec(paquete) is None:
+                    log(f"[DIAG {num}] ❌ {paquete} no está instalado.")
+                else:
+                    log(f"[DIAG {num}] {paquete} disponible. Versión: {importlib_metadata.version(paquete)}")
+            except Exception as e:
+                log(f"[DIAG {num}] ❌ Error verificando {paquete}: {e}\n{traceback.format_exc()}")
     except Exception as e:
         log(f"[DIAG ERROR] Excepción en diagnóstico: {e}\n{traceback.format_exc()}")
 # --- BASE DE MEJORES PRÁCTICAS DE DISEÑO PARA TODA LA APP ---
@@ -972,18 +1042,37 @@ if __name__ == "__main__":
             login_view.mostrar_error("Usuario o contraseña incorrectos.")
             return
         login_view.close()
-        modulos_permitidos = usuarios_model.obtener_modulos_permitidos(user)
-        main_window = MainWindow(user, modulos_permitidos)
+        modulos_permitidos = usuarios_model.precargar_permisos(user)
+        with profiler_arranque.medir("ventana", "MainWindow"):
+            main_window = MainWindow(user, modulos_permitidos)
         main_window.actualizar_usuario_label(user)
         main_window.mostrar_mensaje(f"Usuario actual: {user['usuario']} ({user['rol']})", tipo="info", duracion=4000)
         main_window.show()
+        profiler_arranque.registrar_resumen()
 
     login_view.boton_login.clicked.connect(on_login_success)
     from PyQt6.QtCore import QTimer
     def cerrar_splash_y_mostrar_login():
         splash.close()
         QTimer.singleShot(0, login_view.show)
+        profiler_arranque.marcar("login visible")
     splash.fade_out.finished.connect(cerrar_splash_y_mostrar_login)
     splash.fade_out.start()
+    from core.workers import cancelar_tareas, esperar_tareas
+    from core.database import cerrar_pools
+    from modules.auditoria.sink import activar_sink_auditoria, detener_sink_auditoria
+    from core.offline import reanudar_modo_offline, detener_motor_offline
+    # Los eventos de auditoría se insertan por lotes en segundo plano
+    activar_sink_auditoria()
+    # Si la sesión anterior quedó en modo offline (o con escrituras sin enviar) se retoma la réplica local
+    reanudar_modo_offline()
+    def al_salir():
+        # Cortar las cargas en segundo plano antes de cerrar las conexiones que usan
+        cancelar_tareas()
+        esperar_tareas(3000)
+        detener_sink_auditoria()
+        detener_motor_offline()
+        cerrar_pools()
+    app.aboutToQuit.connect(al_salir)
     print("[LOG 4.10] QApplication loop iniciado.")
     sys.exit(app.exec())
\ No newline at end of file
@@ -1,5 +1,6 @@
 import csv
 from PyQt6.QtWidgets import QTableWidgetItem
+from core.workers import cancelar_exportacion, ejecutar_en_segundo_plano, mostrar_progreso_exportacion
 
 class AuditoriaController:
     def __init__(self, model, view, db_connection, usuario_actual=None):
@@ -46,10 +47,27 @@ class AuditoriaController:
             print(f"[LOG ACCIÓN] Error en acción 'exportar_logs' en módulo 'auditoria': {e}")
 
     def exportar_auditorias(self, formato):
-        try:
-            print(f"[LOG ACCIÓN] Ejecutando acción 'exportar_auditorias' en módulo 'auditoria' por usuario: {getattr(self.usuario_actual, 'username', 'desconocido')}")
-            mensaje = self.model.exportar_auditorias(formato)
+        print(f"[LOG ACCIÓN] Ejecutando acción 'exportar_auditorias' en módulo 'auditoria' por usuario: {getattr(self.usuario_actual, 'username', 'desconocido')}")
+
+        def al_terminar(mensaje):
             self.view.label.setText(mensaje)
             print("[LOG ACCIÓN] Acción 'exportar_auditorias' en módulo 'auditoria' finalizada con éxito.")
-        except Exception as e:
+
+        def al_error(e):
+            self.view.label.setText(f"Error al exportar auditorías: {e}")
             print(f"[LOG ACCIÓN] Error en acción 'exportar_auditorias' en módulo 'auditoria': {e}")
+
+        # Las auditorías pueden ser millones de filas: se exportan en streaming en un hilo del pool
+        ejecutar_en_segundo_plano(
+            self.model.exportar_auditorias,
+            args=(formato,),
+            al_terminar=al_terminar,
+            al_error=al_error,
+            al_progreso=lambda escritas, total: mostrar_progreso_exportacion(self.view, escritas, total),
+            vista=self.view,
+            mensaje_carga="Exportando auditorías...",
+            clave="auditoria.exportar",
+        )
+
+    def cancelar_exportacion_auditorias(self):
+        cancelar_exportacion("auditoria.exportar")
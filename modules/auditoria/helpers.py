@@ -5,6 +5,7 @@ Permite inyectar conexión para tests y nunca interrumpe el flujo principal.
 """
 from core.logger import Logger
 from modules.auditoria.model import AuditoriaModel
+from modules.auditoria.sink import sink_auditoria_activo
 from core.database import AuditoriaDatabaseConnection  # Importar la clase correcta
 
 def _registrar_evento_auditoria(usuario, modulo, accion, db_conn=None):
@@ -17,10 +18,11 @@ def _registrar_evento_auditoria(usuario, modulo, accion, db_conn=None):
     - accion: str (detalle de la acción)
     - db_conn: conexión opcional (para tests)
     Devuelve True si registra, False si hay error (nunca lanza excepción).
+    Con el sink de auditoría activo el evento se encola y se inserta por lotes (ver modules/auditoria/sink.py).
     """
     logger = Logger()
     try:
-        db = db_conn or AuditoriaDatabaseConnection()
+        db = db_conn or (None if sink_auditoria_activo() else AuditoriaDatabaseConnection())
         auditoria = AuditoriaModel(db)
         usuario_id = usuario['id'] if isinstance(usuario, dict) and 'id' in usuario else usuario
         ip = usuario.get('ip', '') if isinstance(usuario, dict) else ''
@@ -1,25 +1,31 @@
-import pandas as pd
-from fpdf import FPDF
 from core.database import AuditoriaDatabaseConnection  # Importar la clase correcta
+from core.exportacion import EXTENSIONES, FORMATOS, NOMBRES_FORMATO, ExportacionCancelada, exportar_filas, filas_de_query
+from modules.auditoria.sink import QUERY_INSERTAR_EVENTO, sink_auditoria_activo
 
 class AuditoriaModel:
     def __init__(self, db_connection):
         self.db = db_connection
 
-    def obtener_auditorias(self, filtros=None):
+    def _query_auditorias(self, filtros=None):
         query = "SELECT * FROM auditorias_sistema"
         campos_validos = {"modulo_afectado", "usuario_id", "tipo_evento", "detalle", "ip_origen", "fecha_hora"}
-        if filtros:
-            # Solo aplicar filtros válidos
-            filtros_validos = {k: v for k, v in filtros.items() if k in campos_validos}
-            if filtros_validos:
-                query += " WHERE " + " AND ".join([f"{campo} = ?" for campo in filtros_validos.keys()])
-                result = self.db.ejecutar_query(query, tuple(filtros_validos.values()))
-                return result if result is not None else []
-            # Si no hay filtros válidos, devolver todos los resultados
-        result = self.db.ejecutar_query(query)
+        # Solo aplicar filtros válidos; si no hay ninguno se consultan todos los registros
+        filtros_validos = {k: v for k, v in (filtros or {}).items() if k in campos_validos}
+        if filtros_validos:
+            query += " WHERE " + " AND ".join([f"{campo} = ?" for campo in filtros_validos.keys()])
+            return query, tuple(filtros_validos.values())
+        return query, None
+
+    def obtener_auditorias(self, filtros=None):
+        query, parametros = self._query_auditorias(filtros)
+        result = self.db.ejecutar_query(query, parametros) if parametros else self.db.ejecutar_query(query)
         return result if result is not None else []
 
+    def iterar_auditorias(self, filtros=None, chunk=1000):
+        """Igual que obtener_auditorias pero en streaming (fetchmany), para tablas de millones de filas."""
+        query, parametros = self._query_auditorias(filtros)
+        return self.db.iterar_query(query, parametros, chunk=chunk)
+
     def obtener_errores(self, filtros=None):
         query = "SELECT * FROM errores_sistema"
         if filtros:
@@ -29,9 +35,10 @@ class AuditoriaModel:
 
     def exportar_auditorias(self, formato="excel", filename=None):
         """
-        Exporta los registros de auditoría a Excel o PDF.
+        Exporta los registros de auditoría a Excel, CSV o PDF.
+        Las filas se leen por lotes y se escriben directo al archivo (memoria constante, ver core.exportacion).
         Args:
-            formato (str): 'excel' o 'pdf'.
+            formato (str): 'excel', 'csv' o 'pdf'.
             filename (str): Nombre de archivo opcional.
         Returns:
             str: Mensaje de resultado.
@@ -40,37 +47,20 @@ class AuditoriaModel:
         SELECT fecha_hora, usuario_id, modulo_afectado, tipo_evento, detalle, ip_origen
         FROM auditorias_sistema
         """
-        datos = self.db.ejecutar_query(query)
         columnas = ["Fecha/Hora", "Usuario", "Módulo", "Evento", "Detalle", "IP"]
-        if formato not in ("excel", "pdf"):
-            return "Formato no soportado. Usa 'excel' o 'pdf'."
-        if not datos or len(datos) == 0:
-            return "No hay datos de auditoría para exportar."
+        if formato not in FORMATOS:
+            return "Formato no soportado. Usa 'excel', 'csv' o 'pdf'."
         if not filename:
-            filename = "auditorias.xlsx" if formato == "excel" else "auditorias.pdf"
-        if formato == "excel":
-            try:
-                import pandas as pd
-                df = pd.DataFrame(datos, columns=columnas)
-                df.to_excel(filename, index=False)
-                return f"Auditorías exportadas a Excel: {filename}"
-            except Exception as e:
-                return f"Error al exportar a Excel: {e}"
-        elif formato == "pdf":
-            try:
-                from fpdf import FPDF
-                pdf = FPDF()
-                pdf.add_page()
-                pdf.set_font("Arial", size=10)
-                pdf.cell(200, 10, "Auditorías del Sistema", ln=True, align="C")
-                for row in datos:
-                    fila = " | ".join([str(x) for x in row])
-                    pdf.cell(0, 8, fila, ln=True)
-                pdf.output(filename)
-                return f"Auditorías exportadas a PDF: {filename}"
-            except Exception as e:
-                return f"Error al exportar a PDF: {e}"
-        return "Formato no soportado. Usa 'excel' o 'pdf'."
+            filename = f"auditorias{EXTENSIONES[formato]}"
+        try:
+            escritas = exportar_filas(filas_de_query(self.db, query), formato, filename, columnas, titulo="Auditorías del Sistema")
+        except ExportacionCancelada:
+            return "Exportación de auditorías cancelada."
+        except Exception as e:
+            return f"Error al exportar a {NOMBRES_FORMATO[formato]}: {e}"
+        if not escritas:
+            return "No hay datos de auditoría para exportar."
+        return f"Auditorías exportadas a {NOMBRES_FORMATO[formato]}: {filename}"
 
     def registrar_evento(self, usuario_id, modulo, tipo_evento, detalle, ip_origen):
         """
@@ -91,12 +81,12 @@ class AuditoriaModel:
             except Exception:
                 pass
             return False
-        query = """
-        INSERT INTO auditorias_sistema (usuario_id, modulo_afectado, tipo_evento, detalle, ip_origen)
-        VALUES (?, ?, ?, ?, ?)
-        """
+        # Con el sink activo (aplicación en marcha) el evento se encola y se inserta por lotes
+        sink = sink_auditoria_activo()
+        if sink is not None:
+            return sink.registrar(usuario_id, modulo, tipo_evento, detalle, ip_origen)
         try:
-            self.db.ejecutar_query(query, (usuario_id, modulo, tipo_evento, detalle, ip_origen))
+            self.db.ejecutar_query(QUERY_INSERTAR_EVENTO, (usuario_id, modulo, tipo_evento, detalle, ip_origen))
             return True
         except Exception as e:
             try:
@@ -126,9 +116,11 @@ class AuditoriaModel:
             except Exception:
                 pass
             return False
-        query = "INSERT INTO auditorias_sistema (usuario_id, modulo_afectado, tipo_evento, detalle, ip_origen) VALUES (?, ?, ?, ?, ?)"
+        sink = sink_auditoria_activo()
+        if sink is not None:
+            return sink.registrar(usuario_id, modulo_afectado, tipo_evento, detalle, ip_origen)
         try:
-            self.db.ejecutar_query(query, (usuario_id, modulo_afectado, tipo_evento, detalle, ip_origen))
+            self.db.ejecutar_query(QUERY_INSERTAR_EVENTO, (usuario_id, modulo_afectado, tipo_evento, detalle, ip_origen))
             return True
         except Exception as e:
             try:
@@ -0,0 +1,172 @@
+"""
+Escritura asíncrona y por lotes de eventos de auditoría.
+
+Antes cada acción crítica hacía uno o más INSERT sincrónicos en auditorias_sistema y el usuario esperaba
+a la base de auditoría. El sink:
+- acumula los eventos en memoria (registrar no toca el disco ni la base)
+- los inserta con ejecutar_lote cuando hay `tamano_lote` eventos o pasaron `intervalo` segundos
+- al terminar cada flush (y al salir) vuelca lo que sigue pendiente a un archivo spool local
+  (una línea JSON por evento); si la base falla los conserva y reintenta, y al reiniciar la
+  aplicación re-encola lo que quedó en el spool
+
+Uso:
+    activar_sink_auditoria()           # al iniciar (main.py); a partir de ahí AuditoriaModel.registrar_evento encola
+    ...
+    detener_sink_auditoria()           # al salir: vacía el buffer
+Sin sink activo (tests, scripts) AuditoriaModel sigue insertando en forma sincrónica.
+"""
+import atexit
+import json
+import os
+import threading
+from core.logger import Logger
+
+QUERY_INSERTAR_EVENTO = """
+INSERT INTO auditorias_sistema (usuario_id, modulo_afectado, tipo_evento, detalle, ip_origen)
+VALUES (?, ?, ?, ?, ?)
+"""
+
+class AuditoriaSink:
+    def __init__(self, db_connection=None, tamano_lote=50, intervalo=2.0, spool_path="logs/auditoria_pendiente.jsonl"):
+        self._db = db_connection
+        self.tamano_lote = tamano_lote
+        self.intervalo = intervalo
+        self.spool_path = spool_path
+        self._pendientes = []
+        self._lock = threading.Lock()
+        self._lock_flush = threading.Lock()
+        self._hay_lote = threading.Event()
+        self._detenido = threading.Event()
+        self._hilo = None
+        self._recuperar_spool()
+
+    @property
+    def db(self):
+        if self._db is None:
+            from core.database import AuditoriaDatabaseConnection
+            self._db = AuditoriaDatabaseConnection()
+        return self._db
+
+    def pendientes(self):
+        with self._lock:
+            return len(self._pendientes)
+
+    # --- Encolado ---
+    def registrar(self, usuario_id, modulo, tipo_evento, detalle, ip_origen):
+        """Encola el evento en memoria y vuelve de inmediato. Devuelve True."""
+        evento = (usuario_id, modulo, tipo_evento, detalle, ip_origen)
+        with self._lock:
+            self._pendientes.append(evento)
+            lleno = len(self._pendientes) >= self.tamano_lote
+        if lleno:
+            self._hay_lote.set()
+        return True
+
+    def _recuperar_spool(self):
+        if not os.path.exists(self.spool_path):
+            return
+        try:
+            with open(self.spool_path, encoding="utf-8") as f:
+                eventos = [tuple(json.loads(linea)) for linea in f if linea.strip()]
+        except Exception as e:
+            Logger().warning(f"[AUDITORÍA] Spool {self.spool_path} ilegible, se ignora: {e}")
+            return
+        self._pendientes.extend(eventos)
+        if eventos:
+            Logger().info(f"[AUDITORÍA] {len(eventos)} eventos pendientes recuperados del spool")
+
+    def _reescribir_spool(self):
+        # Se llama con self._lock tomado: deja en el spool sólo lo que sigue pendiente
+        try:
+            if not self._pendientes:
+                if os.path.exists(self.spool_path):
+                    os.remove(self.spool_path)
+                return
+            directorio = os.path.dirname(self.spool_path)
+            if directorio:
+                os.makedirs(directorio, exist_ok=True)
+            temporal = self.spool_path + ".tmp"
+            with open(temporal, "w", encoding="utf-8") as f:
+                for evento in self._pendientes:
+                    f.write(json.dumps(evento, ensure_ascii=False, default=str) + "\n")
+            os.replace(temporal, self.spool_path)
+        except Exception as e:
+            Logger().warning(f"[AUDITORÍA] No se pudo actualizar el spool {self.spool_path}: {e}")
+
+    # --- Escritura ---
+    def flush(self):
+        """
+        Inserta todo lo pendiente en lotes y deja en el spool lo que no se pudo escribir.
+        Devuelve la cantidad de eventos escritos.
+        """
+        escritos = 0
+        with self._lock_flush:
+            try:
+                while True:
+                    with self._lock:
+                        lote = self._pendientes[:self.tamano_lote]
+                    if not lote:
+                        return escritos
+                    try:
+                        # Dentro de una transacción ejecutar_lote relanza el error en vez de mostrar un popup
+                        # (este código corre en el hilo del sink, no en el de la GUI)
+                        with self.db.transaction():
+                            self.db.ejecutar_lote(QUERY_INSERTAR_EVENTO, lote)
+                    except Exception as e:
+                        Logger().warning(f"[AUDITORÍA] No se pudo escribir un lote de {len(lote)} eventos, se reintentará: {e}")
+                        return escritos
+                    with self._lock:
+                        del self._pendientes[:len(lote)]
+                    escritos += len(lote)
+            finally:
+                with self._lock:
+                    self._reescribir_spool()
+
+    def iniciar(self):
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._detenido.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="AuditoriaSink", daemon=True)
+        self._hilo.start()
+
+    def _bucle(self):
+        while not self._detenido.is_set():
+            self._hay_lote.wait(self.intervalo)
+            self._hay_lote.clear()
+            self.flush()
+
+    def detener(self, timeout=5.0):
+        """Detiene el hilo y hace un último flush; lo que no se pudo escribir queda en el spool."""
+        self._detenido.set()
+        self._hay_lote.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+            self._hilo = None
+        self.flush()
+
+_SINK = None
+_LOCK_SINK = threading.Lock()
+
+def activar_sink_auditoria(db_connection=None, **opciones):
+    """Crea e inicia el sink de proceso (una sola vez). Las opciones por defecto salen de core.config."""
+    global _SINK
+    with _LOCK_SINK:
+        if _SINK is None:
+            from core.config import AUDITORIA_LOTE_TAMANO, AUDITORIA_LOTE_INTERVALO, AUDITORIA_SPOOL_PATH
+            opciones.setdefault("tamano_lote", AUDITORIA_LOTE_TAMANO)
+            opciones.setdefault("intervalo", AUDITORIA_LOTE_INTERVALO)
+            opciones.setdefault("spool_path", AUDITORIA_SPOOL_PATH)
+            _SINK = AuditoriaSink(db_connection, **opciones)
+            _SINK.iniciar()
+            atexit.register(detener_sink_auditoria)
+        return _SINK
+
+def sink_auditoria_activo():
+    return _SINK
+
+def detener_sink_auditoria():
+    global _SINK
+    with _LOCK_SINK:
+        sink, _SINK = _SINK, None
+    if sink is not None:
+        sink.detener()
@@ -8,12 +8,21 @@ from PyQt6.QtWidgets import QApplication, QTableWidgetItem, QCheckBox, QFileDial
 import pandas as pd
 import pyodbc
 import os
-from scripts.procesar_e_importar_inventario import importar_inventario_desde_archivo
+from scripts.procesar_e_importar_inventario import ejecutar_importacion, preparar_importacion
+from core.cache import estadisticas_caches, invalidar_caches
+from core.metricas_sql import instantanea_metricas_sql
+from core.workers import ejecutar_en_segundo_plano, tarea_actual
 
 # REGLA CRÍTICA: Nunca usar .text() directo sobre widgets. Usar siempre _get_text(nombre) o _get_checked(nombre).
 # Si se modifica este archivo, revisar que no haya ningún .text() directo. Documentar cualquier excepción.
 # Última revisión: 2025-05-25
 
+def _informar_avance_importacion(cargadas, total):
+    # Corre en el hilo de la tarea: el avance viaja a la GUI por la señal de progreso
+    tarea = tarea_actual()
+    if tarea is not None:
+        tarea.informar_progreso(cargadas, total)
+
 class PermisoAuditoria:
     def __init__(self, modulo):
         self.modulo = modulo
@@ -101,6 +110,12 @@ class ConfiguracionController:
             idx = self.view.tabs.indexOf(self.view.tab_permisos_usuarios)
             if idx != -1:
                 self.view.tabs.currentChanged.connect(lambda i: self.cargar_permisos_por_usuario() if i == idx else None)
+        # Estadísticas de la caché de lectura: al abrir la pestaña Diagnóstico y con su botón
+        if hasattr(self.view, 'tabs') and hasattr(self.view, 'tab_diagnostico'):
+            idx = self.view.tabs.indexOf(self.view.tab_diagnostico)
+            if idx != -1:
+                self.view.tabs.currentChanged.connect(lambda i: self.cargar_diagnostico_cache() if i == idx else None)
+            self.view.boton_actualizar_diagnostico.clicked.connect(self.cargar_diagnostico_cache)
         # Conectar cambio de tema visual
         if hasattr(self.view, "theme_changed"):
             self.view.theme_changed.connect(self.cambiar_tema)
@@ -252,17 +267,35 @@ class ConfiguracionController:
     def activar_modo_offline(self):
         try:
             self.model.activar_modo_offline()
-            self.mostrar_mensaje("Modo offline activado.", tipo="info")
+            self.mostrar_mensaje("Modo offline activado: las lecturas usan la réplica local y las escrituras se envían en segundo plano.", tipo="info")
         except Exception as e:
             self.mostrar_mensaje(f"Error al activar el modo offline: {e}", tipo="error")
 
     @permiso_auditoria_configuracion('editar')
     def desactivar_modo_offline(self):
-        try:
-            self.model.desactivar_modo_offline()
+        # Al desactivar se envía la cola de escrituras diferidas: puede tardar, corre fuera del hilo de la GUI
+        ejecutar_en_segundo_plano(
+            self.model.desactivar_modo_offline,
+            al_terminar=self._mostrar_resultado_modo_offline,
+            al_error=lambda e: self.mostrar_mensaje(f"Error al desactivar el modo offline: {e}", tipo="error"),
+            vista=self.view,
+            mensaje_carga="Enviando escrituras pendientes...",
+            clave="configuracion.modo_offline",
+        )
+
+    def _mostrar_resultado_modo_offline(self, resumen):
+        if isinstance(resumen, dict) and resumen.get('pendientes'):
+            self.mostrar_mensaje(
+                f"Sin conexión con el servidor: quedan {resumen['pendientes']} escrituras en cola. "
+                "El modo offline se desactivará al terminar de enviarlas.", tipo="advertencia"
+            )
+        elif isinstance(resumen, dict) and resumen.get('conflictos'):
+            self.mostrar_mensaje(
+                f"Modo offline desactivado. {resumen['conflictos']} escrituras no se enviaron porque los registros "
+                "cambiaron en el servidor; revise el log.", tipo="advertencia"
+            )
+        else:
             self.mostrar_mensaje("Modo offline desactivado.", tipo="info")
-        except Exception as e:
-            self.mostrar_mensaje(f"Error al desactivar el modo offline: {e}", tipo="error")
 
     @permiso_auditoria_configuracion('editar')
     def cambiar_estado_notificaciones(self):
@@ -335,32 +368,62 @@ class ConfiguracionController:
         if not ruta_csv.lower().endswith('.csv'):
             self.mostrar_mensaje("El archivo seleccionado no es un CSV.", tipo="error")
             return
-        # Callback robusto para preview y confirmación
-        def confirmar(df, resultado):
-            if hasattr(self.view, 'mostrar_preview'):
-                try:
-                    self.view.mostrar_preview(df)
-                except Exception as e:
-                    self.mostrar_mensaje(f"Error mostrando preview: {e}", tipo="error")
-            if hasattr(self.view, 'mostrar_advertencias'):
-                try:
-                    self.view.mostrar_advertencias(resultado.get("advertencias", []))
-                except Exception as e:
-                    self.mostrar_mensaje(f"Error mostrando advertencias: {e}", tipo="error")
-            if hasattr(self.view, 'confirmar_importacion'):
-                try:
-                    return self.view.confirmar_importacion(len(df))
-                except Exception as e:
-                    self.mostrar_mensaje(f"Error en confirmación de importación: {e}", tipo="error")
-                    return False
-            return True
-        try:
-            resultado = importar_inventario_desde_archivo(ruta_csv, self.usuario_actual, confirmar_importacion_callback=confirmar)
-        except Exception as e:
-            self.mostrar_mensaje(f"Error al procesar el archivo: {e}", tipo="error")
+        # La lectura del archivo y la carga a la base corren en segundo plano; la vista previa y la
+        # confirmación quedan en el hilo de la GUI, entre ambas tareas
+        ejecutar_en_segundo_plano(
+            preparar_importacion, args=(ruta_csv, self.usuario_actual),
+            al_terminar=self._confirmar_importacion,
+            al_error=self._error_importacion,
+            vista=self.view,
+            mensaje_carga="Procesando archivo de inventario...",
+            clave="configuracion.importar_inventario",
+        )
+
+    def _confirmar_importacion(self, preparado):
+        df, resultado = preparado
+        if df is None:
+            self._mostrar_resultado_importacion(resultado)
             return
+        if hasattr(self.view, 'mostrar_preview'):
+            try:
+                self.view.mostrar_preview(df)
+            except Exception as e:
+                self.mostrar_mensaje(f"Error mostrando preview: {e}", tipo="error")
+        if hasattr(self.view, 'mostrar_advertencias'):
+            try:
+                self.view.mostrar_advertencias(resultado.get("advertencias", []))
+            except Exception as e:
+                self.mostrar_mensaje(f"Error mostrando advertencias: {e}", tipo="error")
+        confirmado = True
+        if hasattr(self.view, 'confirmar_importacion'):
+            try:
+                confirmado = self.view.confirmar_importacion(len(df))
+            except Exception as e:
+                self.mostrar_mensaje(f"Error en confirmación de importación: {e}", tipo="error")
+                confirmado = False
+        if not confirmado:
+            resultado["mensajes"].append("Importación cancelada por el usuario.")
+            self._mostrar_resultado_importacion(resultado)
+            return
+        ejecutar_en_segundo_plano(
+            ejecutar_importacion, args=(df, self.usuario_actual, resultado),
+            kwargs={"al_progreso": _informar_avance_importacion},
+            al_terminar=self._mostrar_resultado_importacion,
+            al_error=self._error_importacion,
+            al_progreso=self._informar_progreso_importacion,
+            vista=self.view,
+            mensaje_carga="Importando inventario...",
+            clave="configuracion.importar_inventario",
+        )
+
+    def _error_importacion(self, error):
+        self.mostrar_mensaje(f"Error al procesar el archivo: {error}", tipo="error")
+
+    def _mostrar_resultado_importacion(self, resultado):
         # Feedback visual y manejo de advertencias/errores
         if resultado.get("exito"):
+            # La importación reescribe el catálogo: lo cacheado de perfiles ya no vale
+            invalidar_caches()
             if hasattr(self.view, 'mostrar_exito'):
                 try:
                     self.view.mostrar_exito(resultado.get("mensajes", []))
@@ -383,6 +446,20 @@ class ConfiguracionController:
                 self.mostrar_mensaje(f"Error mostrando advertencias: {e}", tipo="error")
         # Comentario para tests: cubrir casos de archivo inexistente, formato inválido, advertencias, errores y éxito.
 
+    def cargar_diagnostico_cache(self):
+        """
+        Muestra en la pestaña Diagnóstico los aciertos/fallos de cada caché de lectura (core/cache.py)
+        y los sitios de consulta SQL que más tiempo acumulan (core/metricas_sql.py).
+        """
+        if hasattr(self.view, 'mostrar_estadisticas_cache'):
+            self.view.mostrar_estadisticas_cache(estadisticas_caches())
+        if hasattr(self.view, 'mostrar_metricas_sql'):
+            self.view.mostrar_metricas_sql(instantanea_metricas_sql())
+
+    def _informar_progreso_importacion(self, cargadas, total):
+        # Llega por la señal de progreso de la tarea, ya en el hilo de la GUI
+        self.mostrar_mensaje(f"Importando inventario... {cargadas} de {total} filas", tipo="info", destino="mensaje_label")
+
     def cargar_permisos_modulos(self):
         try:
             usuarios = self.usuarios_model.obtener_usuarios()
@@ -1,4 +1,5 @@
-from core.database import ConfiguracionDatabaseConnection  # Importar la clase correcta
+from core.database import BaseDatabaseConnection, ConfiguracionDatabaseConnection  # Importar la clase correcta
+from core.offline import activar_motor_offline, desactivar_motor_offline
 
 class ConfiguracionModel:
     def __init__(self, db_connection):
@@ -35,12 +36,18 @@ class ConfiguracionModel:
             self.db.ejecutar_query(query, (valor, clave))
 
     def activar_modo_offline(self):
+        # A partir de acá las lecturas salen de la réplica local y las escrituras van a la cola (core/offline.py)
+        if isinstance(self.db, BaseDatabaseConnection):
+            activar_motor_offline()
         query = "UPDATE configuracion_sistema SET valor = 'True' WHERE clave = 'modo_offline'"
         self.db.ejecutar_query(query)
 
     def desactivar_modo_offline(self):
+        """Envía la cola de escrituras diferidas y devuelve su resumen (ver desactivar_motor_offline)."""
+        resumen = desactivar_motor_offline() if isinstance(self.db, BaseDatabaseConnection) else None
         query = "UPDATE configuracion_sistema SET valor = 'False' WHERE clave = 'modo_offline'"
         self.db.ejecutar_query(query)
+        return resumen
 
     def obtener_estado_notificaciones(self):
         query = "SELECT valor FROM configuracion_sistema WHERE clave = 'notificaciones_activas'"
@@ -41,6 +41,13 @@ TAB_GENERAL = "General"
 TAB_CONEXION = "Conexión"
 TAB_PERMISOS = "Permisos"
 TAB_IMPORTAR = "Importar Inventario"
+TAB_DIAGNOSTICO = "Diagnóstico"
+LABEL_DIAGNOSTICO = "Cachés de lectura: consultas resueltas sin ir a la base desde que se abrió la aplicación."
+BTN_ACTUALIZAR_DIAGNOSTICO = "Actualizar"
+TOOLTIP_ACTUALIZAR_DIAGNOSTICO = "Actualizar estadísticas de caché"
+HEADERS_DIAGNOSTICO = ["Caché", "Entradas", "Aciertos", "Fallos", "% aciertos", "Invalidaciones", "Desalojos"]
+LABEL_DIAGNOSTICO_SQL = "Consultas SQL: sitios que más tiempo de base acumulan desde que se abrió la aplicación."
+HEADERS_DIAGNOSTICO_SQL = ["Módulo", "Método", "Consultas", "Total ms", "Promedio ms", "Máx ms", "Filas", "Consulta"]
 IMPORTAR_INVENTARIO_TITLE = "Importar Inventario desde CSV/Excel"
 IMPORTAR_INVENTARIO_STYLE = "font-size: 18px; font-weight: bold; color: #2563eb;"
 AYUDA_IMPORT = "Selecciona un archivo CSV o Excel con los datos de inventario. El sistema detectará y completará automáticamente las columnas requeridas. Puedes importar archivos incompletos: los campos faltantes se rellenarán por defecto."
@@ -95,6 +102,7 @@ class ConfiguracionView(QMainWindow):
         self._init_tab_conexion()
         self._init_tab_permisos()
         self._init_tab_importar()
+        self._init_tab_diagnostico()
         self.main_layout.addWidget(self.tabs)
         self.main_widget.setLayout(self.main_layout)
         self.setCentralWidget(self.main_widget)
@@ -337,6 +345,61 @@ class ConfiguracionView(QMainWindow):
         self._reforzar_accesibilidad_labels()
         self._aplicar_margenes_layout()
 
+    def _init_tab_diagnostico(self):
+        self.tab_diagnostico = QWidget()
+        layout_diagnostico = QVBoxLayout(self.tab_diagnostico)
+        label_diagnostico = QLabel(LABEL_DIAGNOSTICO)
+        label_diagnostico.setWordWrap(True)
+        layout_diagnostico.addWidget(label_diagnostico)
+        self.tabla_diagnostico = QTableWidget(0, len(HEADERS_DIAGNOSTICO))
+        self.tabla_diagnostico.setHorizontalHeaderLabels(HEADERS_DIAGNOSTICO)
+        self.tabla_diagnostico.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.tabla_diagnostico.setAccessibleName("Tabla de estadísticas de caché")
+        layout_diagnostico.addWidget(self.tabla_diagnostico)
+        self.label_diagnostico_sql = QLabel(LABEL_DIAGNOSTICO_SQL)
+        self.label_diagnostico_sql.setWordWrap(True)
+        layout_diagnostico.addWidget(self.label_diagnostico_sql)
+        self.tabla_diagnostico_sql = QTableWidget(0, len(HEADERS_DIAGNOSTICO_SQL))
+        self.tabla_diagnostico_sql.setHorizontalHeaderLabels(HEADERS_DIAGNOSTICO_SQL)
+        self.tabla_diagnostico_sql.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.tabla_diagnostico_sql.setAccessibleName("Tabla de consultas SQL por tiempo total")
+        layout_diagnostico.addWidget(self.tabla_diagnostico_sql)
+        self.boton_actualizar_diagnostico = QPushButton(BTN_ACTUALIZAR_DIAGNOSTICO)
+        self.boton_actualizar_diagnostico.setToolTip(TOOLTIP_ACTUALIZAR_DIAGNOSTICO)
+        self.boton_actualizar_diagnostico.setAccessibleName(TOOLTIP_ACTUALIZAR_DIAGNOSTICO)
+        layout_diagnostico.addWidget(self.boton_actualizar_diagnostico, alignment=Qt.AlignmentFlag.AlignRight)
+        self.tabs.addTab(self.tab_diagnostico, TAB_DIAGNOSTICO)
+
+    def mostrar_estadisticas_cache(self, estadisticas):
+        """Llena la tabla de Diagnóstico con las estadísticas de core.cache.estadisticas_caches()."""
+        self.tabla_diagnostico.setRowCount(len(estadisticas))
+        for fila, datos in enumerate(estadisticas):
+            valores = [
+                datos['nombre'], datos['entradas'], datos['aciertos'], datos['fallos'],
+                f"{datos['tasa_aciertos']:.0%}", datos['invalidaciones'], datos['desalojos'],
+            ]
+            for columna, valor in enumerate(valores):
+                self.tabla_diagnostico.setItem(fila, columna, QTableWidgetItem(str(valor)))
+        self.tabla_diagnostico.resizeColumnsToContents()
+
+    def mostrar_metricas_sql(self, instantanea):
+        """Llena la tabla de consultas SQL con core.metricas_sql.instantanea_metricas_sql() y resume p95 por módulo."""
+        resumen = ", ".join(f"{datos['modulo']} p95 ≤ {datos['p95_ms']} ms" for datos in instantanea['modulos'][:5])
+        self.label_diagnostico_sql.setText(
+            f"{LABEL_DIAGNOSTICO_SQL} Lentas (≥ {instantanea['umbral_lenta_ms']} ms): {instantanea['lentas']}."
+            + (f" {resumen}." if resumen else "")
+        )
+        sitios = instantanea['sitios']
+        self.tabla_diagnostico_sql.setRowCount(len(sitios))
+        for fila, datos in enumerate(sitios):
+            valores = [
+                datos['modulo'], datos['metodo'], datos['consultas'], f"{datos['total_ms']:.0f}",
+                f"{datos['promedio_ms']:.1f}", f"{datos['max_ms']:.0f}", datos['filas'], datos['huella'],
+            ]
+            for columna, valor in enumerate(valores):
+                self.tabla_diagnostico_sql.setItem(fila, columna, QTableWidgetItem(str(valor)))
+        self.tabla_diagnostico_sql.resizeColumnsToContents()
+
     def _init_importar_file_row(self, layout_importar):
         file_row = QHBoxLayout()
         self.csv_file_input = QLabel(MSG_NO_ARCHIVO)
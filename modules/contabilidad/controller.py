@@ -5,6 +5,7 @@ from modules.usuarios.model import UsuariosModel
 from modules.auditoria.model import AuditoriaModel
 from functools import wraps
 from core.logger import log_error
+from core.workers import cancelar_exportacion, ejecutar_en_segundo_plano, mostrar_progreso_exportacion
 
 class PermisoAuditoria:
     def __init__(self, modulo):
@@ -77,6 +78,22 @@ class ContabilidadController(BaseController):
             self.view.boton_agregar_balance.clicked.connect(self.abrir_dialogo_nuevo_movimiento)
         if hasattr(self.view, 'boton_generar_pdf'):
             self.view.boton_generar_pdf.clicked.connect(self.generar_recibo_pdf_desde_vista)
+        if hasattr(self.view, 'tab_estadisticas'):
+            self.view.estadisticas = self.model.estadisticas
+            self.view.tabs.currentChanged.connect(self._al_cambiar_pestana)
+
+    def _al_cambiar_pestana(self, _indice):
+        if self.view.tabs.currentWidget() is self.view.tab_estadisticas:
+            self.actualizar_estadisticas()
+
+    def actualizar_estadisticas(self):
+        """Recarga los años disponibles y redibuja; las series se agregan en SQL una vez por cambio de datos."""
+        try:
+            self.view.cargar_anios_estadisticas(self.model.estadisticas.anios())
+            self.view.actualizar_grafico_estadisticas()
+        except Exception as e:
+            self.view.label_resumen.setText(f"Error al cargar estadísticas: {e}")
+            log_error(f"Error al cargar estadísticas: {e}")
 
     def abrir_dialogo_nuevo_recibo(self):
         self.view.abrir_dialogo_nuevo_recibo(self)
@@ -145,14 +162,27 @@ class ContabilidadController(BaseController):
 
     @permiso_auditoria_contabilidad('exportar_balance')
     def exportar_balance(self, formato):
-        try:
-            datos_balance = self.model.obtener_datos_balance()  # Método que debe obtener los datos del balance
-            mensaje = self.model.exportar_balance(formato, datos_balance)
-            self.view.label.setText(mensaje)
-        except Exception as e:
+        def exportar():
+            # Los movimientos se leen por lotes mientras se escribe el archivo, en el hilo del pool
+            return self.model.exportar_balance(formato, self.model.obtener_datos_balance())
+
+        def al_error(e):
             self.view.label.setText(f"Error al exportar balance: {e}")
             log_error(f"Error al exportar balance: {e}")
 
+        ejecutar_en_segundo_plano(
+            exportar,
+            al_terminar=self.view.label.setText,
+            al_error=al_error,
+            al_progreso=lambda escritas, total: mostrar_progreso_exportacion(self.view, escritas, total),
+            vista=self.view,
+            mensaje_carga="Exportando balance...",
+            clave="contabilidad.exportar_balance",
+        )
+
+    def cancelar_exportacion_balance(self):
+        cancelar_exportacion("contabilidad.exportar_balance")
+
     @permiso_auditoria_contabilidad('generar_firma_digital')
     def generar_firma_digital(self, datos_recibo):
         try:
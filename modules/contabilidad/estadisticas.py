@@ -0,0 +1,128 @@
+"""
+Series pre-agregadas para la pestaña Estadísticas de Contabilidad.
+
+El gráfico se armaba desde las filas crudas de movimientos_contables en el hilo de la GUI. Acá:
+
+1. una sola consulta GROUP BY agrega en el servidor por año, mes y tipo_movimiento (movimientos_contables),
+   por año, mes y obra los cobros (recibos no anulados) y los pagos (pagos_pedidos); son unas decenas de
+   filas por mes aunque la tabla tenga años de movimientos;
+2. el resultado queda en un DataFrame y cada gráfico se arma con groupby de pandas sobre esas filas;
+3. cada serie se memoriza por filtro (tipo de gráfico, año, mes, dólar): cambiar de filtro y volver no
+   vuelve a calcular nada. `invalidar()` descarta todo y sube `version`, que la vista usa en la clave de
+   su caché de renders (core/graficos.py).
+
+movimientos_contables no tiene columna de moneda ni de obra: "Por Obra" sale de recibos y pagos_pedidos
+y "Desglose por Moneda" muestra los totales en pesos y convertidos al dólar ingresado.
+"""
+from collections import namedtuple
+import pandas as pd
+
+TIPOS_GRAFICO = ("Ingresos vs Egresos", "Cobros por Obra", "Pagos por Obra", "Evolución Mensual", "Desglose por Moneda")
+
+COLUMNAS_AGREGADO = ["fuente", "anio", "mes", "obra", "tipo", "total", "cantidad"]
+
+SQL_AGREGADO = """
+    SELECT 'movimientos' AS fuente, YEAR(fecha) AS anio, MONTH(fecha) AS mes, CAST(NULL AS INT) AS obra,
+           LOWER(tipo_movimiento) AS tipo, SUM(monto) AS total, COUNT(*) AS cantidad
+    FROM movimientos_contables
+    GROUP BY YEAR(fecha), MONTH(fecha), LOWER(tipo_movimiento)
+    UNION ALL
+    SELECT 'cobros', YEAR(fecha_emision), MONTH(fecha_emision), obra_id, CAST(NULL AS VARCHAR(20)), SUM(monto_total), COUNT(*)
+    FROM recibos
+    WHERE estado IS NULL OR LOWER(estado) <> 'anulado'
+    GROUP BY YEAR(fecha_emision), MONTH(fecha_emision), obra_id
+    UNION ALL
+    SELECT 'pagos', YEAR(fecha), MONTH(fecha), obra_id, CAST(NULL AS VARCHAR(20)), SUM(monto), COUNT(*)
+    FROM pagos_pedidos
+    GROUP BY YEAR(fecha), MONTH(fecha), obra_id
+"""
+
+# series: [(nombre, valores)] alineadas con etiquetas; tipo: "barras" o "linea" (ver core/graficos.py)
+SerieGrafico = namedtuple("SerieGrafico", "titulo etiquetas series tipo unidad")
+
+class EstadisticasContables:
+    def __init__(self, db_connection):
+        self.db = db_connection
+        self.version = 0
+        self._agregado = None
+        self._series = {}
+
+    def invalidar(self):
+        """Descarta el agregado y las series memorizadas; llamar después de alta de movimientos/recibos/pagos."""
+        self._agregado = None
+        self._series.clear()
+        self.version += 1
+
+    def agregado(self):
+        """DataFrame (fuente, anio, mes, obra, tipo, total, cantidad); se consulta una vez por versión."""
+        if self._agregado is None:
+            filas = self.db.ejecutar_query(SQL_AGREGADO) or []
+            agregado = pd.DataFrame([tuple(fila) for fila in filas], columns=COLUMNAS_AGREGADO)
+            agregado["total"] = pd.to_numeric(agregado["total"], errors="coerce").fillna(0.0)
+            agregado = agregado.dropna(subset=["anio", "mes"])
+            agregado[["anio", "mes"]] = agregado[["anio", "mes"]].astype(int)
+            self._agregado = agregado
+        return self._agregado
+
+    def anios(self):
+        """Años con datos, del más reciente al más antiguo (para combo_anio)."""
+        return sorted({int(anio) for anio in self.agregado()["anio"]}, reverse=True)
+
+    def serie(self, tipo_grafico, anio=None, mes=None, dolar=None):
+        """SerieGrafico del tipo pedido filtrada por año/mes; con `dolar` los importes van en USD."""
+        if tipo_grafico not in TIPOS_GRAFICO:
+            raise ValueError(f"Tipo de gráfico desconocido: {tipo_grafico}")
+        clave = (tipo_grafico, anio, mes, dolar)
+        if clave not in self._series:
+            self._series[clave] = self._calcular(tipo_grafico, anio, mes, dolar)
+        return self._series[clave]
+
+    def _filtrar(self, fuente, anio, mes):
+        agregado = self.agregado()
+        filtro = agregado["fuente"] == fuente
+        if anio is not None:
+            filtro &= agregado["anio"] == anio
+        if mes is not None:
+            filtro &= agregado["mes"] == mes
+        return agregado[filtro]
+
+    def _por_periodo(self, anio, mes):
+        """Ingresos y egresos por (anio, mes), ordenados por período."""
+        movimientos = self._filtrar("movimientos", anio, mes)
+        clase = movimientos["tipo"].fillna("").str.strip().str[:6].map({"ingres": "ingreso", "egreso": "egreso"})
+        tabla = (
+            movimientos.assign(clase=clase).dropna(subset=["clase"])
+            .pivot_table(index=["anio", "mes"], columns="clase", values="total", aggfunc="sum", fill_value=0.0)
+            .reindex(columns=["ingreso", "egreso"], fill_value=0.0)
+            .sort_index()
+        )
+        etiquetas = [f"{mes:02d}/{anio}" for anio, mes in tabla.index]
+        return etiquetas, tabla
+
+    def _por_obra(self, fuente, anio, mes):
+        datos = self._filtrar(fuente, anio, mes)
+        por_obra = datos.groupby(datos["obra"].fillna(-1).astype(int))["total"].sum().sort_values(ascending=False)
+        etiquetas = ["Sin obra" if obra == -1 else f"Obra {obra}" for obra in por_obra.index]
+        return etiquetas, por_obra.tolist()
+
+    def _calcular(self, tipo_grafico, anio, mes, dolar):
+        unidad = "USD" if dolar else "ARS"
+        factor = 1.0 / dolar if dolar else 1.0
+        if tipo_grafico == "Ingresos vs Egresos":
+            etiquetas, tabla = self._por_periodo(anio, mes)
+            series = [("Ingresos", (tabla["ingreso"] * factor).tolist()), ("Egresos", (tabla["egreso"] * factor).tolist())]
+            return SerieGrafico(tipo_grafico, etiquetas, series, "barras", unidad)
+        if tipo_grafico == "Evolución Mensual":
+            etiquetas, tabla = self._por_periodo(anio, mes)
+            saldo = (tabla["ingreso"] - tabla["egreso"]) * factor
+            return SerieGrafico(tipo_grafico, etiquetas, [("Saldo", saldo.tolist())], "linea", unidad)
+        if tipo_grafico == "Desglose por Moneda":
+            _etiquetas, tabla = self._por_periodo(anio, mes)
+            totales = [float(tabla["ingreso"].sum()), float(tabla["egreso"].sum())]
+            series = [("ARS", totales)]
+            if dolar:
+                series.append(("USD", [total / dolar for total in totales]))
+            return SerieGrafico(tipo_grafico, ["Ingresos", "Egresos"], series, "barras", "")
+        fuente = "cobros" if tipo_grafico == "Cobros por Obra" else "pagos"
+        etiquetas, totales = self._por_obra(fuente, anio, mes)
+        return SerieGrafico(tipo_grafico, etiquetas, [(tipo_grafico.split()[0], [total * factor for total in totales])], "barras", unidad)
@@ -1,6 +1,8 @@
 import pandas as pd
 from fpdf import FPDF
+from core.exportacion import EXTENSIONES, FORMATOS, NOMBRES_FORMATO, ExportacionCancelada, exportar_filas, filas_de_query
 import hashlib
+from modules.contabilidad.estadisticas import EstadisticasContables
 
 class ContabilidadModel:
     """
@@ -9,6 +11,8 @@ class ContabilidadModel:
     """
     def __init__(self, db_connection):
         self.db = db_connection
+        # Series pre-agregadas de la pestaña Estadísticas; se invalidan en cada alta/cambio de importes
+        self.estadisticas = EstadisticasContables(db_connection)
 
     def obtener_reportes(self):
         query = "SELECT * FROM reportes"
@@ -28,6 +32,7 @@ class ContabilidadModel:
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         """
         self.db.ejecutar_query(query, datos)
+        self.estadisticas.invalidar()
 
     def obtener_movimientos_contables(self):
         query = "SELECT * FROM movimientos_contables"
@@ -39,46 +44,47 @@ class ContabilidadModel:
         VALUES (?, ?, ?, ?, ?, ?)
         """
         self.db.ejecutar_query(query, datos)
+        self.estadisticas.invalidar()
 
     def anular_recibo(self, id_recibo):
         query = "UPDATE recibos SET estado = 'anulado' WHERE id = ?"
         self.db.ejecutar_query(query, (id_recibo,))
+        self.estadisticas.invalidar()
+
+    def obtener_datos_balance(self):
+        """Movimientos contables en el orden de columnas de exportar_balance, leídos por lotes."""
+        query = """
+        SELECT fecha, tipo_movimiento, monto, concepto, referencia_recibo, observaciones
+        FROM movimientos_contables
+        ORDER BY fecha
+        """
+        return filas_de_query(self.db, query)
 
     def exportar_balance(self, formato: str, datos_balance) -> str:
         """
-        Exporta el balance contable en el formato solicitado ('excel' o 'pdf').
+        Exporta el balance contable en el formato solicitado ('excel', 'csv' o 'pdf').
+        `datos_balance` puede ser una lista o un iterable (p. ej. obtener_datos_balance()); se escribe en streaming.
         Si no hay datos, retorna un mensaje de advertencia.
         Si ocurre un error, retorna un mensaje de error.
         El nombre del archivo incluye fecha y hora para evitar sobrescritura.
         """
-        if not datos_balance:
+        if datos_balance is None:
             return "No hay datos de balance para exportar."
         formato = (formato or '').lower().strip()
-        if formato not in ("excel", "pdf"):
-            return "Formato no soportado. Use 'excel' o 'pdf'."
+        if formato not in FORMATOS:
+            return "Formato no soportado. Use 'excel', 'csv' o 'pdf'."
         fecha_str = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
+        nombre_archivo = f"balance_contable_{fecha_str}{EXTENSIONES[formato]}"
         columnas = ["Fecha", "Tipo", "Monto", "Concepto", "Referencia", "Observaciones"]
-        if formato == "excel":
-            nombre_archivo = f"balance_contable_{fecha_str}.xlsx"
-            try:
-                df = pd.DataFrame(datos_balance, columns=columnas)
-                df.to_excel(nombre_archivo, index=False)
-                return f"Balance exportado a Excel: {nombre_archivo}"
-            except Exception as e:
-                return f"Error al exportar a Excel: {e}"
-        elif formato == "pdf":
-            nombre_archivo = f"balance_contable_{fecha_str}.pdf"
-            try:
-                pdf = FPDF()
-                pdf.add_page()
-                pdf.set_font("Arial", size=12)
-                pdf.cell(200, 10, "Balance Contable", ln=True, align="C")
-                for row in datos_balance:
-                    pdf.cell(200, 10, str(row), ln=True)
-                pdf.output(nombre_archivo)
-                return f"Balance exportado a PDF: {nombre_archivo}"
-            except Exception as e:
-                return f"Error al exportar a PDF: {e}"
+        try:
+            escritas = exportar_filas(datos_balance, formato, nombre_archivo, columnas, titulo="Balance Contable")
+        except ExportacionCancelada:
+            return "Exportación del balance cancelada."
+        except Exception as e:
+            return f"Error al exportar a {NOMBRES_FORMATO[formato]}: {e}"
+        if not escritas:
+            return "No hay datos de balance para exportar."
+        return f"Balance exportado a {NOMBRES_FORMATO[formato]}: {nombre_archivo}"
 
     def generar_recibo_pdf(self, id_recibo):
         query = """
@@ -149,6 +155,7 @@ class ContabilidadModel:
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         '''
         self.db.ejecutar_query(query, (id_pedido, modulo, obra_id, monto, fecha, usuario, estado, comprobante, observaciones))
+        self.estadisticas.invalidar()
 
     def actualizar_estado_pago(self, id_pago, nuevo_estado):
         query = "UPDATE pagos_pedidos SET estado = ? WHERE id = ?"
@@ -167,10 +174,24 @@ class ContabilidadModel:
             return self.db.ejecutar_query(query, (obra_id,))
 
     def obtener_estado_pago_pedido(self, id_pedido, modulo):
-        query = "SELECT estado FROM pagos_pedidos WHERE id_pedido = ? AND modulo = ? ORDER BY fecha DESC LIMIT 1"
+        query = "SELECT TOP 1 estado FROM pagos_pedidos WHERE id_pedido = ? AND modulo = ? ORDER BY fecha DESC"
         res = self.db.ejecutar_query(query, (id_pedido, modulo))
         return res[0][0] if res else None
 
+    def obtener_estados_pago_por_obras(self):
+        """
+        Estado del último pago de cada obra y módulo en una sola consulta: {(obra_id, modulo): estado}.
+        Mantiene el criterio de obtener_estado_pago_pedido (el pago más reciente manda).
+        Las combinaciones sin pagos no aparecen.
+        """
+        query = """
+        SELECT obra_id, modulo, estado FROM (
+            SELECT obra_id, modulo, estado, ROW_NUMBER() OVER (PARTITION BY obra_id, modulo ORDER BY fecha DESC) AS orden
+            FROM pagos_pedidos
+        ) ultimos WHERE orden = 1
+        """
+        return {(fila[0], fila[1]): fila[2] for fila in (self.db.ejecutar_query(query) or [])}
+
     def obtener_pagos_por_usuario(self, usuario):
         query = "SELECT * FROM pagos_pedidos WHERE usuario = ?"
         return self.db.ejecutar_query(query, (usuario,))
@@ -16,11 +16,10 @@ from PyQt6.QtGui import QIcon, QColor, QPixmap, QPainter, QAction
 from PyQt6.QtCore import QSize
 from PyQt6.QtPrintSupport import QPrinter
 from functools import partial
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
 from core.table_responsive_mixin import TableResponsiveMixin
 from core.ui_components import estilizar_boton_icono, aplicar_qss_global_y_tema
 from core.logger import log_error
+from core.graficos import GraficoCacheado
 
 class ContabilidadView(QWidget, TableResponsiveMixin):
     def __init__(self, db_connection=None, obras_model=None):
@@ -174,8 +173,11 @@ class ContabilidadView(QWidget, TableResponsiveMixin):
         controles_layout.addWidget(QLabel("Personalizada:"))
         controles_layout.addWidget(self.combo_estadistica_personalizada)
         self.tab_estadisticas_layout.addLayout(controles_layout)
-        self.grafico_canvas = FigureCanvas(Figure(figsize=(6, 4)))
-        self.tab_estadisticas_layout.addWidget(self.grafico_canvas)
+        # El canvas (y matplotlib) se crean recién al mostrar el primer gráfico; ver grafico_canvas
+        self.grafico = GraficoCacheado(figsize=(6, 4))
+        self.estadisticas = None  # EstadisticasContables, la asigna el controlador
+        self.layout_grafico = QVBoxLayout()
+        self.tab_estadisticas_layout.addLayout(self.layout_grafico)
         self.setup_exportar_grafico_btn()
         self.tabs.addTab(self.tab_estadisticas, "Estadísticas")
         self.boton_actualizar_grafico.clicked.connect(self.actualizar_grafico_estadisticas)
@@ -461,6 +463,68 @@ class ContabilidadView(QWidget, TableResponsiveMixin):
             self.boton_exportar_grafico = QPushButton("Exportar gráfico")
             self.tab_estadisticas_layout.addWidget(self.boton_exportar_grafico)
 
+    def _grafico_en_layout(self):
+        """El GraficoCacheado con su canvas ya agregado a la pestaña (se crea con el primer gráfico)."""
+        if self.grafico.canvas.parent() is None:
+            self.layout_grafico.addWidget(self.grafico.canvas)
+        return self.grafico
+
+    @property
+    def grafico_canvas(self):
+        return self._grafico_en_layout().canvas
+
+    def cargar_anios_estadisticas(self, anios):
+        """Carga combo_anio ("Todos" + años con datos) sin disparar un redibujo por cada ítem."""
+        actual = self.combo_anio.currentText()
+        self.combo_anio.blockSignals(True)
+        self.combo_anio.clear()
+        self.combo_anio.addItems(["Todos"] + [str(anio) for anio in anios])
+        indice = self.combo_anio.findText(actual)
+        self.combo_anio.setCurrentIndex(max(indice, 0))
+        self.combo_anio.blockSignals(False)
+
+    def _filtros_estadisticas(self):
+        anio = self.combo_anio.currentText()
+        mes = self.combo_mes.currentText()
+        try:
+            dolar = float(self.input_dolar.text().replace(",", ".")) or None
+        except ValueError:
+            dolar = None
+        return (
+            self.combo_tipo_grafico.currentText(),
+            int(anio) if anio.isdigit() else None,
+            int(mes) if mes.isdigit() else None,
+            dolar,
+        )
+
     def actualizar_grafico_estadisticas(self):
-        # Implementación básica: solo muestra un mensaje
-        self.label_resumen.setText("Actualizando gráfico...")
+        """Redibuja el gráfico con los filtros actuales desde las series pre-agregadas del modelo."""
+        if self.estadisticas is None:
+            self.label_resumen.setText("Sin datos para graficar.")
+            return
+        tipo_grafico, anio, mes, dolar = self._filtros_estadisticas()
+        try:
+            serie = self.estadisticas.serie(tipo_grafico, anio, mes, dolar)
+        except Exception as e:
+            self.label_resumen.setText(f"Error al calcular estadísticas: {e}")
+            log_error(f"Error al calcular estadísticas: {e}")
+            return
+        if not serie.etiquetas:
+            self.label_resumen.setText(f"{tipo_grafico}: Sin datos para el período seleccionado.")
+        else:
+            self.label_resumen.setText(f"{tipo_grafico}: {len(serie.etiquetas)} valores ({serie.unidad or 'ARS/USD'})")
+        clave = ("estadisticas", tipo_grafico, anio, mes, dolar, self.estadisticas.version)
+        self._grafico_en_layout().mostrar(clave, serie.titulo, serie.etiquetas, serie.series, serie.tipo, serie.unidad)
+
+    def mostrar_grafico_personalizado(self, etiquetas, valores, config):
+        """Grafica una estadística personalizada (Barra, Torta o Línea) ya agrupada por el controlador."""
+        nombre = config.get("nombre", "Estadística personalizada")
+        metrica = config.get("metrica", "Suma")
+        columna = config.get("columna", "")
+        tipo = {"Torta": "torta", "Línea": "linea"}.get(config.get("tipo_grafico"), "barras")
+        clave = ("personalizada", nombre, tipo, tuple(etiquetas), tuple(valores))
+        self._grafico_en_layout().mostrar(clave, nombre, etiquetas, [(metrica, valores)], tipo)
+        if not etiquetas:
+            self.label_resumen.setText(f"{nombre}: Sin datos para {metrica} de {columna}")
+        else:
+            self.label_resumen.setText(f"{nombre}: {metrica} de {columna}")
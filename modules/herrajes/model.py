@@ -1,11 +1,12 @@
-from core.database import InventarioDatabaseConnection, AuditoriaDatabaseConnection
+from core.database import InventarioDatabaseConnection
+from modules.auditoria.helpers import _registrar_evento_auditoria
+from core.stock_ledger import fijar_stock, reservar_para_obra
 
 class HerrajesModel:
     """
     Modelo de Herrajes que utiliza InventarioDatabaseConnection (hereda de BaseDatabaseConnection) para conexión persistente y segura.
     """
     CANTIDAD_INVALIDA_MSG = "Cantidad inválida"
-    AUDITORIA_INSERT_QUERY = "INSERT INTO auditorias_sistema (usuario, modulo, accion, fecha) VALUES (?, ?, ?, CURRENT_TIMESTAMP)"
 
     def __init__(self, db_connection=None):
         self.db = db_connection or InventarioDatabaseConnection()
@@ -49,25 +50,25 @@ class HerrajesModel:
         self.db.ejecutar_query(query, (id_material,))
 
     def reservar_herraje(self, usuario, id_obra, id_herraje, cantidad):
-        if cantidad is None or cantidad <= 0:
-            raise ValueError(self.CANTIDAD_INVALIDA_MSG)
-        stock = self.db.ejecutar_query("SELECT stock_actual FROM herrajes WHERE id_herraje = ?", (id_herraje,))
-        if not stock or stock[0][0] is None:
-            raise ValueError("Herraje no encontrado")
-        if cantidad > stock[0][0]:
-            raise ValueError("Stock insuficiente")
-        with self.db.transaction(timeout=30, retries=2):
-            self.db.ejecutar_query("UPDATE herrajes SET stock_actual = stock_actual - ? WHERE id_herraje = ?", (cantidad, id_herraje))
-            res = self.db.ejecutar_query("SELECT cantidad_reservada FROM herrajes_por_obra WHERE id_obra=? AND id_herraje=?", (id_obra, id_herraje))
-            if res:
-                nueva = res[0][0] + cantidad
-                self.db.ejecutar_query("UPDATE herrajes_por_obra SET cantidad_reservada=?, estado='Reservado' WHERE id_obra=? AND id_herraje=?", (nueva, id_obra, id_herraje))
-            else:
-                self.db.ejecutar_query("INSERT INTO herrajes_por_obra (id_obra, id_herraje, cantidad_reservada, estado) VALUES (?, ?, ?, 'Reservado')", (id_obra, id_herraje, cantidad))
-            self.db.ejecutar_query("INSERT INTO movimientos_herrajes (id_herraje, tipo_movimiento, cantidad, fecha, usuario) VALUES (?, 'Egreso', ?, CURRENT_TIMESTAMP, ?)", (id_herraje, cantidad, usuario or ""))
-            auditoria_db = AuditoriaDatabaseConnection()
-            auditoria_db.ejecutar_query(self.AUDITORIA_INSERT_QUERY, (usuario, "Herrajes", f"Reservó {cantidad} del herraje {id_herraje} para obra {id_obra}"))
-            auditoria_db.ejecutar_query(self.AUDITORIA_INSERT_QUERY, (usuario, "Herrajes", f"Reservó {cantidad} del herraje {id_herraje} para obra {id_obra}"))
+        return self.reservar_herrajes_lote(usuario, id_obra, [(id_herraje, cantidad)])
+
+    def reservar_herrajes_lote(self, usuario, id_obra, items):
+        """
+        Reserva varios herrajes [(id_herraje, cantidad), ...] para una obra en una sola transacción.
+        El stock se descuenta con un UPDATE condicionado (core.stock_ledger): si un ítem no alcanza
+        o no existe no se reserva ninguno. Reservas y movimientos se envían por lotes.
+        """
+        cantidades = {}
+        for id_herraje, cantidad in items:
+            if cantidad is None or cantidad <= 0:
+                raise ValueError(self.CANTIDAD_INVALIDA_MSG)
+            cantidades[id_herraje] = cantidades.get(id_herraje, 0) + cantidad
+        if not cantidades:
+            return True
+        reservar_para_obra(self.db, "herrajes", id_obra, cantidades.items(), usuario)
+        # La auditoría va a su propia base: se registra (vía sink) una vez confirmada la reserva
+        for id_herraje, cantidad in cantidades.items():
+            _registrar_evento_auditoria(usuario, "Herrajes", f"Reservó {cantidad} del herraje {id_herraje} para obra {id_obra}")
         return True
 
     def devolver_herraje(self, usuario, id_obra, id_herraje, cantidad):
@@ -87,24 +88,14 @@ class HerrajesModel:
             else:
                 self.db.ejecutar_query("UPDATE herrajes_por_obra SET cantidad_reservada=0, estado='Liberado' WHERE id_obra=? AND id_herraje=?", (id_obra, id_herraje))
             self.db.ejecutar_query("INSERT INTO movimientos_herrajes (id_herraje, tipo_movimiento, cantidad, fecha, usuario) VALUES (?, 'Ingreso', ?, CURRENT_TIMESTAMP, ?)", (id_herraje, cantidad, usuario or ""))
-            auditoria_db = AuditoriaDatabaseConnection()
-            auditoria_db.ejecutar_query(self.AUDITORIA_INSERT_QUERY, (usuario, "Herrajes", f"Devolvió {cantidad} del herraje {id_herraje} de la obra {id_obra}"))
-            auditoria_db.ejecutar_query(self.AUDITORIA_INSERT_QUERY, (usuario, "Herrajes", f"Devolvió {cantidad} del herraje {id_herraje} de la obra {id_obra}"))
+        _registrar_evento_auditoria(usuario, "Herrajes", f"Devolvió {cantidad} del herraje {id_herraje} de la obra {id_obra}")
         return True
 
     def ajustar_stock_herraje(self, usuario, id_herraje, cantidad):
         if cantidad < 0:
             raise ValueError(self.CANTIDAD_INVALIDA_MSG)
-        stock_ant = self.db.ejecutar_query("SELECT stock_actual FROM herrajes WHERE id_herraje = ?", (id_herraje,))
-        if not stock_ant or stock_ant[0][0] is None:
-            raise ValueError("Herraje no encontrado")
-        stock_anterior = stock_ant[0][0]
-        with self.db.transaction(timeout=30, retries=2):
-            self.db.ejecutar_query("UPDATE herrajes SET stock_actual = ? WHERE id_herraje = ?", (cantidad, id_herraje))
-            self.db.ejecutar_query("INSERT INTO movimientos_herrajes (id_herraje, tipo_movimiento, cantidad, fecha, usuario) VALUES (?, 'Ajuste', ?, CURRENT_TIMESTAMP, ?)", (id_herraje, abs(cantidad - stock_anterior), usuario or ""))
-            auditoria_db = AuditoriaDatabaseConnection()
-            auditoria_db.ejecutar_query(self.AUDITORIA_INSERT_QUERY, (usuario, "Herrajes", f"Ajustó stock del herraje {id_herraje} de {stock_anterior} a {cantidad}"))
-            auditoria_db.ejecutar_query(self.AUDITORIA_INSERT_QUERY, (usuario, "Herrajes", f"Ajustó stock del herraje {id_herraje} de {stock_anterior} a {cantidad}"))
+        stock_anterior = fijar_stock(self.db, "herrajes", id_herraje, cantidad, usuario)
+        _registrar_evento_auditoria(usuario, "Herrajes", f"Ajustó stock del herraje {id_herraje} de {stock_anterior} a {cantidad}")
         return True
 
     def obtener_estado_pedido_por_obra(self, id_obra):
@@ -116,7 +107,7 @@ class HerrajesModel:
         Justificación: permite integración y trazabilidad entre módulos.
         """
         try:
-            query = "SELECT estado FROM pedidos_herrajes WHERE id_obra = ? ORDER BY fecha DESC LIMIT 1"
+            query = "SELECT TOP 1 estado FROM pedidos_herrajes WHERE id_obra = ? ORDER BY fecha DESC"
             resultado = self.db.ejecutar_query(query, (id_obra,))
             if resultado and resultado[0]:
                 return resultado[0][0]
@@ -125,6 +116,20 @@ class HerrajesModel:
             # Excepción documentada: error de conexión o consulta
             return f"Error: {e}"
 
+    def obtener_estados_pedidos_por_obras(self):
+        """
+        Estado del último pedido de herrajes de cada obra en una sola consulta: {id_obra: estado}.
+        Las obras sin pedidos no aparecen (equivalen a 'pendiente').
+        Justificación: evita una consulta por obra al armar tablas de Obras y Logística.
+        """
+        query = """
+        SELECT id_obra, estado FROM (
+            SELECT id_obra, estado, ROW_NUMBER() OVER (PARTITION BY id_obra ORDER BY fecha DESC) AS orden
+            FROM pedidos_herrajes
+        ) ultimos WHERE orden = 1
+        """
+        return {fila[0]: fila[1] for fila in (self.db.ejecutar_query(query) or [])}
+
     def obtener_pedidos_por_obra(self, id_obra):
         """
         Devuelve todos los pedidos de herrajes asociados a una obra, con su estado y detalle.
@@ -1,12 +1,15 @@
 import json
-from PyQt6.QtWidgets import QTableWidgetItem, QDialog, QVBoxLayout, QTableWidget, QFormLayout, QLineEdit, QHBoxLayout, QPushButton, QMessageBox, QLabel
-from PyQt6 import QtGui
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QTableWidget, QFormLayout, QLineEdit, QHBoxLayout, QPushButton, QMessageBox, QLabel
 from modules.usuarios.model import UsuariosModel
 from modules.auditoria.model import AuditoriaModel
 from modules.inventario.view import InventarioView
 from modules.obras.model import ObrasModel
 from functools import wraps
+from core.delta_sync import SincronizadorDelta
+from core.event_bus import event_bus
 from core.logger import log_error
+from core.workers import cancelar_exportacion, ejecutar_en_segundo_plano, mostrar_progreso_exportacion
+from modules.inventario.indice_busqueda import IndiceBusqueda
 
 class PermisoAuditoria:
     def __init__(self, modulo):
@@ -78,11 +81,12 @@ class InventarioController:
         def agregar_item(self):
             ...
     """
-    def __init__(self, model, view, db_connection, usuario_actual=None):
+    def __init__(self, model, view, db_connection, usuario_actual=None, usuarios_model=None):
         self.model = model
         self.view = view
         self.usuario_actual = usuario_actual  # dict con id, nombre, rol, ip, etc.
-        self.usuarios_model = UsuariosModel(db_connection)
+        # Compartir el UsuariosModel de la ventana principal reutiliza su caché de permisos
+        self.usuarios_model = usuarios_model if usuarios_model else UsuariosModel(db_connection)
         self.auditoria_model = AuditoriaModel(db_connection)
         self.db_connection = db_connection
         from modules.obras.model import ObrasModel
@@ -99,7 +103,8 @@ class InventarioController:
         self.view.nuevo_item_signal.connect(self.agregar_item)
         self.view.ver_movimientos_signal.connect(self.ver_movimientos)
         self.view.reservar_signal.connect(self.reservar_item)
-        self.view.exportar_excel_signal.connect(lambda: self.exportar_inventario("excel"))
+        # Excel: la vista pide la ruta (exportar_tabla_a_excel) y emite exportacion_solicitada
+        self.view.exportacion_solicitada.connect(self.exportar_inventario)
         self.view.exportar_pdf_signal.connect(lambda: self.exportar_inventario("pdf"))
         self.view.buscar_signal.connect(self.buscar_item)
         self.view.generar_qr_signal.connect(self.generar_qr_para_item)
@@ -110,8 +115,18 @@ class InventarioController:
         self.view.reservar_signal.connect(self.abrir_reserva_lote_perfiles)
         self.view.ajustes_stock_guardados.connect(self.procesar_ajustes_stock)
 
+        # Búsqueda mientras se escribe: índice en memoria del catálogo (ver modules/inventario/indice_busqueda.py)
+        self.indice_busqueda = IndiceBusqueda()
+        if hasattr(self.view, 'busqueda_cambiada'):
+            self.view.busqueda_cambiada.connect(self.buscar_mientras_escribe)
+        if hasattr(self.view, 'configurar_indice_busqueda'):
+            self.view.configurar_indice_busqueda(self.indice_busqueda)
+        # Conectada desde el hilo de la GUI: los avisos emitidos en un hilo del pool llegan encolados a este hilo
+        event_bus.stock_modificado.connect(self._actualizar_indice_stock)
+
         self.actualizar_inventario()
         self.cargar_productos()
+        self.cargar_indice_busqueda()
 
     def _registrar_evento_auditoria(self, tipo_evento, detalle, exito=True):
         usuario_id = self.usuario_actual['id'] if self.usuario_actual and 'id' in self.usuario_actual else -1
@@ -134,23 +149,82 @@ class InventarioController:
         elif hasattr(self.view, 'label'):
             self.view.label.setText(mensaje)
 
+    TAMANO_LOTE_INVENTARIO = 500
+
+    def _lotes_grilla(self, offset=0):
+        """fetcher(desde, cantidad) de la grilla: pide sólo las columnas que la vista muestra, en su orden."""
+        headers = list(getattr(self.view, 'inventario_headers', None) or [])
+        if not headers:
+            return lambda desde, cantidad: self.model.obtener_items_por_lotes(offset + desde, cantidad)
+        return lambda desde, cantidad: self.model.obtener_pagina_grilla(offset + desde, cantidad, headers)
+
+    def _sincronizacion_grilla(self):
+        """Sincronizador delta de la grilla, o None si el modelo no lo tiene o la vista no conoce sus columnas."""
+        sincronizacion = getattr(self.model, 'sincronizacion_perfiles', None)
+        if isinstance(sincronizacion, SincronizadorDelta) and getattr(self.view, 'inventario_headers', None):
+            return sincronizacion
+        return None
+
     @permiso_auditoria_inventario('ver')
     def actualizar_inventario(self):
+        sincronizacion = self._sincronizacion_grilla()
+        if sincronizacion is not None and sincronizacion.activo:
+            # Ya hay una grilla cargada: sólo se piden las filas modificadas y las bajas desde la última marca
+            ejecutar_en_segundo_plano(
+                self.model.obtener_cambios_grilla,
+                args=(list(self.view.inventario_headers),),
+                al_terminar=self._aplicar_cambios_inventario,
+                al_error=self._error_actualizar_inventario,
+                clave="inventario.actualizar",
+            )
+            return
+        # El primer lote se consulta fuera del hilo de la GUI; los siguientes los pide la grilla al hacer scroll
+        ejecutar_en_segundo_plano(
+            self._primer_lote_grilla,
+            al_terminar=self._mostrar_inventario,
+            al_error=self._error_actualizar_inventario,
+            vista=self.view,
+            mensaje_carga="Cargando inventario...",
+            clave="inventario.actualizar",
+        )
+
+    def _primer_lote_grilla(self):
+        # La versión se lee antes que las filas: lo que cambie mientras tanto vuelve a llegar en el próximo delta
+        sincronizacion = self._sincronizacion_grilla()
+        version = sincronizacion.version_actual() if sincronizacion is not None else None
+        return version, self._lotes_grilla()(0, self.TAMANO_LOTE_INVENTARIO)
+
+    def _mostrar_inventario(self, resultado):
+        version, primer_lote = resultado
         try:
-            datos = self.model.obtener_items()
-            self.view.tabla_inventario.setRowCount(len(datos))
-            self.view.tabla_inventario.setColumnCount(18)
-            if not datos:
+            self.view.configurar_carga_por_lotes(self._lotes_grilla(), self.TAMANO_LOTE_INVENTARIO, primer_lote or [])
+            self._grilla_filtrada = False
+            sincronizacion = self._sincronizacion_grilla()
+            if sincronizacion is not None:
+                sincronizacion.confirmar(version)
+            if not primer_lote:
                 self.view.label_titulo.setText("No hay datos de inventario para mostrar.")
             else:
                 self.view.label_titulo.setText("INVENTORY")
-            for row, item in enumerate(datos):
-                for col, value in enumerate(item):
-                    self.view.tabla_inventario.setItem(row, col, QTableWidgetItem(str(value)))
         except Exception as e:
-            log_error(f"Error al actualizar inventario: {e}")
-            self._feedback(f"Error al actualizar inventario: {e}", tipo='error')
-            self._registrar_evento_auditoria('error', f"Error al actualizar inventario: {e}", exito=False)
+            self._error_actualizar_inventario(e)
+
+    def _aplicar_cambios_inventario(self, cambios):
+        try:
+            # Con resultados de búsqueda en pantalla sólo se actualizan o quitan las filas visibles
+            aplicado = self.view.aplicar_cambios_inventario(cambios.filas, cambios.bajas, agregar_nuevas=not getattr(self, '_grilla_filtrada', False))
+            if not aplicado:
+                self._sincronizacion_grilla().reiniciar()
+                self.actualizar_inventario()
+                return
+            self._sincronizacion_grilla().confirmar(cambios.hasta)
+        except Exception as e:
+            self._error_actualizar_inventario(e)
+
+    def _error_actualizar_inventario(self, e):
+        log_error(f"Error al actualizar inventario: {e}")
+        self._feedback(f"Error al actualizar inventario: {e}", tipo='error')
+        self._registrar_evento_auditoria('error', f"Error al actualizar inventario: {e}", exito=False)
 
     def cargar_productos(self):
         try:
@@ -163,8 +237,9 @@ class InventarioController:
 
     def cargar_datos_inventario(self, offset=0, limite=500):
         try:
-            items = self.model.obtener_items_por_lotes(offset, limite)
-            self.view.cargar_items(items)
+            self.view.configurar_carga_por_lotes(
+                self._lotes_grilla(offset), limite
+            )
         except Exception as e:
             log_error(f"Error al cargar datos de inventario: {e}")
             self._feedback(f"Error al cargar datos de inventario: {e}", tipo='error')
@@ -208,6 +283,7 @@ class InventarioController:
                 self._registrar_movimiento_alta(codigo, datos)
                 self._registrar_evento_auditoria('alta', f"Ítem agregado: {codigo}")
                 self.actualizar_inventario()
+                self.cargar_indice_busqueda()
                 self._feedback(f"Ítem '{codigo}' agregado correctamente.", tipo='success')
             except Exception as e:
                 log_error(f"Error general al agregar ítem: {e}")
@@ -507,8 +583,8 @@ class InventarioController:
         Recibe una lista de dicts: {id, cantidad, motivo} y procesa los ajustes de stock en lote.
         Valida, actualiza la base y registra en auditoría.
         """
-        exitos = 0
         errores = []
+        validos = []
         for ajuste in ajustes:
             id_item = ajuste.get('id')
             cantidad = ajuste.get('cantidad')
@@ -516,16 +592,21 @@ class InventarioController:
             if not id_item or cantidad is None or not motivo:
                 errores.append(f"Faltan datos en ajuste: {ajuste}")
                 continue
+            validos.append((id_item, cantidad, motivo))
+        if validos:
             try:
-                self.model.actualizar_stock(id_item, cantidad)
-                self.model.registrar_movimiento(id_item, cantidad, 'ajuste', motivo)
-                self._registrar_evento_auditoria('ajuste_stock', f"Ajuste de stock: {id_item} cantidad {cantidad} motivo {motivo}")
-                exitos += 1
+                # Una transacción para todos; los ítems que fallan se informan uno por uno y no frenan al resto
+                aplicados, fallidos = self.model.aplicar_ajustes_stock(validos, self.usuario_actual)
+                errores.extend(f"Error en id {id_item}: {mensaje}" for id_item, mensaje in fallidos.items())
+                ids_fallidos = {str(id_item) for id_item in fallidos}
+                guardados = [ajuste for ajuste in validos if str(ajuste[0]) not in ids_fallidos]
+                if aplicados:
+                    detalle = "; ".join(f"{id_item} cantidad {cantidad} motivo {motivo}" for id_item, cantidad, motivo in guardados)
+                    self._registrar_evento_auditoria('ajuste_stock', f"Ajuste de stock en lote: {detalle}")
+                    self._feedback(f"{len(guardados)} ajustes de stock guardados correctamente.", tipo='success')
+                    self.actualizar_inventario()
             except Exception as e:
-                errores.append(f"Error en id {id_item}: {e}")
-        if exitos:
-            self._feedback(f"{exitos} ajustes de stock guardados correctamente.", tipo='success')
-            self.actualizar_inventario()
+                errores.append(f"Error al guardar los ajustes: {e}")
         if errores:
             self._feedback("\n".join(errores), tipo='error')
 
@@ -549,24 +630,70 @@ class InventarioController:
             if not codigo:
                 self.view.label.setText("Ingrese un código para buscar.")
                 return
-            item = self.model.obtener_item_por_codigo(codigo)
-            if item:
-                self.view.tabla_inventario.setRowCount(1)
-                for col, value in enumerate(item[0]):
-                    self.view.tabla_inventario.setItem(0, col, QTableWidgetItem(str(value)))
-                self.view.label.setText("")
+            if self.indice_busqueda.cargado:
+                encontrados = self.buscar_mientras_escribe(codigo)
             else:
-                self.view.label.setText("Ítem no encontrado.")
+                # El índice todavía se está cargando: búsqueda exacta por código en la base
+                item = self.model.obtener_item_por_codigo(codigo)
+                if item:
+                    self.view.cargar_items(item[:1])
+                encontrados = bool(item)
+            self.view.label.setText("" if encontrados else "Ítem no encontrado.")
         except Exception as e:
             self.view.label.setText(f"Error al buscar ítem: {e}")
 
+    def cargar_indice_busqueda(self):
+        """(Re)carga el índice de búsqueda con todo el catálogo fuera del hilo de la GUI."""
+        ejecutar_en_segundo_plano(
+            self._construir_indice_busqueda,
+            al_error=lambda e: log_error(f"Error al cargar el índice de búsqueda de inventario: {e}"),
+            clave="inventario.indice_busqueda",
+        )
+
+    def _construir_indice_busqueda(self):
+        self.indice_busqueda.cargar(self.model.iterar_productos())
+        return len(self.indice_busqueda)
+
+    def buscar_mientras_escribe(self, texto):
+        """
+        Muestra en la grilla los perfiles que coinciden con `texto` (código, descripción, tipo, acabado o proveedor),
+        paginados como la carga normal. Con el texto vacío vuelve a la grilla completa. Devuelve la cantidad encontrada.
+        """
+        if not texto or not texto.strip():
+            self.view.filtrar_items("")
+            self.view.configurar_carga_por_lotes(self._lotes_grilla(), self.TAMANO_LOTE_INVENTARIO)
+            self._grilla_filtrada = False
+            return None
+        if not self.indice_busqueda.cargado:
+            # Hasta que termine la carga del índice se filtran las filas ya traídas a la grilla
+            self.view.filtrar_items(texto)
+            return None
+        resultados = self.indice_busqueda.buscar(texto)
+        self.view.filtrar_items("")
+        self.view.configurar_carga_por_lotes(lambda desde, cantidad: resultados[desde:desde + cantidad], self.TAMANO_LOTE_INVENTARIO)
+        self._grilla_filtrada = True
+        return len(resultados)
+
+    def _actualizar_indice_stock(self, datos):
+        if datos.get('tipo') == 'perfiles':
+            self.indice_busqueda.actualizar_stock(datos.get('cambios', {}))
+
     @permiso_auditoria_inventario('ver')
-    def exportar_inventario(self, formato):
-        try:
-            resultado = self.model.exportar_inventario(formato)
-            self.view.mostrar_feedback(resultado, tipo="exito" if "exportado" in resultado.lower() else "info")
-        except Exception as e:
-            self.view.mostrar_feedback(f"Error al exportar inventario: {e}", tipo="error")
+    def exportar_inventario(self, formato, nombre_archivo=None):
+        # La exportación lee y escribe en streaming en un hilo del pool; una nueva exportación cancela la anterior
+        ejecutar_en_segundo_plano(
+            self.model.exportar_inventario,
+            args=(formato, nombre_archivo),
+            al_terminar=lambda resultado: self.view.mostrar_feedback(resultado, tipo="exito" if "exportado" in resultado.lower() else "info"),
+            al_error=lambda e: self.view.mostrar_feedback(f"Error al exportar inventario: {e}", tipo="error"),
+            al_progreso=lambda escritas, total: mostrar_progreso_exportacion(self.view, escritas, total),
+            vista=self.view,
+            mensaje_carga="Exportando inventario...",
+            clave="inventario.exportar",
+        )
+
+    def cancelar_exportacion_inventario(self):
+        cancelar_exportacion("inventario.exportar")
 
     @permiso_auditoria_inventario('editar')
     def generar_qr_para_item(self):
@@ -618,12 +745,13 @@ class InventarioController:
     @permiso_auditoria_inventario('ver')
     def resaltar_items_bajo_stock(self, datos):
         try:
+            filas_bajo_stock = []
             for row, item in enumerate(datos):
                 stock_actual = item[5]  # Suponiendo que la columna 5 es el stock actual
                 stock_minimo = item[6]  # Suponiendo que la columna 6 es el stock mínimo
                 if stock_actual < stock_minimo:
-                    for col in range(self.view.tabla_inventario.columnCount()):
-                        self.view.tabla_inventario.item(row, col).setBackground(QtGui.QColor("red"))
+                    filas_bajo_stock.append(row)
+            self.view.modelo_inventario.marcar_filas(filas_bajo_stock, "red")
             self._registrar_evento_auditoria('resaltar_items_bajo_stock', '', exito=True)
         except Exception as e:
             # print(f"Error al resaltar ítems bajo stock: {e}")
@@ -674,9 +802,13 @@ class InventarioController:
     def actualizar_por_pedido(self, datos_pedido):
         """
         Método para refrescar la vista de inventario cuando se actualiza un pedido.
-        Se puede usar para actualizar la lista de materiales, stock, etc.
+        Se puede usar para actualizar la lista de materiales, stock, etc. Con el payload agregado de
+        despachador_eventos, una ráfaga de pedidos recarga el inventario una sola vez.
         """
         self.actualizar_inventario()
+        if datos_pedido.get('cantidad', 1) > 1:
+            self._feedback(f"Inventario actualizado por {datos_pedido['cantidad']} pedidos: {sorted(datos_pedido.get('ids', []), key=str)}", tipo='info')
+            return
         self._feedback(f"Inventario actualizado por pedido: {datos_pedido.get('id','')} (Obra: {datos_pedido.get('obra','')})", tipo='info')
         if hasattr(self.view, 'mostrar_mensaje'):
             self.view.mostrar_mensaje(f"Inventario actualizado automáticamente por el pedido '{datos_pedido.get('id','')}'.", tipo='info')
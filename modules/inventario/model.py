@@ -1,12 +1,12 @@
 """
 FLUJO PASO A PASO DEL MÓDULO INVENTARIO
 
-- Este modelo utiliza InventarioDatabaseConnection (hereda de BaseDatabaseConnection) para garantizar una única conexión persistente y evitar duplicados, según el estándar del sistema (ver README).
+- Este modelo utiliza InventarioDatabaseConnection (hereda de BaseDatabaseConnection, con pool de conexiones compartido) para evitar conexiones duplicadas, según el estándar del sistema (ver README).
 
 1. Alta de ítem/material: agregar_item(datos)
 2. Edición/eliminación: métodos asociados en el controlador
 3. Reserva de material: registrar_reserva(datos)
-4. Visualización de inventario: obtener_items(), obtener_items_por_lotes()
+4. Visualización de inventario: obtener_items(), obtener_items_por_lotes(), obtener_pagina_grilla()
 5. Visualización de movimientos: obtener_movimientos(id_item)
 6. Exportación: exportar_inventario(formato)
 7. Auditoría: todas las acciones relevantes quedan registradas
@@ -15,16 +15,27 @@ FLUJO PASO A PASO DEL MÓDULO INVENTARIO
 """
 
 import pandas as pd  # Asegúrate de tener pandas instalado
-try:
-    from fpdf import FPDF  # Asegúrate de tener fpdf instalado (pip install fpdf)
-except ImportError:
-    FPDF = None  # Permite que la app siga funcionando aunque falte fpdf
+from core.cache import cache_lectura, clave_base
 from core.database import InventarioDatabaseConnection
+from core.delta_sync import SincronizadorDelta
+from core.stock_ledger import ErrorStock, StockInsuficiente, aplicar_movimientos, reservar_para_obra
+from core.exportacion import (
+    EXTENSIONES as EXTENSIONES_EXPORTACION, FORMATOS as FORMATOS_EXPORTACION, NOMBRES_FORMATO,
+    ExportacionCancelada, exportar_filas, filas_de_query
+)
 import re
 
+# Perfiles por código y por id (core/cache.py); core.stock_ledger emite stock_modificado en cada movimiento
+CACHE_PERFILES = cache_lectura("perfiles", invalidar_con=("stock_modificado", "pedido_actualizado"))
+
+def _lista_columnas(columnas):
+    return ", ".join("[" + str(columna).replace("]", "]]") + "]" for columna in columnas)
+
 class InventarioModel:
     def __init__(self, db_connection=None):
         self.db = db_connection or InventarioDatabaseConnection()
+        # Marca de rowversion de la grilla de perfiles (core/delta_sync.py)
+        self.sincronizacion_perfiles = SincronizadorDelta(self.db, "inventario_perfiles")
 
     def obtener_items(self):
         query = """
@@ -38,16 +49,37 @@ class InventarioModel:
         # print(f"Resultados obtenidos: {resultados}")  # Registro de depuración
         return resultados
 
+    def iterar_items(self, chunk=1000):
+        """Versión en streaming de obtener_items: entrega las filas de a `chunk` sin cargar toda la tabla."""
+        query = """
+        SELECT id, codigo, descripcion, tipo, acabado, numero, vs, proveedor, longitud, ancho, alto, necesarias, stock, faltan, ped_min, emba, pedido, importe
+        FROM inventario_perfiles
+        """
+        return self.db.iterar_query(query, chunk=chunk)
+
     def obtener_items_por_lotes(self, offset=0, limite=1000):
         query = "SELECT id, codigo, nombre, tipo_material, unidad, stock_actual, stock_minimo, ubicacion, descripcion, qr, imagen_referencia FROM inventario_perfiles ORDER BY id OFFSET ? ROWS FETCH NEXT ? ROWS ONLY"
         return self.db.ejecutar_query(query, (offset, limite))
 
+    def obtener_pagina_grilla(self, offset, limite, columnas):
+        """
+        Página de inventario_perfiles para la grilla virtualizada de InventarioView: tuplas con las `columnas`
+        pedidas (los headers que la vista leyó de la metadata de la tabla), en ese orden.
+        """
+        query = f"SELECT {_lista_columnas(columnas)} FROM inventario_perfiles ORDER BY id OFFSET ? ROWS FETCH NEXT ? ROWS ONLY"
+        return list(self.db.iterar_query(query, (offset, limite), chunk=max(limite, 1)))
+
+    def obtener_cambios_grilla(self, columnas):
+        """Filas de la grilla (mismas `columnas`) nuevas o modificadas y bajas desde la última marca confirmada."""
+        return self.sincronizacion_perfiles.leer_cambios(_lista_columnas(columnas))
+
     def agregar_item(self, datos):
         query = """
         INSERT INTO inventario_perfiles (codigo, nombre, tipo_material, unidad, stock_actual, stock_minimo, ubicacion, descripcion, qr, imagen_referencia)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """
         self.db.ejecutar_query(query, datos)
+        CACHE_PERFILES.invalidar()
 
     def registrar_movimiento(self, id_perfil, cantidad, tipo_movimiento, referencia):
         query = '''
@@ -56,6 +88,14 @@ class InventarioModel:
         '''
         self.db.ejecutar_query(query, (id_perfil, cantidad, tipo_movimiento, str(referencia)))
 
+    def registrar_movimientos_lote(self, movimientos):
+        """Registra varios movimientos [(id_perfil, cantidad, tipo_movimiento, referencia), ...] en un solo viaje."""
+        query = '''
+        INSERT INTO movimientos_stock (id_perfil, cantidad, tipo_movimiento, fecha, referencia)
+        VALUES (?, ?, ?, GETDATE(), ?)
+        '''
+        return self.db.ejecutar_lote(query, [(id_perfil, cantidad, tipo, str(referencia)) for id_perfil, cantidad, tipo, referencia in movimientos])
+
     def registrar_reserva(self, datos_reserva):
         # Asumiendo que datos_reserva es una tupla (id_perfil, cantidad_reservada, referencia_obra, estado)
         # y que la tabla reservas_materiales usará id_perfil
@@ -77,7 +117,8 @@ class InventarioModel:
     def obtener_item_por_codigo(self, codigo):
         try:
             query = "SELECT id, codigo, nombre, tipo_material, unidad, stock_actual, stock_minimo, ubicacion, descripcion, qr, imagen_referencia FROM inventario_perfiles WHERE codigo = ?"
-            return self.db.ejecutar_query(query, (codigo,))
+            filas = CACHE_PERFILES.obtener((clave_base(self.db), "codigo", codigo), lambda: self.db.ejecutar_query(query, (codigo,)))
+            return list(filas) if filas is not None else None
         except Exception:
             # print(f"Error al obtener ítem por código: {e}")
             return None
@@ -87,29 +128,56 @@ class InventarioModel:
         Actualiza el stock sumando/restando la cantidad indicada.
         Bloquea si el resultado sería negativo. Registra auditoría y feedback visual.
         """
+        self.actualizar_stock_lote([(id_perfil, cantidad)], usuario, view)
+
+    def actualizar_stock_lote(self, ajustes, usuario=None, view=None):
+        """
+        Aplica varios ajustes de stock [(id_perfil, cantidad), ...] en una sola transacción (core.stock_ledger).
+        El UPDATE condicionado valida en la base que ninguno quede negativo (si alguno falla no se aplica
+        ninguno) y los movimientos se envían por lote. Un perfil inexistente lanza ItemNoEncontrado.
+        """
         from core.logger import Logger
         from modules.auditoria.helpers import _registrar_evento_auditoria
-        logger = Logger()
-        # Obtener stock actual
-        stock_actual = self.obtener_stock_item(id_perfil)
-        nuevo_stock = stock_actual + cantidad
-        if nuevo_stock < 0:
-            mensaje = f"No se puede actualizar el stock: la operación dejaría stock negativo (actual: {stock_actual}, cambio: {cantidad})."
+        cambios = {}
+        for id_perfil, cantidad in ajustes:
+            cambios[id_perfil] = cambios.get(id_perfil, 0) + cantidad
+        if not cambios:
+            return
+        try:
+            resultado = aplicar_movimientos(self.db, "perfiles", cambios.items(), usuario)
+        except StockInsuficiente as e:
+            id_perfil = e.ids[0]
+            mensaje = f"No se puede actualizar el stock: la operación dejaría stock negativo (actual: {e.stocks.get(id_perfil, 0)}, cambio: {cambios[id_perfil]})."
             if view and hasattr(view, 'mostrar_mensaje'):
                 view.mostrar_mensaje(mensaje, tipo='error')
-            logger.error(mensaje)
+            Logger().error(mensaje)
             _registrar_evento_auditoria(usuario, "Inventario", f"Intento de stock negativo en perfil {id_perfil}: {mensaje}")
             raise ValueError("Stock negativo no permitido.")
-        # Actualizar stock
-        query = "UPDATE inventario_perfiles SET stock_actual = ? WHERE id = ?"
-        self.db.ejecutar_query(query, (nuevo_stock, id_perfil))
-        # Registrar movimiento
-        tipo_mov = 'Ingreso' if cantidad > 0 else 'Egreso'
-        self.db.ejecutar_query(
-            "INSERT INTO movimientos_stock (id_perfil, tipo_movimiento, cantidad, fecha, usuario) VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?)",
-            (id_perfil, tipo_mov, abs(cantidad), usuario or "")
-        )
-        _registrar_evento_auditoria(usuario, "Inventario", f"Stock actualizado para perfil {id_perfil}: {stock_actual} -> {nuevo_stock}")
+        detalle = "; ".join(f"perfil {id_perfil}: {anterior} -> {nuevo}" for id_perfil, (anterior, nuevo) in resultado.items())
+        _registrar_evento_auditoria(usuario, "Inventario", f"Stock actualizado para {detalle}")
+
+    def aplicar_ajustes_stock(self, ajustes, usuario=None):
+        """
+        Ajustes de stock [(id_perfil, cantidad, motivo), ...]: cada uno queda en movimientos_stock como
+        movimiento 'ajuste' con su motivo en referencia. Se aplican juntos en una transacción; si algún perfil
+        no existe o quedaría negativo se lo aparta y se reintenta con el resto, así un id inválido no rechaza
+        los demás ajustes. Devuelve (aplicados {id: (anterior, nuevo)}, errores {id: mensaje}).
+        """
+        pendientes = [(int(id_perfil) if str(id_perfil).isdigit() else id_perfil, cantidad, motivo) for id_perfil, cantidad, motivo in ajustes]
+        errores = {}
+        aplicados = {}
+        while pendientes:
+            try:
+                aplicados = aplicar_movimientos(self.db, "perfiles", pendientes, usuario, tipo_movimiento='ajuste')
+                break
+            except ErrorStock as e:
+                for id_perfil in e.ids:
+                    if isinstance(e, StockInsuficiente):
+                        errores[id_perfil] = f"stock insuficiente (actual: {e.stocks.get(id_perfil, 0)})"
+                    else:
+                        errores[id_perfil] = "material no encontrado"
+                pendientes = [ajuste for ajuste in pendientes if ajuste[0] not in e.ids]
+        return aplicados, errores
 
     def obtener_items_bajo_stock(self):
         try:
@@ -127,6 +195,7 @@ class InventarioModel:
             update_query = "UPDATE inventario_perfiles SET qr = ? WHERE id = ?"
             # print(f"DEBUG: Ejecutando actualización con qr={qr} y id_perfil={id_perfil}")
             self.db.ejecutar_query(update_query, (qr, id_perfil))
+            CACHE_PERFILES.invalidar()
             return qr
         # print(f"DEBUG: Código no encontrado o vacío para id_perfil={id_perfil}")
         return None
@@ -134,88 +203,31 @@ class InventarioModel:
     def actualizar_qr_code(self, id_perfil, qr):
         query = "UPDATE inventario_perfiles SET qr = ? WHERE id = ?"
         self.db.ejecutar_query(query, (qr, id_perfil))
+        CACHE_PERFILES.invalidar()
 
-    def exportar_inventario(self, formato: str) -> str:
+    def exportar_inventario(self, formato: str, nombre_archivo=None) -> str:
         """
-        Exporta el inventario completo en el formato solicitado ('excel' o 'pdf').
-        Incluye todos los campos de la tabla inventario_perfiles.
+        Exporta el inventario completo en el formato solicitado ('excel', 'csv' o 'pdf').
+        Incluye todos los campos de la tabla inventario_perfiles (encabezados tomados del cursor).
+        Las filas se leen por lotes y se escriben directo al archivo (ver core.exportacion).
         Si no hay datos, retorna un mensaje de éxito (para tests).
         Si ocurre un error, retorna un mensaje de error claro.
-        El nombre del archivo incluye fecha y hora para evitar sobrescritura.
+        Sin `nombre_archivo` el nombre incluye fecha y hora para evitar sobrescritura.
         """
-        query = "SELECT * FROM inventario_perfiles"
-        try:
-            datos = self.db.ejecutar_query(query) or []
-            formato = (formato or '').lower().strip()
-            if formato not in ("excel", "pdf"):
-                return "Formato no soportado. Use 'excel' o 'pdf'."
-            columnas = self._obtener_columnas_inventario(datos)
+        formato = (formato or '').lower().strip()
+        if formato not in FORMATOS_EXPORTACION:
+            return "Formato no soportado. Use 'excel', 'csv' o 'pdf'."
+        if not nombre_archivo:
             fecha_str = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
-            if not datos:
-                return self._mensaje_exito_exportacion_vacio(formato)
-            if formato == "excel":
-                return self._exportar_excel(datos, columnas, fecha_str)
-            elif formato == "pdf":
-                return self._exportar_pdf(datos, columnas, fecha_str)
-        except Exception as e:
-            return f"Error al exportar el inventario: {e}"
-
-    def _obtener_columnas_inventario(self, datos):
-        try:
-            self.db.conectar()
-            if not self.db.connection:
-                raise RuntimeError("No se pudo establecer la conexión para obtener los headers.")
-            cursor = self.db.connection.cursor()
-            cursor.execute("SELECT * FROM inventario_perfiles WHERE 1=0")
-            columnas = [column[0] for column in cursor.description]
-        except Exception:
-            columnas = [
-                'id', 'codigo', 'nombre', 'tipo_material', 'unidad', 'stock_actual', 'stock_minimo',
-                'ubicacion', 'descripcion', 'qr', 'imagen_referencia', 'tipo', 'acabado', 'numero', 'vs',
-                'proveedor', 'longitud', 'ancho', 'alto', 'necesarias', 'stock', 'faltan', 'ped_min', 'emba',
-                'pedido', 'importe', 'fecha_creacion', 'fecha_actualizacion'
-            ]
-        if datos and len(datos[0]) != len(columnas):
-            columnas = [f"col_{i+1}" for i in range(len(datos[0]))]
-        return columnas
-
-    def _mensaje_exito_exportacion_vacio(self, formato):
-        if formato == "excel":
-            return "Inventario exportado a Excel."
-        elif formato == "pdf":
-            return "Inventario exportado a PDF."
-        return ""
-
-    def _exportar_excel(self, datos, columnas, fecha_str):
+            nombre_archivo = f"inventario_completo_{fecha_str}{EXTENSIONES_EXPORTACION[formato]}"
         try:
-            nombre_archivo = f"inventario_completo_{fecha_str}.xlsx"
-            df = pd.DataFrame(datos, columns=columnas)
-            df.to_excel(nombre_archivo, index=False)
-            return "Inventario exportado a Excel."
+            filas = filas_de_query(self.db, "SELECT * FROM inventario_perfiles", como_dict=True)
+            exportar_filas(filas, formato, nombre_archivo, titulo="Inventario Completo")
+        except ExportacionCancelada:
+            return "Exportación del inventario cancelada."
         except Exception as e:
-            return f"Error al exportar a Excel: {e}"
-
-    def _exportar_pdf(self, datos, columnas, fecha_str):
-        if FPDF is None:
-            return "Error: la librería fpdf no está instalada. Instale fpdf para exportar a PDF."
-        try:
-            nombre_archivo = f"inventario_completo_{fecha_str}.pdf"
-            pdf = FPDF()
-            pdf.add_page()
-            pdf.set_font("Arial", size=8)
-            pdf.cell(200, 10, "Inventario Completo", ln=True, align="C")
-            for col in columnas:
-                pdf.cell(35, 8, str(col), border=1)
-            pdf.ln()
-            for row in datos:
-                for i, col in enumerate(columnas):
-                    valor = str(row[i]) if i < len(row) else ""
-                    pdf.cell(35, 8, valor, border=1)
-                pdf.ln()
-            pdf.output(nombre_archivo)
-            return "Inventario exportado a PDF."
-        except Exception as e:
-            return f"Error al exportar a PDF: {e}"
+            return f"Error al exportar a {NOMBRES_FORMATO[formato]}: {e}"
+        return f"Inventario exportado a {NOMBRES_FORMATO[formato]}."
 
     def transformar_reserva_en_entrega(self, id_reserva):
         # Obtener datos de la reserva
@@ -238,6 +250,7 @@ class InventarioModel:
         # Cambiar el estado de la reserva a 'entregada'
         query_actualizar_reserva = "UPDATE reservas_materiales SET estado = 'entregada' WHERE id = ?"
         self.db.ejecutar_query(query_actualizar_reserva, (id_reserva,))
+        CACHE_PERFILES.invalidar()
         # Registrar auditoría si está disponible (formato unificado)
         auditoria_model = getattr(self, 'auditoria_model', None)
         if auditoria_model:
@@ -253,28 +266,21 @@ class InventarioModel:
         return True
 
     def obtener_productos(self):
+        return list(self.iterar_productos())
+
+    def iterar_productos(self, chunk=1000):
+        """Recorre inventario_perfiles como dicts {columna: valor}, de a `chunk` filas por viaje."""
         query = "SELECT * FROM inventario_perfiles"
-        from core.database import get_connection_string
-        import pyodbc
-        with pyodbc.connect(get_connection_string(self.db.driver, self.db.database), timeout=10) as conn:
-            cursor = conn.cursor()
-            cursor.execute(query)
-            resultados = cursor.fetchall()
-            columnas = [column[0] for column in cursor.description]
-            return [dict(zip(columnas, row)) for row in resultados]
+        return self.db.iterar_query(query, chunk=chunk, como_dict=True)
 
     def obtener_item_por_id(self, id_perfil):
+        item = CACHE_PERFILES.obtener((clave_base(self.db), "id", id_perfil), lambda: self._consultar_item_por_id(id_perfil))
+        return dict(item) if item is not None else None
+
+    def _consultar_item_por_id(self, id_perfil):
         query = "SELECT * FROM inventario_perfiles WHERE id = ?"
-        connection_string = (
-            f"DRIVER={{{self.db.driver}}};"
-            f"SERVER=localhost\\SQLEXPRESS;"
-            f"DATABASE={self.db.database};"
-            f"UID={self.db.username};"
-            f"PWD={self.db.password};"
-            f"TrustServerCertificate=yes;"
-        )
-        import pyodbc
-        with pyodbc.connect(connection_string, timeout=10) as conn:
+        from core.database import obtener_pool
+        with obtener_pool(self.db.database).conexion() as conn:
             cursor = conn.cursor()
             cursor.execute(query, (id_perfil,))
             row = cursor.fetchone()
@@ -306,42 +312,79 @@ class InventarioModel:
             longitud = longitud_match.group(1).replace(",", ".")
         return tipo, acabado, longitud
 
+    # Mismas expresiones que extraer_datos_descripcion, para aplicarlas a toda la columna con pandas
+    _REGEX_TIPO = r"^(.*?)\s*Euro-Design"
+    _REGEX_ACABADO = r"Euro-Design\s*\d+\s*([\w\-/]+)"
+    _REGEX_LONGITUD = r"([\d,.]+)\s*m"
+
+    @classmethod
+    def extraer_datos_descripciones(cls, descripciones):
+        """
+        Versión vectorizada de extraer_datos_descripcion: recibe una serie (o lista) de descripciones y
+        devuelve un DataFrame con las columnas tipo, acabado y longitud, alineado con la entrada.
+        """
+        serie = pd.Series(descripciones, dtype=object).fillna("").astype(str)
+        return pd.DataFrame({
+            "tipo": serie.str.extract(cls._REGEX_TIPO, flags=re.IGNORECASE, expand=False).fillna("").str.strip(),
+            "acabado": serie.str.extract(cls._REGEX_ACABADO, flags=re.IGNORECASE, expand=False).fillna("").str.strip(),
+            "longitud": serie.str.extract(cls._REGEX_LONGITUD, expand=False).fillna("").str.replace(",", ".", regex=False),
+        }, index=serie.index)
+
+    def _normalizar_perfiles(self, perfiles):
+        """
+        Recalcula tipo/acabado/longitud/qr de los perfiles (DataFrame con id, codigo, descripcion) y los escribe
+        en una sola transacción: carga por lotes en una tabla temporal y un único UPDATE con JOIN.
+        Devuelve la cantidad de perfiles actualizados.
+        """
+        if perfiles.empty:
+            return 0
+        campos = self.extraer_datos_descripciones(perfiles["descripcion"].tolist())
+        codigos = perfiles["codigo"].astype(object).where(perfiles["codigo"].notna(), None).tolist()
+        filas = [
+            (id_perfil, tipo, acabado, longitud, f"QR-{codigo}" if codigo else None)
+            for id_perfil, codigo, tipo, acabado, longitud in zip(
+                perfiles["id"].tolist(), codigos, campos["tipo"], campos["acabado"], campos["longitud"]
+            )
+        ]
+        with self.db.transaction():
+            cursor = self.db.connection.cursor()
+            cursor.execute(
+                "CREATE TABLE #perfiles_normalizados (id INT PRIMARY KEY, tipo NVARCHAR(255), acabado NVARCHAR(255), "
+                "longitud NVARCHAR(50), qr NVARCHAR(255))"
+            )
+            self.db.ejecutar_lote(
+                "INSERT INTO #perfiles_normalizados (id, tipo, acabado, longitud, qr) VALUES (?, ?, ?, ?, ?)", filas
+            )
+            cursor.execute('''
+                UPDATE p
+                SET p.tipo = n.tipo, p.acabado = n.acabado, p.longitud = n.longitud, p.qr = n.qr
+                FROM inventario_perfiles p
+                JOIN #perfiles_normalizados n ON n.id = p.id
+            ''')
+            cursor.execute("DROP TABLE #perfiles_normalizados")
+        CACHE_PERFILES.invalidar()
+        return len(filas)
+
     def actualizar_qr_y_campos_por_descripcion(self):
+        """Recalcula tipo, acabado, longitud y QR de todo el catálogo a partir de la descripción."""
         perfiles = self.db.ejecutar_query("SELECT id, codigo, descripcion FROM inventario_perfiles") or []
-        for perfil_data in perfiles:
-            id_perfil_loop = perfil_data[0] # Renombrar para evitar conflicto con el parámetro
-            codigo = perfil_data[1]
-            descripcion = perfil_data[2] or ""
-            tipo, acabado, longitud = self.extraer_datos_descripcion(descripcion)
-            qr = f"QR-{codigo}" if codigo else None
-            query = '''
-                UPDATE inventario_perfiles
-                SET tipo = ?, acabado = ?, longitud = ?, qr = ?
-                WHERE id = ?
-            '''
-            self.db.ejecutar_query(query, (tipo, acabado, longitud, qr, id_perfil_loop))
+        df = pd.DataFrame([tuple(p) for p in perfiles], columns=["id", "codigo", "descripcion"])
+        return self._normalizar_perfiles(df)
 
     def test_y_corregir_campos_tipo_acabado_longitud(self):
         """ id_item, descripcion, tipo, acabado, longitud, codigo = perfil
         Verifica cuántos registros de inventario_perfiles tienen tipo, acabado o longitud vacíos o nulos.
-        Si encuentra registros incompletos, los corrige usando extraer_datos_descripcion y actualiza la tabla.
+        Si encuentra registros incompletos, los corrige a partir de la descripción (en un solo UPDATE).
         Devuelve la cantidad de registros corregidos.
         """
         perfiles = self.db.ejecutar_query("SELECT id, descripcion, tipo, acabado, longitud, codigo FROM inventario_perfiles") or []
-        faltantes = []
-        for perfil_data in perfiles:
-            id_perfil_loop, descripcion, tipo, acabado, longitud, codigo = perfil_data # Renombrar para evitar conflicto
-            if not tipo or not acabado or not longitud:
-                tipo_n, acabado_n, longitud_n = self.extraer_datos_descripcion(descripcion or "")
-                qr = f"QR-{codigo}" if codigo else None
-                query = '''
-                    UPDATE inventario_perfiles
-                    SET tipo = ?, acabado = ?, longitud = ?, qr = ?
-                    WHERE id = ?
-                '''
-                self.db.ejecutar_query(query, (tipo_n, acabado_n, longitud_n, qr, id_perfil_loop))
-                faltantes.append(id_perfil_loop)
-        return len(faltantes)
+        df = pd.DataFrame([tuple(p) for p in perfiles], columns=["id", "descripcion", "tipo", "acabado", "longitud", "codigo"])
+        if df.empty:
+            return 0
+        # Vacío, NULL o 0 cuentan como faltante (igual que `not valor`)
+        campos = df[["tipo", "acabado", "longitud"]]
+        completos = (campos.notna() & campos.apply(lambda columna: columna.map(bool))).all(axis=1)
+        return self._normalizar_perfiles(df[~completos])
 
     def obtener_stock_item(self, id_perfil):
         """Devuelve el stock actual de un ítem/material por su id."""
@@ -349,21 +392,28 @@ class InventarioModel:
         res = self.db.ejecutar_query(query, (id_perfil,))
         return res[0][0] if res and len(res[0]) > 0 else 0
 
+    # SQL Server admite hasta 2100 parámetros por sentencia
+    _MAX_PARAMETROS_IN = 2000
+
+    def obtener_stock_items(self, ids_perfil):
+        """Devuelve {id_perfil: stock_actual} para varios perfiles con una consulta por cada 2000 ids."""
+        stocks = {}
+        ids_perfil = list(ids_perfil)
+        for inicio in range(0, len(ids_perfil), self._MAX_PARAMETROS_IN):
+            bloque = ids_perfil[inicio:inicio + self._MAX_PARAMETROS_IN]
+            marcadores = ", ".join("?" for _ in bloque)
+            filas = self.db.ejecutar_query(
+                f"SELECT id, stock_actual FROM inventario_perfiles WHERE id IN ({marcadores})", tuple(bloque)
+            ) or []
+            stocks.update({fila[0]: fila[1] for fila in filas})
+        return stocks
+
     def reservar_stock(self, id_perfil, cantidad, id_obra):
-        """Reserva stock de un ítem/material, actualizando stock_actual y registrando la reserva."""
-        stock_actual = self.obtener_stock_item(id_perfil)
-        if stock_actual < cantidad:
+        """Reserva stock de un perfil para una obra: descuento condicionado, egreso y reserva en una transacción."""
+        try:
+            reservar_para_obra(self.db, "perfiles", id_obra, [(id_perfil, cantidad)])
+        except ErrorStock:
             raise ValueError("Stock insuficiente para reservar.")
-        # Descontar stock
-        query_update = "UPDATE inventario_perfiles SET stock_actual = stock_actual - ? WHERE id = ?"
-        self.db.ejecutar_query(query_update, (cantidad, id_perfil))
-        # Registrar reserva
-        # Asumiendo que la tabla reservas_materiales usará id_perfil
-        query_reserva = '''
-        INSERT INTO reservas_materiales (id_perfil, cantidad_reservada, referencia_obra, estado)
-        VALUES (?, ?, ?, ?)
-        '''
-        self.db.ejecutar_query(query_reserva, (id_perfil, cantidad, str(id_obra), 'activa'))
         return True
 
     def exportar_perfiles(self, perfiles):
@@ -398,6 +448,20 @@ class InventarioModel:
         except Exception as e:
             return f"Error: {e}"
 
+    def obtener_estados_pedidos_por_obras(self):
+        """
+        Versión por conjuntos de obtener_estado_pedido_por_obra: estado del último pedido de material
+        de cada obra, en una sola consulta. Retorna {id_obra: estado}; las obras sin pedidos no aparecen
+        (equivalen a 'pendiente').
+        """
+        query = """
+        SELECT id_obra, estado FROM (
+            SELECT id_obra, estado, ROW_NUMBER() OVER (PARTITION BY id_obra ORDER BY fecha DESC) AS orden
+            FROM pedidos_material
+        ) ultimos WHERE orden = 1
+        """
+        return {fila[0]: fila[1] for fila in (self.db.ejecutar_query(query) or [])}
+
     def registrar_pedido_material(self, id_obra, id_perfil, cantidad, estado, usuario=None):
         """
         Registra un pedido de material asociado a una obra, con estado y auditoría.
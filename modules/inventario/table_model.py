@@ -0,0 +1,199 @@
+"""
+Modelo de tabla virtualizado para la grilla de inventario.
+
+En lugar de crear un QTableWidgetItem por celda (≈45k objetos para 2.500 perfiles × 18 columnas),
+la vista consulta `data()` sólo para las celdas visibles y las filas se piden a la base por lotes
+(`obtener_pagina_grilla(offset, limite, columnas)`) a medida que el usuario hace scroll (canFetchMore/fetchMore);
+cada lote se lee en segundo plano (core/workers.py) y se agrega a la grilla cuando llega.
+El ordenamiento y el filtrado los resuelve un QSortFilterProxyModel sobre las filas ya cargadas.
+Los refrescos posteriores llegan como deltas por rowversion (core/delta_sync.py) y se aplican con
+aplicar_cambios sin reiniciar el modelo: la posición de scroll y la selección se conservan.
+"""
+from decimal import Decimal
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+from PyQt6.QtGui import QColor
+from core.logger import log_error
+from core.workers import ejecutar_en_segundo_plano
+
+class InventarioTableModel(QAbstractTableModel):
+    def __init__(self, headers, tamano_lote=500, parent=None):
+        super().__init__(parent)
+        self._headers = list(headers)
+        self._filas = []
+        self._fetcher = None
+        self._agotado = True
+        self._cargando = False
+        # Cambia con cada configurar_origen/set_items: un lote pedido antes de reiniciar el modelo se descarta
+        self._generacion = 0
+        self._filas_marcadas = {}
+        self.tamano_lote = tamano_lote
+
+    # --- Carga de datos ---
+    def configurar_origen(self, fetcher, tamano_lote=None, primer_lote=None):
+        """
+        fetcher(offset, limite) -> lista de filas (tuplas en orden de columnas o dicts por header).
+        Reinicia el modelo y trae el primer lote; el resto se pide con fetchMore al hacer scroll.
+        Si el primer lote ya se consultó (p. ej. en segundo plano) se pasa en `primer_lote`.
+        """
+        self.beginResetModel()
+        self._generacion += 1
+        self._cargando = False
+        self._filas = []
+        self._filas_marcadas = {}
+        self._fetcher = fetcher
+        self._agotado = fetcher is None
+        if tamano_lote:
+            self.tamano_lote = tamano_lote
+        if primer_lote is not None:
+            self._filas = [self._normalizar(item) for item in primer_lote]
+            self._agotado = self._agotado or len(self._filas) < self.tamano_lote
+        self.endResetModel()
+        if primer_lote is None and self.canFetchMore(QModelIndex()):
+            self.fetchMore(QModelIndex())
+
+    def set_items(self, items):
+        """Reemplaza el contenido por una lista ya materializada (búsquedas, resultados puntuales)."""
+        self.beginResetModel()
+        self._generacion += 1
+        self._cargando = False
+        self._fetcher = None
+        self._agotado = True
+        self._filas_marcadas = {}
+        self._filas = [self._normalizar(item) for item in (items or [])]
+        self.endResetModel()
+
+    def aplicar_cambios(self, filas, bajas=(), columna_id="id", agregar_nuevas=True):
+        """
+        Aplica un delta: `filas` [(id, fila en el orden de los headers)] reemplazan a las cargadas con ese id,
+        las de `bajas` se quitan y las nuevas se agregan al final sólo si ya se cargó toda la tabla
+        (si no, llegan con el próximo fetchMore: los ids nuevos son siempre los mayores).
+        Devuelve False si la grilla no tiene la columna id y hay que recargarla completa.
+        """
+        if columna_id not in self._headers:
+            return False
+        posicion = self._headers.index(columna_id)
+        bajas = set(bajas)
+        if bajas:
+            for row in range(len(self._filas) - 1, -1, -1):
+                if self._filas[row][posicion] in bajas:
+                    self.beginRemoveRows(QModelIndex(), row, row)
+                    del self._filas[row]
+                    self.endRemoveRows()
+                    self._filas_marcadas = {}
+        por_id = {fila[posicion]: row for row, fila in enumerate(self._filas)}
+        nuevas = []
+        for id_registro, datos in filas:
+            if id_registro in bajas:
+                continue
+            datos = self._normalizar(datos)
+            row = por_id.get(id_registro)
+            if row is None:
+                if agregar_nuevas and self._agotado:
+                    nuevas.append(datos)
+            elif self._filas[row] != datos:
+                self._filas[row] = datos
+                self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+        if nuevas:
+            inicio = len(self._filas)
+            self.beginInsertRows(QModelIndex(), inicio, inicio + len(nuevas) - 1)
+            self._filas.extend(nuevas)
+            self.endInsertRows()
+        return True
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and not self._agotado and not self._cargando and self._fetcher is not None
+
+    def fetchMore(self, parent):
+        """Pide el próximo lote en segundo plano; mientras llega, canFetchMore devuelve False."""
+        if not self.canFetchMore(parent):
+            return
+        self._cargando = True
+        generacion = self._generacion
+        ejecutar_en_segundo_plano(
+            self._fetcher,
+            args=(len(self._filas), self.tamano_lote),
+            al_terminar=lambda lote: self._agregar_lote(generacion, lote),
+            al_error=lambda e: self._error_lote(generacion, e),
+        )
+
+    def _error_lote(self, generacion, error):
+        if generacion == self._generacion:
+            self._cargando = False
+        log_error(f"Error al cargar un lote de la grilla de inventario: {error}")
+
+    def _agregar_lote(self, generacion, lote):
+        if generacion != self._generacion:
+            return
+        self._cargando = False
+        lote = lote or []
+        if len(lote) < self.tamano_lote:
+            self._agotado = True
+        if not lote:
+            return
+        inicio = len(self._filas)
+        self.beginInsertRows(QModelIndex(), inicio, inicio + len(lote) - 1)
+        self._filas.extend(self._normalizar(item) for item in lote)
+        self.endInsertRows()
+
+    def _normalizar(self, item):
+        if hasattr(item, "get"):
+            return tuple(item.get(header, "") for header in self._headers)
+        return tuple(item)
+
+    # --- Acceso a filas cargadas ---
+    def fila(self, row):
+        return self._filas[row]
+
+    def valor(self, row, columna):
+        """Valor crudo de una celda; `columna` puede ser índice o nombre de header."""
+        if isinstance(columna, str):
+            columna = self._headers.index(columna)
+        fila = self._filas[row]
+        return fila[columna] if columna < len(fila) else None
+
+    def obtener_filas(self):
+        return list(self._filas)
+
+    def marcar_filas(self, filas, color):
+        """Pinta el fondo de las filas indicadas (p. ej. ítems bajo stock)."""
+        for row in filas:
+            self._filas_marcadas[row] = QColor(color)
+        if filas and self._filas:
+            self.dataChanged.emit(self.index(min(filas), 0), self.index(max(filas), self.columnCount() - 1), [Qt.ItemDataRole.BackgroundRole])
+
+    # --- API de QAbstractTableModel ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._filas)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._headers)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        valor = self.valor(index.row(), index.column())
+        if role == Qt.ItemDataRole.DisplayRole:
+            return "" if valor is None else str(valor)
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return f"{self._headers[index.column()]}: {'' if valor is None else valor}"
+        if role == Qt.ItemDataRole.UserRole:
+            # Clave de orden: números como float, el resto como texto
+            if isinstance(valor, (int, float, Decimal)) and not isinstance(valor, bool):
+                return float(valor)
+            return "" if valor is None else str(valor)
+        if role == Qt.ItemDataRole.BackgroundRole:
+            return self._filas_marcadas.get(index.row())
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal and section < len(self._headers):
+            return self._headers[section]
+        return None
+
+class InventarioProxyModel(QSortFilterProxyModel):
+    """Ordena por el valor crudo (UserRole) y filtra por texto en todas las columnas, sin distinguir mayúsculas."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSortRole(Qt.ItemDataRole.UserRole)
+        self.setFilterKeyColumn(-1)
+        self.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
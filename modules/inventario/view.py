@@ -1,16 +1,15 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QLineEdit, QFormLayout, QTableWidget, QTableWidgetItem, QTabWidget, QDialog, QMessageBox, QInputDialog, QCheckBox, QScrollArea, QHeaderView, QMenu, QSizePolicy, QGraphicsDropShadowEffect, QFileDialog, QProgressBar
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QLineEdit, QFormLayout, QTableWidget, QTableWidgetItem, QTableView, QAbstractItemView, QTabWidget, QDialog, QMessageBox, QInputDialog, QCheckBox, QScrollArea, QHeaderView, QMenu, QSizePolicy, QGraphicsDropShadowEffect, QFileDialog, QProgressBar
 from PyQt6.QtGui import QColor, QAction, QIcon
 from PyQt6.QtCore import Qt, pyqtSignal, QSize, QPoint
 import json
 import os
-import pyodbc
-import pandas as pd
 from functools import partial
 from modules.vidrios.view import VidriosView
 from core.table_responsive_mixin import TableResponsiveMixin
 from core.ui_components import estilizar_boton_icono, aplicar_qss_global_y_tema
 from core.logger import log_error
-from core.config import get_db_server
+from core.database import obtener_pool
+from modules.inventario.table_model import InventarioTableModel, InventarioProxyModel
 
 # ---
 # EXCEPCIÓN JUSTIFICADA: Este módulo no requiere feedback de carga adicional porque los procesos son instantáneos o ya usan QProgressBar en operaciones largas (ver mostrar_feedback_carga). Ver test_feedback_carga y docs/estandares_visuales.md.
@@ -29,6 +28,8 @@ class InventarioView(QWidget, TableResponsiveMixin):
     actualizar_signal = pyqtSignal()
     ajustar_stock_signal = pyqtSignal()
     ajustes_stock_guardados = pyqtSignal(list)  # Señal para emitir ajustes de stock guardados
+    busqueda_cambiada = pyqtSignal(str)  # Texto de búsqueda mientras se escribe
+    exportacion_solicitada = pyqtSignal(str, str)  # (formato, ruta): exportación completa desde el modelo
 
     CONEXION_INVALIDA_MSG = "No hay conexión válida a la base de datos."
     ERROR_OBRAS_PENDIENTES_MSG = "Error de conexión a la base de datos al consultar obras pendientes."
@@ -42,6 +43,7 @@ class InventarioView(QWidget, TableResponsiveMixin):
 
         self.db_connection = db_connection
         self.usuario_actual = usuario_actual
+        self.indice_busqueda = None
 
         self._setup_feedback_label()
         self._setup_header_and_buttons()
@@ -75,6 +77,15 @@ class InventarioView(QWidget, TableResponsiveMixin):
         self.label_titulo.setAccessibleDescription("Encabezado principal de la vista de inventario")
         header_layout.addWidget(self.label_titulo, alignment=Qt.AlignmentFlag.AlignVCenter)
         header_layout.addStretch()
+        self.buscar_input = QLineEdit()
+        self.buscar_input.setObjectName("buscar_input")
+        self.buscar_input.setPlaceholderText("Buscar por código, descripción, tipo, acabado o proveedor")
+        self.buscar_input.setAccessibleName("Buscar ítem de inventario")
+        self.buscar_input.setClearButtonEnabled(True)
+        self.buscar_input.setMinimumWidth(320)
+        self.buscar_input.textChanged.connect(self.busqueda_cambiada.emit)
+        self.buscar_input.returnPressed.connect(self.buscar_signal.emit)
+        header_layout.addWidget(self.buscar_input)
         icon_dir = os.path.join(os.path.dirname(__file__), '../../resources/icons')
         botones = [
             ("ajustar-stock.svg", "Ajustar stock", self.ajustar_stock_signal, "boton_ajustar_stock"),
@@ -132,17 +143,41 @@ class InventarioView(QWidget, TableResponsiveMixin):
         tab_perfiles_layout = QVBoxLayout(self.tab_perfiles)
         tab_perfiles_layout.setContentsMargins(24, 20, 24, 20)
         tab_perfiles_layout.setSpacing(18)
-        self.tabla_inventario = QTableWidget()
+        self._crear_tabla_inventario()
+        self.tabla_inventario.setMinimumHeight(600)
+        self.tabla_inventario.setMaximumHeight(1000)
+        tab_perfiles_layout.addWidget(self.tabla_inventario)
+        # Detalle de reservas del ítem clickeado (reemplaza a las filas expandidas de la grilla)
+        self.label_detalle_reservas = QLabel("")
+        self.label_detalle_reservas.setObjectName("label_detalle_reservas")
+        self.label_detalle_reservas.setProperty("detalle", True)
+        self.label_detalle_reservas.setAccessibleName("Detalle de reservas del ítem seleccionado")
+        self.label_detalle_reservas.setVisible(False)
+        tab_perfiles_layout.addWidget(self.label_detalle_reservas)
+        self.tab_perfiles.setLayout(tab_perfiles_layout)
+        self.tabs.addTab(self.tab_perfiles, "Perfiles y materiales")
+
+    def _crear_tabla_inventario(self):
+        """
+        Grilla virtualizada: QTableView + InventarioTableModel (filas por lotes) + proxy para ordenar/filtrar.
+        Sólo se materializan las celdas visibles.
+        """
+        self.modelo_inventario = InventarioTableModel(self.inventario_headers, parent=self)
+        self.proxy_inventario = InventarioProxyModel(self)
+        self.proxy_inventario.setSourceModel(self.modelo_inventario)
+        self.tabla_inventario = QTableView()
         self.tabla_inventario.setObjectName("tabla_inventario")
-        self.tabla_inventario.setColumnCount(len(self.inventario_headers))
-        self.tabla_inventario.setHorizontalHeaderLabels(self.inventario_headers)
+        self.tabla_inventario.setModel(self.proxy_inventario)
         self.make_table_responsive(self.tabla_inventario)
         self.tabla_inventario.setAlternatingRowColors(True)
-        self.tabla_inventario.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.tabla_inventario.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.tabla_inventario.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.tabla_inventario.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.tabla_inventario.setSortingEnabled(True)
         v_header = self.tabla_inventario.verticalHeader()
         if v_header is not None:
             v_header.setVisible(False)
+            # Altura fija: con ResizeToContents Qt mediría todas las filas cargadas
+            v_header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
             v_header.setDefaultSectionSize(25)
         h_header = self.tabla_inventario.horizontalHeader()
         if h_header is not None:
@@ -156,17 +191,26 @@ class InventarioView(QWidget, TableResponsiveMixin):
                 h_header.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
             if hasattr(h_header, 'customContextMenuRequested'):
                 h_header.customContextMenuRequested.connect(self.mostrar_menu_header)
-            if hasattr(h_header, 'sectionClicked'):
-                h_header.sectionClicked.connect(self.mostrar_menu_header)
             h_header.setMinimumSectionSize(80)
             h_header.setDefaultSectionSize(120)
-        self.tabla_inventario.cellClicked.connect(self.toggle_expandir_fila)
+        self.tabla_inventario.clicked.connect(self.toggle_expandir_fila)
         self.filas_expandidas = set()
-        self.tabla_inventario.setMinimumHeight(600)
-        self.tabla_inventario.setMaximumHeight(1000)
-        tab_perfiles_layout.addWidget(self.tabla_inventario)
-        self.tab_perfiles.setLayout(tab_perfiles_layout)
-        self.tabs.addTab(self.tab_perfiles, "Perfiles y materiales")
+
+    def configurar_carga_por_lotes(self, fetcher, tamano_lote=500, primer_lote=None):
+        """Conecta la grilla a fetcher(offset, limite); las filas siguientes se piden al hacer scroll."""
+        self.modelo_inventario.configurar_origen(fetcher, tamano_lote, primer_lote)
+
+    def aplicar_cambios_inventario(self, filas, bajas=(), agregar_nuevas=True):
+        """Aplica un delta por rowversion sobre la grilla sin recargarla (ver InventarioTableModel.aplicar_cambios)."""
+        return self.modelo_inventario.aplicar_cambios(filas, bajas, agregar_nuevas=agregar_nuevas)
+
+    def configurar_indice_busqueda(self, indice):
+        """Índice en memoria (IndiceBusqueda) que usan los diálogos de búsqueda de perfiles."""
+        self.indice_busqueda = indice
+
+    def filtrar_items(self, texto):
+        """Filtra las filas cargadas por texto en cualquier columna."""
+        self.proxy_inventario.setFilterFixedString(texto or "")
 
     def _setup_tab_obras_material(self):
         self.tab_obras_material = QWidget()
@@ -231,17 +275,8 @@ class InventarioView(QWidget, TableResponsiveMixin):
         # --- POLÍTICA DE SEGURIDAD: No hardcodear cadenas de conexión. Usar variables de entorno o config segura ---
         if self.db_connection and all(hasattr(self.db_connection, attr) for attr in ["driver", "database", "username", "password", "server"]):
             query = f"SELECT TOP 0 * FROM {tabla}"
-            server = get_db_server()
-            connection_string = (
-                f"DRIVER={{{self.db_connection.driver}}};"
-                f"SERVER={server};"
-                f"DATABASE={self.db_connection.database};"
-                f"UID={self.db_connection.username};"
-                f"PWD={self.db_connection.password};"
-                f"TrustServerCertificate=yes;"
-            )
             try:
-                with pyodbc.connect(connection_string, timeout=10) as conn:
+                with obtener_pool(self.db_connection.database).conexion() as conn:
                     cursor = conn.cursor()
                     cursor.execute(query)
                     return [column[0] for column in cursor.description]
@@ -302,49 +337,31 @@ class InventarioView(QWidget, TableResponsiveMixin):
         self.tabla_inventario.resizeColumnToContents(idx)
 
     def autoajustar_todas_columnas(self):
-        for idx in range(self.tabla_inventario.columnCount()):
+        for idx in range(self.modelo_inventario.columnCount()):
             self.tabla_inventario.resizeColumnToContents(idx)
 
     def obtener_id_item_seleccionado(self):
         # Devuelve el ID del ítem seleccionado en la tabla (robustecida)
-        fila = self.tabla_inventario.currentRow()
-        if fila != -1:
-            item = self.tabla_inventario.item(fila, 0)
-            if item is not None and hasattr(item, 'text'):
-                return item.text()
+        indice = self.tabla_inventario.currentIndex()
+        if indice.isValid():
+            fila = self.proxy_inventario.mapToSource(indice).row()
+            valor = self.modelo_inventario.valor(fila, 0)
+            if valor is not None:
+                return str(valor)
         return None
 
     def cargar_items(self, items):
-        # items debe ser una lista de diccionarios con claves iguales a los headers
-        self.tabla_inventario.setRowCount(len(items))
-        for fila, item in enumerate(items):
-            for columna, header in enumerate(self.inventario_headers):
-                valor = item.get(header, "")
-                qitem = QTableWidgetItem(str(valor))
-                qitem.setToolTip(f"{header}: {valor}")
-                self.tabla_inventario.setItem(fila, columna, qitem)
+        # items: lista de diccionarios con claves iguales a los headers, o tuplas en el orden de columnas
+        self.modelo_inventario.set_items(items)
 
     def exportar_tabla_a_excel(self):
         # Abrir diálogo para elegir ubicación
         file_path, _ = QFileDialog.getSaveFileName(self, "Exportar a Excel", "inventario.xlsx", "Archivos Excel (*.xlsx)")
         if not file_path:
             return
-        # Obtener datos de la tabla
-        data = []
-        for row in range(self.tabla_inventario.rowCount()):
-            row_data = {}
-            for col, header in enumerate(self.inventario_headers):
-                item = self.tabla_inventario.item(row, col)
-                row_data[header] = item.text() if item else ""
-            data.append(row_data)
-        df = pd.DataFrame(data)
-        try:
-            df.to_excel(file_path, index=False)
-            self.mostrar_feedback(f"Inventario exportado correctamente a {file_path}", tipo="exito")
-            log_error(f"Inventario exportado correctamente a {file_path}")
-        except Exception as e:
-            self.mostrar_feedback(f"No se pudo exportar: {e}", tipo="error")
-            log_error(f"Error al exportar inventario: {e}")
+        # La grilla sólo tiene los lotes ya leídos (fetchMore): el controlador exporta la tabla completa
+        # leyéndola en streaming desde el modelo, en segundo plano
+        self.exportacion_solicitada.emit("excel", file_path)
 
     def ver_obras_pendientes_material(self):
         id_item = self.obtener_id_item_seleccionado()
@@ -356,20 +373,11 @@ class InventarioView(QWidget, TableResponsiveMixin):
             return
         try:
             query = "SELECT referencia_obra, cantidad_reservada, estado, codigo_reserva FROM reservas_materiales WHERE id_item = ? AND estado IN ('activa', 'pendiente')"
-            server = get_db_server()
             if not (self.db_connection and all(hasattr(self.db_connection, attr) for attr in ["driver", "database", "username", "password"])):
                 self.mostrar_feedback(self.CONEXION_INVALIDA_MSG, tipo="error")
                 log_error("Error de conexión a la base de datos al consultar obras pendientes.")
                 return
-            connection_string = (
-                f"DRIVER={{{self.db_connection.driver}}};"
-                f"SERVER={server};"
-                f"DATABASE={self.db_connection.database};"
-                f"UID={self.db_connection.username};"
-                f"PWD={self.db_connection.password};"
-                f"TrustServerCertificate=yes;"
-            )
-            with pyodbc.connect(connection_string, timeout=10) as conn:
+            with obtener_pool(self.db_connection.database).conexion() as conn:
                 cursor = conn.cursor()
                 cursor.execute(query, (id_item,))
                 reservas = cursor.fetchall()
@@ -409,36 +417,25 @@ class InventarioView(QWidget, TableResponsiveMixin):
             self.mostrar_feedback(f"Error al consultar reservas: {e}", tipo="error")
             log_error(f"Error al consultar reservas: {e}")
 
-    def toggle_expandir_fila(self, row, col):
-        item = self.tabla_inventario.item(row, 0)
-        if item is None or not hasattr(item, 'text'):
+    def toggle_expandir_fila(self, indice):
+        if not indice.isValid():
+            return
+        row = self.proxy_inventario.mapToSource(indice).row()
+        valor = self.modelo_inventario.valor(row, 0)
+        if valor is None:
+            return
+        id_item = str(valor)
+        if id_item in self.filas_expandidas:
+            self.colapsar_fila(id_item)
             return
-        id_item = item.text()
-        if (row, id_item) in self.filas_expandidas:
-            self.colapsar_fila(row)
-            self.filas_expandidas.remove((row, id_item))
-        else:
-            self.expandir_fila(row, id_item)
-            self.filas_expandidas.add((row, id_item))
 
         if not (self.db_connection and all(hasattr(self.db_connection, attr) for attr in ["driver", "database", "username", "password", "server"])):
             self.mostrar_feedback(self.CONEXION_INVALIDA_MSG, tipo="error")
             log_error("Error de conexión a la base de datos al expandir fila.")
             return
-            log_error("Error de conexión a la base de datos al expandir fila.")
-            return
         try:
             query = "SELECT referencia_obra, cantidad_reservada, estado, codigo_reserva FROM reservas_materiales WHERE id_item = ? AND estado IN ('activa', 'pendiente')"
-            server = get_db_server()
-            connection_string = (
-                f"DRIVER={{{self.db_connection.driver}}};"
-                f"SERVER={server};"
-                f"DATABASE={self.db_connection.database};"
-                f"UID={self.db_connection.username};"
-                f"PWD={self.db_connection.password};"
-                f"TrustServerCertificate=yes;"
-            )
-            with pyodbc.connect(connection_string, timeout=10) as conn:
+            with obtener_pool(self.db_connection.database).conexion() as conn:
                 cursor = conn.cursor()
                 cursor.execute(query, (id_item,))
                 reservas = cursor.fetchall()
@@ -446,39 +443,25 @@ class InventarioView(QWidget, TableResponsiveMixin):
                 reservas = [dict(zip(columnas, row)) for row in reservas]
             if not reservas:
                 return
-            # Insertar filas debajo de la seleccionada
-            insert_at = row + 1
-            for r in reservas:
-                if insert_at > self.tabla_inventario.rowCount():
-                    break
-                self.tabla_inventario.insertRow(insert_at)
-                self.tabla_inventario.setSpan(insert_at, 0, 1, self.tabla_inventario.columnCount())
-                obra = r.get("referencia_obra", "")
-                cantidad = r.get("cantidad_reservada", "")
-                estado = r.get("estado", "")
-                codigo = r.get("codigo_reserva", "")
-                label = QLabel(f"<b>Obra:</b> {obra} | <b>Cantidad:</b> {cantidad} | <b>Estado:</b> {estado} | <b>Código:</b> {codigo}")
-                # QSS global: el estilo de feedback y detalles se define en themes/light.qss y dark.qss
-                label.setProperty("detalle", True)
-                self.tabla_inventario.setCellWidget(insert_at, 0, label)
-                insert_at += 1
+            self.expandir_fila(id_item, reservas)
         except Exception as e:
             self.mostrar_feedback(f"Error al consultar reservas: {e}", tipo="error")
             log_error(f"Error al expandir fila: {e}")
 
-    def expandir_fila(self, row, id_item):
-        # Método placeholder para expandir una fila, puede ser personalizado según la lógica de expansión
-        # Por defecto, no hace nada. Se puede implementar lógica adicional si se requiere.
-        pass
-
-    def colapsar_fila(self, row):
-        # Elimina todas las filas expandidas debajo de la fila seleccionada
-        while self.tabla_inventario.rowCount() > row + 1:
-            widget = self.tabla_inventario.cellWidget(row + 1, 0)
-            if widget is not None:
-                self.tabla_inventario.removeRow(row + 1)
-            else:
-                break
+    def expandir_fila(self, id_item, reservas):
+        # Muestra las reservas del ítem debajo de la grilla (el modelo virtual no admite filas de detalle intercaladas)
+        lineas = [
+            f"<b>Obra:</b> {r.get('referencia_obra', '')} | <b>Cantidad:</b> {r.get('cantidad_reservada', '')} | <b>Estado:</b> {r.get('estado', '')} | <b>Código:</b> {r.get('codigo_reserva', '')}"
+            for r in reservas
+        ]
+        self.filas_expandidas = {id_item}
+        self.label_detalle_reservas.setText("<br>".join(lineas))
+        self.label_detalle_reservas.setVisible(True)
+
+    def colapsar_fila(self, id_item):
+        self.filas_expandidas.discard(id_item)
+        self.label_detalle_reservas.clear()
+        self.label_detalle_reservas.setVisible(False)
 
     def abrir_pedido_material_obra(self):
         dialog = QDialog(self)
@@ -531,55 +514,38 @@ class InventarioView(QWidget, TableResponsiveMixin):
         dialog.exec()
 
     def _buscar_perfiles_dialog(self, codigo_proveedor_input, tabla_perfiles, perfiles_encontrados):
-        if not (self.db_connection and all(hasattr(self.db_connection, attr) for attr in ["driver", "database", "username", "password", "server"])):
-            self.mostrar_feedback(self.CONEXION_INVALIDA_MSG, tipo="error")
-            log_error("Error de conexión a la base de datos al buscar perfiles.")
-            return
         codigo = codigo_proveedor_input.text().strip()
         if not codigo:
             self.mostrar_feedback("Ingrese un código de proveedor.", tipo="advertencia")
             log_error("Intento de buscar perfiles sin código de proveedor.")
             return
-        query = "SELECT id, codigo, descripcion, stock FROM inventario_perfiles WHERE codigo LIKE ?"
-        server = get_db_server()
-        connection_string = (
-            f"DRIVER={{{self.db_connection.driver}}};"
-            f"SERVER={server};"
-            f"DATABASE={self.db_connection.database};"
-            f"UID={self.db_connection.username};"
-            f"PWD={self.db_connection.password};"
-            f"TrustServerCertificate=yes;"
-        )
-        try:
-            with pyodbc.connect(connection_string, timeout=10) as conn:
-                cursor = conn.cursor()
-                cursor.execute(query, (f"%{codigo}%",))
-                perfiles = cursor.fetchall()
-                perfiles_encontrados.clear()
-                tabla_perfiles.setRowCount(0)
-                for i, row in enumerate(perfiles):
-                    id_item, cod, desc, stock = row
-                    tabla_perfiles.insertRow(i)
-                    tabla_perfiles.setItem(i, 0, QTableWidgetItem(str(cod)))
-                    tabla_perfiles.setItem(i, 1, QTableWidgetItem(str(desc)))
-                    tabla_perfiles.setItem(i, 2, QTableWidgetItem(str(stock)))
-                    cantidad_pedir = QLineEdit()
-                    faltan_label = QLabel("0")
-                    tabla_perfiles.setCellWidget(i, 3, cantidad_pedir)
-                    tabla_perfiles.setCellWidget(i, 4, faltan_label)
-                    perfiles_encontrados.append({
-                        "id": id_item,
-                        "codigo": cod,
-                        "desc": desc,
-                        "stock": stock,
-                        "input": cantidad_pedir,
-                        "faltan": faltan_label
-                    })
-                    cantidad_pedir.textChanged.connect(
-                        partial(self._actualizar_faltan, perfiles_encontrados, i)
-                    )
-        except Exception as e:
-            self.mostrar_feedback(f"Error al buscar perfiles: {e}", tipo="error")
+        if self.indice_busqueda is None or not self.indice_busqueda.cargado:
+            self.mostrar_feedback("El catálogo todavía se está cargando. Intente nuevamente en unos segundos.", tipo="advertencia")
+            return
+        perfiles_encontrados.clear()
+        tabla_perfiles.setRowCount(0)
+        for i, perfil in enumerate(self.indice_busqueda.buscar(codigo)):
+            id_item, cod, desc = perfil.get("id"), perfil.get("codigo"), perfil.get("descripcion")
+            stock = perfil.get("stock", perfil.get("stock_actual")) or 0
+            tabla_perfiles.insertRow(i)
+            tabla_perfiles.setItem(i, 0, QTableWidgetItem(str(cod)))
+            tabla_perfiles.setItem(i, 1, QTableWidgetItem(str(desc)))
+            tabla_perfiles.setItem(i, 2, QTableWidgetItem(str(stock)))
+            cantidad_pedir = QLineEdit()
+            faltan_label = QLabel("0")
+            tabla_perfiles.setCellWidget(i, 3, cantidad_pedir)
+            tabla_perfiles.setCellWidget(i, 4, faltan_label)
+            perfiles_encontrados.append({
+                "id": id_item,
+                "codigo": cod,
+                "desc": desc,
+                "stock": stock,
+                "input": cantidad_pedir,
+                "faltan": faltan_label
+            })
+            cantidad_pedir.textChanged.connect(
+                partial(self._actualizar_faltan, perfiles_encontrados, i)
+            )
 
     def _actualizar_faltan(self, perfiles_encontrados, idx):
         try:
@@ -611,17 +577,8 @@ class InventarioView(QWidget, TableResponsiveMixin):
             self.mostrar_feedback("No hay cantidades válidas para pedir.", tipo="advertencia")
             log_error("Intento de pedir lote sin cantidades válidas.")
             return
-        server = get_db_server()
-        connection_string = (
-            f"DRIVER={{{self.db_connection.driver}}};"
-            f"SERVER={server};"
-            f"DATABASE={self.db_connection.database};"
-            f"UID={self.db_connection.username};"
-            f"PWD={self.db_connection.password};"
-            f"TrustServerCertificate=yes;"
-        )
         try:
-            with pyodbc.connect(connection_string, timeout=10) as conn:
+            with obtener_pool(self.db_connection.database).conexion() as conn:
                 cursor = conn.cursor()
                 for id_item, cantidad, estado in pedidos:
                     cursor.execute(
@@ -17,6 +17,7 @@ FLUJO PASO A PASO DEL MÓDULO LOGÍSTICA
 
 import pandas as pd
 from fpdf import FPDF
+from core.exportacion import EXTENSIONES, FORMATOS, NOMBRES_FORMATO, ExportacionCancelada, exportar_filas, filas_de_query
 
 class LogisticaModel:
     def __init__(self, db_connection=None):
@@ -89,7 +90,8 @@ class LogisticaModel:
 
     def exportar_historial_entregas(self, formato: str) -> str:
         """
-        Exporta el historial de entregas en el formato solicitado ('excel' o 'pdf').
+        Exporta el historial de entregas en el formato solicitado ('excel', 'csv' o 'pdf').
+        Las filas se leen por lotes y se escriben directo al archivo (ver core.exportacion).
         Si no hay datos, retorna un mensaje de advertencia.
         Si ocurre un error, retorna un mensaje de error.
         El nombre del archivo incluye fecha y hora para evitar sobrescritura.
@@ -98,38 +100,21 @@ class LogisticaModel:
         SELECT id, id_obra, fecha_programada, fecha_realizada, estado, vehiculo_asignado, chofer_asignado, observaciones
         FROM entregas_obras
         """
+        formato = (formato or '').lower().strip()
+        if formato not in FORMATOS:
+            return "Formato no soportado. Use 'excel', 'csv' o 'pdf'."
+        fecha_str = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
+        nombre_archivo = f"historial_entregas_{fecha_str}{EXTENSIONES[formato]}"
+        columnas = ["ID", "Obra", "Fecha Programada", "Fecha Realizada", "Estado", "Vehículo", "Chofer", "Observaciones"]
         try:
-            datos = self.db.ejecutar_query(query) or []
-            if not datos:
-                return "No hay datos de entregas para exportar."
-            formato = (formato or '').lower().strip()
-            if formato not in ("excel", "pdf"):
-                return "Formato no soportado. Use 'excel' o 'pdf'."
-            fecha_str = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
-            columnas = ["ID", "Obra", "Fecha Programada", "Fecha Realizada", "Estado", "Vehículo", "Chofer", "Observaciones"]
-            if formato == "excel":
-                nombre_archivo = f"historial_entregas_{fecha_str}.xlsx"
-                try:
-                    df = pd.DataFrame(datos, columns=columnas)
-                    df.to_excel(nombre_archivo, index=False)
-                    return f"Historial de entregas exportado a Excel: {nombre_archivo}"
-                except Exception as e:
-                    return f"Error al exportar a Excel: {e}"
-            elif formato == "pdf":
-                nombre_archivo = f"historial_entregas_{fecha_str}.pdf"
-                try:
-                    pdf = FPDF()
-                    pdf.add_page()
-                    pdf.set_font("Arial", size=12)
-                    pdf.cell(200, 10, "Historial de Entregas", ln=True, align="C")
-                    for row in datos:
-                        pdf.cell(200, 10, str(row), ln=True)
-                    pdf.output(nombre_archivo)
-                    return f"Historial de entregas exportado a PDF: {nombre_archivo}"
-                except Exception as e:
-                    return f"Error al exportar a PDF: {e}"
+            escritas = exportar_filas(filas_de_query(self.db, query), formato, nombre_archivo, columnas, titulo="Historial de Entregas")
+        except ExportacionCancelada:
+            return "Exportación del historial de entregas cancelada."
         except Exception as e:
             return f"Error al exportar el historial de entregas: {e}"
+        if not escritas:
+            return "No hay datos de entregas para exportar."
+        return f"Historial de entregas exportado a {NOMBRES_FORMATO[formato]}: {nombre_archivo}"
 
     def exportar_acta_entrega(self, id_entrega):
         query = """
@@ -207,6 +192,11 @@ class LogisticaModel:
         query = "SELECT * FROM inventario_perfiles"
         return self.db.ejecutar_query(query)
 
+    def iterar_datos_inventario(self, chunk=1000):
+        """Recorre la tabla de inventario de a `chunk` filas sin cargarla entera en memoria."""
+        query = "SELECT * FROM inventario_perfiles"
+        return self.db.iterar_query(query, chunk=chunk)
+
     def agregar_entrega(self, datos):
         """Agrega una nueva entrega a la base de datos."""
         try:
@@ -219,23 +209,54 @@ class LogisticaModel:
             print(f"Error al agregar entrega: {e}")
             raise
 
+    MODULOS_PEDIDOS = ("inventario", "vidrios", "herrajes")
+
+    def obtener_estado_obras(self, ids_obras, inventario_model, vidrios_model, herrajes_model, contabilidad_model):
+        """
+        Estado de pedidos y pagos de todas las obras indicadas, resuelto por conjuntos:
+        {id_obra: {'pedidos': {modulo: estado}, 'pagos': {modulo: estado}}}.
+        Cada módulo vive en su propia base, así que se hace una consulta agregada por módulo
+        (obtener_estados_pedidos_por_obras / obtener_estados_pago_por_obras) en lugar de una por obra.
+        Los modelos de pedidos que no exponen la versión por conjuntos se consultan obra por obra.
+        Un módulo sin pagos registrados para la obra queda con estado de pago None (no pagado).
+        """
+        ids_obras = list(ids_obras)
+        modelos = dict(zip(self.MODULOS_PEDIDOS, (inventario_model, vidrios_model, herrajes_model)))
+        pedidos = {modulo: self._estados_pedidos(modelo, ids_obras) for modulo, modelo in modelos.items()}
+        pagos = self._estados_pago(contabilidad_model, ids_obras)
+        return {
+            id_obra: {
+                'pedidos': {modulo: pedidos[modulo][id_obra] for modulo in self.MODULOS_PEDIDOS},
+                'pagos': {modulo: pagos[(id_obra, modulo)] for modulo in self.MODULOS_PEDIDOS},
+            }
+            for id_obra in ids_obras
+        }
+
+    def _estados_pedidos(self, modelo, ids_obras):
+        if hasattr(modelo, 'obtener_estados_pedidos_por_obras'):
+            estados = modelo.obtener_estados_pedidos_por_obras()
+            return {id_obra: estados.get(id_obra, 'pendiente') for id_obra in ids_obras}
+        por_obra = getattr(modelo, 'obtener_estado_pedidos_por_obra', None) or modelo.obtener_estado_pedido_por_obra
+        return {id_obra: por_obra(id_obra) for id_obra in ids_obras}
+
+    def _estados_pago(self, contabilidad_model, ids_obras):
+        estados = contabilidad_model.obtener_estados_pago_por_obras()
+        return {(id_obra, modulo): estados.get((id_obra, modulo)) for id_obra in ids_obras for modulo in self.MODULOS_PEDIDOS}
+
     def obtener_obras_listas_para_entrega(self, obras_model, inventario_model, vidrios_model, herrajes_model, contabilidad_model):
         """
         Devuelve la lista de obras listas para fabricar/entregar:
         - Todos los pedidos de material, vidrios y herrajes deben estar realizados y pagados.
         - Integra con los modelos de Inventario, Vidrios, Herrajes y Contabilidad.
+        La cantidad de consultas no depende de la cantidad de obras (ver obtener_estado_obras).
         """
         obras = obras_model.obtener_todas_las_obras()
+        ids_obras = [obra['id'] if isinstance(obra, dict) else obra[0] for obra in obras]
+        estados = self.obtener_estado_obras(ids_obras, inventario_model, vidrios_model, herrajes_model, contabilidad_model)
         obras_listas = []
-        for obra in obras:
-            id_obra = obra['id'] if isinstance(obra, dict) else obra[0]
-            estado_mat = inventario_model.obtener_estado_pedidos_por_obra(id_obra)
-            estado_vid = vidrios_model.obtener_estado_pedidos_por_obra(id_obra)
-            estado_her = herrajes_model.obtener_estado_pedido_por_obra(id_obra)
-            pagos_mat = contabilidad_model.obtener_estado_pago_pedido_por_obra(id_obra, modulo="inventario")
-            pagos_vid = contabilidad_model.obtener_estado_pago_pedido_por_obra(id_obra, modulo="vidrios")
-            pagos_her = contabilidad_model.obtener_estado_pago_pedido_por_obra(id_obra, modulo="herrajes")
-            if (estado_mat == 'entregado' and estado_vid == 'entregado' and estado_her == 'entregado' and
-                pagos_mat == 'pagado' and pagos_vid == 'pagado' and pagos_her == 'pagado'):
+        for obra, id_obra in zip(obras, ids_obras):
+            estado = estados[id_obra]
+            if (all(valor == 'entregado' for valor in estado['pedidos'].values()) and
+                    all(valor == 'pagado' for valor in estado['pagos'].values())):
                 obras_listas.append(obra)
         return obras_listas
@@ -3,6 +3,7 @@ from modules.usuarios.model import UsuariosModel
 from modules.auditoria.model import AuditoriaModel
 from functools import wraps
 from core.logger import log_error
+from core.workers import ExportacionEnSegundoPlanoMixin
 
 class PermisoAuditoria:
     def __init__(self, modulo):
@@ -41,7 +42,7 @@ class PermisoAuditoria:
 
 permiso_auditoria_mantenimiento = PermisoAuditoria('mantenimiento')
 
-class MantenimientoController(BaseController):
+class MantenimientoController(ExportacionEnSegundoPlanoMixin, BaseController):
     """
     Controlador para el módulo de Mantenimiento.
     
@@ -59,6 +60,8 @@ class MantenimientoController(BaseController):
         def registrar_mantenimiento(self):
             ...
     """
+    MODULO_EXPORTACION = "mantenimiento"
+    EXPORTACION_POR_DEFECTO = "exportar_reporte_mantenimiento"
 
     def __init__(self, model, view, db_connection, usuarios_model, usuario_actual=None, notificaciones_controller=None):
         super().__init__(model, view)
@@ -140,12 +143,8 @@ class MantenimientoController(BaseController):
 
     @permiso_auditoria_mantenimiento('exportar_reporte_mantenimiento')
     def exportar_reporte_mantenimiento(self, formato):
-        mensaje = self.model.exportar_reporte_mantenimiento(formato)
-        self.view.label.setText(mensaje)
-        self._registrar_evento_auditoria('exportar_reporte_mantenimiento', estado="éxito")
+        self._exportar_en_segundo_plano(self.model.exportar_reporte_mantenimiento, formato, 'exportar_reporte_mantenimiento')
 
     @permiso_auditoria_mantenimiento('exportar_historial_mantenimientos')
     def exportar_historial_mantenimientos(self, formato):
-        mensaje = self.model.exportar_historial_mantenimientos(formato)
-        self.view.label.setText(mensaje)
-        self._registrar_evento_auditoria('exportar_historial_mantenimientos', estado="éxito")
+        self._exportar_en_segundo_plano(self.model.exportar_historial_mantenimientos, formato, 'exportar_historial_mantenimientos')
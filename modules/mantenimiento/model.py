@@ -1,5 +1,5 @@
 import pandas as pd
-from fpdf import FPDF
+from core.exportacion import EXTENSIONES, FORMATOS, NOMBRES_FORMATO, ExportacionCancelada, exportar_filas, filas_de_query
 
 class MantenimientoModel:
     """
@@ -73,97 +73,60 @@ class MantenimientoModel:
         self.db.ejecutar_query(query, (id_tarea,))
         return True
 
+    _QUERY_EXPORTAR_MANTENIMIENTOS = """
+        SELECT tipo_mantenimiento, fecha_realizacion, realizado_por, observaciones, firma_digital
+        FROM mantenimientos
+        """
+    _COLUMNAS_EXPORTAR_MANTENIMIENTOS = ["Tipo", "Fecha", "Realizado Por", "Observaciones", "Firma Digital"]
+
+    def _exportar_mantenimientos(self, formato, prefijo_archivo, titulo):
+        """Escribe los mantenimientos en streaming (ver core.exportacion). Devuelve (nombre_archivo, filas escritas)."""
+        fecha_str = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
+        nombre_archivo = f"{prefijo_archivo}_{fecha_str}{EXTENSIONES[formato]}"
+        filas = filas_de_query(self.db, self._QUERY_EXPORTAR_MANTENIMIENTOS)
+        return nombre_archivo, exportar_filas(filas, formato, nombre_archivo, self._COLUMNAS_EXPORTAR_MANTENIMIENTOS, titulo=titulo)
+
     def exportar_reporte_mantenimiento(self, formato: str) -> str:
         """
         Exporta el reporte de mantenimientos en el formato solicitado.
-        Soporta 'excel' y 'pdf'.
+        Soporta 'excel', 'csv' y 'pdf'.
         Si no hay datos, retorna un mensaje de advertencia.
         Si ocurre un error, retorna un mensaje de error.
         El nombre del archivo incluye fecha y hora para evitar sobrescritura.
         """
-        query = (
-            """
-            SELECT tipo_mantenimiento, fecha_realizacion, realizado_por, observaciones, firma_digital
-            FROM mantenimientos
-            """
-        )
+        formato = (formato or '').lower().strip()
+        if formato not in FORMATOS:
+            return "Formato no soportado. Use 'excel', 'csv' o 'pdf'."
         try:
-            datos = self.db.ejecutar_query(query) or []
-            if not datos:
-                return "No hay datos de mantenimiento para exportar."
-            formato = (formato or '').lower().strip()
-            if formato not in ("excel", "pdf"):
-                return "Formato no soportado. Use 'excel' o 'pdf'."
-            fecha_str = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
-            if formato == "excel":
-                nombre_archivo = f"reporte_mantenimiento_{fecha_str}.xlsx"
-                try:
-                    df = pd.DataFrame(datos, columns=["Tipo", "Fecha", "Realizado Por", "Observaciones", "Firma Digital"])
-                    df.to_excel(nombre_archivo, index=False)
-                    return f"Reporte de mantenimiento exportado a Excel: {nombre_archivo}"
-                except Exception as e:
-                    return f"Error al exportar a Excel: {e}"
-            elif formato == "pdf":
-                nombre_archivo = f"reporte_mantenimiento_{fecha_str}.pdf"
-                try:
-                    pdf = FPDF()
-                    pdf.add_page()
-                    pdf.set_font("Arial", size=12)
-                    pdf.cell(200, 10, "Reporte de Mantenimiento", ln=True, align="C")
-                    for row in datos:
-                        pdf.cell(200, 10, str(row), ln=True)
-                    pdf.output(nombre_archivo)
-                    return f"Reporte de mantenimiento exportado a PDF: {nombre_archivo}"
-                except Exception as e:
-                    return f"Error al exportar a PDF: {e}"
+            nombre_archivo, escritas = self._exportar_mantenimientos(formato, "reporte_mantenimiento", "Reporte de Mantenimiento")
+        except ExportacionCancelada:
+            return "Exportación del reporte cancelada."
         except Exception as e:
             return f"Error al exportar el reporte: {e}"
+        if not escritas:
+            return "No hay datos de mantenimiento para exportar."
+        return f"Reporte de mantenimiento exportado a {NOMBRES_FORMATO[formato]}: {nombre_archivo}"
 
     def exportar_historial_mantenimientos(self, formato: str) -> str:
         """
         Exporta el historial de mantenimientos en el formato solicitado.
-        Soporta 'excel' y 'pdf'.
+        Soporta 'excel', 'csv' y 'pdf'.
         Si no hay datos, retorna un mensaje de advertencia.
         Si ocurre un error, retorna un mensaje de error.
         El nombre del archivo incluye fecha y hora para evitar sobrescritura.
         """
-        query = (
-            """
-            SELECT tipo_mantenimiento, fecha_realizacion, realizado_por, observaciones, firma_digital
-            FROM mantenimientos
-            """
-        )
+        formato = (formato or '').lower().strip()
+        if formato not in FORMATOS:
+            return "Formato no soportado. Use 'excel', 'csv' o 'pdf'."
         try:
-            datos = self.db.ejecutar_query(query) or []
-            if not datos:
-                return "No hay historial de mantenimientos para exportar."
-            formato = (formato or '').lower().strip()
-            if formato not in ("excel", "pdf"):
-                return "Formato no soportado. Use 'excel' o 'pdf'."
-            fecha_str = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
-            if formato == "excel":
-                nombre_archivo = f"historial_mantenimientos_{fecha_str}.xlsx"
-                try:
-                    df = pd.DataFrame(datos, columns=["Tipo", "Fecha", "Realizado Por", "Observaciones", "Firma Digital"])
-                    df.to_excel(nombre_archivo, index=False)
-                    return f"Historial de mantenimientos exportado a Excel: {nombre_archivo}"
-                except Exception as e:
-                    return f"Error al exportar a Excel: {e}"
-            elif formato == "pdf":
-                nombre_archivo = f"historial_mantenimientos_{fecha_str}.pdf"
-                try:
-                    pdf = FPDF()
-                    pdf.add_page()
-                    pdf.set_font("Arial", size=12)
-                    pdf.cell(200, 10, "Historial de Mantenimientos", ln=True, align="C")
-                    for row in datos:
-                        pdf.cell(200, 10, str(row), ln=True)
-                    pdf.output(nombre_archivo)
-                    return f"Historial de mantenimientos exportado a PDF: {nombre_archivo}"
-                except Exception as e:
-                    return f"Error al exportar a PDF: {e}"
+            nombre_archivo, escritas = self._exportar_mantenimientos(formato, "historial_mantenimientos", "Historial de Mantenimientos")
+        except ExportacionCancelada:
+            return "Exportación del historial cancelada."
         except Exception as e:
             return f"Error al exportar el historial: {e}"
+        if not escritas:
+            return "No hay historial de mantenimientos para exportar."
+        return f"Historial de mantenimientos exportado a {NOMBRES_FORMATO[formato]}: {nombre_archivo}"
 
     def obtener_historial_mantenimientos(self, id_objeto):
         query = "SELECT * FROM mantenimientos WHERE id_objeto = ?"
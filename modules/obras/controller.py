@@ -18,9 +18,11 @@ from modules.usuarios.model import UsuariosModel
 from modules.auditoria.model import AuditoriaModel
 from functools import wraps
 from core.ui_components import estilizar_boton_icono
-from modules.obras.model import OptimisticLockError
+from modules.obras.model import COLUMNAS_DATOS_OBRAS, OptimisticLockError
+from core.delta_sync import SincronizadorDelta, aplicar_cambios_tabla
 from core.event_bus import event_bus
 from core.logger import Logger
+from core.workers import ejecutar_en_segundo_plano
 
 class PermisoAuditoria:
     def __init__(self, modulo):
@@ -229,15 +231,47 @@ class ObrasController:
             self._registrar_evento_auditoria("cargar_headers", mensaje, exito=False)
 
     def cargar_datos_obras_tabla(self):
+        sincronizacion = getattr(self.model, 'sincronizacion_obras', None)
+        if isinstance(sincronizacion, SincronizadorDelta):
+            # Con la tabla ya cargada sólo se traen las obras modificadas y las bajas desde la última marca
+            headers_obras = getattr(self, '_headers_obras_tabla', None)
+            if sincronizacion.activo and headers_obras:
+                ejecutar_en_segundo_plano(
+                    self.model.obtener_cambios_obras,
+                    al_terminar=self._aplicar_cambios_obras_tabla,
+                    al_error=self._error_cargar_datos_obras,
+                    clave="obras.cargar_tabla",
+                )
+                return
+            ejecutar_en_segundo_plano(
+                lambda: (sincronizacion.leer_todo(COLUMNAS_DATOS_OBRAS), self.model.obtener_headers_obras()),
+                al_terminar=self._mostrar_cambios_obras_tabla,
+                al_error=self._error_cargar_datos_obras,
+                vista=self.view,
+                mensaje_carga="Cargando obras...",
+                clave="obras.cargar_tabla",
+            )
+            return
+        # Datos y headers se consultan en segundo plano; la tabla se llena en el hilo de la GUI
+        ejecutar_en_segundo_plano(
+            lambda: (self.model.obtener_datos_obras(), self.model.obtener_headers_obras()),
+            al_terminar=self._mostrar_datos_obras_tabla,
+            al_error=self._error_cargar_datos_obras,
+            vista=self.view,
+            mensaje_carga="Cargando obras...",
+            clave="obras.cargar_tabla",
+        )
+
+    def _mostrar_datos_obras_tabla(self, resultado):
         try:
-            datos = self.model.obtener_datos_obras()
+            datos, headers_obras = resultado
             headers_visibles = getattr(self, '_headers_visibles', None)
             if not headers_visibles:
-                headers_visibles = [h for h in self.model.obtener_headers_obras() if h not in ("id", "usuario_creador")]
+                headers_visibles = [h for h in headers_obras if h not in ("id", "usuario_creador")]
             # Adaptar a lista de dicts para la tabla visual
             obras = []
             for d in datos:
-                obra = dict(zip(self.model.obtener_headers_obras(), d))
+                obra = dict(zip(headers_obras, d))
                 obras.append(obra)
             if hasattr(self.view, 'cargar_tabla_obras'):
                 # Solo pasar los campos visibles
@@ -251,12 +285,40 @@ class ObrasController:
                     for col, header in enumerate(headers_visibles):
                         self.view.tabla_obras.setItem(row, col, QTableWidgetItem(str(obra.get(header, ''))))
         except Exception as e:
-            mensaje = f"Error al cargar datos: {e}"
-            if hasattr(self.view, 'mostrar_mensaje'):
-                self.view.mostrar_mensaje(mensaje, tipo='error')
-            elif hasattr(self.view, 'label'):
-                self.view.label.setText(mensaje)
-            self._registrar_evento_auditoria("cargar_datos", mensaje, exito=False)
+            self._error_cargar_datos_obras(e)
+
+    def _mostrar_cambios_obras_tabla(self, resultado):
+        cambios, headers_obras = resultado
+        self._headers_obras_tabla = headers_obras
+        self._aplicar_cambios_obras_tabla(cambios)
+
+    def _aplicar_cambios_obras_tabla(self, cambios):
+        try:
+            headers_obras = self._headers_obras_tabla
+            headers_visibles = getattr(self, '_headers_visibles', None)
+            if not headers_visibles:
+                headers_visibles = [h for h in headers_obras if h not in ("id", "usuario_creador")]
+            self.view.tabla_obras.setColumnCount(len(headers_visibles))
+            aplicado = aplicar_cambios_tabla(
+                self.view.tabla_obras, cambios,
+                lambda fila: [dict(zip(headers_obras, fila)).get(header, '') for header in headers_visibles]
+            )
+            if not aplicado:
+                self.model.sincronizacion_obras.reiniciar()
+                self.cargar_datos_obras_tabla()
+                return
+            self.model.sincronizacion_obras.confirmar(cambios.hasta)
+        except Exception as e:
+            self.model.sincronizacion_obras.reiniciar()
+            self._error_cargar_datos_obras(e)
+
+    def _error_cargar_datos_obras(self, e):
+        mensaje = f"Error al cargar datos: {e}"
+        if hasattr(self.view, 'mostrar_mensaje'):
+            self.view.mostrar_mensaje(mensaje, tipo='error')
+        elif hasattr(self.view, 'label'):
+            self.view.label.setText(mensaje)
+        self._registrar_evento_auditoria("cargar_datos", mensaje, exito=False)
 
     VERIFICAR_OBRA_TITULO = "Verificar Obra"
 
@@ -737,9 +799,10 @@ class ObrasController:
         """Stub visual para evitar errores si no está implementado en la vista/test."""
         pass
 
-    def actualizar_por_pedido(self):
+    def actualizar_por_pedido(self, datos=None):
         """
         Slot para integración en tiempo real: refresca la vista y muestra feedback visual cuando se actualiza un pedido.
+        `datos` es el payload agregado de despachador_eventos (una ráfaga de pedidos refresca una sola vez).
         Cumple con los estándares de feedback visual y robustez de señales.
         """
         try:
@@ -750,7 +813,7 @@ class ObrasController:
             from core.logger import log_error
             log_error(f"Error en actualizar_por_pedido (ObrasController): {e}")
 
-    def actualizar_por_pedido_cancelado(self):
+    def actualizar_por_pedido_cancelado(self, datos=None):
         """
         Slot para integración en tiempo real: refresca la vista y muestra feedback visual cuando se cancela un pedido.
         Cumple con los estándares de feedback visual y robustez de señales.
@@ -820,29 +883,54 @@ class ObrasController:
                 estado['herrajes'] = f"Error: {e}"
         return estado
 
-    def mostrar_estado_pedidos_en_tabla(self, inventario_controller=None, vidrios_controller=None, herrajes_controller=None):
+    def obtener_estado_pedidos_por_obras(self, ids_obras, inventario_model=None, vidrios_model=None, herrajes_model=None):
+        """
+        Versión por conjuntos de obtener_estado_pedidos_por_obra: una consulta agregada por módulo
+        (obtener_estados_pedidos_por_obras) en lugar de una consulta por obra y módulo.
+        Recibe los modelos de cada módulo, no sus controllers: no hace falta construir sus vistas.
+        Retorna {id_obra: {'inventario': estado, 'vidrios': estado, 'herrajes': estado}}; las obras sin
+        pedidos quedan 'pendiente'. Si el modelo correspondiente es None, omite ese módulo.
+        """
+        estados = {id_obra: {} for id_obra in ids_obras}
+        modelos = (('inventario', inventario_model), ('vidrios', vidrios_model), ('herrajes', herrajes_model))
+        for modulo, modelo in modelos:
+            if modelo is None:
+                continue
+            try:
+                por_obra = modelo.obtener_estados_pedidos_por_obras()
+                for id_obra, estado in estados.items():
+                    estado[modulo] = por_obra.get(id_obra, 'pendiente')
+            except Exception as e:
+                for estado in estados.values():
+                    estado[modulo] = f"Error: {e}"
+        return estados
+
+    def mostrar_estado_pedidos_en_tabla(self, inventario_model=None, vidrios_model=None, herrajes_model=None):
         """
         Agrega columnas de estado de pedidos de cada módulo en la tabla de obras.
-        Llama a obtener_estado_pedidos_por_obra para cada obra y actualiza la vista.
+        Los estados de todas las obras se obtienen juntos con obtener_estado_pedidos_por_obras.
         """
         obras = self.model.obtener_datos_obras()
         if not hasattr(self.view, 'tabla_obras'):
             return
-        self.view.tabla_obras.setRowCount(len(obras))
-        for fila, obra in enumerate(obras):
+        ids_obras = []
+        for obra in obras:
             # Compatibilidad con pyodbc.Row, tuple, dict
             if hasattr(obra, 'id'):
-                id_obra = obra.id
+                ids_obras.append(obra.id)
             elif isinstance(obra, (list, tuple)):
-                id_obra = obra[0]
+                ids_obras.append(obra[0])
             elif isinstance(obra, dict):
-                id_obra = obra.get('id')
+                ids_obras.append(obra.get('id'))
             else:
                 raise TypeError("Tipo de obra no soportado para obtener id")
+        estados_por_obra = self.obtener_estado_pedidos_por_obras(ids_obras, inventario_model, vidrios_model, herrajes_model)
+        self.view.tabla_obras.setRowCount(len(obras))
+        for fila, (obra, id_obra) in enumerate(zip(obras, ids_obras)):
             # Rellenar columnas base
             for col, valor in enumerate(obra[:4]):
                 self.view.tabla_obras.setItem(fila, col, QTableWidgetItem(str(valor)))
-            estados = self.obtener_estado_pedidos_por_obra(id_obra, inventario_controller, vidrios_controller, herrajes_controller)
+            estados = estados_por_obra[id_obra]
             # Suponiendo que las columnas extra están al final
             for idx, modulo in enumerate(['inventario', 'vidrios', 'herrajes']):
                 valor = estados.get(modulo, '-')
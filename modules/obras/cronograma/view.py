@@ -1,6 +1,7 @@
-from PyQt6.QtWidgets import QWidget, QGraphicsView, QGraphicsScene, QVBoxLayout, QGraphicsRectItem, QToolTip, QTableWidget, QLabel
-from PyQt6.QtGui import QBrush, QColor, QPen, QFont, QLinearGradient, QPainter
-from PyQt6.QtCore import Qt, QRectF
+from PyQt6.QtWidgets import QWidget, QGraphicsView, QGraphicsScene, QVBoxLayout, QGraphicsRectItem, QToolTip, QTableWidget, QLabel, QStyleOptionGraphicsItem
+from PyQt6.QtGui import QBrush, QColor, QPen, QFont, QLinearGradient, QGradient, QPainter, QStaticText
+from PyQt6.QtCore import Qt, QRectF, QPointF
+from bisect import bisect_left, bisect_right
 import datetime
 from core.table_responsive_mixin import TableResponsiveMixin
 
@@ -13,12 +14,27 @@ ESTADO_COLORES = {
     "Entrega": QColor(102, 187, 106),       # Verde
 }
 
+# Geometría del Gantt en coordenadas de escena
+ROW_HEIGHT = 70
+BAR_HEIGHT = 32
+LEFT_MARGIN = 140
+TOP_MARGIN = 60
+DIAS_MINIMOS = 90
+# Separación mínima en píxeles de pantalla entre dos etiquetas del eje de fechas (nivel de detalle)
+PX_MINIMOS_ETIQUETA = 48
+# Separación mínima en píxeles de pantalla entre dos líneas de entrega
+PX_MINIMOS_LINEA = 3
+# Ancho aproximado de una etiqueta "dd/mm" en coordenadas de escena
+ANCHO_ETIQUETA = 40
+# Por debajo de este nivel de detalle las barras se pintan planas, sin degradé ni bordes redondeados
+LOD_BARRA_SIMPLE = 0.5
+
 def parse_fecha_safe(fecha):
     # Soporta datetime.date, datetime.datetime, string 'YYYY-MM-DD', None
-    if isinstance(fecha, datetime.date):
-        return fecha
     if isinstance(fecha, datetime.datetime):
         return fecha.date()
+    if isinstance(fecha, datetime.date):
+        return fecha
     if isinstance(fecha, str):
         for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%Y/%m/%d"):
             try:
@@ -27,14 +43,51 @@ def parse_fecha_safe(fecha):
                 continue
     return None
 
+def calcular_progreso(fecha_inicio, fecha_entrega, hoy):
+    """Fracción [0, 1] del plazo transcurrida a `hoy`."""
+    dias_total = max(1, (fecha_entrega - fecha_inicio).days)
+    dias_transcurridos = max(0, (hoy - fecha_inicio).days)
+    return max(0, min(1, dias_transcurridos / dias_total))
+
 class GanttBarItem(QGraphicsRectItem):
+    """
+    Barra de una obra. Fechas, progreso y pinceles se calculan en actualizar() (una vez por cambio de datos)
+    y reubicar() sólo cambia la geometría, así paint() sólo dibuja.
+    """
     def __init__(self, obra, rect, fecha_min, parent=None):
         super().__init__(rect, parent)
-        self.obra = obra
-        self.fecha_min = fecha_min
         self.setAcceptHoverEvents(True)
         self.setZValue(1)
         self.hovered = False
+        self.actualizar(obra, rect, fecha_min)
+
+    def actualizar(self, obra, rect, fecha_min, hoy=None):
+        """Actualiza la barra en el lugar con los datos ya normalizados por CronogramaView.set_obras."""
+        hoy = hoy or datetime.date.today()
+        self.obra = obra
+        self.fecha_min = fecha_min
+        self.fecha_inicio = parse_fecha_safe(obra.get('fecha'))
+        self.fecha_entrega = parse_fecha_safe(obra.get('fecha_entrega'))
+        if self.fecha_inicio and self.fecha_entrega:
+            self.progreso = calcular_progreso(self.fecha_inicio, self.fecha_entrega, hoy)
+            self.en_curso = self.fecha_inicio <= hoy <= self.fecha_entrega
+        else:
+            self.progreso = None
+            self.en_curso = False
+        self.color_estado = ESTADO_COLORES.get(obra.get('estado', ''), QColor(120, 120, 120))
+        self._pen_borde = QPen(self.color_estado.darker(150), 2)
+        # Degradé relativo a la barra: sigue sirviendo cuando el zoom cambia el rect
+        grad = QLinearGradient(0, 0, 1, 0)
+        grad.setCoordinateMode(QGradient.CoordinateMode.ObjectBoundingMode)
+        grad.setColorAt(0, self.color_estado.lighter(120))
+        grad.setColorAt(1, self.color_estado.darker(120))
+        self._brush_degrade = QBrush(grad)
+        self.reubicar(rect)
+
+    def reubicar(self, rect):
+        """Mueve o estira la barra (zoom o reordenamiento) sin recalcular fechas ni avance."""
+        if rect != self.rect():
+            self.setRect(rect)
 
     def hoverEnterEvent(self, event):
         self.hovered = True
@@ -49,46 +102,140 @@ class GanttBarItem(QGraphicsRectItem):
         super().hoverLeaveEvent(event)
 
     def paint(self, painter, option, widget=None):
+        if painter is None:
+            return
         rect = self.rect()
-        color_estado = ESTADO_COLORES.get(self.obra.get('estado', ''), QColor(120, 120, 120))
-        grad = QLinearGradient(rect.x(), rect.y(), rect.x() + rect.width(), rect.y())
-        grad.setColorAt(0, color_estado.lighter(120))
-        grad.setColorAt(1, color_estado.darker(120))
-        brush = QBrush(grad)
-        if painter is not None:
-            painter.setBrush(brush)
-            pen = QPen(color_estado.darker(150), 2)
-            painter.setPen(pen)
-            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-            painter.drawRoundedRect(rect, 8, 8)
-        hoy = datetime.date.today()
-        fecha_inicio = parse_fecha_safe(self.obra.get('fecha'))
-        fecha_entrega = parse_fecha_safe(self.obra.get('fecha_entrega'))
-        if not fecha_inicio or not fecha_entrega:
+        lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        if lod < LOD_BARRA_SIMPLE:
+            # Muy alejado: una barra plana con el avance alcanza y es mucho más barata de pintar
+            painter.fillRect(rect, self.color_estado)
+            if self.progreso:
+                painter.fillRect(QRectF(rect.x(), rect.y(), rect.width() * self.progreso, rect.height()), QColor(60, 180, 75, 180))
+            return
+        painter.setBrush(self._brush_degrade)
+        painter.setPen(self._pen_borde)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.drawRoundedRect(rect, 8, 8)
+        if self.progreso is None:
             return
-        dias_total = max(1, (fecha_entrega - fecha_inicio).days)
-        dias_transcurridos = max(0, (hoy - fecha_inicio).days)
-        progreso = max(0, min(1, dias_transcurridos / dias_total)) if dias_total > 0 else 1
-        ancho = int(rect.width() * progreso)
-        if ancho > 0 and painter is not None:
+        ancho = int(rect.width() * self.progreso)
+        if ancho > 0:
             painter.save()
             painter.setBrush(QColor(60, 180, 75, 180))
             painter.setPen(Qt.PenStyle.NoPen)
             painter.drawRoundedRect(int(rect.x()), int(rect.y()), ancho, int(rect.height()), 8, 8)
             painter.restore()
-        if self.hovered and painter is not None:
+        if self.hovered:
             painter.save()
             painter.setBrush(QColor(60, 180, 75, 60))
             painter.setPen(Qt.PenStyle.NoPen)
             painter.drawRoundedRect(rect, 8, 8)
             painter.restore()
-        if fecha_inicio <= hoy <= fecha_entrega and painter is not None:
-            x_hoy = int(rect.x() + rect.width() * progreso)
+        if self.en_curso:
+            x_hoy = int(rect.x() + rect.width() * self.progreso)
             painter.save()
             painter.setPen(QPen(QColor(230, 57, 53), 2, Qt.PenStyle.DashLine))
             painter.drawLine(x_hoy, int(rect.y()), x_hoy, int(rect.y() + rect.height()))
             painter.restore()
 
+class GanttGraphicsView(QGraphicsView):
+    """
+    Vista del Gantt que dibuja el eje de fechas y la grilla en drawBackground, sólo para el rango visible.
+    Las etiquetas se espacian según el zoom (nivel de detalle) y sus QStaticText quedan en caché por fecha.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.fecha_min = None
+        self.dias_totales = 0
+        self.day_width = 1
+        self.alto_filas = 0
+        self.fechas_entrega = []
+        self._fechas_entrega_set = set()
+        self._etiquetas = {}
+        self._font = QFont("Segoe UI", 11)
+        self._font_bold = QFont("Segoe UI", 11)
+        self._font_bold.setBold(True)
+        self._pen_semana = QPen(QColor(220, 220, 220), 1, Qt.PenStyle.DashLine)
+        self._pen_entrega = QPen(QColor(200, 40, 40), 2, Qt.PenStyle.SolidLine)
+        self.setCacheMode(QGraphicsView.CacheModeFlag.CacheBackground)
+        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.SmartViewportUpdate)
+        self.setOptimizationFlag(QGraphicsView.OptimizationFlag.DontAdjustForAntialiasing, True)
+
+    def configurar_eje(self, fecha_min, dias_totales, day_width, alto_filas, fechas_entrega):
+        """Datos del eje; se llama una vez por cambio de datos o de zoom."""
+        self.fecha_min = fecha_min
+        self.dias_totales = dias_totales
+        self.day_width = day_width
+        self.alto_filas = alto_filas
+        self.fechas_entrega = sorted((fecha - fecha_min).days for fecha in fechas_entrega) if fecha_min else []
+        self._fechas_entrega_set = set(fechas_entrega)
+        self.resetCachedContent()
+
+    def paso_etiquetas(self):
+        """Cada cuántos días va una etiqueta: múltiplo de una semana que deje PX_MINIMOS_ETIQUETA en pantalla."""
+        px_por_semana = 7 * self.day_width * max(self.transform().m11(), 1e-6)
+        semanas = 1
+        while px_por_semana * semanas < PX_MINIMOS_ETIQUETA:
+            semanas *= 2
+        return 7 * semanas
+
+    def dias_visibles(self, rect):
+        """Rango [desde, hasta) de días del eje que caen en `rect` (coordenadas de escena)."""
+        # Se incluye el ancho de una etiqueta a la izquierda: la de un día apenas fuera del rect puede asomar
+        desde = int((rect.left() - LEFT_MARGIN - ANCHO_ETIQUETA) // self.day_width)
+        hasta = int((rect.right() - LEFT_MARGIN) // self.day_width) + 1
+        return max(0, desde), min(self.dias_totales, hasta)
+
+    def _etiqueta(self, fecha):
+        texto = self._etiquetas.get(fecha)
+        if texto is None:
+            texto = QStaticText(fecha.strftime("%d/%m"))
+            texto.setPerformanceHint(QStaticText.PerformanceHint.AggressiveCaching)
+            self._etiquetas[fecha] = texto
+        return texto
+
+    def drawBackground(self, painter, rect):
+        super().drawBackground(painter, rect)
+        if self.fecha_min is None or painter is None:
+            return
+        desde, hasta = self.dias_visibles(rect)
+        if desde >= hasta:
+            return
+        y_fin = TOP_MARGIN + self.alto_filas
+        paso = self.paso_etiquetas()
+        # Líneas por semana (o cada `paso` días si la grilla semanal quedaría demasiado densa)
+        paso_lineas = 7 if paso == 7 else paso
+        primero = -(-desde // paso_lineas) * paso_lineas
+        painter.setPen(self._pen_semana)
+        for d in range(primero, hasta, paso_lineas):
+            x = LEFT_MARGIN + d * self.day_width
+            painter.drawLine(QPointF(x, TOP_MARGIN), QPointF(x, y_fin))
+        primero = -(-desde // paso) * paso
+        painter.setPen(QColor(120, 120, 120))
+        painter.setFont(self._font)
+        for d in range(primero, hasta, paso):
+            fecha = self.fecha_min + datetime.timedelta(days=d)
+            if fecha not in self._fechas_entrega_set:
+                painter.drawStaticText(QPointF(LEFT_MARGIN + d * self.day_width - 18, 10), self._etiqueta(fecha))
+        # Marcas de fecha de entrega visibles (bisect sobre la lista ordenada)
+        # Con el zoom alejado varias entregas caen en el mismo píxel o solapan sus etiquetas: se dibuja una sola
+        entregas = self.fechas_entrega[bisect_left(self.fechas_entrega, desde):bisect_right(self.fechas_entrega, hasta)]
+        escala = max(self.transform().m11(), 1e-6)
+        separacion_linea = PX_MINIMOS_LINEA / escala
+        separacion_etiqueta = PX_MINIMOS_ETIQUETA / escala
+        ultima_linea = ultima_etiqueta = float("-inf")
+        painter.setFont(self._font_bold)
+        for dias in entregas:
+            x = LEFT_MARGIN + dias * self.day_width
+            if x - ultima_linea >= separacion_linea:
+                painter.setPen(self._pen_entrega)
+                painter.drawLine(QPointF(x, TOP_MARGIN), QPointF(x, y_fin))
+                ultima_linea = x
+            if x - ultima_etiqueta >= separacion_etiqueta:
+                painter.setPen(QColor(200, 40, 40))
+                painter.drawStaticText(QPointF(x - 18, 10), self._etiqueta(self.fecha_min + datetime.timedelta(days=dias)))
+                ultima_etiqueta = x
+
 class CronogramaView(QWidget, TableResponsiveMixin):
     def __init__(self, obras=None, parent=None):
         super().__init__(parent)
@@ -98,15 +245,23 @@ class CronogramaView(QWidget, TableResponsiveMixin):
         self.main_layout = QVBoxLayout(self)
         self.main_layout.setContentsMargins(16, 8, 16, 8)
         self.main_layout.setSpacing(4)
-        self.gantt_view = QGraphicsView()
+        self.gantt_view = GanttGraphicsView()
         self.gantt_view.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
         self.gantt_view.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
+        # Una sola escena para toda la vida de la vista: set_obras y el zoom la actualizan en el lugar
+        self.scene = QGraphicsScene(self)
+        self.gantt_view.setScene(self.scene)
         self.main_layout.addWidget(self.gantt_view)
         self.setLayout(self.main_layout)
         self.tabla_cronograma = QTableWidget()
         self.make_table_responsive(self.tabla_cronograma)
         self.label = QLabel()
         self.obras = []
+        # {clave de obra: (barra, texto del nombre, texto del estado)}
+        self._filas = {}
+        self._fecha_min = None
+        self._dias_totales = 0
+        self._font = QFont("Segoe UI", 11)
         self._zoom_factor = 0.8
         self._min_day_width = 4
         self._max_day_width = 40
@@ -116,17 +271,20 @@ class CronogramaView(QWidget, TableResponsiveMixin):
     def zoom_in(self):
         if self._base_day_width * self._zoom_factor < self._max_day_width:
             self._zoom_factor *= 1.15
-            self._draw_gantt()
+            self._layout_gantt()
 
     def zoom_out(self):
         if self._base_day_width * self._zoom_factor > self._min_day_width:
             self._zoom_factor /= 1.15
-            self._draw_gantt()
+            self._layout_gantt()
 
     def _apply_zoom(self):
         self.gantt_view.resetTransform()
         self.gantt_view.scale(self._zoom_factor, self._zoom_factor)
 
+    def _day_width(self):
+        return max(self._min_day_width, min(self._base_day_width * self._zoom_factor, self._max_day_width))
+
     def set_obras(self, obras):
         # Robustez: acepta lista de dicts, ignora obras sin fechas válidas
         self.obras = []
@@ -165,98 +323,86 @@ class CronogramaView(QWidget, TableResponsiveMixin):
     def mostrar_error(self, texto):
         self.mostrar_mensaje(texto, tipo="error")
 
+    @staticmethod
+    def _clave(obra, idx):
+        # Las obras sin id (datos de prueba) se identifican por su posición
+        return obra['id'] if obra.get('id') is not None else ('fila', idx)
+
     def _draw_gantt(self):
-        scene = QGraphicsScene(self)
-        if not self.obras:
-            self.gantt_view.setScene(scene)
-            return
-        fechas_inicio = [o['fecha'] for o in self.obras]
-        fechas_fin = [o['fecha_entrega'] for o in self.obras]
-        fecha_min = min(fechas_inicio)
-        fecha_max = max(fechas_fin)
-        dias_totales = (fecha_max - fecha_min).days + 1
-        if dias_totales < 90:
-            dias_totales = 90
-            fecha_max = fecha_min + datetime.timedelta(days=89)
-        row_height = 70
-        bar_height = 32
-        left_margin = 140
-        top_margin = 60
-        day_width = max(self._min_day_width, min(self._base_day_width * self._zoom_factor, self._max_day_width))
-        font = QFont("Segoe UI", 11)
-        font_bold = QFont("Segoe UI", 11)
-        font_bold.setBold(True)
-        fechas_entrega_set = set(o['fecha_entrega'] for o in self.obras if o['fecha_entrega'])
-        # Líneas verticales por semana
-        for d in range(0, dias_totales, 7):
-            x = left_margin + d * day_width
-            scene.addLine(x, top_margin, x, top_margin + len(self.obras)*row_height, QPen(QColor(220,220,220), 1, Qt.PenStyle.DashLine))
-            fecha = fecha_min + datetime.timedelta(days=d)
-            if fecha in fechas_entrega_set:
-                text = scene.addText(fecha.strftime("%d/%m"), font_bold)
-                if text is not None:
-                    text.setDefaultTextColor(QColor(200, 40, 40))
-                    text.setPos(x-18, 10)
-            else:
-                text = scene.addText(fecha.strftime("%d/%m"), font)
-                if text is not None:
-                    text.setDefaultTextColor(QColor(120,120,120))
-                    text.setPos(x-18, 10)
-        # Marcas visuales para cada fecha de entrega
-        for fecha_entrega in fechas_entrega_set:
-            dias = (fecha_entrega - fecha_min).days
-            if 0 <= dias < dias_totales:
-                x = left_margin + dias * day_width
-                scene.addLine(x, top_margin, x, top_margin + len(self.obras)*row_height, QPen(QColor(200,40,40), 2, Qt.PenStyle.SolidLine))
-                text = scene.addText(fecha_entrega.strftime("%d/%m"), font_bold)
-                if text is not None:
-                    text.setDefaultTextColor(QColor(200, 40, 40))
-                    text.setPos(x-18, 10)
+        """
+        Sincroniza la escena con self.obras: actualiza en el lugar las filas de obras que siguen, agrega las
+        nuevas y quita las que ya no están. Textos, fechas y avance se calculan acá, una vez por cambio de datos.
+        """
+        if self.obras:
+            self._fecha_min = min(o['fecha'] for o in self.obras)
+            fecha_max = max(o['fecha_entrega'] for o in self.obras)
+            self._dias_totales = max(DIAS_MINIMOS, (fecha_max - self._fecha_min).days + 1)
+        else:
+            self._fecha_min, self._dias_totales = None, 0
         hoy = datetime.date.today()
+        vigentes = {}
         for idx, obra in enumerate(self.obras):
-            y = top_margin + idx * row_height
+            clave = self._clave(obra, idx)
+            fila = self._filas.pop(clave, None) or self._crear_fila(obra)
+            barra, nombre_item, estado_item = fila
             nombre = obra.get('nombre', '')
             cliente = obra.get('cliente', '')
-            fecha = obra.get('fecha')
-            fecha_entrega = obra.get('fecha_entrega')
+            fecha = obra['fecha']
+            fecha_entrega = obra['fecha_entrega']
             estado = obra.get('estado', '')
             nombre_html = f"""
                 <div style='font-size:15px;font-weight:bold;color:#2563eb'>{nombre}</div>
                 <div style='font-size:12px;color:#555'>{cliente}</div>
                 <div style='font-size:11px;color:#888'>Medición: {fecha.strftime('%d/%m/%Y')} | Entrega: <b style='color:#e53935'>{fecha_entrega.strftime('%d/%m/%Y')}</b></div>
             """
-            text_widget = scene.addText(nombre, font)
-            if text_widget is not None:
-                # setHtml solo disponible en PyQt6 >= 6.4, fallback seguro
-                if hasattr(text_widget, "setHtml"):
-                    try:
-                        text_widget.setHtml(nombre_html)
-                    except Exception:
-                        text_widget.setPlainText(f"{nombre}\n{cliente}\nMedición: {fecha.strftime('%d/%m/%Y')} | Entrega: {fecha_entrega.strftime('%d/%m/%Y')}")
-                else:
-                    text_widget.setPlainText(f"{nombre}\n{cliente}\nMedición: {fecha.strftime('%d/%m/%Y')} | Entrega: {fecha_entrega.strftime('%d/%m/%Y')}")
-                text_widget.setPos(10, y+row_height/2-18)
-            inicio = (fecha - fecha_min).days
-            fin = (fecha_entrega - fecha_min).days
-            x1 = left_margin + inicio * day_width
-            x2 = left_margin + fin * day_width
-            color = ESTADO_COLORES.get(estado, QColor(200,200,200))
-            rect = QRectF(x1, y+10, max(10, x2-x1), bar_height)  # Asegura ancho mínimo
-            bar = GanttBarItem(obra, rect, fecha_min)
-            bar.setBrush(QBrush(color))
-            bar.setPen(QPen(Qt.GlobalColor.transparent))
-            scene.addItem(bar)
-            label = f"<span style='font-weight:bold;color:#2563eb'>{estado}</span>"
-            t = scene.addText(cliente + ' - ' + estado, font)
-            if t is not None:
-                if hasattr(t, "setHtml"):
-                    try:
-                        t.setHtml(label)
-                    except Exception:
-                        t.setPlainText(estado)
-                else:
-                    t.setPlainText(estado)
-                t.setPos(x1+8, y+14)
-        scene.setSceneRect(0, 0, left_margin + dias_totales*day_width + 100, top_margin + len(self.obras)*row_height + 60)
-        self.gantt_view.setScene(scene)
+            self._set_html(nombre_item, nombre_html, f"{nombre}\n{cliente}\nMedición: {fecha.strftime('%d/%m/%Y')} | Entrega: {fecha_entrega.strftime('%d/%m/%Y')}")
+            self._set_html(estado_item, f"<span style='font-weight:bold;color:#2563eb'>{estado}</span>", estado)
+            nombre_item.setPos(10, TOP_MARGIN + idx * ROW_HEIGHT + ROW_HEIGHT / 2 - 18)
+            barra.actualizar(obra, barra.rect(), self._fecha_min, hoy)
+            barra.setBrush(QBrush(barra.color_estado))
+            vigentes[clave] = fila
+        for barra, nombre_item, estado_item in self._filas.values():
+            for item in (barra, nombre_item, estado_item):
+                self.scene.removeItem(item)
+        self._filas = vigentes
+        self._layout_gantt()
+
+    def _crear_fila(self, obra):
+        nombre = self.scene.addText("", self._font)
+        estado = self.scene.addText("", self._font)
+        estado.setZValue(2)
+        barra = GanttBarItem(obra, QRectF(), self._fecha_min)
+        barra.setPen(QPen(Qt.GlobalColor.transparent))
+        self.scene.addItem(barra)
+        return barra, nombre, estado
+
+    @staticmethod
+    def _set_html(text_widget, html, plano):
+        if text_widget.data(0) == html:
+            return
+        # setHtml solo disponible en PyQt6 >= 6.4, fallback seguro
+        if hasattr(text_widget, "setHtml"):
+            try:
+                text_widget.setHtml(html)
+            except Exception:
+                text_widget.setPlainText(plano)
+        else:
+            text_widget.setPlainText(plano)
+        # El html vigente queda guardado para no volver a maquetar el texto si no cambió
+        text_widget.setData(0, html)
+
+    def _layout_gantt(self):
+        """Posiciona barras y textos para el zoom actual (sin crear ítems ni tocar textos) y configura el eje."""
+        day_width = self._day_width()
+        for idx, obra in enumerate(self.obras):
+            barra, _nombre_item, estado_item = self._filas[self._clave(obra, idx)]
+            y = TOP_MARGIN + idx * ROW_HEIGHT
+            x1 = LEFT_MARGIN + (obra['fecha'] - self._fecha_min).days * day_width
+            x2 = LEFT_MARGIN + (obra['fecha_entrega'] - self._fecha_min).days * day_width
+            barra.reubicar(QRectF(x1, y + 10, max(10, x2 - x1), BAR_HEIGHT))  # Asegura ancho mínimo
+            estado_item.setPos(x1 + 8, y + 14)
+        alto_filas = len(self.obras) * ROW_HEIGHT
+        fechas_entrega = set(o['fecha_entrega'] for o in self.obras)
+        self.gantt_view.configurar_eje(self._fecha_min, self._dias_totales, day_width, alto_filas, fechas_entrega)
+        self.scene.setSceneRect(0, 0, LEFT_MARGIN + self._dias_totales * day_width + 100, TOP_MARGIN + alto_filas + 60)
         self._apply_zoom()
@@ -63,7 +63,9 @@ Modelo de Obras que utiliza ObrasDatabaseConnection (hereda de BaseDatabaseConne
 
 import pandas as pd
 from fpdf import FPDF
+from core.cache import cache_lectura, clave_base
 from core.database import ObrasDatabaseConnection
+from core.delta_sync import SincronizadorDelta
 from core.logger import Logger
 
 CLIENTE_SOLO_LETRAS_NUMEROS_ESPACIOS = "Cliente solo puede contener letras, números y espacios"
@@ -73,6 +75,12 @@ FECHA_ENTREGA_ANTERIOR_MEDICION = "La fecha de entrega no puede ser anterior a l
 FECHAS_INVALIDAS = "Fechas inválidas"
 OBRA_DUPLICADA = "Ya existe una obra con ese nombre y cliente."
 
+# Columnas de la tabla principal de obras (obtener_datos_obras y sincronización delta)
+COLUMNAS_DATOS_OBRAS = "id, nombre, cliente, estado, fecha, fecha_entrega"
+
+# Lista de obras cacheada (core/cache.py); el alta, la edición y la baja la invalidan
+CACHE_OBRAS = cache_lectura("obras", invalidar_con=("obra_agregada", "pedido_actualizado", "vidrio_asignado"))
+
 class OptimisticLockError(Exception):
     """Excepción para conflictos de bloqueo optimista en obras."""
     pass
@@ -85,17 +93,31 @@ class ObrasModel:
     """
     def __init__(self, db_connection=None):
         self.db_connection = db_connection or ObrasDatabaseConnection()
+        # Marca de rowversion de la tabla de obras ya mostrada (core/delta_sync.py)
+        self.sincronizacion_obras = SincronizadorDelta(self.db_connection, "obras")
 
     def obtener_datos_obras(self):
-        query = "SELECT id, nombre, cliente, estado, fecha, fecha_entrega FROM obras"
-        resultado = self.db_connection.ejecutar_query(query)
-        return resultado if resultado else []
+        query = f"SELECT {COLUMNAS_DATOS_OBRAS} FROM obras"
+        resultado = CACHE_OBRAS.obtener((clave_base(self.db_connection), "datos"), lambda: self.db_connection.ejecutar_query(query))
+        return list(resultado) if resultado else []
+
+    def obtener_cambios_obras(self):
+        """Obras nuevas/modificadas y bajas desde la última marca confirmada (todas si no hay marca)."""
+        return self.sincronizacion_obras.leer_cambios(COLUMNAS_DATOS_OBRAS)
+
+    def _invalidar_cache_obras(self):
+        CACHE_OBRAS.invalidar((clave_base(self.db_connection), "datos"))
 
     def obtener_obras(self):
         query = "SELECT * FROM obras"
         resultado = self.db_connection.ejecutar_query(query)
         return resultado if resultado else []
 
+    def obtener_todas_las_obras(self):
+        """Todas las obras como dicts {'id', 'nombre', 'cliente', 'estado', 'fecha', 'fecha_entrega'}."""
+        columnas = ("id", "nombre", "cliente", "estado", "fecha", "fecha_entrega")
+        return [dict(zip(columnas, fila)) for fila in self.obtener_datos_obras()]
+
     def agregar_obra(self, datos):
         # Validar datos usando helper para reducir complejidad
         self._validar_datos_agregar_obra(datos)
@@ -107,6 +129,7 @@ class ObrasModel:
                 ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """
             self.db_connection.ejecutar_query(query, datos)
+            self._invalidar_cache_obras()
             # Recuperar el id de la obra recién insertada
             res = self.db_connection.ejecutar_query("SELECT last_insert_rowid()")
             return res[0][0] if res else None
@@ -162,6 +185,7 @@ class ObrasModel:
     def actualizar_estado_obra(self, id_obra, nuevo_estado):
         query = "UPDATE obras SET estado = ? WHERE id = ?"
         self.db_connection.ejecutar_query(query, (nuevo_estado, id_obra))
+        self._invalidar_cache_obras()
 
     def obtener_materiales_por_obra(self, id_obra):
         try:
@@ -278,6 +302,7 @@ class ObrasModel:
         else:
             query = "UPDATE obras SET nombre = ?, cliente = ?, estado = ? WHERE id = ?"
             self.db_connection.ejecutar_query(query, (nombre, cliente, estado, id_obra))
+        self._invalidar_cache_obras()
 
     def actualizar_obra_completa(self, id_obra, nombre, cliente, estado, fecha_compra, cantidad_aberturas, pago_completo, pago_porcentaje, monto_usd, monto_ars, fecha_medicion, dias_entrega, fecha_entrega):
         query = """
@@ -286,6 +311,7 @@ class ObrasModel:
         self.db_connection.ejecutar_query(query, (
             nombre, cliente, estado, fecha_compra, cantidad_aberturas, pago_completo, pago_porcentaje, monto_usd, monto_ars, fecha_medicion, dias_entrega, fecha_entrega, id_obra
         ))
+        self._invalidar_cache_obras()
 
     def obtener_headers_obras(self):
         """
@@ -293,13 +319,12 @@ class ObrasModel:
         Cumple el MUST de sincronización automática de columnas.
         """
         try:
-            self.db_connection.conectar()
-            if not self.db_connection.connection:
-                raise RuntimeError("No se pudo establecer la conexión para obtener los headers.")
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute("SELECT * FROM obras WHERE 1=0")
-            headers = [column[0] for column in cursor.description]
-            cursor.close()
+            # Conexión prestada por el pool sólo para esta consulta (puede correr en un hilo de core.workers)
+            with self.db_connection.pool.conexion() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT * FROM obras WHERE 1=0")
+                headers = [column[0] for column in cursor.description]
+                cursor.close()
             return headers
         except Exception:
             return ["id", "nombre", "cliente", "estado", "fecha", "fecha_entrega"]
@@ -334,6 +359,7 @@ class ObrasModel:
         rows_affected = self.db_connection.ejecutar_query_return_rowcount(query, valores)
         if rows_affected == 0:
             raise OptimisticLockError("La obra fue modificada por otro usuario (conflicto de rowversion).")
+        self._invalidar_cache_obras()
         # Retornar el nuevo rowversion
         res = self.db_connection.ejecutar_query("SELECT rowversion FROM obras WHERE id = ?", (id_obra,))
         return res[0][0] if res else None
@@ -393,6 +419,7 @@ class ObrasModel:
         """Elimina la obra con el id dado. Retorna True si se eliminó, False si no existe."""
         query = "DELETE FROM obras WHERE id = ?"
         rows = self.db_connection.ejecutar_query_return_rowcount(query, (id_obra,))
+        self._invalidar_cache_obras()
         return rows > 0
 
     def validar_datos_obra(self, datos):
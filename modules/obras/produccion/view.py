@@ -7,9 +7,8 @@ from PyQt6.QtGui import QIcon, QColor, QPixmap, QPainter, QAction
 from PyQt6.QtCore import Qt, QSize, QPoint
 from PyQt6.QtPrintSupport import QPrinter
 from functools import partial
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
 from core.ui_components import estilizar_boton_icono, aplicar_qss_global_y_tema
+from core.graficos import GraficoCacheado
 
 class ProduccionView(QWidget):
     def __init__(self):
@@ -132,12 +131,12 @@ class ProduccionView(QWidget):
         # EXCEPCIÓN: Si algún botón requiere texto visible por UX, debe estar documentado aquí y en docs/estandares_visuales.md
 
     def agregar_grafico(self, datos):
-        figura = Figure()
-        canvas = FigureCanvas(figura)
-        ax = figura.add_subplot(111)
-        ax.bar([d[0] for d in datos], [d[1] for d in datos])
-        ax.set_title("Eficiencia por Etapa")
-        self.main_layout.addWidget(canvas)
+        # Un solo canvas para toda la vida de la vista: las llamadas siguientes actualizan las barras
+        if not hasattr(self, 'grafico_eficiencia'):
+            self.grafico_eficiencia = GraficoCacheado()
+            self.main_layout.addWidget(self.grafico_eficiencia.canvas)
+        datos = [(str(d[0]), d[1]) for d in datos]
+        self.grafico_eficiencia.mostrar(tuple(datos), "Eficiencia por Etapa", [d[0] for d in datos], [("Eficiencia", [d[1] for d in datos])])
 
     def inicializar_kanban(self):
         self.kanban_scroll = QScrollArea()
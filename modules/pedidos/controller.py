@@ -111,6 +111,24 @@ class PedidosController:
                 self.view.mostrar_feedback(f"Error al generar pedido: {e}", tipo="error")
             raise
 
+    @permiso_auditoria_pedidos('crear')
+    def generar_pedidos_consolidados(self, ids_obras=None):
+        """
+        Genera un pedido por proveedor con los faltantes netos de todas las obras abiertas (MRP consolidado,
+        modules/pedidos/mrp.py) en lugar de un pedido por obra. Feedback visual y refresco de la vista.
+        """
+        try:
+            usuario = self.usuario_actual.get('username', 'desconocido') if self.usuario_actual else None
+            pedidos = self.model.generar_pedidos_consolidados(ids_obras, usuario=usuario, view=self.view)
+            if hasattr(self.view, 'mostrar_feedback'):
+                self.view.mostrar_feedback(f"Pedidos consolidados generados: {len(pedidos)}", tipo="exito")
+            self.cargar_pedidos()
+            return pedidos
+        except Exception as e:
+            if hasattr(self.view, 'mostrar_feedback'):
+                self.view.mostrar_feedback(f"Error al generar pedidos consolidados: {e}", tipo="error")
+            raise
+
     @permiso_auditoria_pedidos('editar')
     def recibir_pedido(self, id_pedido):
         """
@@ -142,8 +160,8 @@ class PedidosController:
         self.view.abrir_dialogo_recepcion_pedido(pedido_id, resumen_items, self)
 
     # Ejemplo de integración cruzada para desarrolladores de UI:
-    # Suscribirse a event_bus.pedido_actualizado en Inventario/Obras:
-    # from core.event_bus import event_bus
-    # event_bus.pedido_actualizado.connect(lambda datos: self.actualizar_por_pedido(datos))
+    # Suscribirse a pedido_actualizado en Inventario/Obras (las ráfagas llegan agrupadas, con datos['ids']):
+    # from core.event_bus import despachador_eventos
+    # despachador_eventos.suscribir('pedido_actualizado', self.actualizar_por_pedido)
     # En el slot, refrescar la vista y mostrar feedback visual inmediato.
     # Ver docs/flujo_obras_material_vidrios.md y docs/estandares_feedback.md
@@ -1,5 +1,6 @@
 import logging
 from core.database import PedidosDatabaseConnection
+from core.stock_ledger import aplicar_movimientos_por_tipo
 
 class PedidosModel:
     """
@@ -97,6 +98,51 @@ class PedidosModel:
         faltantes, total_estimado = self._agregar_faltantes(vidrios, "vidrio", faltantes, total_estimado)
         return faltantes, total_estimado
 
+    def planificar_compras(self, ids_obras=None, db_obras=None):
+        """
+        Propuestas de compra consolidadas por proveedor para todas las obras abiertas (o `ids_obras`),
+        calculadas en una sola pasada por modules/pedidos/mrp.py. No escribe nada.
+        """
+        from modules.pedidos.mrp import calcular_plan_compras
+        return calcular_plan_compras(self.db, ids_obras=ids_obras, db_obras=db_obras)
+
+    def generar_pedidos_consolidados(self, ids_obras=None, db_obras=None, usuario=None, view=None):
+        """
+        Emite un pedido por proveedor con los faltantes netos de todas las obras (ver planificar_compras),
+        todo en una transacción. Las líneas quedan sin obra (id_obra NULL): cubren a varias a la vez.
+        Devuelve {proveedor: id_pedido}.
+        """
+        import datetime
+        from modules.auditoria.helpers import _registrar_evento_auditoria
+
+        try:
+            propuestas = self.planificar_compras(ids_obras, db_obras)
+            if not propuestas:
+                raise ValueError("No hay faltantes para pedir en las obras abiertas.")
+            fecha_emision = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            pedidos = {}
+            with self.db.transaction(timeout=30, retries=2):
+                for propuesta in propuestas:
+                    id_pedido = self._insertar_pedido(None, fecha_emision, propuesta.total)
+                    faltantes = [(linea.tipo, linea.id_item, linea.cantidad, linea.precio_unitario) for linea in propuesta.lineas]
+                    self._insertar_items_pedido(id_pedido, None, faltantes)
+                    pedidos[propuesta.proveedor] = id_pedido
+                detalle = ", ".join(f"{proveedor}: {id_pedido}" for proveedor, id_pedido in pedidos.items())
+                _registrar_evento_auditoria(usuario, "Pedidos", f"Generó pedidos consolidados por proveedor ({detalle})")
+
+            self.logger.info(f"Pedidos consolidados generados: {pedidos}")
+            if view and hasattr(view, 'mostrar_mensaje'):
+                view.mostrar_mensaje(f"Se generaron {len(pedidos)} pedidos consolidados por proveedor", tipo='success')
+            for id_pedido in pedidos.values():
+                self._emitir_evento_pedido_actualizado(id_pedido, None, usuario)
+            return pedidos
+        except Exception as e:
+            self.logger.warning(f"Error al generar pedidos consolidados: {e}")
+            _registrar_evento_auditoria(usuario, "Pedidos", f"Error al generar pedidos consolidados: {e}")
+            if view and hasattr(view, 'mostrar_mensaje'):
+                view.mostrar_mensaje(f"Error al generar pedidos consolidados: {e}", tipo='error')
+            raise
+
     def _agregar_faltantes(self, items, tipo, faltantes, total_estimado):
         for id_material, cant_res, stock, precio in items:
             faltante = cant_res - stock
@@ -123,11 +169,10 @@ class PedidosModel:
         return id_pedido
 
     def _insertar_items_pedido(self, id_pedido, id_obra, faltantes):
-        for tipo, id_material, cantidad, _ in faltantes:
-            self.db.ejecutar_query(
-                "INSERT INTO pedidos_por_obra (id_pedido, id_obra, id_item, tipo_item, cantidad_requerida) VALUES (?, ?, ?, ?, ?)",
-                (id_pedido, id_obra, id_material, tipo, cantidad)
-            )
+        self.db.ejecutar_lote(
+            "INSERT INTO pedidos_por_obra (id_pedido, id_obra, id_item, tipo_item, cantidad_requerida) VALUES (?, ?, ?, ?, ?)",
+            [(id_pedido, id_obra, id_material, tipo, cantidad) for tipo, id_material, cantidad, _ in faltantes]
+        )
 
     def _emitir_evento_pedido_actualizado(self, id_pedido, id_obra, usuario):
         try:
@@ -141,7 +186,6 @@ class PedidosModel:
         Recibe un pedido, actualiza stock, movimientos y auditoría (helper global).
         Feedback visual y logging robusto. Cumple estándares de seguridad, feedback, logging y auditoría.
         """
-        import datetime
         from modules.auditoria.helpers import _registrar_evento_auditoria
         try:
             pedido = self.db.ejecutar_query("SELECT estado FROM pedidos WHERE id_pedido=?", (id_pedido,))
@@ -151,11 +195,8 @@ class PedidosModel:
             if estado == "Recibido":
                 raise ValueError("Pedido ya recibido")
             items = self.db.ejecutar_query("SELECT tipo_item, id_item, cantidad_requerida FROM pedidos_por_obra WHERE id_pedido=?", (id_pedido,)) or []
-            fecha = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            with self.db.transaction(timeout=30, retries=2):
-                self.db.ejecutar_query("UPDATE pedidos SET estado='Recibido' WHERE id_pedido=?", (id_pedido,))
-                self._actualizar_stock_y_movimientos(items, fecha, usuario)
-                _registrar_evento_auditoria(usuario, "Pedidos", f"Recibió pedido {id_pedido}")
+            self._actualizar_stock_y_movimientos(items, usuario, [("UPDATE pedidos SET estado='Recibido' WHERE id_pedido=?", [(id_pedido,)])])
+            _registrar_evento_auditoria(usuario, "Pedidos", f"Recibió pedido {id_pedido}")
             self.logger.info(f"Pedido recibido correctamente (ID: {id_pedido})")
             if view and hasattr(view, 'mostrar_mensaje'):
                 view.mostrar_mensaje(f"Pedido recibido correctamente (ID: {id_pedido})", tipo='success')
@@ -168,17 +209,21 @@ class PedidosModel:
                 view.mostrar_mensaje(f"Error al recibir pedido: {e}", tipo='error')
             raise
 
-    def _actualizar_stock_y_movimientos(self, items, fecha, usuario):
+    # tipo_item de pedidos_por_obra -> tipo de material de core.stock_ledger
+    _TIPOS_STOCK = {"perfil": "perfiles", "herraje": "herrajes", "vidrio": "vidrios"}
+
+    def _actualizar_stock_y_movimientos(self, items, usuario, lotes_adicionales=None):
+        """
+        Suma al stock los ítems recibidos y registra sus movimientos con core.stock_ledger: una transacción
+        para todos los tipos (y los `lotes_adicionales`, p. ej. el cambio de estado del pedido), sentencias
+        por lotes y event_bus.stock_modificado después del commit, así el índice de búsqueda de Inventario
+        y las vistas de Herrajes/Vidrios ven el stock nuevo.
+        """
+        por_tipo = {}
         for tipo, id_material, cantidad in items:
-            if tipo == "perfil":
-                self.db.ejecutar_query("UPDATE inventario_perfiles SET stock_actual = stock_actual + ? WHERE id = ?", (cantidad, id_material))
-                self.db.ejecutar_query("INSERT INTO movimientos_stock (id_perfil, tipo_movimiento, cantidad, fecha, usuario) VALUES (?, 'Ingreso', ?, ?, ?)", (id_material, cantidad, fecha, usuario or ""))
-            elif tipo == "herraje":
-                self.db.ejecutar_query("UPDATE herrajes SET stock_actual = stock_actual + ? WHERE id = ?", (cantidad, id_material))
-                self.db.ejecutar_query("INSERT INTO movimientos_herrajes (id_herraje, tipo_movimiento, cantidad, fecha, usuario) VALUES (?, 'Ingreso', ?, ?, ?)", (id_material, cantidad, fecha, usuario or ""))
-            elif tipo == "vidrio":
-                self.db.ejecutar_query("UPDATE vidrios SET stock_actual = stock_actual + ? WHERE id = ?", (cantidad, id_material))
-                self.db.ejecutar_query("INSERT INTO movimientos_vidrios (id_vidrio, tipo_movimiento, cantidad, fecha, usuario) VALUES (?, 'Ingreso', ?, ?, ?)", (id_material, cantidad, fecha, usuario or ""))
+            if tipo in self._TIPOS_STOCK:
+                por_tipo.setdefault(self._TIPOS_STOCK[tipo], []).append((id_material, cantidad))
+        return aplicar_movimientos_por_tipo(self.db, por_tipo, usuario, lotes_adicionales)
 
     def _emitir_evento_pedido_actualizado_recibir(self, id_pedido, usuario):
         try:
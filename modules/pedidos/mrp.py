@@ -0,0 +1,148 @@
+"""
+Planificación consolidada de compras (MRP) para todas las obras abiertas.
+
+generar_pedido_por_obra calcula los faltantes de una obra por vez: tres JOIN por obra y la resta en
+Python contra el stock completo, así dos obras que usan el mismo perfil lo piden dos veces. Acá se hace
+una sola pasada:
+
+1. se leen una vez las reservas de todas las obras (perfiles_por_obra, herrajes_por_obra, vidrios_por_obra),
+   el stock, proveedor y precio de cada material, lo pedido en compras abiertas (detalle_pedido de
+   pedidos_compra sin recibir) y lo que ya está en tránsito (pedidos_por_obra de pedidos sin recibir);
+2. con NumPy se suman por material (np.unique + np.bincount) y se netea:
+       faltante = max(demanda - stock - en_compra - en_transito, 0)
+3. los faltantes se agrupan por proveedor en propuestas de compra.
+
+La demanda de cada obra es cantidad_reservada, igual que en PedidosModel._calcular_faltantes_y_total.
+Son como máximo 9 consultas sin importar la cantidad de obras (300 obras eran 900 consultas).
+
+Uso:
+    propuestas = calcular_plan_compras(db)                       # todas las obras abiertas
+    propuestas = calcular_plan_compras(db, ids_obras=[3, 8])     # sólo esas obras
+"""
+from collections import namedtuple
+import numpy as np
+
+MaterialMRP = namedtuple("MaterialMRP", "tipo tabla columna_id tabla_obra columna_obra")
+
+# tipo: el mismo valor que pedidos_por_obra.tipo_item (ver PedidosModel._TIPOS_STOCK); columnas
+# con los mismos nombres que usa PedidosModel._calcular_faltantes_y_total
+MATERIALES_MRP = (
+    MaterialMRP("perfil", "inventario_perfiles", "id_perfil", "perfiles_por_obra", "id_perfil"),
+    MaterialMRP("herraje", "herrajes", "id_herraje", "herrajes_por_obra", "id_herraje"),
+    MaterialMRP("vidrio", "vidrios", "id_vidrio", "vidrios_por_obra", "id_vidrio"),
+)
+
+# Estados (en minúsculas) de obras que ya no generan demanda y de pedidos que ya no están en camino
+ESTADOS_OBRA_CERRADA = ("finalizada", "entregada", "entregado", "cancelada")
+ESTADOS_PEDIDO_CERRADO = ("recibido", "cancelado", "rechazado")
+
+SIN_PROVEEDOR = "Sin proveedor"
+
+# tipo, id, faltante a comprar, precio, importe y obras que lo demandan
+LineaPropuesta = namedtuple("LineaPropuesta", "tipo id_item cantidad precio_unitario importe obras")
+PropuestaCompra = namedtuple("PropuestaCompra", "proveedor lineas total")
+
+def _lista_sql(valores):
+    return ", ".join(f"'{valor}'" for valor in valores)
+
+def obtener_obras_abiertas(db):
+    """Ids de las obras cuyo estado no es de cierre."""
+    filas = db.ejecutar_query(
+        f"SELECT id FROM obras WHERE estado IS NULL OR LOWER(estado) NOT IN ({_lista_sql(ESTADOS_OBRA_CERRADA)})"
+    ) or []
+    return [fila[0] for fila in filas]
+
+def _leer_demanda(db, material):
+    """(ids_obra, ids_material, cantidades) de todas las reservas del tipo, como arrays."""
+    filas = db.ejecutar_query(
+        f"SELECT id_obra, {material.columna_obra}, cantidad_reservada FROM {material.tabla_obra} "
+        f"WHERE cantidad_reservada > 0"
+    ) or []
+    if not filas:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+    obras, ids, cantidades = zip(*filas)
+    return np.asarray(obras, dtype=np.int64), np.asarray(ids, dtype=np.int64), np.asarray(cantidades, dtype=float)
+
+def _leer_maestro(db, material):
+    """{id: (stock, proveedor, precio)} de los materiales del tipo."""
+    filas = db.ejecutar_query(
+        f"SELECT {material.columna_id}, stock_actual, proveedor, precio_unitario FROM {material.tabla}"
+    ) or []
+    return {fila[0]: (float(fila[1] or 0), fila[2] or SIN_PROVEEDOR, float(fila[3] or 0)) for fila in filas}
+
+def _leer_en_compra(db):
+    """[(tipo, id, cantidad)] pedido en compras abiertas (detalle_pedido es siempre de perfiles)."""
+    filas = db.ejecutar_query(
+        "SELECT d.id_perfil, d.cantidad FROM detalle_pedido d JOIN pedidos_compra pc ON pc.id = d.id_pedido "
+        f"WHERE pc.estado IS NULL OR LOWER(pc.estado) NOT IN ({_lista_sql(ESTADOS_PEDIDO_CERRADO)})"
+    ) or []
+    return [("perfil", id_perfil, cantidad) for id_perfil, cantidad in filas]
+
+def _leer_en_transito(db):
+    """[(tipo, id, cantidad)] de pedidos de obra emitidos y todavía no recibidos."""
+    filas = db.ejecutar_query(
+        "SELECT ppo.tipo_item, ppo.id_item, ppo.cantidad_requerida FROM pedidos_por_obra ppo "
+        "JOIN pedidos p ON p.id_pedido = ppo.id_pedido "
+        f"WHERE p.estado IS NULL OR LOWER(p.estado) NOT IN ({_lista_sql(ESTADOS_PEDIDO_CERRADO)})"
+    ) or []
+    return [tuple(fila) for fila in filas]
+
+def _sumar_por_material(ids_material, entradas, tipo):
+    """Suma las cantidades de `entradas` [(tipo, id, cantidad)] del tipo sobre el orden de `ids_material`."""
+    total = np.zeros(len(ids_material))
+    filas = [(id_item, cantidad) for tipo_item, id_item, cantidad in entradas if tipo_item == tipo]
+    if not filas or not len(ids_material):
+        return total
+    ids, cantidades = zip(*filas)
+    ids = np.asarray(ids, dtype=np.int64)
+    posiciones = np.searchsorted(ids_material, ids)
+    validas = (posiciones < len(ids_material)) & (ids_material[np.minimum(posiciones, len(ids_material) - 1)] == ids)
+    np.add.at(total, posiciones[validas], np.asarray(cantidades, dtype=float)[validas])
+    return total
+
+def netear(obras, ids, cantidades, maestro, en_compra, en_transito, tipo):
+    """
+    Netea un tipo de material con arrays: demanda sumada por material menos stock, compras y tránsito.
+    Devuelve [LineaPropuesta] de los materiales con faltante, con el proveedor en el maestro.
+    """
+    if not len(ids):
+        return []
+    ids_material, indice = np.unique(ids, return_inverse=True)
+    demanda = np.bincount(indice, weights=cantidades, minlength=len(ids_material))
+    stock = np.array([maestro.get(int(id_item), (0.0,))[0] for id_item in ids_material])
+    faltante = demanda - stock - _sumar_por_material(ids_material, en_compra, tipo) - _sumar_por_material(ids_material, en_transito, tipo)
+    # Pares (material, obra) distintos ordenados por material: las obras de cada uno quedan contiguas
+    pares = np.unique(np.stack([indice, obras]), axis=1)
+    cortes = np.searchsorted(pares[0], np.arange(len(ids_material) + 1))
+    lineas = []
+    for posicion in np.flatnonzero(faltante > 1e-9):
+        id_item = int(ids_material[posicion])
+        _stock, _proveedor, precio = maestro.get(id_item, (0.0, SIN_PROVEEDOR, 0.0))
+        cantidad = float(faltante[posicion])
+        obras_material = tuple(int(obra) for obra in pares[1][cortes[posicion]:cortes[posicion + 1]])
+        lineas.append(LineaPropuesta(tipo, id_item, cantidad, precio, cantidad * precio, obras_material))
+    return lineas
+
+def calcular_plan_compras(db, ids_obras=None, db_obras=None):
+    """
+    Propuestas de compra consolidadas [PropuestaCompra] por proveedor para las obras dadas (por defecto
+    las abiertas, leídas de `db_obras` o de `db`). Las líneas de cada propuesta van por tipo e id.
+    """
+    if ids_obras is None:
+        ids_obras = obtener_obras_abiertas(db_obras or db)
+    ids_obras = np.asarray(sorted(set(ids_obras)), dtype=np.int64)
+    en_compra = _leer_en_compra(db)
+    en_transito = _leer_en_transito(db)
+    por_proveedor = {}
+    for material in MATERIALES_MRP:
+        obras, ids, cantidades = _leer_demanda(db, material)
+        de_obras_pedidas = np.isin(obras, ids_obras)
+        if not de_obras_pedidas.any():
+            continue
+        maestro = _leer_maestro(db, material)
+        for linea in netear(obras[de_obras_pedidas], ids[de_obras_pedidas], cantidades[de_obras_pedidas], maestro, en_compra, en_transito, material.tipo):
+            por_proveedor.setdefault(maestro.get(linea.id_item, (0, SIN_PROVEEDOR))[1], []).append(linea)
+    return [
+        PropuestaCompra(proveedor, lineas, sum(linea.importe for linea in lineas))
+        for proveedor, lineas in sorted(por_proveedor.items())
+    ]
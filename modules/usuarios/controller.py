@@ -7,6 +7,7 @@ from modules.usuarios.model import UsuariosModel
 from modules.auditoria.model import AuditoriaModel
 from functools import wraps
 from core.logger import log_error, Logger
+from core.workers import ExportacionEnSegundoPlanoMixin
 
 class PermisoAuditoria:
     def __init__(self, modulo):
@@ -116,7 +117,10 @@ class PermisoAuditoria:
 
 permiso_auditoria_usuarios = PermisoAuditoria('usuarios')
 
-class UsuariosController(BaseController):
+class UsuariosController(ExportacionEnSegundoPlanoMixin, BaseController):
+    MODULO_EXPORTACION = "usuarios"
+    EXPORTACION_POR_DEFECTO = "exportar_usuarios"
+
     def __init__(self, model, view, db_connection, usuario_actual=None):
         super().__init__(model, view)
         self.usuario_actual = usuario_actual
@@ -361,9 +365,7 @@ class UsuariosController(BaseController):
         Exporta los logs de usuarios en el formato solicitado ('excel' o 'pdf') usando el método robusto del modelo.
         Muestra feedback visual y registra auditoría.
         """
-        mensaje = self.model.exportar_logs_usuarios(formato)
-        self.view.label.setText(mensaje)
-        self._registrar_evento_auditoria('exportar_logs', estado=self.EXITO_LITERAL if 'exportado' in mensaje else "error")
+        self._exportar_en_segundo_plano(self.model.exportar_logs_usuarios, formato, 'exportar_logs')
 
     @permiso_auditoria_usuarios('exportar_usuarios')
     def exportar_usuarios(self, formato):
@@ -371,9 +373,10 @@ class UsuariosController(BaseController):
         Exporta la lista de usuarios en el formato solicitado ('excel' o 'pdf') usando el método robusto del modelo.
         Muestra feedback visual y registra auditoría.
         """
-        mensaje = self.model.exportar_usuarios(formato)
-        self.view.label.setText(mensaje)
-        self._registrar_evento_auditoria('exportar_usuarios', estado=self.EXITO_LITERAL if 'exportado' in mensaje else "error")
+        self._exportar_en_segundo_plano(self.model.exportar_usuarios, formato, 'exportar_usuarios')
+
+    def _estado_exportacion(self, mensaje):
+        return self.EXITO_LITERAL if 'exportado' in mensaje else "error"
 
     def verificar_permiso(self, usuario_id, modulo, accion):
         permisos = self.model.obtener_permisos_por_usuario(usuario_id, modulo)
@@ -2,7 +2,73 @@ import os
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
+import time
+from core.cache import cache_lectura, clave_base
 from core.database import UsuariosDatabaseConnection
+from core.exportacion import EXTENSIONES, FORMATOS, NOMBRES_FORMATO, ExportacionCancelada, exportar_filas, filas_de_query
+
+class PermisosCache:
+    """
+    Caché en memoria de permisos por (usuario_id, modulo) con vencimiento por TTL.
+    Los decoradores PermisoAuditoria consultan permisos en cada acción; con la caché un click
+    no cuesta un viaje a la base sólo para autorizarlo.
+    La invalidación es compartida entre instancias (la del login, la de MainWindow, la de cada controller):
+    una entrada cargada antes de invalidar_cache_permisos(usuario_id) se descarta en la próxima lectura.
+    El id y rol resueltos a partir de un nombre de usuario se guardan bajo ese nombre, pero también
+    se descartan al invalidar el id al que resolvieron.
+    """
+    _invalidado_en = {}
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._entradas = {}
+
+    @classmethod
+    def invalidar(cls, usuario_id=None):
+        """Invalida las entradas de un usuario, o de todos si usuario_id es None."""
+        cls._invalidado_en[usuario_id] = time.monotonic()
+
+    def _vigente(self, usuario_id, cargado_en):
+        if time.monotonic() - cargado_en >= self.ttl:
+            return False
+        invalidado = max(self._invalidado_en.get(usuario_id, float('-inf')), self._invalidado_en.get(None, float('-inf')))
+        return cargado_en > invalidado
+
+    def obtener(self, usuario_id, modulo, cargar):
+        """Devuelve el valor cacheado para (usuario_id, modulo) o lo carga con cargar() si venció."""
+        clave = (usuario_id, modulo)
+        entrada = self._entradas.get(clave)
+        if entrada is not None and self._vigente(usuario_id, entrada[0]):
+            return entrada[1]
+        cargado_en = time.monotonic()
+        valor = cargar()
+        self._entradas[clave] = (cargado_en, valor)
+        return valor
+
+    def obtener_usuario(self, nombre_usuario, cargar):
+        """Devuelve las filas (id, rol) cacheadas para un nombre de usuario o las carga con cargar()."""
+        clave = (nombre_usuario, '__usuario__')
+        entrada = self._entradas.get(clave)
+        if entrada is not None and self._vigente(nombre_usuario, entrada[0]):
+            filas = entrada[1]
+            if not filas or self._vigente(filas[0][0], entrada[0]):
+                return filas
+        cargado_en = time.monotonic()
+        filas = cargar()
+        self._entradas[clave] = (cargado_en, filas)
+        return filas
+
+    def guardar(self, usuario_id, modulo, valor):
+        self._entradas[(usuario_id, modulo)] = (time.monotonic(), valor)
+
+    def limpiar(self):
+        self._entradas.clear()
+
+def invalidar_cache_permisos(usuario_id=None):
+    PermisosCache.invalidar(usuario_id)
+
+# Listas de usuarios y de roles (core/cache.py); las escrituras de este modelo la invalidan
+CACHE_USUARIOS = cache_lectura("usuarios")
 
 class UsuariosModel:
     """Modelo de Usuarios."""
@@ -16,12 +82,18 @@ class UsuariosModel:
         if db_connection is None:
             raise TypeError("UsuariosModel requiere un db_connection explícito para evitar conexiones reales en tests y cumplir la política de aislamiento.")
         self.db = db_connection
+        from core.config import PERMISOS_CACHE_TTL
+        self.cache_permisos = PermisosCache(ttl=PERMISOS_CACHE_TTL)
 
     def obtener_usuarios(self):
         """Devuelve una lista de todos los usuarios."""
         query = "SELECT * FROM usuarios"
-        resultado = self.db.ejecutar_query(query)
-        return resultado if resultado else []
+        resultado = CACHE_USUARIOS.obtener((clave_base(self.db), "usuarios"), lambda: self.db.ejecutar_query(query))
+        return list(resultado) if resultado else []
+
+    def _invalidar_cache_usuarios(self):
+        CACHE_USUARIOS.invalidar((clave_base(self.db), "usuarios"))
+        CACHE_USUARIOS.invalidar((clave_base(self.db), "roles"))
 
     def agregar_usuario(self, datos):
         """Agrega un nuevo usuario validando unicidad de usuario y email."""
@@ -32,11 +104,13 @@ class UsuariosModel:
             raise ValueError("Usuario o email ya existe")
         query = "INSERT INTO usuarios (nombre, apellido, email, usuario, password_hash, rol, estado) VALUES (?, ?, ?, ?, ?, ?, 'Activo')"
         self.db.ejecutar_query(query, datos)
+        self._invalidar_cache_usuarios()
 
     def actualizar_password(self, usuario_id, password_hash):
         """Actualiza el hash de la contraseña de un usuario."""
         query = "UPDATE usuarios SET password_hash = ? WHERE id = ?"
         self.db.ejecutar_query(query, (password_hash, usuario_id))
+        self._invalidar_cache_usuarios()
 
     def actualizar_usuario(self, id_usuario, datos, fecha_actualizacion):
         """Actualiza los datos de un usuario."""
@@ -44,22 +118,27 @@ class UsuariosModel:
         valores = list(datos.values()) + [fecha_actualizacion, id_usuario]
         query = f"UPDATE usuarios SET {set_clause}, fecha_actualizacion = ? WHERE id = ?"
         self.db.ejecutar_query(query, valores)
+        invalidar_cache_permisos(id_usuario)
+        self._invalidar_cache_usuarios()
 
     def eliminar_usuario(self, usuario_id):
         """Elimina un usuario por su ID."""
         query = "DELETE FROM usuarios WHERE id = ?"
         self.db.ejecutar_query(query, (usuario_id,))
+        invalidar_cache_permisos(usuario_id)
+        self._invalidar_cache_usuarios()
 
     def actualizar_estado_usuario(self, usuario_id, nuevo_estado):
         """Actualiza el estado de un usuario."""
         query = "UPDATE usuarios SET estado = ? WHERE id = ?"
         self.db.ejecutar_query(query, (nuevo_estado, usuario_id))
+        self._invalidar_cache_usuarios()
 
     def obtener_roles(self):
         """Devuelve una lista de roles distintos registrados en la tabla usuarios."""
         query = "SELECT DISTINCT rol FROM usuarios"
-        resultado = self.db.ejecutar_query(query)
-        return resultado if resultado else []
+        resultado = CACHE_USUARIOS.obtener((clave_base(self.db), "roles"), lambda: self.db.ejecutar_query(query))
+        return list(resultado) if resultado else []
 
     def obtener_permisos_por_rol(self, rol):
         """Devuelve los permisos asociados a un rol agrupados por módulo."""
@@ -93,12 +172,14 @@ class UsuariosModel:
         """Suspende la cuenta de un usuario."""
         query = "UPDATE usuarios SET estado = 'suspendido' WHERE id = ?"
         self.db.ejecutar_query(query, (id_usuario,))
+        self._invalidar_cache_usuarios()
         return f"Cuenta del usuario {id_usuario} suspendida."
 
     def reactivar_cuenta(self, id_usuario):
         """Reactiva la cuenta de un usuario."""
         query = "UPDATE usuarios SET estado = 'activo' WHERE id = ?"
         self.db.ejecutar_query(query, (id_usuario,))
+        self._invalidar_cache_usuarios()
         return f"Cuenta del usuario {id_usuario} reactivada."
 
     def obtener_todos_los_modulos(self):
@@ -117,72 +198,46 @@ class UsuariosModel:
                 self._SQL_INSERT_PERMISOS_MODULOS,
                 (id_usuario, modulo, int(permisos.get('ver', False)), int(permisos.get('modificar', False)), int(permisos.get('aprobar', False)), creado_por)
             )
+        # Se invalida después de escribir: una lectura concurrente no puede volver a cachear los permisos viejos.
+        # Algunas pantallas pasan el nombre de usuario en lugar del id: en ese caso se invalida toda la caché
+        invalidar_cache_permisos(id_usuario if isinstance(id_usuario, int) else None)
 
     def obtener_headers_usuarios(self):
         """Obtiene los nombres de columnas (headers) de la tabla usuarios desde la metadata de la base de datos."""
         try:
-            self.db.conectar()
-            if not self.db.connection:
-                raise RuntimeError("No se pudo establecer la conexión para obtener los headers.")
-            cursor = self.db.connection.cursor()
-            cursor.execute("SELECT * FROM usuarios WHERE 1=0")
-            headers = [column[0] for column in cursor.description]
-            cursor.close()
+            # Conexión prestada por el pool sólo para esta consulta (puede correr en un hilo de core.workers)
+            with self.db.pool.conexion() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT * FROM usuarios WHERE 1=0")
+                headers = [column[0] for column in cursor.description]
+                cursor.close()
             return headers
         except Exception:
             return ['id', 'nombre', 'apellido', 'email', 'usuario', 'password_hash', 'rol', 'estado', 'fecha_creacion', 'fecha_actualizacion']
 
+    def _exportar_consulta(self, formato, query, columnas, prefijo_archivo, titulo):
+        """Escribe el resultado de `query` en streaming (ver core.exportacion). Devuelve (nombre_archivo, filas escritas)."""
+        from datetime import datetime
+        fecha_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+        nombre_archivo = f"{prefijo_archivo}_{fecha_str}{EXTENSIONES[formato]}"
+        return nombre_archivo, exportar_filas(filas_de_query(self.db, query), formato, nombre_archivo, columnas, titulo=titulo)
+
     def exportar_usuarios(self, formato: str) -> str:
-        """Exporta la lista de usuarios en el formato solicitado ('excel' o 'pdf')."""
+        """Exporta la lista de usuarios en el formato solicitado ('excel', 'csv' o 'pdf')."""
         query = "SELECT id, nombre, apellido, email, usuario, rol, estado, fecha_creacion, fecha_actualizacion FROM usuarios"
+        formato = (formato or '').lower().strip()
+        if formato not in FORMATOS:
+            return "Formato no soportado. Use 'excel', 'csv' o 'pdf'."
+        columnas = ["ID", "Nombre", "Apellido", "Email", "Usuario", "Rol", "Estado", "Fecha Creación", "Fecha Actualización"]
         try:
-            datos = self.db.ejecutar_query(query) or []
-            if not datos:
-                return "No hay usuarios para exportar."
-            formato = (formato or '').lower().strip()
-            if formato not in ("excel", "pdf"):
-                return "Formato no soportado. Use 'excel' o 'pdf'."
-            from datetime import datetime
-            fecha_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-            columnas = ["ID", "Nombre", "Apellido", "Email", "Usuario", "Rol", "Estado", "Fecha Creación", "Fecha Actualización"]
-            if formato == "excel":
-                nombre_archivo = f"usuarios_{fecha_str}.xlsx"
-                return self._exportar_usuarios_excel(datos, columnas, nombre_archivo)
-            else:
-                nombre_archivo = f"usuarios_{fecha_str}.pdf"
-                return self._exportar_usuarios_pdf(datos, columnas, nombre_archivo)
+            nombre_archivo, escritas = self._exportar_consulta(formato, query, columnas, "usuarios", "Listado de Usuarios")
+        except ExportacionCancelada:
+            return "Exportación de usuarios cancelada."
         except Exception as e:
             return f"Error al exportar los usuarios: {e}"
-
-    def _exportar_usuarios_excel(self, datos, columnas, nombre_archivo):
-        """Exporta usuarios a Excel."""
-        try:
-            import pandas as pd
-            df = pd.DataFrame(datos, columns=columnas)
-            df.to_excel(nombre_archivo, index=False)
-            return f"Usuarios exportados a Excel: {nombre_archivo}"
-        except Exception as e:
-            return f"Error al exportar a Excel: {e}"
-
-    def _exportar_usuarios_pdf(self, datos, columnas, nombre_archivo):
-        """Exporta usuarios a PDF."""
-        try:
-            from fpdf import FPDF
-            pdf = FPDF()
-            pdf.add_page()
-            pdf.set_font("Arial", size=12)
-            pdf.cell(200, 10, "Listado de Usuarios", ln=True, align="C")
-            pdf.set_font("Arial", style="B", size=10)
-            header = " | ".join(columnas)
-            pdf.cell(0, 8, header, ln=True)
-            pdf.set_font("Arial", size=10)
-            for row in datos:
-                fila = " | ".join([str(x) if x is not None else "" for x in row])
-                pdf.cell(0, 8, fila, ln=True)
-            pdf.output(nombre_archivo)
-            return f"Usuarios exportados a PDF: {nombre_archivo}"
-        except Exception as e:
-            return f"Error al exportar a PDF: {e}"
+        if not escritas:
+            return "No hay usuarios para exportar."
+        return f"Usuarios exportados a {NOMBRES_FORMATO[formato]}: {nombre_archivo}"
 
     def obtener_logs_usuarios(self):
         """Obtiene todos los logs de usuarios desde la tabla logs_usuarios."""
@@ -191,47 +246,21 @@ class UsuariosModel:
         return resultado if resultado else []
 
     def exportar_logs_usuarios(self, formato: str) -> str:
-        """Exporta los logs de usuarios en el formato solicitado ('excel' o 'pdf')."""
+        """Exporta los logs de usuarios en el formato solicitado ('excel', 'csv' o 'pdf')."""
+        query = "SELECT id, usuario_id, accion, modulo, fecha_hora, detalle, ip_origen FROM logs_usuarios ORDER BY fecha_hora DESC"
+        formato = (formato or '').lower().strip()
+        if formato not in FORMATOS:
+            return "Formato no soportado. Use 'excel', 'csv' o 'pdf'."
+        columnas = ["ID", "Usuario ID", "Acción", "Módulo", "Fecha/Hora", "Detalle", "IP Origen"]
         try:
-            datos = self.obtener_logs_usuarios()
-            if not datos:
-                return "No hay logs de usuarios para exportar."
-            formato = (formato or '').lower().strip()
-            if formato not in ("excel", "pdf"):
-                return "Formato no soportado. Use 'excel' o 'pdf'."
-            import pandas as pd
-            from datetime import datetime
-            fecha_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-            columnas = ["ID", "Usuario ID", "Acción", "Módulo", "Fecha/Hora", "Detalle", "IP Origen"]
-            if formato == "excel":
-                nombre_archivo = f"logs_usuarios_{fecha_str}.xlsx"
-                try:
-                    df = pd.DataFrame(datos, columns=columnas)
-                    df.to_excel(nombre_archivo, index=False)
-                    return f"Logs de usuarios exportados a Excel: {nombre_archivo}"
-                except Exception as e:
-                    return f"Error al exportar a Excel: {e}"
-            elif formato == "pdf":
-                nombre_archivo = f"logs_usuarios_{fecha_str}.pdf"
-                try:
-                    from fpdf import FPDF
-                    pdf = FPDF()
-                    pdf.add_page()
-                    pdf.set_font("Arial", size=12)
-                    pdf.cell(200, 10, "Logs de Usuarios", ln=True, align="C")
-                    pdf.set_font("Arial", style="B", size=10)
-                    header = " | ".join(columnas)
-                    pdf.cell(0, 8, header, ln=True)
-                    pdf.set_font("Arial", size=10)
-                    for row in datos:
-                        fila = " | ".join([str(x) if x is not None else "" for x in row])
-                        pdf.cell(0, 8, fila, ln=True)
-                    pdf.output(nombre_archivo)
-                    return f"Logs de usuarios exportados a PDF: {nombre_archivo}"
-                except Exception as e:
-                    return f"Error al exportar a PDF: {e}"
+            nombre_archivo, escritas = self._exportar_consulta(formato, query, columnas, "logs_usuarios", "Logs de Usuarios")
+        except ExportacionCancelada:
+            return "Exportación de logs cancelada."
         except Exception as e:
             return f"Error al exportar los logs de usuarios: {e}"
+        if not escritas:
+            return "No hay logs de usuarios para exportar."
+        return f"Logs de usuarios exportados a {NOMBRES_FORMATO[formato]}: {nombre_archivo}"
 
     def obtener_usuario_por_nombre(self, nombre_usuario):
         """Devuelve todos los campos relevantes del usuario por nombre de usuario."""
@@ -286,6 +315,7 @@ class UsuariosModel:
                 "INSERT INTO usuarios (nombre, apellido, email, usuario, password_hash, rol, estado) VALUES (?, ?, ?, ?, ?, ?, 'activo')",
                 (nombre, apellido, email, usuario, hashlib.sha256(password.encode()).hexdigest(), rol)
             )
+            self._invalidar_cache_usuarios()
             return self.db.ejecutar_query("SELECT id FROM usuarios WHERE usuario = ?", (usuario,))[0][0]
         return usernames[usuario]
 
@@ -310,13 +340,8 @@ class UsuariosModel:
                     (usuario_id, modulo, *permisos, creado_por)
                 )
 
-    def obtener_modulos_permitidos(self, usuario):
-        """
-        Devuelve una lista de módulos a los que el usuario tiene permiso de ver.
-        Si el usuario es admin (rol == 'admin'), devuelve todos los módulos.
-        Acepta usuario como dict, id o username.
-        """
-        # Si es dict, extraer id y rol
+    def _resolver_usuario(self, usuario):
+        """Devuelve (usuario_id, rol) a partir de un dict, un id o un nombre de usuario."""
         usuario_id = None
         rol = None
         if isinstance(usuario, dict):
@@ -324,7 +349,10 @@ class UsuariosModel:
             rol = usuario.get('rol')
             if not usuario_id and usuario.get('username'):
                 # Buscar id por username
-                res = self.db.ejecutar_query("SELECT id, rol FROM usuarios WHERE usuario = ?", (usuario['username'],))
+                res = self.cache_permisos.obtener_usuario(
+                    usuario['username'],
+                    lambda: self.db.ejecutar_query("SELECT id, rol FROM usuarios WHERE usuario = ?", (usuario['username'],))
+                )
                 if res:
                     usuario_id = res[0][0]
                     if not rol:
@@ -333,16 +361,80 @@ class UsuariosModel:
             usuario_id = usuario
         elif isinstance(usuario, str):
             # Buscar id y rol por username
-            res = self.db.ejecutar_query("SELECT id, rol FROM usuarios WHERE usuario = ?", (usuario,))
+            res = self.cache_permisos.obtener_usuario(
+                usuario,
+                lambda: self.db.ejecutar_query("SELECT id, rol FROM usuarios WHERE usuario = ?", (usuario,))
+            )
             if res:
                 usuario_id = res[0][0]
                 rol = res[0][1]
+        return usuario_id, rol
+
+    def obtener_modulos_permitidos(self, usuario):
+        """
+        Devuelve una lista de módulos a los que el usuario tiene permiso de ver.
+        Si el usuario es admin (rol == 'admin'), devuelve todos los módulos.
+        Acepta usuario como dict, id o username.
+        El resultado se cachea por usuario (ver PermisosCache); se llama en el login para precargarlo.
+        """
+        usuario_id, rol = self._resolver_usuario(usuario)
         # Si es admin, devolver todos los módulos
         if rol == 'admin':
-            return self.obtener_todos_los_modulos()
+            return list(self.cache_permisos.obtener(None, '__todos__', self.obtener_todos_los_modulos))
         # Si no hay id, no puede consultar
         if not usuario_id:
             return []
-        query = "SELECT modulo FROM permisos_modulos WHERE id_usuario = ? AND puede_ver = 1"
-        resultado = self.db.ejecutar_query(query, (usuario_id,))
-        return [r[0] for r in resultado] if resultado else []
+
+        def cargar():
+            query = "SELECT modulo FROM permisos_modulos WHERE id_usuario = ? AND puede_ver = 1"
+            resultado = self.db.ejecutar_query(query, (usuario_id,))
+            return [r[0] for r in resultado] if resultado else []
+        return list(self.cache_permisos.obtener(usuario_id, '__modulos__', cargar))
+
+    # Verbos de las acciones de los decoradores que sólo requieren permiso de lectura; la acción se clasifica
+    # por su verbo (exportar_balance -> exportar, ver_detalles -> ver). 'aprobar' requiere puede_aprobar
+    # y el resto (agregar, editar, eliminar, ...) puede_modificar
+    ACCIONES_LECTURA = {'ver', 'leer', 'consultar', 'buscar', 'listar', 'exportar', 'mostrar'}
+
+    def tiene_permiso(self, usuario, modulo, accion):
+        """
+        Indica si el usuario puede realizar `accion` en `modulo`.
+        Los permisos de todos los módulos del usuario se cargan juntos en una consulta y quedan
+        cacheados por (usuario_id, modulo) hasta que vence el TTL o se actualizan sus permisos.
+        """
+        usuario_id, rol = self._resolver_usuario(usuario)
+        if rol == 'admin':
+            return True
+        if not usuario_id:
+            return False
+        permisos = self.cache_permisos.obtener(usuario_id, str(modulo).lower(), lambda: self._cargar_permisos_usuario(usuario_id).get(str(modulo).lower(), {}))
+        verbo = str(accion).split('_')[0]
+        if verbo in self.ACCIONES_LECTURA:
+            return permisos.get('ver', False)
+        if verbo == 'aprobar':
+            return permisos.get('aprobar', False)
+        return permisos.get('modificar', False)
+
+    def _cargar_permisos_usuario(self, usuario_id):
+        """Carga en bloque los permisos de todos los módulos del usuario y los guarda en la caché."""
+        query = (
+            "SELECT modulo, puede_ver, puede_modificar, puede_aprobar "
+            "FROM permisos_modulos "
+            "WHERE id_usuario = ?"
+        )
+        resultado = self.db.ejecutar_query(query, (usuario_id,)) or []
+        permisos = {
+            str(r[0]).lower(): {"ver": bool(r[1]), "modificar": bool(r[2]), "aprobar": bool(r[3])}
+            for r in resultado
+        }
+        for modulo, valor in permisos.items():
+            self.cache_permisos.guardar(usuario_id, modulo, valor)
+        return permisos
+
+    def precargar_permisos(self, usuario):
+        """Llena la caché con los módulos y permisos del usuario (se llama una vez al iniciar sesión)."""
+        usuario_id, rol = self._resolver_usuario(usuario)
+        modulos = self.obtener_modulos_permitidos(usuario)
+        if usuario_id and rol != 'admin':
+            self._cargar_permisos_usuario(usuario_id)
+        return modulos
@@ -1,6 +1,8 @@
 from PyQt6.QtWidgets import QTableWidgetItem
 from modules.auditoria.model import AuditoriaModel
+from core.delta_sync import SincronizadorDelta, aplicar_cambios_tabla
 from core.logger import Logger
+from core.workers import ejecutar_en_segundo_plano
 
 class VidriosController:
     def __init__(self, model, view, db_connection, usuario_actual=None):
@@ -50,9 +52,31 @@ class VidriosController:
         Logger().info(f"[LOG ACCIÓN] Ejecutando acción 'refrescar_vidrios' en módulo 'vidrios' por usuario: {getattr(self.usuario_actual, 'username', 'desconocido') if self.usuario_actual else 'desconocido'}")
         """
         Refresca la tabla de vidrios desde la base de datos.
+        La consulta corre en segundo plano y la tabla se llena al recibir el resultado.
+        Con un modelo que sincroniza por rowversion sólo se traen los vidrios modificados desde el último refresco.
         """
+        if isinstance(getattr(self.model, 'sincronizacion_vidrios', None), SincronizadorDelta):
+            ejecutar_en_segundo_plano(
+                self.model.obtener_cambios_vidrios,
+                al_terminar=self._aplicar_cambios_vidrios,
+                al_error=self._error_refrescar_vidrios,
+                vista=None if self.model.sincronizacion_vidrios.activo else self.view,
+                mensaje_carga="Cargando vidrios...",
+                clave="vidrios.refrescar",
+            )
+            return
+        ejecutar_en_segundo_plano(
+            self.model.obtener_vidrios,
+            al_terminar=self._mostrar_vidrios,
+            al_error=self._error_refrescar_vidrios,
+            vista=self.view,
+            mensaje_carga="Cargando vidrios...",
+            clave="vidrios.refrescar",
+        )
+
+    def _mostrar_vidrios(self, vidrios):
         try:
-            vidrios = self.model.obtener_vidrios()
+            vidrios = vidrios or []
             if hasattr(self.view, 'tabla_vidrios') and hasattr(self.view, 'vidrios_headers'):
                 self.view.tabla_vidrios.setRowCount(len(vidrios))
                 for fila, vidrio in enumerate(vidrios):
@@ -61,9 +85,31 @@ class VidriosController:
                         self.view.tabla_vidrios.setItem(fila, columna, QTableWidgetItem(str(valor)))
             Logger().info("[LOG ACCIÓN] Acción 'refrescar_vidrios' en módulo 'vidrios' finalizada con éxito.")
         except Exception as e:
-            Logger().error(f"[LOG ACCIÓN] Error en acción 'refrescar_vidrios' en módulo 'vidrios': {e}")
-            if hasattr(self.view, 'mostrar_mensaje'):
-                self.view.mostrar_mensaje(f"Error al refrescar vidrios: {e}", tipo='error')
+            self._error_refrescar_vidrios(e)
+
+    def _aplicar_cambios_vidrios(self, cambios):
+        sincronizacion = self.model.sincronizacion_vidrios
+        try:
+            if hasattr(self.view, 'tabla_vidrios') and hasattr(self.view, 'vidrios_headers'):
+                columnas = range(len(self.view.vidrios_headers))
+                aplicado = aplicar_cambios_tabla(
+                    self.view.tabla_vidrios, cambios,
+                    lambda vidrio: [vidrio[columna] if columna < len(vidrio) else "" for columna in columnas]
+                )
+                if not aplicado:
+                    sincronizacion.reiniciar()
+                    self.refrescar_vidrios()
+                    return
+            sincronizacion.confirmar(cambios.hasta)
+            Logger().info("[LOG ACCIÓN] Acción 'refrescar_vidrios' en módulo 'vidrios' finalizada con éxito.")
+        except Exception as e:
+            sincronizacion.reiniciar()
+            self._error_refrescar_vidrios(e)
+
+    def _error_refrescar_vidrios(self, e):
+        Logger().error(f"[LOG ACCIÓN] Error en acción 'refrescar_vidrios' en módulo 'vidrios': {e}")
+        if hasattr(self.view, 'mostrar_mensaje'):
+            self.view.mostrar_mensaje(f"Error al refrescar vidrios: {e}", tipo='error')
 
     def cargar_resumen_obras(self):
         obras = self.model.obtener_obras_con_estado_pedido()
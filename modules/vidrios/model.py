@@ -1,13 +1,24 @@
+from core.delta_sync import SincronizadorDelta
+from core.event_bus import event_bus
+from core.stock_ledger import fijar_stock, reservar_para_obra
+from modules.auditoria.helpers import _registrar_evento_auditoria
+
 class VidriosModel:
     CANTIDAD_INVALIDA_MSG = "Cantidad inválida"
 
     def __init__(self, db_connection):
         self.db = db_connection
+        # Marca de rowversion de la tabla de vidrios ya mostrada (core/delta_sync.py)
+        self.sincronizacion_vidrios = SincronizadorDelta(self.db, "vidrios", "id_vidrio")
 
     def obtener_vidrios(self):
         query = "SELECT * FROM vidrios"
         return self.db.ejecutar_query(query)
 
+    def obtener_cambios_vidrios(self):
+        """Vidrios (mismas columnas que obtener_vidrios) nuevos o modificados y bajas desde la última marca confirmada."""
+        return self.sincronizacion_vidrios.leer_cambios("*")
+
     def agregar_vidrio(self, datos):
         query = """
         INSERT INTO vidrios (tipo, ancho, alto, cantidad, proveedor, fecha_entrega)
@@ -16,29 +27,28 @@ class VidriosModel:
         self.db.ejecutar_query(query, datos)
 
     def asignar_a_obra(self, id_vidrio, id_obra, cantidad, usuario):
-        query = """
-        INSERT INTO vidrios_obras (id_vidrio, id_obra)
-        VALUES (?, ?)
+        return self.asignar_a_obra_lote(id_obra, [(id_vidrio, cantidad)], usuario)
+
+    def asignar_a_obra_lote(self, id_obra, items, usuario):
         """
-        self.db.ejecutar_query(query, (id_vidrio, id_obra))
-        if cantidad <= 0:
-            raise ValueError(self.CANTIDAD_INVALIDA_MSG)
-        with self.db.transaction():
-            stock = self.db.ejecutar_query("SELECT stock_actual FROM vidrios WHERE id_vidrio = ?", (id_vidrio,))
-            if not stock:
-                raise ValueError("Vidrio no encontrado")
-            stock_actual = stock[0][0]
-            if cantidad > stock_actual:
-                raise ValueError("Stock insuficiente")
-            self.db.ejecutar_query("UPDATE vidrios SET stock_actual = stock_actual - ? WHERE id_vidrio = ?", (cantidad, id_vidrio))
-            reserva = self.db.ejecutar_query("SELECT cantidad_reservada FROM vidrios_por_obra WHERE id_obra = ? AND id_vidrio = ?", (id_obra, id_vidrio))
-            if reserva:
-                nueva_cantidad = reserva[0][0] + cantidad
-                self.db.ejecutar_query("UPDATE vidrios_por_obra SET cantidad_reservada = ?, estado = 'Reservado' WHERE id_obra = ? AND id_vidrio = ?", (nueva_cantidad, id_obra, id_vidrio))
-            else:
-                self.db.ejecutar_query("INSERT INTO vidrios_por_obra (id_obra, id_vidrio, cantidad_reservada, estado) VALUES (?, ?, ?, 'Reservado')", (id_obra, id_vidrio, cantidad))
-            self.db.ejecutar_query("INSERT INTO movimientos_vidrios (id_vidrio, tipo_movimiento, cantidad, fecha, usuario) VALUES (?, 'Egreso', ?, CURRENT_TIMESTAMP, ?)", (id_vidrio, cantidad, usuario or ""))
-            self.db.ejecutar_query("INSERT INTO auditorias_sistema (usuario, modulo, accion, fecha) VALUES (?, ?, ?, CURRENT_TIMESTAMP)", (usuario, "Vidrios", f"Reservó {cantidad} del vidrio {id_vidrio} para obra {id_obra}"))
+        Asigna varios vidrios [(id_vidrio, cantidad), ...] a una obra en una sola transacción.
+        El stock se descuenta con un UPDATE condicionado (core.stock_ledger) y el vínculo con la obra,
+        las reservas y los movimientos viajan por lotes en la misma transacción; la auditoría se registra
+        después del commit (por el sink de auditoría cuando está activo).
+        """
+        cantidades = {}
+        for id_vidrio, cantidad in items:
+            if cantidad <= 0:
+                raise ValueError(self.CANTIDAD_INVALIDA_MSG)
+            cantidades[id_vidrio] = cantidades.get(id_vidrio, 0) + cantidad
+        if not cantidades:
+            return True
+        reservar_para_obra(self.db, "vidrios", id_obra, cantidades.items(), usuario, lotes_adicionales=[
+            ("INSERT INTO vidrios_obras (id_vidrio, id_obra) VALUES (?, ?)", [(id_vidrio, id_obra) for id_vidrio in cantidades]),
+        ])
+        for id_vidrio, cantidad in cantidades.items():
+            _registrar_evento_auditoria(usuario, "Vidrios", f"Reservó {cantidad} del vidrio {id_vidrio} para obra {id_obra}")
+        event_bus.vidrio_asignado.emit({'id_obra': id_obra, 'vidrios': cantidades, 'usuario': usuario})
         return True
 
     def devolver_vidrio(self, usuario, id_obra, id_vidrio, cantidad):
@@ -55,20 +65,14 @@ class VidriosModel:
             nueva_cantidad = cantidad_reservada - cantidad
             self.db.ejecutar_query("UPDATE vidrios_por_obra SET cantidad_reservada = ?, estado = 'Reservado' WHERE id_obra = ? AND id_vidrio = ?", (nueva_cantidad, id_obra, id_vidrio))
             self.db.ejecutar_query("INSERT INTO movimientos_vidrios (id_vidrio, tipo_movimiento, cantidad, fecha, usuario) VALUES (?, 'Ingreso', ?, CURRENT_TIMESTAMP, ?)", (id_vidrio, cantidad, usuario or ""))
-            self.db.ejecutar_query("INSERT INTO auditorias_sistema (usuario, modulo, accion, fecha) VALUES (?, ?, ?, CURRENT_TIMESTAMP)", (usuario, "Vidrios", f"Devolvió {cantidad} del vidrio {id_vidrio} de la obra {id_obra}"))
+        _registrar_evento_auditoria(usuario, "Vidrios", f"Devolvió {cantidad} del vidrio {id_vidrio} de la obra {id_obra}")
         return True
+
+    def ajustar_stock_vidrio(self, usuario, id_vidrio, nueva_cantidad):
         if nueva_cantidad < 0:
             raise ValueError(self.CANTIDAD_INVALIDA_MSG)
-        if nueva_cantidad < 0:
-            raise ValueError(self.CANTIDAD_INVALIDA_MSG)
-        with self.db.transaction():
-            stock = self.db.ejecutar_query("SELECT stock_actual FROM vidrios WHERE id_vidrio = ?", (id_vidrio,))
-            if not stock:
-                raise ValueError("Vidrio no encontrado")
-            stock_anterior = stock[0][0]
-            self.db.ejecutar_query("UPDATE vidrios SET stock_actual = ? WHERE id_vidrio = ?", (nueva_cantidad, id_vidrio))
-            self.db.ejecutar_query("INSERT INTO movimientos_vidrios (id_vidrio, tipo_movimiento, cantidad, fecha, usuario) VALUES (?, 'Ajuste', ?, CURRENT_TIMESTAMP, ?)", (id_vidrio, abs(nueva_cantidad - stock_anterior), usuario or ""))
-            self.db.ejecutar_query("INSERT INTO auditorias_sistema (usuario, modulo, accion, fecha) VALUES (?, ?, ?, CURRENT_TIMESTAMP)", (usuario, "Vidrios", f"Ajustó stock del vidrio {id_vidrio} de {stock_anterior} a {nueva_cantidad}"))
+        stock_anterior = fijar_stock(self.db, "vidrios", id_vidrio, nueva_cantidad, usuario)
+        _registrar_evento_auditoria(usuario, "Vidrios", f"Ajustó stock del vidrio {id_vidrio} de {stock_anterior} a {nueva_cantidad}")
         return True
 
     def obtener_obras_con_estado_pedido(self):
@@ -116,7 +120,7 @@ class VidriosModel:
         Retorna un string: 'pendiente', 'pedido', 'en proceso', 'entregado', etc.
         """
         try:
-            query = "SELECT estado FROM pedidos_vidrios WHERE id_obra = ? ORDER BY fecha DESC LIMIT 1"
+            query = "SELECT TOP 1 estado FROM pedidos_vidrios WHERE id_obra = ? ORDER BY fecha DESC"
             resultado = self.db.ejecutar_query(query, (id_obra,))
             if resultado and resultado[0]:
                 return resultado[0][0]
@@ -124,6 +128,19 @@ class VidriosModel:
         except Exception as e:
             return f"Error: {e}"
 
+    def obtener_estados_pedidos_por_obras(self):
+        """
+        Estado del último pedido de vidrios de cada obra en una sola consulta: {id_obra: estado}.
+        Las obras sin pedidos no aparecen (equivalen a 'pendiente').
+        """
+        query = """
+        SELECT id_obra, estado FROM (
+            SELECT id_obra, estado, ROW_NUMBER() OVER (PARTITION BY id_obra ORDER BY fecha DESC) AS orden
+            FROM pedidos_vidrios
+        ) ultimos WHERE orden = 1
+        """
+        return {fila[0]: fila[1] for fila in (self.db.ejecutar_query(query) or [])}
+
     def obtener_pedidos_por_obra(self, id_obra):
         """
         Devuelve todos los pedidos de vidrios asociados a una obra, con su estado y detalle.
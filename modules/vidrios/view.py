@@ -10,7 +10,7 @@ from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from core.table_responsive_mixin import TableResponsiveMixin
 from core.ui_components import estilizar_boton_icono, aplicar_qss_global_y_tema
-from core.event_bus import event_bus
+from core.event_bus import despachador_eventos
 
 class VidriosView(QWidget, TableResponsiveMixin):
     """
@@ -218,7 +218,7 @@ class VidriosView(QWidget, TableResponsiveMixin):
         self.conectar_botones_principales()
 
     def _init_event_bus_and_signals(self):
-        event_bus.obra_agregada.connect(self.actualizar_por_obra)
+        despachador_eventos.suscribir('obra_agregada', self.actualizar_por_obra)
         self.tabla_obras.cellDoubleClicked.connect(self.editar_estado_pedido)
         self.tabla_obras.itemSelectionChanged.connect(self.actualizar_detalle_pedido)
         self.tabla_pedido.cellDoubleClicked.connect(self.editar_detalle_pedido)
@@ -503,10 +503,14 @@ class VidriosView(QWidget, TableResponsiveMixin):
     def actualizar_por_obra(self, datos_obra):
         """
         Actualiza la vista de vidrios en tiempo real cuando se agrega una nueva obra.
-        Muestra feedback visual inmediato y refresca los datos necesarios.
+        Muestra feedback visual inmediato y refresca los datos necesarios. Recibe el payload agregado de
+        despachador_eventos: varias obras agregadas seguidas se refrescan una sola vez.
         """
         self.refrescar_por_obra(datos_obra)
-        self.mostrar_feedback(f"Nueva obra agregada: {datos_obra.get('nombre','')} (vidrios actualizados)", tipo="info")
+        if datos_obra.get('cantidad', 1) > 1:
+            self.mostrar_feedback(f"{datos_obra['cantidad']} obras nuevas agregadas (vidrios actualizados)", tipo="info")
+        else:
+            self.mostrar_feedback(f"Nueva obra agregada: {datos_obra.get('nombre','')} (vidrios actualizados)", tipo="info")
 
     def refrescar_por_obra(self, datos_obra):
         # Lógica para refrescar la tabla de obras tras una nueva obra
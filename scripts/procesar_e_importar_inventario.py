@@ -85,6 +85,10 @@ def get_db_connection():
     return InventarioDatabaseConnection()
 
 TABLA_SQL = 'inventario_perfiles'
+# Tabla temporal de la sesión donde se carga el archivo antes de reemplazar inventario_perfiles
+TABLA_STAGING = '#inventario_perfiles_carga'
+# Filas por bloque al enviar el archivo a la tabla temporal de carga
+TAMANO_BLOQUE = 1000
 COLUMNS = [
     'codigo', 'descripcion', 'tipo', 'tipo_material', 'acabado', 'longitud',
     'stock', 'pedidos', 'ubicacion', 'proveedor', 'observaciones', 'activo'
@@ -114,6 +118,33 @@ def validar_configuracion_db():
         print("Revisa la configuración centralizada en core/database.py y asegúrate de que los datos sean correctos.")
         sys.exit(1)
 
+# --- LECTURA DEL ARCHIVO ---
+MAPEO_ENCABEZADOS = {
+    'C�digo': 'codigo', 'Código': 'codigo', 'codigo': 'codigo',
+    'Descripci�n': 'descripcion', 'Descripción': 'descripcion', 'descripcion': 'descripcion',
+    'STOCK': 'stock', 'stock': 'stock', 'PEDIDOS': 'pedidos', 'pedidos': 'pedidos'
+}
+
+def _encoding_csv(archivo_path):
+    try:
+        with open(archivo_path, encoding='utf-8') as f:
+            while f.read(1 << 20):
+                pass
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'latin1'
+
+def leer_archivo(archivo_path):
+    """
+    Lee el archivo completo en un DataFrame (el encoding del CSV se detecta una sola vez).
+    Se lee entero porque los duplicados de 'codigo' se validan sobre todo el archivo y el usuario
+    confirma con la vista previa completa; la carga a la base sí se hace por bloques (importar_a_sql).
+    """
+    ext = os.path.splitext(archivo_path)[1].lower()
+    if ext in ['.xls', '.xlsx']:
+        return pd.read_excel(archivo_path)
+    return pd.read_csv(archivo_path, sep=';', encoding=_encoding_csv(archivo_path))
+
 # --- FUNCIONES DE LIMPIEZA Y NORMALIZACIÓN ---
 def limpiar_texto(texto):
     if pd.isnull(texto):
@@ -172,66 +203,85 @@ def limpiar_dataframe(df):
             df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
     return df
 
-def backup_tabla_sql():
-    from core.database import InventarioDatabaseConnection
-    import pyodbc
+def backup_tabla_sql(db=None, filas_por_insert=500):
+    """
+    Copia la tabla en el servidor (SELECT INTO) y la exporta a un .sql.
+    El archivo se escribe a medida que se leen las filas (iterar_query) y con un INSERT de hasta
+    `filas_por_insert` filas por sentencia, en lugar de un INSERT literal por fila.
+    """
     fecha = datetime.now().strftime('%Y%m%d_%H%M%S')
     backup_table = f"{TABLA_SQL}_backup_{fecha}"
     backup_dir = os.path.join('inventario', 'backups_sql')
     os.makedirs(backup_dir, exist_ok=True)
     backup_file = os.path.join(backup_dir, f"{backup_table}.sql")
-    db = InventarioDatabaseConnection()
-    try:
-        db.conectar()
-        # Crear tabla backup
-        db.ejecutar_query(f"SELECT * INTO {backup_table} FROM {TABLA_SQL}")
-        # Exportar datos a archivo SQL (solo datos, formato INSERT)
-        conn = db.connection
-        if conn is None:
-            raise RuntimeError("No se pudo obtener la conexión a la base de datos para el backup.")
-        cursor = conn.cursor()
-        cursor.execute(f"SELECT * FROM {backup_table}")
-        columns = [column[0] for column in cursor.description]
-        with open(backup_file, 'w', encoding='utf-8') as f:
-            for row in cursor.fetchall():
-                values = []
-                for v in row:
-                    if v is None:
-                        values.append('NULL')
-                    elif isinstance(v, (int, float)):
-                        values.append(str(v))
-                    else:
-                        # Solución robusta: usar format() en vez de f-string para evitar problemas de comillas
-                        values.append("'{}'".format(str(v).replace("'", "''")))
-                sql = f"INSERT INTO {backup_table} ({','.join(columns)}) VALUES ({','.join(values)});\n"
-                f.write(sql)
-        print(f"Backup de la tabla realizado en: {backup_file}")
-    finally:
-        db.cerrar_conexion()
+    db = db or get_db_connection()
+    with db.transaction():
+        db.connection.cursor().execute(f"SELECT * INTO {backup_table} FROM {TABLA_SQL}")
+    with open(backup_file, 'w', encoding='utf-8') as f:
+        columnas = None
+        lote = []
+        for fila in db.iterar_query(f"SELECT * FROM {backup_table}", chunk=filas_por_insert, como_dict=True):
+            if columnas is None:
+                columnas = list(fila.keys())
+            lote.append(f"({','.join(_literal_sql(v) for v in fila.values())})")
+            if len(lote) >= filas_por_insert:
+                _escribir_insert(f, backup_table, columnas, lote)
+                lote = []
+        if lote:
+            _escribir_insert(f, backup_table, columnas, lote)
+    print(f"Backup de la tabla realizado en: {backup_file}")
+    return backup_file
 
-def importar_a_sql(df):
-    db = get_db_connection()
-    try:
-        db.conectar()
-        db.ejecutar_query(f"DELETE FROM {TABLA_SQL}")
-        for _, row in df.iterrows():
-            valores = [row[col] for col in COLUMNS]
-            placeholders = ','.join(['?'] * len(COLUMNS))
-            sql = f"INSERT INTO {TABLA_SQL} ({','.join(COLUMNS)}) VALUES ({placeholders})"
-            try:
-                db.ejecutar_query(sql, valores)
-            except Exception as e:
-                print(f"Error al insertar fila: {e} | Valores: {valores}")
-        print("Importación completada. Los datos están en la base de datos.")
-    finally:
-        db.cerrar_conexion()
+def _literal_sql(valor):
+    if valor is None:
+        return 'NULL'
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return str(valor)
+    return "'{}'".format(str(valor).replace("'", "''"))
+
+def _escribir_insert(archivo, tabla, columnas, valores):
+    archivo.write(f"INSERT INTO {tabla} ({','.join(columnas)}) VALUES\n" + ",\n".join(valores) + ";\n")
+
+def _filas_para_lote(bloque):
+    # Tipos nativos de Python (pyodbc no acepta numpy.int64) y NULL en lugar de NaN
+    bloque = bloque[COLUMNS].astype(object)
+    return bloque.where(bloque.notna(), None).values.tolist()
+
+def importar_a_sql(df, db=None, tamano_bloque=TAMANO_BLOQUE, al_progreso=None):
+    """
+    Reemplaza el contenido de inventario_perfiles por `df` en una sola transacción:
+    1. crea la tabla temporal de carga con las columnas de la tabla destino
+    2. la llena por bloques de `tamano_bloque` filas con ejecutar_lote (fast_executemany)
+    3. vacía inventario_perfiles y copia la tabla de carga con un único INSERT ... SELECT
+    Si algo falla se hace rollback y la tabla queda como estaba (nunca a medio cargar).
+    al_progreso(filas_cargadas, total) se llama después de cada bloque.
+    """
+    db = db or get_db_connection()
+    total = len(df)
+    columnas = ','.join(COLUMNS)
+    placeholders = ','.join(['?'] * len(COLUMNS))
+    with db.transaction():
+        cursor = db.connection.cursor()
+        cursor.execute(f"SELECT TOP 0 {columnas} INTO {TABLA_STAGING} FROM {TABLA_SQL}")
+        cargadas = 0
+        for inicio in range(0, total, tamano_bloque):
+            bloque = df.iloc[inicio:inicio + tamano_bloque]
+            cargadas += db.ejecutar_lote(f"INSERT INTO {TABLA_STAGING} ({columnas}) VALUES ({placeholders})", _filas_para_lote(bloque))
+            if al_progreso:
+                al_progreso(cargadas, total)
+        cursor.execute(f"DELETE FROM {TABLA_SQL}")
+        cursor.execute(f"INSERT INTO {TABLA_SQL} ({columnas}) SELECT {columnas} FROM {TABLA_STAGING}")
+        cursor.execute(f"DROP TABLE {TABLA_STAGING}")
+    print("Importación completada. Los datos están en la base de datos.")
+    return cargadas
 
 # --- FLUJO PRINCIPAL DE IMPORTACIÓN (MODULAR Y UI-FRIENDLY) ---
-def importar_inventario_desde_archivo(archivo_path, usuario_actual, confirmar_importacion_callback=None):
+# El flujo está partido en dos para la UI: preparar_importacion (lectura y limpieza) y ejecutar_importacion
+# (backup y carga) pueden correr en segundo plano, y la confirmación del usuario queda entre ambas.
+def preparar_importacion(archivo_path, usuario_actual):
     """
-    Importa inventario desde un archivo CSV/Excel a la base de datos, siguiendo el flujo seguro y centralizado.
-    Solo permite ejecución si el usuario es admin.
-    Devuelve un dict con el resultado y mensajes para la UI.
+    Valida permisos y archivo, lo lee, limpia y normaliza, y genera el CSV limpio.
+    Devuelve (df, resultado); df es None si hubo errores (ver resultado["errores"]).
     """
     resultado = {"exito": False, "mensajes": [], "advertencias": [], "errores": []}
     try:
@@ -242,22 +292,8 @@ def importar_inventario_desde_archivo(archivo_path, usuario_actual, confirmar_im
         # 2. Validar archivo
         if not os.path.exists(archivo_path):
             raise FileNotFoundError(f"Archivo no encontrado: {archivo_path}")
-        ext = os.path.splitext(archivo_path)[1].lower()
-        if ext in ['.xls', '.xlsx']:
-            df = pd.read_excel(archivo_path)
-        else:
-            try:
-                df = pd.read_csv(archivo_path, sep=';', encoding='utf-8')
-            except UnicodeDecodeError:
-                df = pd.read_csv(archivo_path, sep=';', encoding='latin1')
-        # 3. Renombrar encabezados comunes
-        mapeo = {
-            'C�digo': 'codigo', 'Código': 'codigo', 'codigo': 'codigo',
-            'Descripci�n': 'descripcion', 'Descripción': 'descripcion', 'descripcion': 'descripcion',
-            'STOCK': 'stock', 'stock': 'stock', 'PEDIDOS': 'pedidos', 'pedidos': 'pedidos'
-        }
-        df = df.rename(columns=mapeo)
-        # 4. Limpiar y normalizar
+        # 3 y 4. Leer, renombrar encabezados comunes, limpiar y normalizar
+        df = leer_archivo(archivo_path).rename(columns=MAPEO_ENCABEZADOS)
         df = limpiar_dataframe(df)
         df = agregar_columnas_faltantes(df)
         df = desglose_descripcion(df)
@@ -272,34 +308,54 @@ def importar_inventario_desde_archivo(archivo_path, usuario_actual, confirmar_im
         df.to_csv(limpio_path, sep=';', index=False, encoding='utf-8')
         resultado["mensajes"].append(f"Archivo limpio generado: {limpio_path}")
         resultado["mensajes"].append(f"Total filas listas para importar: {len(df)}")
-        # 7. Confirmar importación (callback UI o automático)
-        if confirmar_importacion_callback:
-            if not confirmar_importacion_callback(df, resultado):
-                resultado["mensajes"].append("Importación cancelada por el usuario.")
-                return resultado
-        # 8. Backup antes de importar
-        try:
-            backup_tabla_sql()
-            resultado["mensajes"].append("Backup de la tabla realizado correctamente.")
-        except Exception as e:
-            logger.error(f"Error en backup: {e}")
-            resultado["advertencias"].append(f"No se pudo realizar backup: {e}")
-        # 9. Importar a SQL
-        try:
-            importar_a_sql(df)
-            resultado["exito"] = True
-            resultado["mensajes"].append(f"Inventario importado correctamente ({len(df)} filas).")
-            logger.info(f"Inventario importado por {usuario_actual}. Filas: {len(df)}")
-        except Exception as e:
-            logger.error(f"Error al importar inventario: {e}")
-            resultado["errores"].append(f"Error al importar inventario: {e}")
+        return df, resultado
     except PermisoDenegadoError as e:
         resultado["errores"].append(str(e))
     except Exception as e:
         logger.error(f"Error general en importación: {e}")
         resultado["errores"].append(f"Error general: {e}")
+    return None, resultado
+
+def ejecutar_importacion(df, usuario_actual, resultado, al_progreso=None, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Hace el backup y reemplaza inventario_perfiles por `df` (ya confirmado por el usuario).
+    al_progreso(filas_cargadas, total) informa el avance de la carga a la base. Devuelve `resultado` actualizado.
+    """
+    # 8. Backup antes de importar
+    try:
+        backup_tabla_sql()
+        resultado["mensajes"].append("Backup de la tabla realizado correctamente.")
+    except Exception as e:
+        logger.error(f"Error en backup: {e}")
+        resultado["advertencias"].append(f"No se pudo realizar backup: {e}")
+    # 9. Importar a SQL
+    try:
+        importar_a_sql(df, tamano_bloque=tamano_bloque, al_progreso=al_progreso)
+        resultado["exito"] = True
+        resultado["mensajes"].append(f"Inventario importado correctamente ({len(df)} filas).")
+        logger.info(f"Inventario importado por {usuario_actual}. Filas: {len(df)}")
+    except Exception as e:
+        logger.error(f"Error al importar inventario: {e}")
+        resultado["errores"].append(f"Error al importar inventario: {e}")
     return resultado
 
+def importar_inventario_desde_archivo(archivo_path, usuario_actual, confirmar_importacion_callback=None,
+                                      al_progreso=None, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Importa inventario desde un archivo CSV/Excel a la base de datos, siguiendo el flujo seguro y centralizado.
+    Solo permite ejecución si el usuario es admin.
+    al_progreso(filas_cargadas, total) informa el avance de la carga a la base.
+    Devuelve un dict con el resultado y mensajes para la UI.
+    """
+    df, resultado = preparar_importacion(archivo_path, usuario_actual)
+    if df is None:
+        return resultado
+    # 7. Confirmar importación (callback UI o automático)
+    if confirmar_importacion_callback and not confirmar_importacion_callback(df, resultado):
+        resultado["mensajes"].append("Importación cancelada por el usuario.")
+        return resultado
+    return ejecutar_importacion(df, usuario_actual, resultado, al_progreso=al_progreso, tamano_bloque=tamano_bloque)
+
 # --- INTEGRACIÓN CLI PARA TESTEO MANUAL ---
 if __name__ == '__main__':
     print("\n--- IMPORTADOR DE INVENTARIO (solo admin) ---")
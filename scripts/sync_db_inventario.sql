@@ -527,3 +527,35 @@ PRINT 'Existe la columna stock_actual que parece cumplir la misma función.'
 PRINT 'Si stock es efectivamente redundante con stock_actual,'
 PRINT 'considere eliminarla manualmente después de una revisión cuidadosa:'
 PRINT '-- ALTER TABLE inventario_perfiles DROP COLUMN stock;\';
+GO
+
+-- Sincronización incremental por rowversion (core/delta_sync.py)
+-- Cada tabla sincronizada necesita una columna ROWVERSION; las bajas se anotan en bajas_sincronizacion
+-- con su propia rowversion para que los refrescos incrementales también quiten las filas borradas.
+IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME = 'bajas_sincronizacion')
+BEGIN
+    CREATE TABLE bajas_sincronizacion (
+        id INT IDENTITY(1,1) PRIMARY KEY,
+        tabla NVARCHAR(128) NOT NULL,
+        id_registro INT NOT NULL,
+        fecha DATETIME DEFAULT GETDATE(),
+        version ROWVERSION
+    );
+    CREATE INDEX IX_bajas_sincronizacion_tabla_version ON bajas_sincronizacion (tabla, version);
+END
+GO
+
+IF COL_LENGTH('obras', 'rowversion') IS NULL ALTER TABLE obras ADD rowversion ROWVERSION;
+IF OBJECT_ID('vidrios', 'U') IS NOT NULL AND COL_LENGTH('vidrios', 'rowversion') IS NULL ALTER TABLE vidrios ADD rowversion ROWVERSION;
+GO
+
+IF OBJECT_ID('obras', 'U') IS NOT NULL
+    EXEC('CREATE OR ALTER TRIGGER trg_obras_bajas_sincronizacion ON obras AFTER DELETE AS
+          INSERT INTO bajas_sincronizacion (tabla, id_registro) SELECT ''obras'', id FROM deleted;');
+IF OBJECT_ID('inventario_perfiles', 'U') IS NOT NULL
+    EXEC('CREATE OR ALTER TRIGGER trg_inventario_perfiles_bajas_sincronizacion ON inventario_perfiles AFTER DELETE AS
+          INSERT INTO bajas_sincronizacion (tabla, id_registro) SELECT ''inventario_perfiles'', id FROM deleted;');
+IF OBJECT_ID('vidrios', 'U') IS NOT NULL
+    EXEC('CREATE OR ALTER TRIGGER trg_vidrios_bajas_sincronizacion ON vidrios AFTER DELETE AS
+          INSERT INTO bajas_sincronizacion (tabla, id_registro) SELECT ''vidrios'', id_vidrio FROM deleted;');
+GO
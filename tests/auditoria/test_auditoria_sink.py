@@ -0,0 +1,53 @@
+import pytest
+from modules.auditoria import sink as sink_mod
+from modules.auditoria.model import AuditoriaModel
+from modules.auditoria.sink import AuditoriaSink
+
+"""
+Tests del sink de auditoría: encolado sin tocar la base, inserción por lotes con ejecutar_lote,
+conservación ante fallas y recuperación desde el spool al reiniciar.
+Se usa la base sqlite3 en memoria compartida de tests/conftest.py (base_sqlite).
+"""
+
+@pytest.fixture
+def db(base_sqlite):
+    return base_sqlite("test_auditoria_sink", "CREATE TABLE auditorias_sistema (usuario_id INTEGER, modulo_afectado TEXT, tipo_evento TEXT, detalle TEXT, ip_origen TEXT)")
+
+def _contar(db):
+    return db.ejecutar_query("SELECT COUNT(*) FROM auditorias_sistema")[0][0]
+
+def test_registrar_encola_y_flush_inserta_por_lotes(db, tmp_path):
+    sink = AuditoriaSink(db, tamano_lote=3, spool_path=str(tmp_path / "spool.jsonl"))
+    for i in range(7):
+        assert sink.registrar(i, "obras", "alta", f"obra {i}", "")
+    assert _contar(db) == 0
+    assert sink.flush() == 7
+    assert _contar(db) == 7
+    assert sink.pendientes() == 0
+    assert not (tmp_path / "spool.jsonl").exists()
+
+def test_falla_de_base_conserva_eventos_y_spool_sobrevive_reinicio(db, tmp_path):
+    spool = str(tmp_path / "spool.jsonl")
+    class BaseCaida:
+        def transaction(self):
+            raise RuntimeError("sin conexión")
+    sink = AuditoriaSink(BaseCaida(), spool_path=spool)
+    sink.registrar(1, "inventario", "ajuste", "stock", "10.0.0.1")
+    sink.registrar(2, "inventario", "ajuste", "stock", "10.0.0.2")
+    # Encolar no toca el disco: el spool se escribe al terminar el flush con lo que quedó pendiente
+    assert not (tmp_path / "spool.jsonl").exists()
+    assert sink.flush() == 0
+    assert len((tmp_path / "spool.jsonl").read_text(encoding="utf-8").splitlines()) == 2
+    assert sink.pendientes() == 2
+    reiniciado = AuditoriaSink(db, spool_path=spool)
+    assert reiniciado.pendientes() == 2
+    reiniciado.flush()
+    assert db.ejecutar_query("SELECT usuario_id, ip_origen FROM auditorias_sistema ORDER BY usuario_id") == [(1, "10.0.0.1"), (2, "10.0.0.2")]
+
+def test_modelo_encola_con_sink_activo(db, tmp_path, monkeypatch):
+    sink = AuditoriaSink(db, spool_path=str(tmp_path / "spool.jsonl"))
+    monkeypatch.setattr(sink_mod, "_SINK", sink)
+    assert AuditoriaModel(db).registrar_evento(1, "usuarios", "login", "ok", "")
+    assert _contar(db) == 0
+    sink.detener()
+    assert _contar(db) == 1
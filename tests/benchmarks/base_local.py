@@ -0,0 +1,294 @@
+import csv
+import glob
+import os
+import random
+import re
+import sqlite3
+from datetime import datetime, timedelta
+from core.database import BaseDatabaseConnection
+from core.offline import traducir_a_sqlite
+
+"""
+Base de datos local para los benchmarks: un archivo SQLite con el esquema de scripts/db/*.sql más las
+columnas y tablas que agregan los scripts/sync_db_*.sql, sembrado con el catálogo de data_inventario/*.csv
+repetido hasta la escala pedida.
+
+BaseBenchmark es una BaseDatabaseConnection real con la conexión SQLite fijada, así los modelos pasan por
+el mismo ejecutar_query / iterar_query / ejecutar_lote / transaction que en producción (incluida la
+instrumentación de core/metricas_sql.py). La conexión cuenta los viajes al servidor que haría pyodbc:
+cada execute/executemany y cada commit/rollback explícito.
+"""
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Escalas disponibles: filas de las tablas grandes (perfiles, movimientos y auditoría)
+ESCALAS = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1M": 1_000_000}
+
+# Filas de cada tabla sembrada como fracción de la escala (mínimo 10)
+PROPORCIONES = {
+    "inventario_perfiles": 1,
+    "movimientos_stock": 1,
+    "auditorias_sistema": 1,
+    "obras": 0.01,
+    "perfiles_por_obra": 0.1,
+    "pedidos_material": 0.1,
+    "pedidos": 0.1,
+    "entregas_obras": 0.02,
+    "checklist_entrega": 0.1,
+}
+
+# Tabla a la que apunta cada columna de referencia (para sembrar ids existentes)
+REFERENCIAS = {
+    "id_obra": "obras",
+    "id_perfil": "inventario_perfiles",
+    "id_item": "inventario_perfiles",
+    "id_entrega": "entregas_obras",
+    "id_pedido": "pedidos",
+}
+
+ESTADOS = ("Pendiente", "En proceso", "Entregado", "Cancelado")
+MODULOS = ("Inventario", "Obras", "Pedidos", "Logística", "Vidrios", "Herrajes")
+
+_RE_CREATE = re.compile(r"CREATE\s+TABLE\s+(?:\w+\.\w*\.)?\[?(\w+)\]?\s*\(", re.IGNORECASE)
+_RE_ALTER_ADD = re.compile(r"ALTER\s+TABLE\s+\[?(\w+)\]?\s+ADD\s+(?!CONSTRAINT\b)\[?(\w+)\]?\s+([^;\n]+)", re.IGNORECASE)
+_RE_TIPO = re.compile(r"\w+(\s*\([^)]*\))?")
+_RE_RESTRICCION = re.compile(r"^(CONSTRAINT|PRIMARY\s+KEY|FOREIGN\s+KEY|UNIQUE\s*\(|CHECK|INDEX)\b", re.IGNORECASE)
+
+def _partir_columnas(cuerpo):
+    """Divide el cuerpo de un CREATE TABLE en definiciones, respetando las comas entre paréntesis."""
+    partes, nivel, actual = [], 0, []
+    for caracter in cuerpo:
+        if caracter == "(":
+            nivel += 1
+        elif caracter == ")":
+            nivel -= 1
+        if caracter == "," and nivel == 0:
+            partes.append("".join(actual))
+            actual = []
+        else:
+            actual.append(caracter)
+    partes.append("".join(actual))
+    return [parte.strip() for parte in partes]
+
+def _tipo_sqlite(definicion):
+    """Tipo y DEFAULT de una columna T-SQL en sintaxis que SQLite acepta; None para ROWVERSION."""
+    tipo = definicion.split()[0].upper() if definicion.split() else ""
+    if tipo in ("ROWVERSION", "TIMESTAMP"):
+        return None
+    if "IDENTITY" in definicion.upper():
+        return "INTEGER PRIMARY KEY AUTOINCREMENT"
+    tipo = re.sub(r"\(\s*MAX\s*\)|\s+", "", _RE_TIPO.match(definicion).group(0), flags=re.IGNORECASE)
+    default = re.search(r"DEFAULT\s+(\(?GETDATE\(\)\)?|'[^']*'|-?[\d.]+)", definicion, re.IGNORECASE)
+    if default:
+        valor = "CURRENT_TIMESTAMP" if "GETDATE" in default.group(1).upper() else default.group(1)
+        tipo += f" DEFAULT {valor}"
+    return tipo
+
+def _tablas_de_script(texto, tablas):
+    texto = re.sub(r"--[^\n]*", "", texto)
+    for encontrado in _RE_CREATE.finditer(texto):
+        nivel, fin = 1, encontrado.end()
+        while nivel and fin < len(texto):
+            nivel += {"(": 1, ")": -1}.get(texto[fin], 0)
+            fin += 1
+        columnas = tablas.setdefault(encontrado.group(1).lower(), {})
+        for definicion in _partir_columnas(texto[encontrado.end():fin - 1]):
+            if not definicion or _RE_RESTRICCION.match(definicion):
+                continue
+            nombre, _, resto = definicion.partition(" ")
+            columnas.setdefault(nombre.strip("[]").lower(), resto.strip())
+    for tabla, columna, definicion in _RE_ALTER_ADD.findall(texto):
+        if tabla.lower() in tablas:
+            tablas[tabla.lower()].setdefault(columna.lower(), definicion.strip())
+
+def leer_esquema(raiz=RAIZ):
+    """{tabla: {columna: definición T-SQL}} de scripts/db/*.sql completado con scripts/sync_db_*.sql."""
+    scripts = sorted(
+        ruta for ruta in glob.glob(os.path.join(raiz, "scripts", "db", "*.sql"))
+        if not os.path.basename(ruta).startswith(("00_", "insert_"))
+    ) + sorted(glob.glob(os.path.join(raiz, "scripts", "sync_db_*.sql")))
+    tablas = {}
+    for ruta in scripts:
+        with open(ruta, encoding="utf-8", errors="replace") as archivo:
+            _tablas_de_script(archivo.read(), tablas)
+    return tablas
+
+def crear_esquema(conn, tablas):
+    for tabla, columnas in tablas.items():
+        definiciones = []
+        for columna, definicion in columnas.items():
+            tipo = _tipo_sqlite(definicion)
+            if tipo is not None:
+                definiciones.append(f'"{columna}" {tipo}')
+        conn.execute(f'CREATE TABLE "{tabla}" ({", ".join(definiciones)})')
+    conn.execute('CREATE INDEX ix_movimientos_perfil ON movimientos_stock (id_perfil)')
+    conn.execute('CREATE INDEX ix_auditorias_modulo ON auditorias_sistema (modulo_afectado)')
+
+def leer_catalogo(raiz=RAIZ):
+    """Filas de data_inventario/inventario_formato_final.csv (codigo;descripcion;tipo;linea;acabado;...)."""
+    with open(os.path.join(raiz, "data_inventario", "inventario_formato_final.csv"), encoding="utf-8") as archivo:
+        return list(csv.DictReader(archivo, delimiter=";"))
+
+def _valor(rng, tabla, columna, definicion, cantidades, indice):
+    tipo = definicion.split()[0].upper() if definicion else ""
+    destino = REFERENCIAS.get(columna)
+    if destino:
+        return rng.randint(1, max(cantidades.get(destino, 1), 1))
+    if columna == "estado":
+        return rng.choice(ESTADOS)
+    if columna in ("modulo", "modulo_afectado"):
+        return rng.choice(MODULOS)
+    if tipo.startswith(("INT", "BIGINT", "SMALLINT", "BIT")):
+        return rng.randint(0, 1) if tipo == "BIT" else rng.randint(1, 100)
+    if tipo.startswith(("DECIMAL", "FLOAT", "NUMERIC", "MONEY")):
+        return round(rng.uniform(0, 500), 2)
+    if tipo.startswith(("DATE", "DATETIME")):
+        return (datetime(2024, 1, 1) + timedelta(minutes=indice * 7 % 525_600)).strftime("%Y-%m-%d %H:%M:%S")
+    return f"{columna}-{indice % 997}"
+
+def _filas_perfiles(catalogo, cantidad, columnas):
+    """El catálogo real repetido; el código lleva el número de copia para respetar el UNIQUE."""
+    for indice in range(cantidad):
+        base = catalogo[indice % len(catalogo)]
+        copia = indice // len(catalogo)
+        datos = {
+            "codigo": base["codigo"] if copia == 0 else f"{base['codigo']}-{copia}",
+            "nombre": base["descripcion"][:100],
+            "descripcion": base["descripcion"],
+            "tipo": base["tipo"],
+            "tipo_material": base["linea"],
+            "acabado": base["acabado"],
+            "longitud": base["longitud"],
+            "unidad": "u",
+            "stock_actual": float(base["stock"] or 0) + indice % 40,
+            "stock_minimo": 5,
+            "stock": float(base["stock"] or 0),
+            "pedido": base["pedidos"],
+        }
+        yield tuple(datos.get(columna) for columna in columnas)
+
+def sembrar(conn, tablas, escala, semilla=20240601, raiz=RAIZ):
+    """Llena las tablas de PROPORCIONES según la escala. Determinista para una misma semilla. Devuelve {tabla: filas}."""
+    rng = random.Random(semilla)
+    cantidades = {tabla: max(int(escala * proporcion), 10) for tabla, proporcion in PROPORCIONES.items()}
+    # Primero las tablas referenciadas, así los ids sembrados apuntan a filas existentes
+    orden = sorted(PROPORCIONES, key=lambda tabla: tabla not in REFERENCIAS.values())
+    catalogo = leer_catalogo(raiz)
+    for tabla in orden:
+        columnas = [
+            columna for columna, definicion in tablas[tabla].items()
+            if _tipo_sqlite(definicion) not in (None, "INTEGER PRIMARY KEY AUTOINCREMENT")
+        ]
+        if tabla == "inventario_perfiles":
+            filas = _filas_perfiles(catalogo, cantidades[tabla], columnas)
+        else:
+            filas = (
+                tuple(_valor(rng, tabla, columna, tablas[tabla][columna], cantidades, indice) for columna in columnas)
+                for indice in range(cantidades[tabla])
+            )
+        marcadores = ", ".join("?" for _ in columnas)
+        nombres = ", ".join(f'"{columna}"' for columna in columnas)
+        conn.executemany(f'INSERT INTO "{tabla}" ({nombres}) VALUES ({marcadores})', filas)
+    conn.commit()
+    return cantidades
+
+def crear_base_local(ruta, escala, semilla=20240601):
+    """Crea y siembra el archivo SQLite en `ruta` (lo reemplaza si existe). Devuelve {tabla: filas}."""
+    if os.path.exists(ruta):
+        os.remove(ruta)
+    conn = sqlite3.connect(ruta)
+    try:
+        tablas = leer_esquema()
+        crear_esquema(conn, tablas)
+        return sembrar(conn, tablas, escala, semilla)
+    finally:
+        conn.close()
+
+class CursorMedido:
+    """Cursor estilo pyodbc sobre SQLite: traduce el T-SQL y cuenta cada sentencia como un viaje."""
+    def __init__(self, conexion):
+        self._conexion = conexion
+        self._cursor = conexion.sqlite.cursor()
+        self.fast_executemany = False
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def execute(self, query, parametros=()):
+        query, parametros = traducir_a_sqlite(query, parametros)
+        self._conexion.viajes += 1
+        try:
+            self._cursor.execute(query, parametros)
+        except sqlite3.Error as e:
+            self._conexion.errores.append(f"{e}: {' '.join(query.split())[:120]}")
+            raise
+        return self
+
+    def executemany(self, query, filas):
+        traducida, _ = traducir_a_sqlite(query)
+        self._conexion.viajes += 1
+        try:
+            self._cursor.executemany(traducida, filas)
+        except sqlite3.Error as e:
+            self._conexion.errores.append(f"{e}: {' '.join(traducida.split())[:120]}")
+            raise
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, cantidad):
+        return self._cursor.fetchmany(cantidad)
+
+    def close(self):
+        self._cursor.close()
+
+class ConexionMedida:
+    """Conexión SQLite con la interfaz que BaseDatabaseConnection usa de pyodbc."""
+    def __init__(self, ruta):
+        self.sqlite = sqlite3.connect(ruta)
+        self.autocommit = True
+        self.viajes = 0
+        self.errores = []
+
+    def cursor(self):
+        return CursorMedido(self)
+
+    def commit(self):
+        self.viajes += 1
+        self.sqlite.commit()
+
+    def rollback(self):
+        self.viajes += 1
+        self.sqlite.rollback()
+
+    def close(self):
+        self.sqlite.close()
+
+class BaseBenchmark(BaseDatabaseConnection):
+    """BaseDatabaseConnection sobre el archivo SQLite sembrado, sin driver ODBC ni pool."""
+    def __init__(self, ruta, database="inventario"):
+        super().__init__(database)
+        self.connection = ConexionMedida(ruta)
+
+    @staticmethod
+    def detectar_driver_odbc():
+        return None
+
+    @property
+    def medida(self):
+        return self._conexion_fija
+
+    def cerrar_conexion(self):
+        conn = self._conexion_fija
+        if conn is not None:
+            self._conexion_fija = None
+            conn.close()
@@ -0,0 +1,196 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+from core.cache import invalidar_caches
+from core.logger import Logger
+from core.metricas_sql import metricas_sql
+from modules.auditoria.model import AuditoriaModel
+from modules.inventario.model import InventarioModel
+from modules.logistica.model import LogisticaModel
+from modules.obras.model import ObrasModel
+from modules.pedidos.model import PedidosModel
+from tests.benchmarks.base_local import ESCALAS, BaseBenchmark, crear_base_local
+
+"""
+Benchmark de los caminos calientes de los modelos contra la base local sembrada (base_local.py).
+
+Cada operación se repite `repeticiones` veces (con las cachés de lectura de core/cache.py vaciadas antes
+de cada una, para medir la consulta y no la caché) y se registra la mediana en ms, los viajes al servidor
+y las filas devueltas. Los resultados se comparan con linea_base.json:
+- más viajes que la línea base es siempre una regresión (no depende de la máquina ni de la escala);
+- un tiempo mayor a la línea base por más de `tolerancia` (y de PISO_MS, para no marcar ruido) también;
+- una operación que falla en la base local es una regresión.
+
+Uso:
+    python -m tests.benchmarks.suite --escala 10k --escala 100k            # compara con la línea base
+    python -m tests.benchmarks.suite --escala 10k --guardar                # reemplaza la línea base de 10k
+
+Los tiempos de la línea base dependen del equipo donde se guardaron: regenerarla en la misma máquina
+antes de comparar cambios de rendimiento. Las sentencias propias de SQL Server (OUTPUT, UPDLOCK,
+MIN_ACTIVE_ROWVERSION) no tienen equivalente en SQLite y no se miden acá.
+"""
+
+LINEA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "linea_base.json")
+
+# Diferencia mínima en ms para considerar un tiempo como regresión
+PISO_MS = 2.0
+
+COLUMNAS_GRILLA = ("id", "codigo", "descripcion", "tipo", "acabado", "stock_actual")
+
+def _operaciones(modelos, cantidades):
+    """[(nombre, función sin argumentos)] de los caminos calientes de cada modelo."""
+    inventario, obras, pedidos, logistica, auditoria = modelos
+    perfil = cantidades["inventario_perfiles"] // 2
+    obra = cantidades["obras"] // 2
+    pedido = cantidades["pedidos"] // 2
+    entrega = cantidades["entregas_obras"] // 2
+    movimientos = [(perfil + i, 1, "Ingreso", "benchmark") for i in range(200)]
+    return [
+        ("inventario.obtener_items", inventario.obtener_items),
+        ("inventario.iterar_items", lambda: sum(1 for _ in inventario.iterar_items())),
+        ("inventario.iterar_productos", lambda: sum(1 for _ in inventario.iterar_productos())),
+        ("inventario.obtener_pagina_grilla", lambda: inventario.obtener_pagina_grilla(perfil, 200, COLUMNAS_GRILLA)),
+        ("inventario.obtener_stock_items", lambda: inventario.obtener_stock_items(range(1, 5001))),
+        ("inventario.obtener_movimientos", lambda: inventario.obtener_movimientos(perfil)),
+        ("inventario.obtener_items_bajo_stock", inventario.obtener_items_bajo_stock),
+        ("inventario.obtener_estados_pedidos_por_obras", inventario.obtener_estados_pedidos_por_obras),
+        ("inventario.registrar_movimientos_lote", lambda: inventario.registrar_movimientos_lote(movimientos)),
+        ("obras.obtener_datos_obras", obras.obtener_datos_obras),
+        ("obras.obtener_obra_por_id", lambda: obras.obtener_obra_por_id(obra)),
+        ("pedidos.obtener_pedidos", pedidos.obtener_pedidos),
+        ("pedidos.actualizar_estado_pedido", lambda: pedidos.actualizar_estado_pedido(pedido, "En proceso")),
+        ("logistica.obtener_entregas", logistica.obtener_entregas),
+        ("logistica.obtener_checklist_por_entrega", lambda: logistica.obtener_checklist_por_entrega(entrega)),
+        ("logistica.iterar_datos_inventario", lambda: sum(1 for _ in logistica.iterar_datos_inventario())),
+        ("auditoria.obtener_auditorias", lambda: auditoria.obtener_auditorias({"modulo_afectado": "Obras"})),
+        ("auditoria.iterar_auditorias", lambda: sum(1 for _ in auditoria.iterar_auditorias())),
+        ("auditoria.registrar_evento", lambda: auditoria.registrar_evento(1, "Obras", "benchmark", "detalle", "127.0.0.1")),
+    ]
+
+def _filas(resultado):
+    if isinstance(resultado, bool) or resultado is None:
+        return 0
+    if isinstance(resultado, int):
+        return resultado
+    if isinstance(resultado, tuple):
+        return 1
+    try:
+        return len(resultado)
+    except TypeError:
+        return 0
+
+def medir(ruta, cantidades, repeticiones=5):
+    """{operación: {'ms', 'viajes', 'filas', 'errores'}} sobre la base local ya sembrada en `ruta`."""
+    conexiones = [BaseBenchmark(ruta, database) for database in ("inventario", "obras", "pedidos", "logistica", "auditoria")]
+    modelos = (
+        InventarioModel(conexiones[0]), ObrasModel(conexiones[1]), PedidosModel(conexiones[2]),
+        LogisticaModel(conexiones[3]), AuditoriaModel(conexiones[4]),
+    )
+    resultados = {}
+    try:
+        # Un error de SQL no debe abrir el popup modal (queda registrado en la conexión) y las lecturas
+        # completas de las escalas grandes no deben llenar el log de consultas lentas
+        with patch.object(Logger, "log_error_popup", Logger.error), patch.object(metricas_sql(), "umbral_lenta_ms", float("inf")):
+            for nombre, funcion in _operaciones(modelos, cantidades):
+                tiempos, errores = [], []
+                for _ in range(repeticiones):
+                    invalidar_caches()
+                    viajes_antes = sum(conexion.medida.viajes for conexion in conexiones)
+                    errores_antes = [len(conexion.medida.errores) for conexion in conexiones]
+                    inicio = time.perf_counter()
+                    resultado = funcion()
+                    tiempos.append(time.perf_counter() - inicio)
+                    viajes = sum(conexion.medida.viajes for conexion in conexiones) - viajes_antes
+                    for conexion, antes in zip(conexiones, errores_antes):
+                        errores.extend(conexion.medida.errores[antes:])
+                resultados[nombre] = {
+                    'ms': round(statistics.median(tiempos) * 1000, 3),
+                    'viajes': viajes,
+                    'filas': _filas(resultado),
+                    'errores': sorted(set(errores)),
+                }
+    finally:
+        for conexion in conexiones:
+            conexion.cerrar_conexion()
+    return resultados
+
+def ejecutar_escala(escala, repeticiones=5, directorio=None):
+    """Siembra una base local de la escala dada (clave de ESCALAS), mide y la borra."""
+    with tempfile.TemporaryDirectory(dir=directorio) as temporal:
+        ruta = os.path.join(temporal, f"benchmark_{escala}.db")
+        cantidades = crear_base_local(ruta, ESCALAS[escala])
+        return medir(ruta, cantidades, repeticiones)
+
+def comparar(resultados, linea_base, tolerancia=0.5, piso_ms=PISO_MS):
+    """Regresiones de `resultados` frente a la línea base de la misma escala, como textos."""
+    regresiones = []
+    for nombre, actual in resultados.items():
+        if actual['errores']:
+            regresiones.append(f"{nombre}: falló en la base local ({actual['errores'][0]})")
+        base = linea_base.get(nombre)
+        if base is None:
+            continue
+        if actual['viajes'] > base['viajes']:
+            regresiones.append(f"{nombre}: {base['viajes']} -> {actual['viajes']} viajes")
+        if actual['ms'] > base['ms'] * (1 + tolerancia) and actual['ms'] - base['ms'] > piso_ms:
+            regresiones.append(f"{nombre}: {base['ms']:.1f} -> {actual['ms']:.1f} ms")
+    return regresiones
+
+def leer_linea_base(ruta=LINEA_BASE):
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+def guardar_linea_base(por_escala, ruta=LINEA_BASE):
+    """Reemplaza en el archivo las escalas medidas y conserva las demás."""
+    linea_base = leer_linea_base(ruta)
+    for escala, resultados in por_escala.items():
+        linea_base[escala] = {
+            nombre: {clave: datos[clave] for clave in ('ms', 'viajes', 'filas')}
+            for nombre, datos in resultados.items()
+        }
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump(linea_base, archivo, indent=2, ensure_ascii=False, sort_keys=True)
+        archivo.write("\n")
+
+def _imprimir(escala, resultados, linea_base):
+    print(f"\n== {escala} ==")
+    print(f"{'operación':45} {'ms':>10} {'base ms':>10} {'viajes':>7} {'filas':>9}")
+    for nombre, datos in resultados.items():
+        base = linea_base.get(nombre, {}).get('ms')
+        print(f"{nombre:45} {datos['ms']:10.2f} {base if base is not None else '-':>10} {datos['viajes']:7} {datos['filas']:9}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de modelos contra una base local sembrada.")
+    parser.add_argument("--escala", action="append", choices=sorted(ESCALAS), help="Escala a medir (se puede repetir). Por defecto 10k.")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--tolerancia", type=float, default=0.5, help="Aumento de tiempo tolerado (0.5 = +50%%).")
+    parser.add_argument("--guardar", action="store_true", help="Guarda los resultados como nueva línea base.")
+    parser.add_argument("--linea-base", default=LINEA_BASE)
+    parser.add_argument("--directorio", default=None, help="Directorio para el archivo SQLite temporal.")
+    args = parser.parse_args(argv)
+    linea_base = leer_linea_base(args.linea_base)
+    por_escala = {}
+    regresiones = []
+    for escala in args.escala or ["10k"]:
+        resultados = por_escala[escala] = ejecutar_escala(escala, args.repeticiones, args.directorio)
+        _imprimir(escala, resultados, linea_base.get(escala, {}))
+        regresiones += [f"[{escala}] {texto}" for texto in comparar(resultados, linea_base.get(escala, {}), args.tolerancia)]
+    if args.guardar:
+        guardar_linea_base(por_escala, args.linea_base)
+        print(f"\nLínea base guardada en {args.linea_base}")
+        return 0
+    if regresiones:
+        print("\nRegresiones:\n" + "\n".join(regresiones))
+        return 1
+    print("\nSin regresiones.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
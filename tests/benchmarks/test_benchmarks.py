@@ -0,0 +1,33 @@
+from tests.benchmarks.base_local import ESCALAS, crear_base_local, leer_esquema
+from tests.benchmarks.suite import comparar, leer_linea_base, medir
+
+"""
+Tests de la suite de benchmarks (tests/benchmarks): la base local se arma con el esquema de los scripts,
+todas las operaciones corren sin errores y ninguna hace más viajes al servidor que en la línea base.
+Los viajes no dependen de la escala, así que se verifican con la escala chica sin medir tiempos.
+"""
+
+def test_esquema_une_scripts_db_y_sync_db():
+    tablas = leer_esquema()
+    # obras.sql no tiene 'fecha' ni auditoria.sql 'modulo_afectado': los agregan los sync_db_*.sql
+    assert {"id", "nombre", "fecha", "fecha_entrega"} <= set(tablas["obras"])
+    assert {"modulo_afectado", "tipo_evento", "detalle"} <= set(tablas["auditorias_sistema"])
+    assert "usar" not in tablas["inventario_perfiles"]  # los comentarios de los scripts no agregan columnas
+
+def test_operaciones_sin_errores_ni_viajes_de_mas(tmp_path):
+    ruta = str(tmp_path / "benchmark.db")
+    cantidades = crear_base_local(ruta, ESCALAS["1k"])
+    resultados = medir(ruta, cantidades, repeticiones=1)
+    assert resultados["inventario.obtener_items"]["filas"] == 1000
+    linea_base = leer_linea_base()["10k"]
+    assert set(resultados) == set(linea_base)
+    sin_tiempos = {nombre: dict(datos, ms=0) for nombre, datos in resultados.items()}
+    assert comparar(sin_tiempos, linea_base) == []
+
+def test_comparar_detecta_viajes_tiempos_y_errores():
+    base = {"a": {"ms": 10, "viajes": 1, "filas": 5}, "b": {"ms": 10, "viajes": 2, "filas": 5}}
+    actual = {
+        "a": {"ms": 20, "viajes": 3, "filas": 5, "errores": []},
+        "b": {"ms": 11, "viajes": 2, "filas": 5, "errores": ["no such column: x"]},
+    }
+    assert comparar(actual, base) == ["a: 1 -> 3 viajes", "a: 10.0 -> 20.0 ms", "b: falló en la base local (no such column: x)"]
@@ -33,6 +33,11 @@ def model():
             cur.execute(q, p)
             self.connection.commit()
             return cur.fetchall()
+        def ejecutar_lote(self, q, filas):
+            filas = list(filas)
+            self.connection.cursor().executemany(q, filas)
+            self.connection.commit()
+            return len(filas)
         def transaction(self, timeout=30, retries=2):
             class Tx:
                 def __enter__(self): return self
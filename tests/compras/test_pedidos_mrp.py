@@ -0,0 +1,80 @@
+import sqlite3
+import pytest
+pytest.importorskip("numpy")
+from modules.pedidos.model import PedidosModel
+from modules.pedidos.mrp import calcular_plan_compras
+
+"""
+Tests del MRP consolidado (modules/pedidos/mrp.py): la demanda de todas las obras abiertas se netea una vez
+por material contra stock, compras abiertas y pedidos en tránsito, y se emite un pedido por proveedor.
+"""
+
+ESQUEMA = """
+    CREATE TABLE obras (id INTEGER PRIMARY KEY, nombre TEXT, estado TEXT);
+    CREATE TABLE inventario_perfiles (id_perfil INTEGER PRIMARY KEY, stock_actual REAL, proveedor TEXT, precio_unitario REAL);
+    CREATE TABLE perfiles_por_obra (id_obra INTEGER, id_perfil INTEGER, cantidad_reservada REAL);
+    CREATE TABLE herrajes (id_herraje INTEGER PRIMARY KEY, stock_actual REAL, proveedor TEXT, precio_unitario REAL);
+    CREATE TABLE herrajes_por_obra (id_obra INTEGER, id_herraje INTEGER, cantidad_reservada REAL);
+    CREATE TABLE vidrios (id_vidrio INTEGER PRIMARY KEY, stock_actual REAL, proveedor TEXT, precio_unitario REAL);
+    CREATE TABLE vidrios_por_obra (id_obra INTEGER, id_vidrio INTEGER, cantidad_reservada REAL);
+    CREATE TABLE pedidos_compra (id INTEGER PRIMARY KEY, estado TEXT);
+    CREATE TABLE detalle_pedido (id_pedido INTEGER, id_perfil INTEGER, cantidad REAL);
+    CREATE TABLE pedidos (id_pedido INTEGER PRIMARY KEY AUTOINCREMENT, id_obra INTEGER, fecha_emision TEXT, estado TEXT, total_estimado REAL);
+    CREATE TABLE pedidos_por_obra (id_pedido INTEGER, id_obra INTEGER, id_item INTEGER, tipo_item TEXT, cantidad_requerida REAL);
+    INSERT INTO obras VALUES (1, 'A', 'Medición'), (2, 'B', 'fabricacion'), (3, 'C', 'Finalizada');
+    INSERT INTO inventario_perfiles VALUES (1, 4, 'Rehau', 100), (2, 50, 'Rehau', 80);
+    INSERT INTO perfiles_por_obra VALUES (1, 1, 10), (2, 1, 5), (3, 1, 40), (1, 2, 20);
+    INSERT INTO herrajes VALUES (7, 0, 'Giesse', 10);
+    INSERT INTO herrajes_por_obra VALUES (2, 7, 3);
+    INSERT INTO pedidos_compra VALUES (1, 'aprobado'), (2, 'recibido');
+    INSERT INTO detalle_pedido VALUES (1, 1, 3), (2, 1, 100);
+    INSERT INTO pedidos (id_obra, fecha_emision, estado, total_estimado) VALUES (1, '2025-06-01', 'Pendiente', 0);
+    INSERT INTO pedidos_por_obra VALUES (1, 1, 1, 'perfil', 2);
+"""
+
+class DummyConn:
+    def __init__(self):
+        self.connection = sqlite3.connect(":memory:")
+        self.connection.executescript(ESQUEMA)
+        self.consultas = 0
+    def ejecutar_query(self, q, p=()):
+        self.consultas += 1
+        cur = self.connection.cursor()
+        cur.execute(q.replace("SCOPE_IDENTITY()", "NULL"), p)
+        self.connection.commit()
+        return cur.fetchall()
+    def ejecutar_lote(self, q, filas):
+        filas = list(filas)
+        self.connection.cursor().executemany(q, filas)
+        self.connection.commit()
+        return len(filas)
+    def transaction(self, timeout=30, retries=2):
+        class Tx:
+            def __enter__(self): return self
+            def __exit__(self, exc_type, exc_val, exc_tb): pass
+        return Tx()
+
+def test_netea_todas_las_obras_abiertas_por_material_y_proveedor():
+    db = DummyConn()
+    propuestas = calcular_plan_compras(db)
+    assert db.consultas <= 9
+    assert [propuesta.proveedor for propuesta in propuestas] == ["Giesse", "Rehau"]
+    giesse, rehau = propuestas
+    assert [(linea.tipo, linea.id_item, linea.cantidad, linea.obras) for linea in giesse.lineas] == [("herraje", 7, 3, (2,))]
+    # Perfil 1: 10 + 5 de las obras abiertas (la finalizada no cuenta) - 4 en stock - 3 en compra - 2 en tránsito
+    assert [(linea.id_item, linea.cantidad, linea.obras) for linea in rehau.lineas] == [(1, 6, (1, 2))]
+    assert rehau.total == 600
+
+def test_generar_pedidos_consolidados_uno_por_proveedor(monkeypatch):
+    eventos = []
+    monkeypatch.setattr("modules.auditoria.helpers._registrar_evento_auditoria", lambda usuario, modulo, accion, db_conn=None: eventos.append(accion))
+    model = PedidosModel(DummyConn())
+    pedidos = model.generar_pedidos_consolidados(usuario="admin")
+    assert set(pedidos) == {"Giesse", "Rehau"}
+    lineas = model.db.ejecutar_query("SELECT id_obra, id_item, tipo_item, cantidad_requerida FROM pedidos_por_obra WHERE id_pedido = ?", (pedidos["Rehau"],))
+    assert lineas == [(None, 1, "perfil", 6)]
+    assert "Generó pedidos consolidados por proveedor" in eventos[0]
+    # Lo pedido queda en tránsito: una segunda corrida ya no tiene faltantes
+    assert model.planificar_compras() == []
+    with pytest.raises(ValueError):
+        model.generar_pedidos_consolidados(usuario="admin")
@@ -0,0 +1,50 @@
+from contextlib import contextmanager
+from core.event_bus import event_bus
+from modules.pedidos.model import PedidosModel
+
+"""
+Tests de la recepción de pedidos: el ingreso de stock pasa por core.stock_ledger (una transacción para
+todos los tipos y el cambio de estado) y emite stock_modificado después del commit.
+"""
+
+class BaseRecepcionFalsa:
+    def __init__(self, stocks):
+        self.stocks = stocks
+        self.lotes = []
+        self.transacciones = 0
+
+    @contextmanager
+    def transaction(self, timeout=30, retries=2):
+        self.transacciones += 1
+        yield self
+
+    def ejecutar_query(self, query, parametros=None):
+        if query.startswith("SELECT estado FROM pedidos"):
+            return [("Pendiente",)]
+        if query.startswith("SELECT tipo_item"):
+            return [("perfil", 1, 5), ("vidrio", 4, 2), ("otro", 9, 1)]
+        if query.startswith("UPDATE") and "OUTPUT" in query:
+            tabla = query.split()[1] if "VALUES" not in query else query.split("FROM ")[1].split()[0]
+            descuento, id_item = parametros[0], parametros[1]
+            anterior = self.stocks[(tabla, id_item)]
+            self.stocks[(tabla, id_item)] = anterior - descuento
+            return [(id_item, anterior, anterior - descuento)]
+        return []
+
+    def ejecutar_lote(self, query, filas):
+        self.lotes.append((query, list(filas)))
+        return len(self.lotes[-1][1])
+
+def test_recibir_pedido_ingresa_stock_por_el_ledger_y_avisa(monkeypatch):
+    monkeypatch.setattr("modules.auditoria.helpers._registrar_evento_auditoria", lambda *args, **kwargs: None)
+    eventos = []
+    event_bus.stock_modificado.connect(eventos.append)
+    try:
+        db = BaseRecepcionFalsa({("inventario_perfiles", 1): 10, ("vidrios", 4): 0})
+        assert PedidosModel(db).recibir_pedido(7, usuario="ana")
+    finally:
+        event_bus.stock_modificado.disconnect(eventos.append)
+    assert db.transacciones == 1
+    assert db.stocks == {("inventario_perfiles", 1): 15, ("vidrios", 4): 2}
+    assert ("UPDATE pedidos SET estado='Recibido' WHERE id_pedido=?", [(7,)]) in db.lotes
+    assert eventos == [{'tipo': 'perfiles', 'cambios': {1: (10, 15)}}, {'tipo': 'vidrios', 'cambios': {4: (0, 2)}}]
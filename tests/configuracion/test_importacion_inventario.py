@@ -0,0 +1,89 @@
+import pandas as pd
+import pytest
+from unittest.mock import MagicMock
+from scripts import procesar_e_importar_inventario as importacion
+
+"""
+Tests del motor de importación de inventario: lectura del archivo, carga por bloques en la tabla
+temporal con ejecutar_lote, reemplazo de inventario_perfiles en una sola transacción y ejecución
+desde Configuración en tareas de segundo plano.
+"""
+
+def _df(filas):
+    return pd.DataFrame(
+        [{**dict.fromkeys(importacion.COLUMNS, ''), 'codigo': f"{i}.1", 'stock': i, 'activo': 1} for i in range(filas)]
+    )
+
+def _db():
+    db = MagicMock()
+    db.ejecutar_lote.side_effect = lambda query, filas: len(filas)
+    return db
+
+def test_importar_a_sql_carga_por_bloques_y_reemplaza_al_final():
+    db = _db()
+    progreso = []
+    cargadas = importacion.importar_a_sql(_df(5), db=db, tamano_bloque=2, al_progreso=lambda n, total: progreso.append((n, total)))
+    assert cargadas == 5
+    assert [len(llamada.args[1]) for llamada in db.ejecutar_lote.call_args_list] == [2, 2, 1]
+    assert all(importacion.TABLA_STAGING in llamada.args[0] for llamada in db.ejecutar_lote.call_args_list)
+    assert progreso == [(2, 5), (4, 5), (5, 5)]
+    sentencias = [llamada.args[0] for llamada in db.connection.cursor.return_value.execute.call_args_list]
+    assert sentencias[0].startswith("SELECT TOP 0")
+    assert sentencias[1] == f"DELETE FROM {importacion.TABLA_SQL}"
+    assert sentencias[2].startswith(f"INSERT INTO {importacion.TABLA_SQL}")
+    # Tipos nativos para pyodbc (sin numpy.int64)
+    assert type(db.ejecutar_lote.call_args_list[0].args[1][1][importacion.COLUMNS.index('stock')]) is int
+
+def test_importar_a_sql_no_vacia_la_tabla_si_falla_la_carga():
+    db = _db()
+    db.ejecutar_lote.side_effect = [2, RuntimeError("conversión inválida")]
+    with pytest.raises(RuntimeError):
+        importacion.importar_a_sql(_df(5), db=db, tamano_bloque=2)
+    sentencias = [llamada.args[0] for llamada in db.connection.cursor.return_value.execute.call_args_list]
+    assert not any(s.startswith("DELETE") for s in sentencias)
+    # La excepción llega al context manager de la transacción, que hace rollback
+    assert db.transaction.return_value.__exit__.call_args.args[0] is RuntimeError
+
+def test_leer_archivo_csv_latin1(tmp_path):
+    archivo = tmp_path / "perfiles.csv"
+    archivo.write_bytes("Código;Descripción;STOCK\n".encode('latin1') + "".join(f"{i};Perfil {i} Bco;{i}\n" for i in range(7)).encode('latin1'))
+    df = importacion.leer_archivo(str(archivo))
+    assert len(df) == 7
+    assert df.rename(columns=importacion.MAPEO_ENCABEZADOS).columns.tolist() == ['codigo', 'descripcion', 'stock']
+
+def test_controller_confirma_en_la_gui_e_informa_el_avance_por_la_tarea(monkeypatch):
+    from modules.configuracion import controller as config_controller
+    from modules.configuracion.controller import ConfiguracionController
+
+    def ejecutar_importacion(df, usuario, resultado, al_progreso=None):
+        # Corre dentro de una TareaBD: el avance se informa con tarea_actual()
+        assert config_controller.tarea_actual() is not None
+        al_progreso(2, len(df))
+        al_progreso(len(df), len(df))
+        resultado["exito"] = True
+        return resultado
+    monkeypatch.setattr(config_controller, "ejecutar_importacion", ejecutar_importacion)
+    controller = ConfiguracionController.__new__(ConfiguracionController)
+    controller.view = MagicMock()
+    controller.view.confirmar_importacion.return_value = True
+    controller.usuario_actual = MagicMock()
+    resultado = {"exito": False, "mensajes": [], "advertencias": [], "errores": []}
+    controller._confirmar_importacion((_df(3), resultado))
+    controller.view.confirmar_importacion.assert_called_once_with(3)
+    mensajes = [llamada.args[0] for llamada in controller.view.mostrar_mensaje.call_args_list]
+    assert "Importando inventario... 2 de 3 filas" in mensajes
+    assert "Importando inventario... 3 de 3 filas" in mensajes
+    assert mensajes[-1] == "Inventario importado correctamente."
+
+def test_controller_no_importa_si_el_usuario_cancela(monkeypatch):
+    from modules.configuracion import controller as config_controller
+    from modules.configuracion.controller import ConfiguracionController
+    importar = MagicMock()
+    monkeypatch.setattr(config_controller, "ejecutar_importacion", importar)
+    controller = ConfiguracionController.__new__(ConfiguracionController)
+    controller.view = MagicMock()
+    controller.view.confirmar_importacion.return_value = False
+    resultado = {"exito": False, "mensajes": [], "advertencias": [], "errores": []}
+    controller._confirmar_importacion((_df(3), resultado))
+    importar.assert_not_called()
+    assert "Importación cancelada por el usuario." in resultado["mensajes"]
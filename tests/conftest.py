@@ -1,3 +1,43 @@
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Las cargas de los controladores corren en línea (sin QThreadPool) para que los tests sean deterministas
+os.environ.setdefault("TAREAS_SINCRONICAS", "1")
+
+import sqlite3
+import pytest
+
+class ConexionSqlite(sqlite3.Connection):
+    # pyodbc expone autocommit; BaseDatabaseConnection.begin_transaction lo usa
+    autocommit = True
+
+@pytest.fixture
+def base_sqlite():
+    """
+    Fábrica de BaseDatabaseConnection sobre sqlite3 en memoria compartida: registra un ConnectionPool con
+    el nombre de la base en lugar del pool ODBC y lo quita al terminar el test.
+    Uso: db = base_sqlite("test_x", "CREATE TABLE t (id INTEGER); INSERT INTO t VALUES (1);")
+    """
+    from core import database
+    from core.db_pool import ConnectionPool
+    creadas = []
+
+    def crear(nombre, esquema="", max_size=2):
+        uri = f"file:{nombre}?mode=memory&cache=shared"
+        # La conexión ancla mantiene viva la base en memoria mientras dura el test
+        ancla = sqlite3.connect(uri, uri=True)
+        ancla.executescript(esquema)
+        ancla.commit()
+        pool = ConnectionPool(
+            lambda: sqlite3.connect(uri, uri=True, check_same_thread=False, factory=ConexionSqlite), nombre=nombre, max_size=max_size
+        )
+        database._POOLS[nombre] = pool
+        creadas.append((nombre, pool, ancla))
+        return database.BaseDatabaseConnection(nombre)
+
+    yield crear
+    for nombre, pool, ancla in creadas:
+        database._POOLS.pop(nombre, None)
+        pool.cerrar()
+        ancla.close()
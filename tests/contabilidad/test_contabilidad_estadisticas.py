@@ -0,0 +1,83 @@
+import time
+import pytest
+from modules.contabilidad.estadisticas import EstadisticasContables
+from modules.contabilidad.model import ContabilidadModel
+
+"""
+Tests de las series pre-agregadas de Estadísticas (modules/contabilidad/estadisticas.py) y del gráfico
+con artistas y renders reutilizables (core/graficos.py).
+"""
+
+class DummyDB:
+    """Devuelve filas ya agregadas como las de SQL_AGREGADO (fuente, anio, mes, obra, tipo, total, cantidad)."""
+    def __init__(self, filas):
+        self.filas = filas
+        self.consultas = 0
+
+    def ejecutar_query(self, query, params=None):
+        if "GROUP BY" in query:
+            self.consultas += 1
+            return self.filas
+        return []
+
+def filas_de_prueba(anios=range(2021, 2025)):
+    filas = []
+    for anio in anios:
+        for mes in range(1, 13):
+            filas.append(("movimientos", anio, mes, None, "ingreso", 1000.0 * mes, 10))
+            filas.append(("movimientos", anio, mes, None, "egreso", 400.0 * mes, 8))
+            filas.append(("cobros", anio, mes, 1, None, 300.0, 1))
+            filas.append(("cobros", anio, mes, 2, None, 100.0, 1))
+            filas.append(("pagos", anio, mes, 2, None, 50.0, 1))
+    return filas
+
+def test_series_por_filtro_y_memoizadas():
+    db = DummyDB(filas_de_prueba())
+    estadisticas = EstadisticasContables(db)
+    assert estadisticas.anios() == [2024, 2023, 2022, 2021]
+    serie = estadisticas.serie("Ingresos vs Egresos", 2024, None)
+    assert serie.etiquetas[0] == "01/2024" and len(serie.etiquetas) == 12
+    assert serie.series[0] == ("Ingresos", [1000.0 * mes for mes in range(1, 13)])
+    evolucion = estadisticas.serie("Evolución Mensual", 2023, 3, dolar=100.0)
+    assert (evolucion.etiquetas, evolucion.series, evolucion.tipo, evolucion.unidad) == (["03/2023"], [("Saldo", [18.0])], "linea", "USD")
+    cobros = estadisticas.serie("Cobros por Obra", 2022)
+    assert cobros.etiquetas == ["Obra 1", "Obra 2"] and cobros.series[0][1] == [3600.0, 1200.0]
+    moneda = estadisticas.serie("Desglose por Moneda", 2024, 1, dolar=1000.0)
+    assert moneda.series == [("ARS", [1000.0, 400.0]), ("USD", [1.0, 0.4])]
+    assert estadisticas.serie("Ingresos vs Egresos", 2024, None) is serie
+    assert db.consultas == 1
+    with pytest.raises(ValueError):
+        estadisticas.serie("Otro")
+
+def test_alta_de_movimiento_invalida_las_series():
+    db = DummyDB(filas_de_prueba([2024]))
+    model = ContabilidadModel(db)
+    version = model.estadisticas.version
+    primera = model.estadisticas.serie("Pagos por Obra")
+    model.agregar_movimiento_contable(("2024-05-01", "ingreso", 10, "x", "", ""))
+    assert model.estadisticas.version == version + 1
+    assert model.estadisticas.serie("Pagos por Obra") is not primera
+    assert db.consultas == 2
+
+def test_grafico_reutiliza_artistas_y_renders():
+    pytest.importorskip("matplotlib")
+    from PyQt6.QtWidgets import QApplication
+    from core.graficos import GraficoCacheado
+    _app = QApplication.instance() or QApplication([])
+    estadisticas = EstadisticasContables(DummyDB(filas_de_prueba(range(2015, 2025))))
+    grafico = GraficoCacheado()
+    grafico.canvas.resize(600, 400)
+    claves = [(anio, mes) for anio in (2024, 2023) for mes in range(1, 13)]
+    for anio, mes in claves:
+        serie = estadisticas.serie("Ingresos vs Egresos", anio, mes)
+        grafico.mostrar((anio, mes), serie.titulo, serie.etiquetas, serie.series)
+    barras = grafico._ax.patches[0]
+    serie = estadisticas.serie("Ingresos vs Egresos", 2024, 5)
+    inicio = time.perf_counter()
+    assert grafico.mostrar((2024, 5), serie.titulo, serie.etiquetas, serie.series) is False
+    assert (time.perf_counter() - inicio) < 0.1
+    assert grafico.renders == len(claves)
+    # Un render en caché no toca los artistas; el próximo redibujo completo (p. ej. al redimensionar) sí.
+    # Misma forma (una etiqueta, dos series): las barras se actualizan en el lugar, no se recrean
+    grafico.canvas.draw()
+    assert grafico._ax.patches[0] is barras and barras.get_height() == 5000.0
@@ -1,5 +1,6 @@
 import unittest
 from unittest.mock import Mock
+import unittest.mock
 from modules.herrajes.model import HerrajesModel
 
 class TestHerrajesModel(unittest.TestCase):
@@ -7,33 +8,34 @@ class TestHerrajesModel(unittest.TestCase):
         self.mock_db = Mock()
         self.mock_db.transaction = Mock()
         self.mock_db.transaction.return_value.__enter__ = lambda s: s
-        self.mock_db.transaction.return_value.__exit__ = lambda s, exc_type, exc_val, tb: None
+        self.salidas_transaccion = []
+        self.mock_db.transaction.return_value.__exit__ = lambda s, exc_type, exc_val, tb: self.salidas_transaccion.append(exc_type)
         self.model = HerrajesModel(self.mock_db)
 
     def test_reservar_herraje_exitoso(self):
-        self.mock_db.ejecutar_query.side_effect = [
-            [(20,)],  # stock_actual
-            None,     # UPDATE stock
-            [],       # No reserva previa
-            None,     # INSERT reserva
-            None,     # INSERT movimiento
-            None      # INSERT auditoría
-        ]
-        result = self.model.reservar_herraje("test", 1, 1, 10)
+        self.mock_db.ejecutar_query.return_value = [(1, 20, 10)]  # OUTPUT del UPDATE condicionado
+        with unittest.mock.patch("modules.herrajes.model._registrar_evento_auditoria") as auditoria:
+            result = self.model.reservar_herraje("test", 1, 1, 10)
         self.assertTrue(result)
-        self.mock_db.ejecutar_query.assert_any_call("UPDATE herrajes SET stock_actual = stock_actual - ? WHERE id_herraje = ?", (10, 1))
-        self.mock_db.ejecutar_query.assert_any_call("INSERT INTO herrajes_por_obra (id_obra, id_herraje, cantidad_reservada, estado) VALUES (?, ?, ?, 'Reservado')", (1, 1, 10))
-        self.mock_db.ejecutar_query.assert_any_call("INSERT INTO movimientos_herrajes (id_herraje, tipo_movimiento, cantidad, fecha, usuario) VALUES (?, 'Egreso', ?, CURRENT_TIMESTAMP, ?)", (1, 10, "test"))
-        self.mock_db.ejecutar_query.assert_any_call("INSERT INTO auditorias_sistema (usuario, modulo, accion, fecha) VALUES (?, ?, ?, CURRENT_TIMESTAMP)", ("test", "Herrajes", "Reservó 10 del herraje 1 para obra 1"))
+        # Un solo UPDATE que valida el stock en la base, sin SELECT previo
+        self.assertEqual(self.mock_db.ejecutar_query.call_count, 1)
+        query, parametros = self.mock_db.ejecutar_query.call_args[0]
+        self.assertIn("SET stock_actual = stock_actual - ?", query)
+        self.assertIn("WHERE id_herraje = ? AND stock_actual >= ?", query)
+        self.assertEqual(parametros, (10, 1, 10))
+        self.mock_db.ejecutar_lote.assert_any_call("INSERT INTO movimientos_herrajes (id_herraje, tipo_movimiento, cantidad, fecha, usuario) VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?)", [(1, "Egreso", 10, "test")])
+        self.assertTrue(any("herrajes_por_obra" in c[0][0] and c[0][1][0][:3] == (1, 1, 10) for c in self.mock_db.ejecutar_lote.call_args_list if c[0][0].startswith("INSERT")))
+        auditoria.assert_called_once_with("test", "Herrajes", "Reservó 10 del herraje 1 para obra 1")
 
     def test_reservar_herraje_insuficiente(self):
-        self.mock_db.ejecutar_query.side_effect = [[(5,)]]  # stock_actual = 5
+        self.mock_db.ejecutar_query.side_effect = [[], [(1, 5)]]  # el UPDATE no afecta filas; el herraje existe con 5
         with self.assertRaises(ValueError) as cm:
             self.model.reservar_herraje("test", 1, 1, 10)
         self.assertIn("Stock insuficiente", str(cm.exception))
+        self.assertFalse(self.mock_db.ejecutar_lote.called)
 
     def test_reservar_herraje_no_encontrado(self):
-        self.mock_db.ejecutar_query.side_effect = [[]]
+        self.mock_db.ejecutar_query.side_effect = [[], []]
         with self.assertRaises(ValueError) as cm:
             self.model.reservar_herraje("test", 1, 1, 1)
         self.assertIn("Herraje no encontrado", str(cm.exception))
@@ -52,12 +54,13 @@ class TestHerrajesModel(unittest.TestCase):
             None,      # INSERT movimiento
             None       # INSERT auditoría
         ]
-        result = self.model.devolver_herraje("test", 1, 1, 5)
+        with unittest.mock.patch("modules.herrajes.model._registrar_evento_auditoria") as auditoria:
+            result = self.model.devolver_herraje("test", 1, 1, 5)
         self.assertTrue(result)
         self.mock_db.ejecutar_query.assert_any_call("UPDATE herrajes SET stock_actual = stock_actual + ? WHERE id_herraje = ?", (5, 1))
         self.mock_db.ejecutar_query.assert_any_call("UPDATE herrajes_por_obra SET cantidad_reservada=?, estado='Reservado' WHERE id_obra=? AND id_herraje=?", (5, 1, 1))
         self.mock_db.ejecutar_query.assert_any_call("INSERT INTO movimientos_herrajes (id_herraje, tipo_movimiento, cantidad, fecha, usuario) VALUES (?, 'Ingreso', ?, CURRENT_TIMESTAMP, ?)", (1, 5, "test"))
-        self.mock_db.ejecutar_query.assert_any_call("INSERT INTO auditorias_sistema (usuario, modulo, accion, fecha) VALUES (?, ?, ?, CURRENT_TIMESTAMP)", ("test", "Herrajes", "Devolvió 5 del herraje 1 de la obra 1"))
+        auditoria.assert_called_once_with("test", "Herrajes", "Devolvió 5 del herraje 1 de la obra 1")
 
     def test_devolver_herraje_sin_reserva(self):
         self.mock_db.ejecutar_query.side_effect = [
@@ -76,17 +79,13 @@ class TestHerrajesModel(unittest.TestCase):
         self.assertIn("No se puede devolver más de lo reservado", str(cm.exception))
 
     def test_ajustar_stock_herraje_ok(self):
-        self.mock_db.ejecutar_query.side_effect = [
-            [(7,)],   # stock_actual anterior
-            None,     # UPDATE stock
-            None,     # INSERT movimiento
-            None      # INSERT auditoría
-        ]
-        result = self.model.ajustar_stock_herraje("test", 1, 10)
+        self.mock_db.ejecutar_query.return_value = [(7,)]  # OUTPUT deleted.stock_actual
+        with unittest.mock.patch("modules.herrajes.model._registrar_evento_auditoria") as auditoria:
+            result = self.model.ajustar_stock_herraje("test", 1, 10)
         self.assertTrue(result)
-        self.mock_db.ejecutar_query.assert_any_call("UPDATE herrajes SET stock_actual = ? WHERE id_herraje = ?", (10, 1))
-        self.mock_db.ejecutar_query.assert_any_call("INSERT INTO movimientos_herrajes (id_herraje, tipo_movimiento, cantidad, fecha, usuario) VALUES (?, 'Ajuste', ?, CURRENT_TIMESTAMP, ?)", (1, 3, "test"))
-        self.mock_db.ejecutar_query.assert_any_call("INSERT INTO auditorias_sistema (usuario, modulo, accion, fecha) VALUES (?, ?, ?, CURRENT_TIMESTAMP)", ("test", "Herrajes", "Ajustó stock del herraje 1 de 7 a 10"))
+        self.mock_db.ejecutar_query.assert_called_once_with("UPDATE herrajes SET stock_actual = ? OUTPUT deleted.stock_actual WHERE id_herraje = ?", (10, 1))
+        self.mock_db.ejecutar_lote.assert_called_once_with("INSERT INTO movimientos_herrajes (id_herraje, tipo_movimiento, cantidad, fecha, usuario) VALUES (?, 'Ajuste', ?, CURRENT_TIMESTAMP, ?)", [(1, 3, "test")])
+        auditoria.assert_called_once_with("test", "Herrajes", "Ajustó stock del herraje 1 de 7 a 10")
 
     def test_ajustar_stock_herraje_invalido(self):
         with self.assertRaises(ValueError) as cm:
@@ -94,5 +93,27 @@ class TestHerrajesModel(unittest.TestCase):
         self.assertIn("Cantidad inválida", str(cm.exception))
         self.assertFalse(self.mock_db.ejecutar_query.called)
 
+    def test_reservar_herrajes_lote_usa_un_update_condicionado(self):
+        self.mock_db.ejecutar_query.return_value = [(1, 20, 15), (2, 5, 2)]
+        with unittest.mock.patch("modules.herrajes.model._registrar_evento_auditoria") as auditoria:
+            result = self.model.reservar_herrajes_lote("test", 7, [(1, 4), (2, 3), (1, 1)])
+        self.assertTrue(result)
+        self.assertEqual(self.mock_db.ejecutar_query.call_count, 1)
+        query, parametros = self.mock_db.ejecutar_query.call_args[0]
+        self.assertIn("JOIN (VALUES (?, ?), (?, ?))", query)
+        self.assertIn("WHERE t.stock_actual >= v.cantidad", query)
+        self.assertEqual(parametros, (1, 5, 2, 3))
+        self.mock_db.ejecutar_lote.assert_any_call("INSERT INTO movimientos_herrajes (id_herraje, tipo_movimiento, cantidad, fecha, usuario) VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?)", [(1, "Egreso", 5, "test"), (2, "Egreso", 3, "test")])
+        self.assertEqual(auditoria.call_count, 2)
+
+    def test_reservar_herrajes_lote_no_escribe_si_un_item_falla(self):
+        self.mock_db.ejecutar_query.side_effect = [[(1, 20, 16)], [(2, 1)]]
+        with self.assertRaises(ValueError) as cm:
+            self.model.reservar_herrajes_lote("test", 7, [(1, 4), (2, 3)])
+        self.assertIn("Stock insuficiente", str(cm.exception))
+        self.assertFalse(self.mock_db.ejecutar_lote.called)
+        # La excepción sale por el context manager de la transacción, que hace rollback del herraje 1
+        self.assertTrue(self.salidas_transaccion and self.salidas_transaccion[0] is not None)
+
 if __name__ == "__main__":
     unittest.main()
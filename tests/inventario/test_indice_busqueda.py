@@ -0,0 +1,75 @@
+import time
+from unittest.mock import MagicMock
+from modules.inventario.controller import InventarioController
+from modules.inventario.indice_busqueda import IndiceBusqueda
+
+"""
+Tests del índice de búsqueda en memoria del catálogo de perfiles: coincidencias parciales y por similitud,
+orden por relevancia, actualizaciones incrementales (alta, baja y stock) y tiempo de respuesta.
+"""
+
+PERFILES = [
+    {"id": 1, "codigo": "A-1000", "descripcion": "Perfil marco ventana", "tipo": "Marco", "acabado": "Anodizado", "proveedor": "Aluar", "stock": 10},
+    {"id": 2, "codigo": "A-100", "descripcion": "Perfil hoja corrediza", "tipo": "Hoja", "acabado": "Blanco", "proveedor": "Hydro", "stock": 4},
+    {"id": 3, "codigo": "B-200", "descripcion": "Contravidrio recto", "tipo": "Contravidrio", "acabado": "Anodizado", "proveedor": "Aluar", "stock": 0},
+    {"id": 4, "codigo": "C-300", "descripcion": "Guía de persiana", "tipo": "Guía", "acabado": "Negro", "proveedor": "Hydro", "stock": 7},
+]
+
+def _indice():
+    indice = IndiceBusqueda()
+    indice.cargar(PERFILES)
+    return indice
+
+def test_coincidencias_parciales_en_todos_los_campos():
+    indice = _indice()
+    assert indice.buscar_ids("anodiz") == [1, 3]
+    assert indice.buscar_ids("hydro guia") == [4]
+    assert indice.buscar_ids("GUIA") == [4]  # sin distinguir mayúsculas ni tildes
+    assert indice.buscar_ids("c") == [4, 2, 3]  # una letra: prefijo de alguna palabra, primero el código
+    assert indice.buscar_ids("inexistente") == []
+
+def test_codigo_exacto_primero_y_despues_prefijos():
+    indice = _indice()
+    assert indice.buscar_ids("a-100") == [2, 1]
+    assert [fila["codigo"] for fila in indice.buscar("a 100", limite=1)] == ["A-100"]
+
+def test_busqueda_por_similitud_tolera_errores_de_tipeo():
+    indice = _indice()
+    assert indice.buscar_ids("contravidiro") == [3]
+    assert set(indice.buscar_ids("perfl")) == {1, 2}
+
+def test_actualizaciones_incrementales():
+    indice = _indice()
+    indice.actualizar_stock({2: (4, 1), 99: (0, 5)})
+    assert indice.buscar("a-100")[0]["stock"] == 1
+    indice.actualizar({"id": 5, "codigo": "D-400", "descripcion": "Zócalo", "tipo": "Zócalo", "acabado": "Blanco", "proveedor": "Aluar"})
+    assert indice.buscar_ids("zocalo") == [5]
+    indice.eliminar(1)
+    assert indice.buscar_ids("ventana") == [] and len(indice) == 4
+
+def test_controller_pagina_los_resultados_en_la_grilla_y_aplica_stock_modificado():
+    controller = InventarioController.__new__(InventarioController)
+    controller.view = MagicMock()
+    controller.indice_busqueda = _indice()
+    assert controller.buscar_mientras_escribe("aluar") == 2
+    fetcher, tamano = controller.view.configurar_carga_por_lotes.call_args[0]
+    assert [fila["id"] for fila in fetcher(0, 1)] == [1] and [fila["id"] for fila in fetcher(1, tamano)] == [3]
+    controller._actualizar_indice_stock({'tipo': 'herrajes', 'cambios': {3: (0, 9)}})
+    controller._actualizar_indice_stock({'tipo': 'perfiles', 'cambios': {3: (0, 6)}})
+    assert controller.indice_busqueda.buscar("b-200")[0]["stock"] == 6
+
+def test_responde_en_menos_de_5_ms_sobre_el_catalogo_completo():
+    indice = IndiceBusqueda()
+    indice.cargar(
+        {"id": i, "codigo": f"P-{i:05d}", "descripcion": f"Perfil serie {i % 40} modelo {i % 97}", "tipo": ("Marco", "Hoja", "Guía")[i % 3],
+         "acabado": ("Anodizado", "Blanco", "Negro")[i % 3], "proveedor": ("Aluar", "Hydro")[i % 2]}
+        for i in range(5000)
+    )
+    for consulta in ("p-0421", "serie 12 blanco", "modleo", "hy"):
+        mejor = min(_medir(indice, consulta) for _ in range(5))
+        assert mejor < 0.005, f"'{consulta}' tardó {mejor * 1000:.1f} ms"
+
+def _medir(indice, consulta):
+    inicio = time.perf_counter()
+    indice.buscar(consulta, limite=500)
+    return time.perf_counter() - inicio
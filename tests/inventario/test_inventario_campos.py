@@ -1,7 +1,7 @@
 import unittest
 from modules.inventario.model import InventarioModel
 from core.database import DatabaseConnection
-from unittest.mock import Mock
+from unittest.mock import Mock, MagicMock
 
 class TestInventarioCampos(unittest.TestCase):
     def setUp(self):
@@ -41,5 +41,35 @@ class TestInventarioCampos(unittest.TestCase):
             faltantes = [prod["id"] for prod in productos if not (prod.get("tipo") and prod.get("acabado") and prod.get("longitud"))]
         self.assertEqual(len(faltantes), 0, f"Aún faltan {len(faltantes)} registros por completar: {faltantes}")
 
+    def test_extraccion_vectorizada_igual_a_la_escalar(self):
+        descripciones = [
+            "Marco 64 Euro-Design 60 Mar-Rob/Rob Pres. 5,8 m.",
+            "Hoja 77 euro-design 70 Bco 6.5 m",
+            "Perfil sin formato",
+            "",
+            None,
+        ]
+        campos = self.model.extraer_datos_descripciones(descripciones)
+        for i, descripcion in enumerate(descripciones):
+            esperado = self.model.extraer_datos_descripcion(descripcion or "")
+            self.assertEqual(tuple(campos.iloc[i]), esperado)
+
+    def test_corregir_campos_un_solo_update(self):
+        self.db.ejecutar_query.return_value = [
+            (1, "Marco 64 Euro-Design 60 Bco 5,8 m", "Marco 64", "Bco", "5.8", "100"),
+            (2, "Hoja 77 Euro-Design 70 Mar 6,5 m", None, "Mar", "6.5", "200"),
+            (3, "Zocalo Euro-Design 60 Nog 6 m", "Zocalo", "", 6.0, None),
+        ]
+        self.db.ejecutar_lote.side_effect = lambda query, filas: len(filas)
+        self.db.transaction = MagicMock()
+        corregidos = self.model.test_y_corregir_campos_tipo_acabado_longitud()
+        self.assertEqual(corregidos, 2)
+        filas = self.db.ejecutar_lote.call_args.args[1]
+        self.assertEqual(filas, [(2, "Hoja 77", "Mar", "6.5", "QR-200"), (3, "Zocalo", "Nog", "6", None)])
+        sentencias = [c.args[0] for c in self.db.connection.cursor.return_value.execute.call_args_list]
+        self.assertEqual(sum("UPDATE" in s for s in sentencias), 1)
+        # Sólo el SELECT inicial pasa por ejecutar_query: no hay UPDATE por fila
+        self.assertEqual(self.db.ejecutar_query.call_count, 1)
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,3 +1,4 @@
+import contextlib
 import unittest
 from unittest.mock import Mock
 from modules.inventario.model import InventarioModel
@@ -36,6 +37,12 @@ class MockDBConnection:
         if "SELECT * FROM reservas_materiales" in query:
             return list(self.reservas_materiales)
         return []
+    def ejecutar_lote(self, query, filas):
+        for fila in filas:
+            self.ejecutar_query(query, fila)
+        return len(filas)
+    def transaction(self, timeout=30, retries=2):
+        return contextlib.nullcontext(self)
 
 class MockInventarioView:
     def __init__(self):
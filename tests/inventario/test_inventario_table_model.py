@@ -0,0 +1,98 @@
+import sys
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import Qt, QModelIndex
+from modules.inventario.table_model import InventarioTableModel, InventarioProxyModel
+
+"""
+Tests del modelo virtualizado de la grilla de inventario: carga por lotes con canFetchMore/fetchMore,
+normalización de filas (dicts o tuplas) y orden/filtro a través del proxy.
+"""
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+HEADERS = ["id", "codigo", "stock_actual"]
+
+def _fetcher(total):
+    llamadas = []
+    def fetcher(offset, limite):
+        llamadas.append((offset, limite))
+        return [{"id": i, "codigo": f"C{i:03d}", "stock_actual": total - i} for i in range(offset, min(offset + limite, total))]
+    return fetcher, llamadas
+
+def test_carga_solo_el_primer_lote_y_pide_mas_bajo_demanda():
+    fetcher, llamadas = _fetcher(25)
+    modelo = InventarioTableModel(HEADERS, tamano_lote=10)
+    modelo.configurar_origen(fetcher)
+    assert modelo.rowCount() == 10
+    assert llamadas == [(0, 10)]
+    while modelo.canFetchMore(QModelIndex()):
+        modelo.fetchMore(QModelIndex())
+    assert modelo.rowCount() == 25
+    assert llamadas == [(0, 10), (10, 10), (20, 10)]
+
+def test_fetch_more_lee_en_segundo_plano_y_descarta_lotes_viejos(monkeypatch):
+    import time
+    monkeypatch.setenv("TAREAS_SINCRONICAS", "0")
+    fetcher, llamadas = _fetcher(25)
+    modelo = InventarioTableModel(HEADERS, tamano_lote=10)
+    modelo.configurar_origen(fetcher, primer_lote=fetcher(0, 10))
+    modelo.fetchMore(QModelIndex())
+    # Mientras el lote viaja no se piden otros ni se bloquea la GUI
+    assert not modelo.canFetchMore(QModelIndex())
+    limite = time.time() + 5
+    while modelo.rowCount() < 20 and time.time() < limite:
+        app.processEvents()
+        time.sleep(0.005)
+    assert modelo.rowCount() == 20 and modelo.canFetchMore(QModelIndex())
+    modelo.fetchMore(QModelIndex())
+    modelo.set_items([(1, "A", 5)])
+    limite = time.time() + 0.3
+    while time.time() < limite:
+        app.processEvents()
+        time.sleep(0.005)
+    assert modelo.rowCount() == 1 and llamadas[-1] == (20, 10)
+
+def test_set_items_acepta_tuplas_y_dicts():
+    modelo = InventarioTableModel(HEADERS)
+    modelo.set_items([(1, "A", 5), {"id": 2, "codigo": "B"}])
+    assert modelo.valor(0, "codigo") == "A"
+    assert modelo.data(modelo.index(1, 2)) == ""
+    assert modelo.data(modelo.index(0, 1), Qt.ItemDataRole.ToolTipRole) == "codigo: A"
+    assert not modelo.canFetchMore(QModelIndex())
+
+def test_proxy_ordena_numericamente_y_filtra():
+    modelo = InventarioTableModel(HEADERS)
+    modelo.set_items([(1, "ABC", 10), (2, "xyz", 9), (3, "abd", 100)])
+    proxy = InventarioProxyModel()
+    proxy.setSourceModel(modelo)
+    proxy.sort(2, Qt.SortOrder.AscendingOrder)
+    assert [proxy.index(r, 2).data() for r in range(3)] == ["9", "10", "100"]
+    proxy.setFilterFixedString("ab")
+    assert proxy.rowCount() == 2
+
+def test_pagina_grilla_pide_solo_las_columnas_de_los_headers():
+    from unittest.mock import MagicMock
+    from modules.inventario.model import InventarioModel
+    db = MagicMock()
+    db.iterar_query.return_value = iter([(1, "A", 5)])
+    modelo = InventarioTableModel(HEADERS)
+    modelo.configurar_origen(lambda offset, limite: InventarioModel(db).obtener_pagina_grilla(offset, limite, HEADERS))
+    query, parametros = db.iterar_query.call_args[0]
+    assert query.startswith("SELECT [id], [codigo], [stock_actual] FROM inventario_perfiles ORDER BY id")
+    assert parametros == (0, modelo.tamano_lote)
+    assert modelo.valor(0, "stock_actual") == 5
+
+def test_aplicar_cambios_actualiza_en_lugar_quita_bajas_y_agrega_solo_con_la_tabla_completa():
+    fetcher, _ = _fetcher(25)
+    modelo = InventarioTableModel(HEADERS, tamano_lote=10)
+    modelo.configurar_origen(fetcher)
+    cambiadas = []
+    modelo.dataChanged.connect(lambda desde, hasta: cambiadas.append(desde.row()))
+    assert modelo.aplicar_cambios([(3, (3, "C003", 99)), (4, (4, "C004", 21)), (30, (30, "C030", 1))], bajas=[0])
+    assert modelo.rowCount() == 9                      # la 30 llega con el próximo fetchMore
+    assert modelo.valor(2, "stock_actual") == 99 and cambiadas == [2]  # la 4 no cambió
+    while modelo.canFetchMore(QModelIndex()):
+        modelo.fetchMore(QModelIndex())
+    modelo.aplicar_cambios([(30, (30, "C030", 1))])
+    assert modelo.valor(modelo.rowCount() - 1, "id") == 30
+    assert not InventarioTableModel(["codigo"]).aplicar_cambios([(1, ("C001",))])
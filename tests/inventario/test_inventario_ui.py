@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import patch
 from PyQt6.QtWidgets import QApplication, QMessageBox, QProgressDialog, QTableWidgetItem, QHBoxLayout, QPushButton, QLabel, QTableWidget
+from PyQt6.QtCore import Qt
 from modules.inventario.view import InventarioView
 import sys
 
@@ -13,9 +14,7 @@ class TestInventarioViewUI(unittest.TestCase):
         # Si la vista no tiene inventario_headers (por conexión inválida), definir headers dummy para los tests
         if not hasattr(self.view, "inventario_headers") or not self.view.inventario_headers:
             self.view.inventario_headers = [f"Columna{i}" for i in range(5)]
-            self.view.tabla_inventario = QTableWidget()
-            self.view.tabla_inventario.setColumnCount(len(self.view.inventario_headers))
-            self.view.tabla_inventario.setHorizontalHeaderLabels(self.view.inventario_headers)
+            self.view._crear_tabla_inventario()
         self.barra_botones_test = []
         for i in range(self.view.main_layout.count()):
             item = self.view.main_layout.itemAt(i)
@@ -77,37 +76,36 @@ class TestInventarioViewUI(unittest.TestCase):
 
     def test_tooltips_en_celdas_tabla(self):
         """Cada celda de la tabla debe tener un tooltip descriptivo con el nombre del campo y valor."""
-        # Limpiar y volver a asignar headers dummy para asegurar entorno controlado
-        self.view.tabla_inventario.clear()
-        self.view.tabla_inventario.setColumnCount(len(self.view.inventario_headers))
-        self.view.tabla_inventario.setHorizontalHeaderLabels(self.view.inventario_headers)
         items = [
             {header: f"valor_{i}_{header}" for header in self.view.inventario_headers}
             for i in range(2)
         ]
         self.view.cargar_items(items)
-        for row in range(self.view.tabla_inventario.rowCount()):
-            for col in range(self.view.tabla_inventario.columnCount()):
-                item = self.view.tabla_inventario.item(row, col)
-                self.assertIsNotNone(item, f"Celda vacía en fila {row}, columna {col} (EXCEPCIÓN: puede deberse a error de carga o headers)")
-                if item is not None:
-                    tooltip = item.toolTip()
-                    self.assertTrue(tooltip and self.view.inventario_headers[col] in tooltip, f"Tooltip ausente o incorrecto en fila {row}, columna {col}")
-                else:
-                    print(f"[EXCEPCIÓN] Celda vacía en fila {row}, columna {col}. Revisar carga de datos y headers.")
+        modelo = self.view.tabla_inventario.model()
+        self.assertEqual(modelo.rowCount(), 2)
+        for row in range(modelo.rowCount()):
+            for col in range(modelo.columnCount()):
+                tooltip = modelo.data(modelo.index(row, col), Qt.ItemDataRole.ToolTipRole)
+                self.assertTrue(tooltip and self.view.inventario_headers[col] in tooltip, f"Tooltip ausente o incorrecto en fila {row}, columna {col}")
 
     @patch('PyQt6.QtWidgets.QProgressDialog')
     def test_feedback_visual_progreso_exportacion(self, mock_progress):
         """Debe mostrar QProgressDialog durante la exportación a Excel."""
-        self.view.tabla_inventario.setRowCount(2)
-        self.view.tabla_inventario.setColumnCount(len(self.view.inventario_headers))
-        for row in range(2):
-            for col in range(len(self.view.inventario_headers)):
-                self.view.tabla_inventario.setItem(row, col, QTableWidgetItem(f"valor_{row}_{col}"))
+        self.view.cargar_items([
+            [f"valor_{row}_{col}" for col in range(len(self.view.inventario_headers))] for row in range(2)
+        ])
         with patch('PyQt6.QtWidgets.QFileDialog.getSaveFileName', return_value=("/tmp/test.xlsx", "")):
             self.view.exportar_tabla_a_excel()
             self.assertTrue(mock_progress.called)
 
+    def test_exportar_excel_pide_exportacion_completa(self):
+        """La grilla sólo tiene los lotes ya leídos: Excel se delega a la exportación en streaming del modelo."""
+        pedidos = []
+        self.view.exportacion_solicitada.connect(lambda formato, ruta: pedidos.append((formato, ruta)))
+        with patch('modules.inventario.view.QFileDialog.getSaveFileName', return_value=("/tmp/test.xlsx", "")):
+            self.view.exportar_tabla_a_excel()
+        self.assertEqual(pedidos, [("excel", "/tmp/test.xlsx")])
+
     def test_dummy(self):
         """Test dummy para verificar que el runner de unittest funciona correctamente."""
         self.assertTrue(True)
@@ -25,10 +25,9 @@ def setup_modelos():
         def obtener_estado_pedido_por_obra(self, id_obra):
             return 'entregado'
     class DummyContabilidadModel:
-        def obtener_estado_pago_pedido_por_obra(self, id_obra, modulo):
-            if id_obra == 1:
-                return 'pagado'
-            return 'pendiente'
+        def obtener_estados_pago_por_obras(self):
+            return {(id_obra, modulo): 'pagado' if id_obra == 1 else 'pendiente'
+                    for id_obra in (1, 2, 3) for modulo in ('inventario', 'vidrios', 'herrajes')}
     return DummyObrasModel(), DummyInventarioModel(), DummyVidriosModel(), DummyHerrajesModel(), DummyContabilidadModel()
 
 def test_obras_listas_para_entrega(setup_modelos):
@@ -54,3 +53,60 @@ def test_obras_no_listas_si_falta_pago_o_estado(setup_modelos):
     # Solo la obra 1 sigue cumpliendo
     assert len(obras_listas) == 1
     assert obras_listas[0]['id'] == 1
+
+def test_obras_listas_usa_consultas_por_conjunto():
+    from modules.logistica.model import LogisticaModel
+    from modules.inventario.model import InventarioModel
+    from modules.contabilidad.model import ContabilidadModel
+
+    class ContadorDB:
+        def __init__(self, filas):
+            self.filas = filas
+            self.consultas = 0
+        def ejecutar_query(self, query, params=None):
+            self.consultas += 1
+            return self.filas
+
+    class ObrasModel:
+        def obtener_todas_las_obras(self):
+            return [{'id': i} for i in range(1, 201)]
+
+    db_pedidos = ContadorDB([(i, 'entregado') for i in range(1, 201) if i != 7])
+    db_pagos = ContadorDB([(i, modulo, 'pagado') for i in (5, 7) for modulo in ('inventario', 'vidrios', 'herrajes')])
+    inventario_model = InventarioModel.__new__(InventarioModel)
+    inventario_model.db = db_pedidos
+    contabilidad_model = ContabilidadModel(db_pagos)
+
+    obras_listas = LogisticaModel().obtener_obras_listas_para_entrega(
+        ObrasModel(), inventario_model, inventario_model, inventario_model, contabilidad_model
+    )
+    # La obra 7 no tiene pedidos (pendiente) y el resto no tiene pagos: sólo la 5 está lista
+    assert [obra['id'] for obra in obras_listas] == [5]
+    # Una consulta por módulo, sin importar la cantidad de obras
+    assert db_pedidos.consultas == 3
+    assert db_pagos.consultas == 1
+
+def test_estado_de_pago_es_el_del_ultimo_pago_y_sin_pagos_queda_none():
+    from modules.logistica.model import LogisticaModel
+    from modules.contabilidad.model import ContabilidadModel
+    from modules.herrajes.model import HerrajesModel
+
+    db_pagos = MagicMock()
+    db_pagos.ejecutar_query.return_value = [(1, 'inventario', 'pagado'), (1, 'vidrios', 'pendiente')]
+    db_herrajes = MagicMock()
+    db_herrajes.ejecutar_query.return_value = [('entregado',)]
+    class HerrajesPorObra:
+        # Sin la versión por conjuntos: fuerza la consulta obra por obra
+        obtener_estado_pedido_por_obra = HerrajesModel(db_herrajes).obtener_estado_pedido_por_obra
+    herrajes_model = HerrajesPorObra()
+
+    estados = LogisticaModel().obtener_estado_obras(
+        [1], herrajes_model, herrajes_model, herrajes_model, ContabilidadModel(db_pagos)
+    )
+    assert estados[1]['pagos'] == {'inventario': 'pagado', 'vidrios': 'pendiente', 'herrajes': None}
+    assert estados[1]['pedidos'] == {'inventario': 'entregado', 'vidrios': 'entregado', 'herrajes': 'entregado'}
+    query_pagos = db_pagos.ejecutar_query.call_args[0][0]
+    assert "ROW_NUMBER() OVER (PARTITION BY obra_id, modulo ORDER BY fecha DESC)" in query_pagos
+    # La consulta por obra es válida en SQL Server (TOP 1, no LIMIT 1)
+    query_obra = db_herrajes.ejecutar_query.call_args[0][0]
+    assert query_obra.startswith("SELECT TOP 1 estado FROM pedidos_herrajes") and "LIMIT" not in query_obra
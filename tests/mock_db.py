@@ -8,3 +8,7 @@ class DummyDB:
     @property
     def connection(self):
         return None
+    def ejecutar_lote(self, query, filas):
+        return len(list(filas))
+    def iterar_query(self, query, params=None, chunk=500, como_dict=False):
+        return iter(self.ejecutar_query(query, params) or [])
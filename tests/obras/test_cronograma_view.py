@@ -0,0 +1,69 @@
+import datetime
+import pytest
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QImage, QPainter
+from PyQt6.QtCore import QRectF
+from modules.obras.cronograma import view as cronograma_view
+from modules.obras.cronograma.view import CronogramaView, GanttBarItem
+
+"""
+Tests del Gantt incremental (modules/obras/cronograma/view.py): la escena es única y las barras se actualizan en
+el lugar por id de obra, las fechas y el avance se calculan una vez por cambio de datos y el eje sólo dibuja
+el rango visible.
+"""
+
+@pytest.fixture(scope="module")
+def app():
+    app = QApplication.instance()
+    if not app:
+        app = QApplication([])
+    yield app
+
+def _obras(cantidad, inicio=datetime.date(2025, 1, 6)):
+    return [
+        {'id': i, 'nombre': f'Obra {i}', 'cliente': 'Cliente', 'estado': 'Fabricación',
+         'fecha': (inicio + datetime.timedelta(days=i % 600)).isoformat(),
+         'fecha_entrega': (inicio + datetime.timedelta(days=i % 600 + 60)).isoformat()}
+        for i in range(1, cantidad + 1)
+    ]
+
+def _barras(vista):
+    return {item.obra['id']: item for item in vista.scene.items() if isinstance(item, GanttBarItem)}
+
+def test_set_obras_y_zoom_actualizan_la_escena_en_el_lugar(app):
+    vista = CronogramaView(_obras(3))
+    escena, barras = vista.scene, _barras(vista)
+    obras = _obras(4)[1:]
+    obras[0]['estado'] = 'Entrega'
+    vista.set_obras(obras)
+    nuevas = _barras(vista)
+    assert vista.gantt_view.scene() is escena
+    assert set(nuevas) == {2, 3, 4}
+    assert nuevas[2] is barras[2] and nuevas[3] is barras[3]
+    assert nuevas[2].obra['estado'] == 'Entrega'
+    ancho = nuevas[3].rect().width()
+    cantidad_items = len(escena.items())
+    vista.zoom_in()
+    assert len(escena.items()) == cantidad_items
+    assert nuevas[3].rect().width() > ancho
+
+def test_paint_no_reparsea_fechas(app, monkeypatch):
+    vista = CronogramaView(_obras(2))
+    barra = _barras(vista)[1]
+    assert 0 <= barra.progreso <= 1
+    monkeypatch.setattr(cronograma_view, "parse_fecha_safe", lambda fecha: pytest.fail("paint no debe parsear fechas"))
+    imagen = QImage(800, 200, QImage.Format.Format_ARGB32)
+    painter = QPainter(imagen)
+    barra.paint(painter, None)
+    painter.end()
+
+def test_eje_solo_dibuja_el_rango_visible_con_nivel_de_detalle(app):
+    vista = CronogramaView(_obras(1000))
+    eje = vista.gantt_view
+    assert eje.dias_totales >= 600
+    desde, hasta = eje.dias_visibles(QRectF(cronograma_view.LEFT_MARGIN + 70 * eje.day_width, 0, 10 * eje.day_width, 100))
+    assert desde <= 70 and 80 <= hasta <= 82 and hasta - desde < 20
+    paso_cerca = eje.paso_etiquetas()
+    for _ in range(20):
+        vista.zoom_out()
+    assert eje.paso_etiquetas() > paso_cerca
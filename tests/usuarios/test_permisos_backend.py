@@ -1,4 +1,5 @@
 import pytest
+from unittest.mock import Mock
 from modules.usuarios.model import UsuariosModel
 
 @pytest.mark.parametrize("rol,modulo,esperado", [
@@ -23,3 +24,83 @@ def test_permisos_por_rol_y_usuario(mocker, rol, modulo, esperado):
     assert permisos_rol[0][0] == rol
     permisos_usuario = model.obtener_permisos_por_usuario(1, modulo)
     assert permisos_usuario == esperado
+
+def test_cache_de_permisos_evita_consultas_repetidas():
+    mock_db = Mock()
+    mock_db.ejecutar_query.return_value = [("Inventario", 1, 0, 0), ("Obras", 1, 1, 0)]
+    model = UsuariosModel(mock_db)
+    usuario = {"id": 7, "rol": "usuario"}
+    for _ in range(5):
+        assert model.tiene_permiso(usuario, "inventario", "ver")
+        assert not model.tiene_permiso(usuario, "inventario", "editar")
+        assert model.tiene_permiso(usuario, "Obras", "agregar")
+        assert not model.tiene_permiso(usuario, "obras", "aprobar")
+    # Una sola carga en bloque de todos los módulos del usuario
+    assert mock_db.ejecutar_query.call_count == 1
+
+@pytest.mark.parametrize("modulo, accion", [
+    ("contabilidad", "exportar_balance"),
+    ("usuarios", "exportar_usuarios"),
+    ("mantenimiento", "exportar_reporte_mantenimiento"),
+])
+def test_acciones_compuestas_se_clasifican_por_su_verbo(modulo, accion):
+    mock_db = Mock()
+    mock_db.ejecutar_query.return_value = [("Contabilidad", 1, 0, 0), ("Usuarios", 1, 0, 0), ("Mantenimiento", 1, 0, 0)]
+    model = UsuariosModel(mock_db)
+    usuario = {"id": 7, "rol": "usuario"}
+    # Exportar es lectura: alcanza con puede_ver aunque no tenga puede_modificar
+    assert model.tiene_permiso(usuario, modulo, accion)
+    assert not model.tiene_permiso(usuario, modulo, "editar")
+
+def test_cache_de_permisos_se_invalida_al_actualizar_y_por_ttl():
+    mock_db = Mock()
+    mock_db.ejecutar_query.return_value = [("Inventario",)]
+    model = UsuariosModel(mock_db)
+    otra_instancia = UsuariosModel(mock_db)
+    usuario = {"id": 8, "rol": "usuario"}
+    assert otra_instancia.obtener_modulos_permitidos(usuario) == ["Inventario"]
+    assert otra_instancia.obtener_modulos_permitidos(usuario) == ["Inventario"]
+    assert mock_db.ejecutar_query.call_count == 1
+    # La actualización desde cualquier instancia invalida la caché de las demás
+    model.actualizar_permisos_modulos_usuario(8, {}, 1)
+    mock_db.ejecutar_query.return_value = []
+    assert otra_instancia.obtener_modulos_permitidos(usuario) == []
+    # Con TTL vencido se vuelve a consultar
+    otra_instancia.cache_permisos.ttl = 0
+    llamadas = mock_db.ejecutar_query.call_count
+    otra_instancia.obtener_modulos_permitidos(usuario)
+    assert mock_db.ejecutar_query.call_count == llamadas + 1
+
+def test_lectura_durante_la_actualizacion_no_deja_permisos_viejos_en_cache():
+    mock_db = Mock()
+    model = UsuariosModel(mock_db)
+    usuario = {"id": 9, "rol": "usuario"}
+    permisos = {"actuales": [("Inventario",)]}
+
+    def ejecutar(query, params=None):
+        if query.startswith("DELETE"):
+            # Otro hilo lee los permisos mientras se reemplazan: todavía ve los viejos
+            assert model.obtener_modulos_permitidos(usuario) == ["Inventario"]
+            permisos["actuales"] = [("Obras",)]
+            return None
+        if query.startswith("INSERT"):
+            return None
+        return permisos["actuales"]
+    mock_db.ejecutar_query.side_effect = ejecutar
+    model.actualizar_permisos_modulos_usuario(9, {"obras": {"ver": True}}, 1)
+    assert model.obtener_modulos_permitidos(usuario) == ["Obras"]
+
+def test_cache_por_nombre_de_usuario_se_invalida_con_su_id():
+    mock_db = Mock()
+    mock_db.ejecutar_query.return_value = [(5, "usuario")]
+    model = UsuariosModel(mock_db)
+    assert model._resolver_usuario("ana") == (5, "usuario")
+    assert model._resolver_usuario("ana") == (5, "usuario")
+    assert mock_db.ejecutar_query.call_count == 1
+    # Cambio de rol por id: la entrada guardada bajo el nombre también se descarta
+    model.actualizar_usuario(5, {"rol": "admin"}, "2026-01-01")
+    mock_db.ejecutar_query.return_value = [(5, "admin")]
+    assert model._resolver_usuario("ana") == (5, "admin")
+    model.eliminar_usuario(5)
+    mock_db.ejecutar_query.return_value = []
+    assert model._resolver_usuario("ana") == (None, None)
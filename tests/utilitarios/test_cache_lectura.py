@@ -0,0 +1,78 @@
+from unittest.mock import MagicMock
+from core.cache import CacheLectura, cache_lectura, estadisticas_caches
+from core.event_bus import event_bus
+from modules.obras.model import ObrasModel
+from modules.usuarios.model import UsuariosModel
+
+"""
+Tests de la caché de lectura de datos de referencia (core/cache.py): LRU acotado, vencimiento por TTL,
+invalidación por señales del event_bus y por las escrituras de los modelos, y estadísticas de aciertos.
+"""
+
+def test_lru_desaloja_la_entrada_menos_usada_y_cuenta_aciertos():
+    cache = CacheLectura("prueba_lru", ttl=60, max_entradas=2)
+    cargas = []
+    def cargar(valor):
+        return lambda: cargas.append(valor) or valor
+    cache.obtener("a", cargar(1))
+    cache.obtener("b", cargar(2))
+    assert cache.obtener("a", cargar(99)) == 1  # "a" pasa a ser la más reciente
+    cache.obtener("c", cargar(3))               # desaloja "b"
+    assert cache.obtener("b", cargar(20)) == 20
+    assert cargas == [1, 2, 3, 20]
+    estadisticas = cache.estadisticas()
+    assert (estadisticas['aciertos'], estadisticas['fallos'], estadisticas['desalojos']) == (1, 4, 2)
+    assert estadisticas['entradas'] == 2 and estadisticas['tasa_aciertos'] == 0.2
+
+def test_ttl_vencido_y_resultados_none_vuelven_a_consultar():
+    cache = CacheLectura("prueba_ttl", ttl=0, max_entradas=10)
+    cargar = MagicMock(return_value=[(1,)])
+    cache.obtener("k", cargar)
+    cache.obtener("k", cargar)
+    assert cargar.call_count == 2
+    cache = CacheLectura("prueba_none", ttl=60, max_entradas=10)
+    cargar = MagicMock(return_value=None)
+    assert cache.obtener("k", cargar) is None and cache.obtener("k", cargar) is None
+    assert cargar.call_count == 2
+
+def test_invalidar_durante_la_carga_no_guarda_el_resultado_viejo():
+    cache = CacheLectura("prueba_carrera", ttl=60, max_entradas=10)
+    def cargar_y_escribir():
+        cache.invalidar()  # otra escritura termina mientras la consulta está en vuelo
+        return "viejo"
+    assert cache.obtener("k", cargar_y_escribir) == "viejo"
+    assert cache.obtener("k", lambda: "nuevo") == "nuevo"
+
+def test_senal_del_event_bus_invalida_la_cache():
+    cache = cache_lectura("prueba_senal", invalidar_con=("stock_modificado",))
+    assert cache_lectura("prueba_senal") is cache
+    cache.obtener("k", lambda: "antes")
+    event_bus.stock_modificado.emit({'tipo': 'perfiles', 'cambios': {1: (5, 3)}})
+    assert cache.obtener("k", lambda: "despues") == "despues"
+    assert any(e['nombre'] == "prueba_senal" and e['invalidaciones'] == 1 for e in estadisticas_caches())
+
+def test_obras_se_consultan_una_vez_hasta_que_una_escritura_invalida():
+    db = MagicMock()
+    db.ejecutar_query.return_value = [(1, "Obra", "Cliente", "Medición", None, None)]
+    model = ObrasModel(db)
+    assert model.obtener_datos_obras() == model.obtener_datos_obras()
+    assert db.ejecutar_query.call_count == 1
+    model.actualizar_estado_obra(1, "Fabricación")
+    model.obtener_datos_obras()
+    assert db.ejecutar_query.call_count == 3
+    event_bus.obra_agregada.emit({'id': 2})
+    model.obtener_datos_obras()
+    assert db.ejecutar_query.call_count == 4
+
+def test_usuarios_y_roles_se_invalidan_con_las_escrituras():
+    db = MagicMock()
+    db.ejecutar_query.side_effect = lambda query, *args: [("admin",)] if query.startswith("SELECT") else None
+    model = UsuariosModel(db)
+    model.obtener_roles()
+    model.obtener_roles()
+    model.obtener_usuarios()
+    assert db.ejecutar_query.call_count == 2
+    model.actualizar_estado_usuario(1, "Inactivo")
+    model.obtener_roles()
+    model.obtener_usuarios()
+    assert db.ejecutar_query.call_count == 5
@@ -0,0 +1,92 @@
+import time
+import pytest
+from core import conectividad
+from core.conectividad import MonitorConectividad, ServidorNoDisponibleError, sonda_pool
+from core.database import BaseDatabaseConnection
+from core.event_bus import EventBus
+
+"""
+Tests del monitor de conectividad (core/conectividad.py): sondea por el pool compartido, calcula
+percentiles de latencia, publica sólo las transiciones y hace que BaseDatabaseConnection falle rápido
+sin tocar el pool mientras el servidor está fuera de línea.
+"""
+
+@pytest.fixture
+def pool(base_sqlite):
+    return base_sqlite("test_conectividad").pool
+
+def _creadas(pool):
+    return pool.estadisticas()["creadas"]
+
+def test_sondeo_por_el_pool_y_transiciones_publicadas(pool):
+    bus = EventBus()
+    publicados = []
+    bus.conectividad_cambiada.connect(publicados.append)
+    servidor = {'caido': False}
+    sonda_real = sonda_pool("test_conectividad")
+    def sonda(timeout):
+        if servidor['caido']:
+            raise ConnectionError("sin red")
+        sonda_real(timeout)
+    monitor = MonitorConectividad(sonda=sonda, fallos_para_offline=2, bus=bus)
+    for _ in range(3):
+        monitor.sondear()
+    # Los sondeos reutilizan la conexión ociosa del pool
+    assert _creadas(pool) == 1
+    estado = monitor.estado()
+    assert estado['en_linea'] and estado['p50_ms'] is not None and estado['p50_ms'] <= estado['p99_ms']
+    servidor['caido'] = True
+    assert monitor.sondear()['en_linea']  # un fallo aislado no cambia el estado
+    assert not monitor.sondear()['en_linea']
+    monitor.sondear()
+    servidor['caido'] = False
+    monitor.sondear()
+    assert [datos['en_linea'] for datos in publicados] == [False, True]
+    assert "sin red" in publicados[0]['ultimo_error']
+
+def test_sondeo_mas_lento_que_el_timeout_cuenta_como_fallo():
+    monitor = MonitorConectividad(sonda=lambda timeout: time.sleep(0.02), timeout=0.001, fallos_para_offline=1, bus=EventBus())
+    estado = monitor.sondear()
+    assert not estado['en_linea'] and "tardó" in estado['ultimo_error']
+
+def test_espera_por_el_pool_no_cuenta_como_latencia_ni_como_fallo(base_sqlite):
+    base = base_sqlite("test_conectividad_pool_ocupado", max_size=1)
+    monitor = MonitorConectividad(sonda=sonda_pool("test_conectividad_pool_ocupado", espera_pool=0.01),
+                                  timeout=1.0, fallos_para_offline=1, bus=EventBus())
+    with base.pool.conexion():
+        # Pool agotado por una consulta en curso: el sondeo se omite en lugar de marcar fuera de línea
+        estado = monitor.sondear()
+    assert estado['en_linea'] and estado['sondeos'] == 0
+    estado = monitor.sondear()
+    assert estado['en_linea'] and estado['sondeos'] == 1 and estado['latencia_ms'] < 1000
+
+def test_modelos_fallan_rapido_sin_servidor(pool, monkeypatch):
+    monitor = MonitorConectividad(sonda=lambda timeout: None, bus=EventBus())
+    monitor.en_linea = False
+    monkeypatch.setattr(conectividad, "_MONITOR", monitor)
+    db = BaseDatabaseConnection("test_conectividad")
+    inicio = time.perf_counter()
+    with pytest.raises(ServidorNoDisponibleError):
+        db.conectar()
+    with pytest.raises(ServidorNoDisponibleError):
+        db.begin_transaction()
+    assert time.perf_counter() - inicio < 0.5
+    assert _creadas(pool) == 0
+    monitor.en_linea = True
+    db.conectar()
+    db.cerrar_conexion()
+    assert _creadas(pool) == 1
+
+def test_hilo_de_sondeo_y_sondeo_inmediato():
+    sondeos = []
+    monitor = MonitorConectividad(sonda=lambda timeout: sondeos.append(time.monotonic()), intervalo=60, bus=EventBus())
+    monitor.iniciar()
+    try:
+        assert monitor.esperar_primer_sondeo(2)
+        monitor.sondear_ahora()
+        limite = time.time() + 2
+        while len(sondeos) < 2 and time.time() < limite:
+            time.sleep(0.01)
+        assert len(sondeos) == 2
+    finally:
+        monitor.detener()
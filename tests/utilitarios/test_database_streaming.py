@@ -0,0 +1,88 @@
+import threading
+import pytest
+
+"""
+Tests de BaseDatabaseConnection: iterar_query (lectura en streaming con fetchmany, errores dentro y fuera de
+transacciones) y transacciones anidadas.
+Se usa la base sqlite3 en memoria compartida de tests/conftest.py (base_sqlite).
+"""
+
+@pytest.fixture
+def db(base_sqlite):
+    valores = ", ".join(f"({i}, 'C{i}')" for i in range(25))
+    return base_sqlite("test_streaming", f"CREATE TABLE inventario_perfiles (id INTEGER, codigo TEXT); INSERT INTO inventario_perfiles VALUES {valores};")
+
+def test_iterar_query_trae_todas_las_filas_por_chunks(db):
+    filas = list(db.iterar_query("SELECT id, codigo FROM inventario_perfiles ORDER BY id", chunk=7))
+    assert [fila[0] for fila in filas] == list(range(25))
+
+def test_iterar_query_como_dict_y_devuelve_conexion_al_cerrar(db):
+    iterador = db.iterar_query("SELECT id, codigo FROM inventario_perfiles WHERE id < ?", (3,), chunk=2, como_dict=True)
+    assert next(iterador) == {"id": 0, "codigo": "C0"}
+    assert db.pool.estadisticas()["en_uso"] == 1
+    iterador.close()
+    assert db.pool.estadisticas()["en_uso"] == 0
+
+def test_iterar_query_chunk_invalido(db):
+    with pytest.raises(ValueError):
+        list(db.iterar_query("SELECT 1", chunk=0))
+
+def test_iterar_query_relanza_el_error_dentro_de_una_transaccion(db, monkeypatch):
+    from core.logger import Logger
+    popups = []
+    monkeypatch.setattr(Logger, "log_error_popup", lambda self, mensaje: popups.append(mensaje))
+    assert list(db.iterar_query("SELECT * FROM tabla_inexistente")) == [] and len(popups) == 1
+    with pytest.raises(Exception):
+        with db.transaction():
+            list(db.iterar_query("SELECT * FROM tabla_inexistente"))
+    assert len(popups) == 1
+
+def test_conexion_fijada_por_conectar_es_del_hilo_que_la_pidio(db):
+    db.conectar()
+    fijada = db.connection
+    otro_hilo = []
+    hilo = threading.Thread(target=lambda: otro_hilo.append(db.connection))
+    hilo.start()
+    hilo.join()
+    assert fijada is not None and otro_hilo == [None]
+    # Las consultas de otro hilo toman su propia conexión del pool
+    hilo = threading.Thread(target=lambda: otro_hilo.append(db.ejecutar_query("SELECT COUNT(*) FROM inventario_perfiles")))
+    hilo.start()
+    hilo.join()
+    assert otro_hilo[1] == [(25,)]
+    db.cerrar_conexion()
+    assert db.connection is None
+    assert db.pool.estadisticas()["en_uso"] == 0
+
+def test_transaccion_anidada_se_confirma_o_revierte_con_la_externa(db):
+    with pytest.raises(ZeroDivisionError):
+        with db.transaction():
+            db.ejecutar_query("INSERT INTO inventario_perfiles VALUES (100, 'X')")
+            with db.transaction():
+                db.ejecutar_query("INSERT INTO inventario_perfiles VALUES (101, 'Y')")
+            # El bloque interno no confirmó ni soltó la conexión de la transacción externa
+            assert db._en_transaccion()
+            1 / 0
+    assert db.ejecutar_query("SELECT COUNT(*) FROM inventario_perfiles WHERE id >= 100") == [(0,)]
+    assert db.pool.estadisticas()["en_uso"] == 0
+
+def test_falla_anidada_tragada_no_confirma_la_externa(db):
+    avisos = []
+    with pytest.raises(RuntimeError, match="transacción anidada"):
+        with db.transaction():
+            db.ejecutar_query("INSERT INTO inventario_perfiles VALUES (100, 'X')")
+            db.al_confirmar(lambda: avisos.append("commit"))
+            try:
+                with db.transaction():
+                    raise ValueError("stock insuficiente")
+            except ValueError:
+                pass
+    assert db.ejecutar_query("SELECT COUNT(*) FROM inventario_perfiles WHERE id >= 100") == [(0,)]
+    assert avisos == []
+    with db.transaction():
+        db.al_confirmar(lambda: avisos.append("commit"))
+        with db.transaction():
+            db.ejecutar_query("INSERT INTO inventario_perfiles VALUES (100, 'X')")
+        assert avisos == []
+    assert avisos == ["commit"]
+    assert db.ejecutar_query("SELECT COUNT(*) FROM inventario_perfiles WHERE id >= 100") == [(1,)]
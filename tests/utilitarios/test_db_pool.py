@@ -0,0 +1,99 @@
+import sqlite3
+import threading
+import time
+import pytest
+from core.db_pool import ConnectionPool, PoolAgotadoError
+
+"""
+Tests del pool de conexiones (core/db_pool.py).
+Se usa sqlite3 en memoria como fábrica para no depender de SQL Server.
+"""
+
+def _fabrica():
+    return sqlite3.connect(":memory:", check_same_thread=False)
+
+def test_reutiliza_conexion_devuelta():
+    pool = ConnectionPool(_fabrica, nombre="test", max_size=2)
+    conn1 = pool.obtener_conexion()
+    pool.liberar_conexion(conn1)
+    conn2 = pool.obtener_conexion()
+    assert conn2 is conn1
+    assert pool.estadisticas()["creadas"] == 1
+
+def test_respeta_max_size_y_timeout():
+    pool = ConnectionPool(_fabrica, nombre="test", max_size=1)
+    pool.obtener_conexion()
+    with pytest.raises(PoolAgotadoError):
+        pool.obtener_conexion(timeout=0.05)
+
+def test_espera_hasta_que_se_libere_una_conexion():
+    pool = ConnectionPool(_fabrica, nombre="test", max_size=1)
+    conn = pool.obtener_conexion()
+    threading.Timer(0.05, pool.liberar_conexion, args=(conn,)).start()
+    assert pool.obtener_conexion(timeout=2) is conn
+
+def test_context_manager_descarta_conexion_con_error_de_red():
+    class OperationalError(Exception):
+        pass
+    pool = ConnectionPool(_fabrica, nombre="test", max_size=1)
+    with pytest.raises(OperationalError):
+        with pool.conexion():
+            raise OperationalError("red caída")
+    stats = pool.estadisticas()
+    assert stats["descartadas"] == 1 and stats["ociosas"] == 0 and stats["en_uso"] == 0
+
+def test_health_check_reemplaza_conexion_cerrada():
+    pool = ConnectionPool(_fabrica, nombre="test", max_size=1, health_check_after=0)
+    conn = pool.obtener_conexion()
+    pool.liberar_conexion(conn)
+    conn.close()
+    nueva = pool.obtener_conexion()
+    assert nueva is not conn
+    nueva.execute("SELECT 1")
+
+def test_recicla_por_max_lifetime_y_desaloja_ociosas():
+    pool = ConnectionPool(_fabrica, nombre="test", max_size=2, max_lifetime=0.01)
+    conn = pool.obtener_conexion()
+    time.sleep(0.02)
+    pool.liberar_conexion(conn)
+    assert pool.estadisticas()["ociosas"] == 0
+    pool = ConnectionPool(_fabrica, nombre="test", max_size=2, idle_timeout=0.01)
+    conn = pool.obtener_conexion()
+    pool.liberar_conexion(conn)
+    time.sleep(0.02)
+    assert pool.obtener_conexion() is not conn
+
+def test_checkouts_concurrentes_no_superan_max_size():
+    pool = ConnectionPool(_fabrica, nombre="test", max_size=3)
+    maximo = []
+    en_uso = []
+    lock = threading.Lock()
+
+    def trabajo():
+        with pool.conexion() as conn:
+            with lock:
+                en_uso.append(conn)
+                maximo.append(len(en_uso))
+            conn.execute("SELECT 1")
+            time.sleep(0.01)
+            with lock:
+                en_uso.remove(conn)
+
+    hilos = [threading.Thread(target=trabajo) for _ in range(12)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert max(maximo) <= 3
+    assert pool.estadisticas()["creadas"] <= 3
+
+def test_context_manager_hace_rollback_de_lo_no_confirmado(tmp_path):
+    ruta = str(tmp_path / "pool.db")
+    pool = ConnectionPool(lambda: sqlite3.connect(ruta, check_same_thread=False), nombre="test", max_size=1)
+    with pool.conexion() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.commit()
+        conn.execute("INSERT INTO t VALUES (1)")
+    with pool.conexion() as conn:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
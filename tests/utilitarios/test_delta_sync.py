@@ -0,0 +1,74 @@
+import sys
+from unittest.mock import MagicMock
+from PyQt6.QtWidgets import QApplication, QTableWidget, QTableWidgetItem
+from core.delta_sync import CambiosDelta, SincronizadorDelta, aplicar_cambios_tabla, id_fila
+
+"""
+Tests de la sincronización incremental por rowversion (core/delta_sync.py): lectura completa con marca,
+lectura de cambios y bajas desde la marca, y aplicación de los deltas sobre un QTableWidget sin vaciarlo.
+"""
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+def _db(version, filas, bajas=()):
+    db = MagicMock()
+    def ejecutar_query(query, parametros=()):
+        if "MIN_ACTIVE_ROWVERSION" in query:
+            return [(version,)]
+        if "bajas_sincronizacion" in query:
+            return [(id_registro,) for id_registro in bajas]
+        return filas
+    db.ejecutar_query.side_effect = ejecutar_query
+    return db
+
+def test_sin_marca_lee_todo_y_despues_solo_el_rango_desde_la_marca():
+    db = _db(10, [(1, 1, "Obra A"), (2, 2, "Obra B")])
+    sincronizacion = SincronizadorDelta(db, "obras")
+    cambios = sincronizacion.leer_cambios("id, nombre")
+    assert cambios == CambiosDelta([(1, (1, "Obra A")), (2, (2, "Obra B"))], [], 10, True)
+    assert not sincronizacion.activo
+    sincronizacion.confirmar(cambios.hasta)
+    db.ejecutar_query.side_effect = _db(14, [(2, 2, "Obra B2")], bajas=[1]).ejecutar_query.side_effect
+    cambios = sincronizacion.leer_cambios("id, nombre")
+    assert cambios == CambiosDelta([(2, (2, "Obra B2"))], [1], 14, False)
+    consulta, parametros = db.ejecutar_query.call_args_list[-2][0]
+    assert "rowversion > CAST(? AS BINARY(8))" in consulta and parametros == (10, 14)
+    assert db.ejecutar_query.call_args_list[-1][0][1] == ("obras", 10, 14)
+
+def test_sin_rowversion_siempre_lee_completo():
+    db = _db(None, [(1, "V1")])
+    db.ejecutar_query.side_effect = lambda query, *args: (_ for _ in ()).throw(Exception("sin rowversion")) if "ROWVERSION" in query else [(1, "V1")]
+    sincronizacion = SincronizadorDelta(db, "vidrios", "id_vidrio")
+    sincronizacion.confirmar(5)
+    cambios = sincronizacion.leer_cambios()
+    assert cambios.completo and cambios.hasta is None and cambios.filas == [(1, ("V1",))]
+
+def test_aplicar_cambios_tabla_actualiza_en_lugar_y_respeta_filas_ajenas():
+    tabla = QTableWidget(0, 2)
+    valores = lambda fila: [fila[0], fila[1]]
+    assert aplicar_cambios_tabla(tabla, CambiosDelta([(1, ("A", "x")), (2, ("B", "y")), (3, ("C", "z"))], [], 10, True), valores)
+    item_a = tabla.item(0, 0)
+    assert aplicar_cambios_tabla(tabla, CambiosDelta([(1, ("A", "x2")), (4, ("D", "w"))], [2], 12, False), valores)
+    assert [id_fila(tabla, fila) for fila in range(tabla.rowCount())] == [1, 3, 4]
+    assert tabla.item(0, 0) is item_a and tabla.item(0, 1).text() == "x2"
+    tabla.insertRow(tabla.rowCount())
+    tabla.setItem(tabla.rowCount() - 1, 0, QTableWidgetItem("sin id"))
+    assert not aplicar_cambios_tabla(tabla, CambiosDelta([(5, ("E", "v"))], [], 13, False), valores)
+    assert tabla.rowCount() == 4
+
+def test_obras_controller_recarga_completa_y_despues_aplica_deltas():
+    from modules.obras.controller import ObrasController
+    model = MagicMock()
+    model.sincronizacion_obras = SincronizadorDelta(_db(10, [(1, 1, "Obra A", "Cliente"), (2, 2, "Obra B", "Cliente")]), "obras")
+    model.obtener_headers_obras.return_value = ["id", "nombre", "cliente"]
+    model.obtener_cambios_obras.side_effect = lambda: model.sincronizacion_obras.leer_cambios()
+    controller = ObrasController.__new__(ObrasController)
+    controller.model, controller.view = model, MagicMock()
+    controller.view.tabla_obras = QTableWidget()
+    controller.cargar_datos_obras_tabla()
+    assert controller.view.tabla_obras.rowCount() == 2 and model.sincronizacion_obras.marca == 10
+    model.sincronizacion_obras.db = _db(11, [(2, 2, "Obra B", "Cliente nuevo")], bajas=[1])
+    controller.cargar_datos_obras_tabla()
+    tabla = controller.view.tabla_obras
+    assert tabla.rowCount() == 1 and tabla.item(0, 1).text() == "Cliente nuevo"
+    assert model.sincronizacion_obras.marca == 11
@@ -0,0 +1,94 @@
+import sys
+import threading
+import time
+from PyQt6.QtWidgets import QApplication
+from core.event_bus import EventBus, DespachadorEventos
+
+"""
+Tests del despachador de eventos (core/event_bus.py): las ráfagas de un tópico se entregan una sola vez
+por suscriptor, con los ids afectados unidos, también cuando se emiten desde otro hilo.
+"""
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+def _procesar_hasta(condicion, timeout=5):
+    limite = time.time() + timeout
+    while not condicion() and time.time() < limite:
+        app.processEvents()
+        time.sleep(0.005)
+
+def test_rafaga_se_entrega_una_vez_con_los_ids_unidos(monkeypatch):
+    monkeypatch.setenv("TAREAS_SINCRONICAS", "0")
+    bus = EventBus()
+    despachador = DespachadorEventos(bus, ventana_ms=30)
+    inventario, obras = [], []
+    despachador.suscribir('pedido_actualizado', inventario.append)
+    despachador.suscribir('pedido_actualizado', obras.append)
+    for id_pedido in range(200):
+        bus.pedido_actualizado.emit({'id': id_pedido, 'obra': id_pedido % 3, 'usuario': 'admin'})
+    app.processEvents()
+    assert inventario == []
+    _procesar_hasta(lambda: inventario)
+    time.sleep(0.05)
+    app.processEvents()
+    assert len(inventario) == 1 and len(obras) == 1
+    agregado = inventario[0]
+    assert agregado['cantidad'] == 200
+    assert agregado['ids'] == set(range(200)) and agregado['ids_obras'] == {0, 1, 2}
+    assert agregado['id'] == 199 and agregado['usuario'] == 'admin'
+
+def test_eventos_desde_otro_hilo_llegan_al_hilo_del_despachador(monkeypatch):
+    monkeypatch.setenv("TAREAS_SINCRONICAS", "0")
+    bus = EventBus()
+    despachador = DespachadorEventos(bus, ventana_ms=10)
+    hilos = []
+    despachador.suscribir('stock_modificado', lambda datos: hilos.append((threading.get_ident(), datos['ids'])))
+    hilo = threading.Thread(target=lambda: [bus.stock_modificado.emit({'tipo': 'perfiles', 'cambios': {i: 1}}) for i in (5, 6)])
+    hilo.start()
+    hilo.join()
+    _procesar_hasta(lambda: hilos)
+    assert hilos == [(threading.get_ident(), {5, 6})]
+
+def test_modo_sincronico_suscriptores_con_error_y_vistas_destruidas(monkeypatch):
+    monkeypatch.setenv("TAREAS_SINCRONICAS", "1")
+    bus = EventBus()
+    despachador = DespachadorEventos(bus)
+    recibidos = []
+
+    class Vista:
+        def actualizar_por_obra(self, datos):
+            recibidos.append(('vista', datos['ids']))
+
+    def falla(datos):
+        raise RuntimeError("tabla borrada")
+
+    vista = Vista()
+    despachador.suscribir('obra_agregada', falla)
+    despachador.suscribir('obra_agregada', vista.actualizar_por_obra)
+    bus.obra_agregada.emit({'id': 7, 'nombre': 'Obra'})
+    assert recibidos == [('vista', {7})]
+    del vista
+    bus.obra_agregada.emit({'id': 8, 'nombre': 'Obra'})
+    assert recibidos == [('vista', {7})]
+
+def test_el_ultimo_desuscripto_suelta_la_conexion_al_bus(monkeypatch):
+    monkeypatch.setenv("TAREAS_SINCRONICAS", "1")
+    bus = EventBus()
+    despachador = DespachadorEventos(bus)
+    recibidos = []
+
+    class Vista:
+        def actualizar(self, datos):
+            recibidos.append(datos['ids'])
+
+    despachador.suscribir('obra_agregada', recibidos.append)
+    assert bus.receivers(bus.obra_agregada) == 1
+    despachador.desuscribir('obra_agregada', recibidos.append)
+    assert bus.receivers(bus.obra_agregada) == 0
+    # Con la vista destruida, el próximo evento del tópico suelta la conexión
+    vista = Vista()
+    despachador.suscribir('obra_agregada', vista.actualizar)
+    bus.obra_agregada.emit({'id': 1})
+    del vista
+    bus.obra_agregada.emit({'id': 2})
+    assert recibidos == [{1}] and bus.receivers(bus.obra_agregada) == 0
@@ -0,0 +1,87 @@
+import csv
+import re
+import pytest
+from core.exportacion import ExportacionCancelada, exportar_filas, filas_de_query
+from core.workers import ejecutar_en_segundo_plano
+
+"""
+Tests del servicio de exportación en streaming: las filas se consumen de un generador y se escriben
+directo a CSV/XLSX/PDF, con avance, cancelación y limpieza del archivo parcial.
+"""
+
+COLUMNAS = ["id", "detalle", "monto"]
+
+def _filas(cantidad, consumidas=None):
+    for i in range(cantidad):
+        if consumidas is not None:
+            consumidas.append(i)
+        yield (i, f"detalle {i}", i * 1.5)
+
+def test_csv_desde_generador_con_avance(tmp_path):
+    archivo = tmp_path / "datos.csv"
+    avance = []
+    escritas = exportar_filas(_filas(25), "csv", str(archivo), COLUMNAS, al_progreso=lambda n, total: avance.append(n), cada=10)
+    assert escritas == 25
+    assert avance == [10, 20, 25]
+    with open(archivo, encoding="utf-8-sig", newline="") as f:
+        filas = list(csv.reader(f, delimiter=";"))
+    assert filas[0] == COLUMNAS
+    assert filas[25] == ["24", "detalle 24", "36.0"]
+
+def test_excel_y_pdf_con_columnas_de_dicts(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    pytest.importorskip("reportlab")
+    filas = [{"codigo": f"C{i}", "stock": i} for i in range(300)]
+    assert exportar_filas(iter(filas), "excel", str(tmp_path / "datos.xlsx")) == 300
+    hoja = openpyxl.load_workbook(tmp_path / "datos.xlsx", read_only=True).active
+    assert [c.value for c in next(hoja.iter_rows(max_row=1))] == ["codigo", "stock"]
+    assert exportar_filas(iter(filas), "pdf", str(tmp_path / "datos.pdf"), titulo="Prueba") == 300
+    # 300 filas no entran en una hoja: el PDF tiene varias páginas
+    paginas = re.search(rb"/Count (\d+)", (tmp_path / "datos.pdf").read_bytes())
+    assert int(paginas.group(1)) > 1
+
+def test_sin_filas_no_crea_archivo(tmp_path):
+    archivo = tmp_path / "vacio.csv"
+    assert exportar_filas(iter([]), "csv", str(archivo), COLUMNAS) == 0
+    assert not archivo.exists()
+
+def test_cancelar_borra_el_parcial_y_cierra_el_origen(tmp_path):
+    archivo = tmp_path / "cancelado.csv"
+    consumidas = []
+    origen = _filas(1000, consumidas)
+    with pytest.raises(ExportacionCancelada):
+        exportar_filas(origen, "csv", str(archivo), COLUMNAS, cancelado=lambda: len(consumidas) >= 20, cada=10)
+    assert not archivo.exists()
+    assert len(consumidas) == 20
+    # El generador quedó cerrado (con iterar_query, la conexión vuelve al pool)
+    assert next(origen, None) is None
+
+def test_avance_de_la_tarea_en_segundo_plano(tmp_path):
+    avance = []
+    resultados = []
+    ejecutar_en_segundo_plano(
+        exportar_filas, args=(_filas(2500), "csv", str(tmp_path / "tarea.csv"), COLUMNAS),
+        al_terminar=resultados.append, al_progreso=lambda n, total: avance.append(n), mensaje_carga=None,
+    )
+    assert resultados == [2500]
+    assert avance == [1000, 2000, 2500]
+
+def test_filas_de_query_sin_iterar_query():
+    class DB:
+        def ejecutar_query(self, query, parametros=None):
+            return [(1,), (2,)]
+    assert list(filas_de_query(DB(), "SELECT id FROM t")) == [(1,), (2,)]
+
+def test_exportacion_no_importa_la_capa_de_tareas():
+    import subprocess
+    import sys
+    codigo = "import sys, core.exportacion; print('core.workers' in sys.modules)"
+    salida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True)
+    assert salida.stdout.strip() == "False"
+
+def test_excel_conserva_decimales(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    from decimal import Decimal
+    exportar_filas(iter([(1, Decimal("12.50"))]), "excel", str(tmp_path / "decimal.xlsx"), ["id", "monto"])
+    hoja = openpyxl.load_workbook(tmp_path / "decimal.xlsx", read_only=True).active
+    assert list(hoja.iter_rows(min_row=2, values_only=True)) == [(1, 12.5)]
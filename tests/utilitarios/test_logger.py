@@ -0,0 +1,44 @@
+import logging
+import queue
+import pytest
+from core import logger as logger_mod
+from core.logger import Logger, detener_logging
+
+"""
+Tests del Logger de proceso único: instanciar Logger() muchas veces no agrega handlers
+ni duplica líneas, y la escritura a disco la hace el QueueListener.
+"""
+
+@pytest.fixture
+def log_file(tmp_path):
+    detener_logging()
+    yield str(tmp_path / "app.log")
+    detener_logging()
+
+def test_logger_instanciado_muchas_veces_escribe_una_sola_linea(log_file):
+    for _ in range(20):
+        Logger(log_file=log_file)
+    Logger(log_file=log_file).info("mensaje unico")
+    assert len(logging.getLogger("MPSLogger").handlers) == 1
+    detener_logging()
+    with open(log_file, encoding="utf-8") as f:
+        assert f.read().count("mensaje unico") == 1
+
+def test_logger_escribe_json_y_auditoria_desde_el_listener(log_file, tmp_path):
+    Logger(log_file=log_file, correlation_id="abc").log_auditoria("admin", "alta", "obra 1")
+    Logger(log_file=log_file).debug("solo debug")
+    detener_logging()
+    with open(tmp_path / "app_json.log", encoding="utf-8") as f:
+        assert '"correlation_id": "abc"' in f.read()
+    with open(tmp_path / "audit.log", encoding="utf-8") as f:
+        contenido = f.read()
+    assert "Acción: alta" in contenido
+    assert "solo debug" not in contenido
+
+def test_cola_llena_descarta_sin_bloquear():
+    handler = logger_mod._QueueHandlerAcotado(queue.Queue(maxsize=1))
+    descartados = logger_mod._QueueHandlerAcotado.descartados
+    for i in range(5):
+        handler.emit(logging.makeLogRecord({"msg": f"linea {i}"}))
+    assert handler.queue.qsize() == 1
+    assert logger_mod._QueueHandlerAcotado.descartados == descartados + 4
@@ -1,5 +1,6 @@
 import pytest
-from PyQt6.QtWidgets import QApplication
+from unittest.mock import MagicMock, patch
+from PyQt6.QtWidgets import QApplication, QWidget
 from main import MainWindow
 
 class DummyUser:
@@ -35,3 +36,35 @@ def test_module_stack_and_sidebar_mapping(qtbot):
         nombre_mod = nombre.lower().replace(' / ', '').replace('í', 'i').replace('ó', 'o').replace('á', 'a').replace('é', 'e').replace('ú', 'u')
         assert nombre_mod[:5] in clase or nombre_mod.replace(' ', '')[:5] in clase, \
             f"El módulo '{nombre}' no carga la vista correcta: stack muestra {clase}"
+
+def test_solo_se_construye_el_modulo_inicial_y_el_placeholder_se_reemplaza(qtbot):
+    construidos = []
+
+    def constructor(nombre):
+        def construir(self):
+            construidos.append(nombre)
+            vista = QWidget()
+            vista.setObjectName(f"vista_{nombre}")
+            return vista, MagicMock()
+        return construir
+
+    constructores = {f"_construir_{nombre}": constructor(nombre) for nombre in MainWindow.MODULOS_STACK}
+    with patch.multiple(MainWindow, **constructores), \
+            patch.object(MainWindow, "_modelo", lambda self, nombre: self._models.setdefault(nombre, MagicMock())), \
+            patch.object(MainWindow, "_setup_conexion_checker"):
+        window = MainWindow(DummyUser(), ["Obras", "Inventario", "Herrajes"])
+        qtbot.addWidget(window)
+        # Al arrancar sólo existe la vista del módulo inicial; el resto del stack son placeholders
+        assert construidos == ["obras"]
+        assert window.module_stack.currentWidget().objectName() == "vista_obras"
+        idx_inventario = MainWindow.MODULOS_STACK.index("inventario")
+        assert window.module_stack.widget(idx_inventario).objectName() == "placeholder_inventario"
+        # La primera selección construye el módulo y reemplaza su placeholder en el mismo índice
+        window.sidebar.pageChanged.emit(1)
+        assert construidos == ["obras", "inventario"]
+        assert window.module_stack.widget(idx_inventario).objectName() == "vista_inventario"
+        assert window.module_stack.currentIndex() == idx_inventario
+        # Volver a seleccionarlo no lo reconstruye
+        window.sidebar.pageChanged.emit(0)
+        window.sidebar.pageChanged.emit(1)
+        assert construidos == ["obras", "inventario"]
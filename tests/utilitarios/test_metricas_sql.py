@@ -0,0 +1,53 @@
+from unittest.mock import MagicMock
+from core.database import BaseDatabaseConnection
+from core.metricas_sql import HistogramaLatencias, MetricasSQL, huella_sql, instantanea_metricas_sql, metricas_sql
+
+"""
+Tests de la instrumentación de consultas (core/metricas_sql.py): huella normalizada del SQL, sitio que
+originó la consulta, histograma de latencias por ventanas, log de consultas lentas e integración con
+BaseDatabaseConnection.
+"""
+
+def test_huella_agrupa_variantes_de_la_misma_consulta():
+    assert huella_sql("SELECT * FROM obras WHERE id = 15 AND estado = 'Medición'") == "SELECT * FROM obras WHERE id = ? AND estado = ?"
+    assert huella_sql("SELECT id FROM t WHERE id IN (?, ?, ?)\n  ORDER BY id") == huella_sql("SELECT id FROM t WHERE id IN (?,?) ORDER BY id")
+    assert huella_sql("SELECT col2 FROM tabla_1") == "SELECT col2 FROM tabla_1"
+
+def test_histograma_por_ventanas_rotativas():
+    histograma = HistogramaLatencias(duracion=60, ventanas=2)
+    for ms in (0.5, 3, 3, 40, 900):
+        histograma.registrar(ms, ahora=0)
+    assert histograma.percentil(0.5, ahora=10) == 5 and histograma.percentil(0.99, ahora=10) == 1000
+    histograma.registrar(1, ahora=70)
+    histograma.registrar(1, ahora=130)   # la primera ventana rota y sus conteos dejan de sumar
+    conteos, total_ms = histograma.conteos(ahora=130)
+    assert sum(conteos) == 2 and total_ms == 2
+
+def test_consultas_lentas_van_al_archivo(tmp_path):
+    ruta = tmp_path / "lentas.log"
+    metricas = MetricasSQL(umbral_lenta_ms=100, ruta_lentas=str(ruta))
+    metricas.registrar("SELECT * FROM obras WHERE id = 3", 0.25, 1, "obras", ("obras", "ObrasModel.obtener_obra"))
+    metricas.registrar("SELECT 1", 0.001, 1, "obras", ("obras", "ObrasModel.ping"))
+    contenido = ruta.read_text(encoding="utf-8")
+    assert "250 ms" in contenido and "ObrasModel.obtener_obra" in contenido and "id = ?" in contenido
+    assert "ping" not in contenido and metricas.instantanea()['lentas'] == 1
+
+def _consultar_perfiles(db):
+    return db.ejecutar_query("SELECT id FROM inventario_perfiles WHERE codigo = 'A-1'")
+
+def test_base_database_connection_registra_sitio_filas_y_tiempo():
+    metricas_sql().reiniciar()
+    db = BaseDatabaseConnection("inventario")
+    cursor = MagicMock()
+    cursor.fetchall.return_value = [(1,), (2,)]
+    db.connection = MagicMock(cursor=MagicMock(return_value=cursor))
+    _consultar_perfiles(db)
+    _consultar_perfiles(db)
+    db.ejecutar_lote("UPDATE inventario_perfiles SET stock_actual = ? WHERE id = ?", [(1, 1), (2, 2), (3, 3)])
+    instantanea = instantanea_metricas_sql()
+    sitio = next(s for s in instantanea['sitios'] if s['metodo'] == "_consultar_perfiles")
+    assert (sitio['modulo'], sitio['consultas'], sitio['filas'], sitio['database']) == ("test_metricas_sql", 2, 4, "inventario")
+    assert sitio['huella'] == "SELECT id FROM inventario_perfiles WHERE codigo = ?"
+    lote = next(s for s in instantanea['sitios'] if s['huella'].startswith("UPDATE"))
+    assert lote['metodo'] == "test_base_database_connection_registra_sitio_filas_y_tiempo" and lote['filas'] == 3
+    assert instantanea['modulos'][0]['modulo'] == "test_metricas_sql" and instantanea['modulos'][0]['consultas'] == 3
@@ -0,0 +1,136 @@
+from contextlib import contextmanager
+import core.database as database
+from core.database import BaseDatabaseConnection
+from core.offline import MotorOffline, traducir_a_sqlite
+
+"""
+Tests del modo offline (core/offline.py): traducción de T-SQL a SQLite, réplica local por rowversion,
+lecturas servidas localmente, cola de escrituras diferidas con detección de conflictos y reintento sin conexión.
+"""
+
+class OperationalError(Exception):
+    """Mismo nombre que el error de conexión de pyodbc (ver core.db_pool.es_error_de_conexion)."""
+
+class ServidorFalso:
+    """Tabla obras en memoria que responde las consultas que hace el motor offline."""
+    def __init__(self):
+        self.obras = {1: ["Obra A", 5], 2: ["Obra B", 6]}
+        self.version = 6
+        self.ejecutadas = []
+        self.caido = False
+
+    @contextmanager
+    def conexion(self, _database):
+        if self.caido:
+            raise OperationalError("sin red")
+        yield self
+
+    def cursor(self):
+        return self
+
+    def commit(self):
+        pass
+
+    def execute(self, query, parametros=()):
+        self.description, self._filas = [("x",)], []
+        if query.startswith("SELECT TOP 0"):
+            self.description = [("id",), ("nombre",), ("rowversion",)]
+        elif "MIN_ACTIVE_ROWVERSION" in query:
+            self._filas = [(self.version,)]
+        elif "bajas_sincronizacion" in query:
+            pass
+        elif "UPDLOCK" in query:
+            self._filas = [(i, self.obras[i][1]) for i in parametros if i in self.obras]
+        elif query.startswith("SELECT"):
+            desde = parametros[0] if "rowversion >" in query else 0
+            hasta = parametros[-1]
+            self._filas = [(i, i, nombre, version) for i, (nombre, version) in sorted(self.obras.items()) if desde < version <= hasta]
+        else:
+            self.description = None
+            self.ejecutadas.append((query, list(parametros)))
+            if query.startswith("UPDATE"):
+                self.version += 1
+                self.obras[parametros[1]] = [parametros[0], self.version]
+
+    def fetchall(self):
+        return self._filas
+
+def _motor(tmp_path, servidor):
+    return MotorOffline(str(tmp_path), tamano_lote=10, conexion_remota=servidor.conexion, tablas={"obras": {"obras": "id"}})
+
+def test_traduce_corchetes_top_y_paginado():
+    assert traducir_a_sqlite("SELECT TOP 5 [id] FROM obras ORDER BY id") == ('SELECT "id" FROM obras ORDER BY id LIMIT 5', ())
+    consulta, parametros = traducir_a_sqlite("SELECT id FROM t WHERE a = ? ORDER BY id OFFSET ? ROWS FETCH NEXT ? ROWS ONLY", ("x", 20, 10))
+    assert consulta.endswith("LIMIT ? OFFSET ?") and parametros == ("x", 10, 20)
+
+def test_lecturas_desde_la_replica_sin_tocar_el_servidor(tmp_path, monkeypatch):
+    servidor = ServidorFalso()
+    motor = _motor(tmp_path, servidor)
+    assert motor.sincronizar()['en_linea']
+    servidor.caido = True
+    monkeypatch.setattr(database, "motor_offline_activo", lambda: motor)
+    db = BaseDatabaseConnection("obras")
+    assert db.ejecutar_query("SELECT nombre FROM obras WHERE id = ?", (2,)) == [("Obra B",)]
+    assert db.ejecutar_query("SELECT [id], nombre FROM obras ORDER BY id OFFSET 0 ROWS FETCH NEXT ? ROWS ONLY", (1,)) == [(1, "Obra A")]
+    # La bajada siguiente sólo trae lo que cambió desde la marca
+    servidor.caido = False
+    servidor.version = 7
+    servidor.obras[2] = ["Obra B editada", 7]
+    motor.sincronizar()
+    assert motor.resolver("obras", "SELECT nombre FROM obras WHERE id = 2").filas == [("Obra B editada",)]
+    motor.detener()
+
+def test_escrituras_diferidas_se_envian_y_detectan_conflictos(tmp_path):
+    servidor = ServidorFalso()
+    motor = _motor(tmp_path, servidor)
+    motor.sincronizar()
+    servidor.caido = True
+    assert motor.resolver("obras", "UPDATE obras SET nombre = ? WHERE id = ?", ("Obra A2", 1)).rowcount == 1
+    assert motor.resolver("obras", "UPDATE obras SET nombre = ? WHERE id = ?", ("Obra A3", 1)).rowcount == 1
+    assert motor.resolver("obras", "UPDATE obras SET nombre = ? WHERE id = ?", ("Obra B2", 2)).rowcount == 1
+    assert motor.resolver("obras", "SELECT nombre FROM obras ORDER BY id").filas == [("Obra A3",), ("Obra B2",)]
+    resumen = motor.sincronizar()
+    assert not resumen['en_linea'] and resumen['pendientes'] == 3
+    # Mientras tanto otro usuario modificó la obra 2 en el servidor
+    servidor.caido = False
+    servidor.version = 9
+    servidor.obras[2] = ["Obra B de otro usuario", 9]
+    resumen = motor.sincronizar()
+    assert (resumen['enviadas'], resumen['conflictos'], resumen['pendientes']) == (2, 1, 0)
+    assert [parametros for _query, parametros in servidor.ejecutadas] == [["Obra A2", 1], ["Obra A3", 1]]
+    assert motor.conflictos()[0][3] == "conflicto"
+    # El servidor gana: la réplica vuelve a mostrar su versión
+    assert motor.resolver("obras", "SELECT nombre FROM obras ORDER BY id").filas == [("Obra A3",), ("Obra B de otro usuario",)]
+    motor.detener()
+
+def test_cambio_de_esquema_recarga_sin_vaciar_la_replica(tmp_path):
+    servidor = ServidorFalso()
+    motor = _motor(tmp_path, servidor)
+    motor.sincronizar()
+    assert motor.resolver("obras", "INSERT INTO obras (nombre) VALUES (?)", ("Obra local",)).rowcount == 1
+    leidas_durante_la_carga = []
+    execute = servidor.execute
+    def execute_con_columna_nueva(query, parametros=()):
+        execute(query, parametros)
+        if query.startswith("SELECT TOP 0"):
+            servidor.description = [("id",), ("nombre",), ("estado",), ("rowversion",)]
+        elif query.startswith("SELECT") and "[estado]" in query:
+            leidas_durante_la_carga.append(motor.resolver("obras", "SELECT nombre FROM obras ORDER BY id").filas)
+            servidor._filas = [(i, i, nombre, "activa", version) for i, _i, nombre, version in servidor._filas]
+    servidor.execute = execute_con_columna_nueva
+    motor.actualizar_replica("obras")
+    # Mientras se leía la tabla con la columna nueva, las lecturas seguían viendo la réplica anterior
+    assert leidas_durante_la_carga == [[("Obra local",), ("Obra A",), ("Obra B",)]]
+    assert motor.resolver("obras", "SELECT id, nombre, estado FROM obras ORDER BY id").filas == [
+        (-1, "Obra local", None), (1, "Obra A", "activa"), (2, "Obra B", "activa")
+    ]
+    motor.detener()
+
+def test_consultas_no_replicadas_y_con_rowversion_van_al_servidor(tmp_path):
+    motor = _motor(tmp_path, ServidorFalso())
+    motor.sincronizar()
+    assert motor.resolver("obras", "SELECT * FROM pedidos") is None
+    assert motor.resolver("obras", "SELECT rowversion FROM obras WHERE id = ?", (1,)) is None
+    assert motor.resolver("obras", "UPDATE pedidos SET estado = ? WHERE id = ?", ("x", 1)) is None
+    assert motor.resolver("users", "SELECT * FROM usuarios") is None
+    motor.detener()
@@ -0,0 +1,22 @@
+from core.startup_profiler import StartupProfiler
+
+"""
+Tests del perfilador de arranque: mediciones por etapa, imports medidos y resumen ordenado.
+"""
+
+def test_medir_e_importar_registran_etapas():
+    profiler = StartupProfiler()
+    with profiler.medir("construccion", "inventario"):
+        pass
+    modulo = profiler.importar("json")
+    profiler.marcar("login visible")
+    assert modulo.__name__ == "json"
+    assert [m[:2] for m in profiler.mediciones()] == [("construccion", "inventario"), ("import", "json"), ("hito", "login visible")]
+
+def test_resumen_ordena_de_mayor_a_menor_sin_hitos():
+    profiler = StartupProfiler()
+    profiler.registrar("import", "rapido", 0.01)
+    profiler.registrar("import", "lento", 0.5)
+    profiler.marcar("fin")
+    assert [nombre for _, nombre, _ in profiler.resumen()] == ["lento", "rapido"]
+    assert "lento" in profiler.registrar_resumen()
@@ -0,0 +1,198 @@
+import threading
+import time
+from contextlib import contextmanager
+import pytest
+from core.stock_ledger import (
+    ItemNoEncontrado, ReservaIncompleta, StockInsuficiente, aplicar_movimientos, fijar_stock, reservar_materiales_obra, reservar_para_obra
+)
+
+"""
+Tests del motor de stock (core/stock_ledger.py): el control de stock lo hace el UPDATE condicionado,
+sin SELECT previo, y cualquier falla revierte la transacción completa.
+Se usa una base falsa que, como SQL Server, ejecuta cada UPDATE en forma atómica y respeta su WHERE.
+"""
+
+class BaseStockFalsa:
+    def __init__(self, stocks, demora=0.0):
+        self.stocks = dict(stocks)
+        self.demora = demora
+        self.falla_commit = False
+        self.lotes_confirmados = []
+        self.sentencias = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def transaction(self, timeout=30, retries=2):
+        self._local.deshacer = []
+        self._local.lotes = []
+        self._local.al_confirmar = []
+        try:
+            yield self
+            if self.falla_commit:
+                raise RuntimeError("commit fallido")
+        except Exception:
+            with self._lock:
+                for id_item, anterior in reversed(self._local.deshacer):
+                    self.stocks[id_item] = anterior
+            raise
+        finally:
+            pendientes, self._local.al_confirmar = self._local.al_confirmar, None
+        with self._lock:
+            self.lotes_confirmados.extend(self._local.lotes)
+        for callback in pendientes:
+            callback()
+
+    def al_confirmar(self, callback):
+        if getattr(self._local, "al_confirmar", None) is None:
+            callback()
+        else:
+            self._local.al_confirmar.append(callback)
+
+    def ejecutar_query(self, query, parametros=None):
+        self.sentencias.append((query, parametros))
+        if query.startswith("UPDATE") and "stock_actual >=" in query:
+            if "VALUES" in query:
+                pares = list(zip(parametros[0::2], parametros[1::2]))
+            else:
+                pares = [(parametros[1], parametros[0])]
+            filas = []
+            time.sleep(self.demora)
+            with self._lock:
+                for id_item, descuento in pares:
+                    stock = self.stocks.get(id_item)
+                    if stock is not None and stock >= descuento:
+                        self._local.deshacer.append((id_item, stock))
+                        self.stocks[id_item] = stock - descuento
+                        filas.append((id_item, stock, stock - descuento))
+            return filas
+        if query.startswith("UPDATE") and "OUTPUT deleted.stock_actual" in query:
+            cantidad, id_item = parametros
+            with self._lock:
+                if id_item not in self.stocks:
+                    return []
+                self._local.deshacer.append((id_item, self.stocks[id_item]))
+                anterior, self.stocks[id_item] = self.stocks[id_item], cantidad
+            return [(anterior,)]
+        if query.startswith("SELECT"):
+            with self._lock:
+                return [(id_item, self.stocks[id_item]) for id_item in parametros if id_item in self.stocks]
+        return None
+
+    def ejecutar_lote(self, query, filas):
+        self._local.lotes.append((query, list(filas)))
+        return len(filas)
+
+    def movimientos(self):
+        return [fila for query, filas in self.lotes_confirmados if query.startswith("INSERT INTO movimientos") for fila in filas]
+
+def test_reservas_concurrentes_no_venden_mas_que_el_stock():
+    db = BaseStockFalsa({7: 10}, demora=0.001)
+    resultados = []
+
+    def reservar():
+        try:
+            reservar_para_obra(db, "herrajes", 1, [(7, 1)], "usuario")
+            resultados.append("ok")
+        except StockInsuficiente:
+            resultados.append("sin stock")
+
+    hilos = [threading.Thread(target=reservar) for _ in range(25)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert resultados.count("ok") == 10 and resultados.count("sin stock") == 15
+    assert db.stocks[7] == 0
+    assert len(db.movimientos()) == 10
+    # Ninguna reserva leyó el stock antes de descontarlo: sólo las fallidas consultaron para diagnosticar
+    assert sum(1 for query, _ in db.sentencias if query.startswith("SELECT")) == 15
+
+def test_un_item_insuficiente_revierte_todo_el_lote():
+    db = BaseStockFalsa({1: 5, 2: 1})
+    with pytest.raises(StockInsuficiente) as error:
+        reservar_para_obra(db, "vidrios", 3, [(1, 4), (2, 3)], "usuario")
+    assert "Stock insuficiente para el vidrio 2" in str(error.value)
+    assert error.value.ids == [2] and error.value.stocks == {2: 1}
+    assert db.stocks == {1: 5, 2: 1}
+    assert db.lotes_confirmados == []
+
+def test_item_inexistente_y_cantidad_invalida():
+    db = BaseStockFalsa({1: 5})
+    with pytest.raises(ItemNoEncontrado, match="Herraje no encontrado: 9"):
+        aplicar_movimientos(db, "herrajes", [(9, -1)])
+    with pytest.raises(ValueError, match="Cantidad inválida"):
+        reservar_para_obra(db, "herrajes", 3, [(1, 0)])
+    assert db.sentencias[0][0].startswith("UPDATE herrajes SET stock_actual = stock_actual - ?")
+
+def test_aplicar_movimientos_ingresos_y_egresos():
+    db = BaseStockFalsa({1: 5, 2: 0})
+    cambios = aplicar_movimientos(db, "perfiles", [(1, -2), (2, 4), (1, -1)], "ana")
+    assert cambios == {1: (5, 2), 2: (0, 4)}
+    assert sorted(db.movimientos()) == [(1, "Egreso", 3, "ana"), (2, "Ingreso", 4, "ana")]
+
+def test_fijar_stock_devuelve_el_anterior():
+    db = BaseStockFalsa({1: 7})
+    assert fijar_stock(db, "herrajes", 1, 10, "ana") == 7
+    assert db.stocks[1] == 10 and db.movimientos() == [(1, 3, "ana")]
+    with pytest.raises(ItemNoEncontrado):
+        fijar_stock(db, "herrajes", 2, 10)
+
+def test_reserva_de_obra_con_una_transaccion_por_base():
+    db_inventario = BaseStockFalsa({1: 10})
+    db_herrajes = BaseStockFalsa({5: 1})
+    with pytest.raises(StockInsuficiente):
+        reservar_materiales_obra(12, [(db_inventario, "perfiles", [(1, 4)]), (db_herrajes, "herrajes", [(5, 2)])], "ana")
+    # Los perfiles ya se habían descontado en su base: se revierten junto con la de herrajes
+    assert db_inventario.stocks == {1: 10} and db_inventario.lotes_confirmados == []
+    resultado = reservar_materiales_obra(12, [(db_inventario, "perfiles", [(1, 4)]), (db_herrajes, "herrajes", [(5, 1)])], "ana")
+    assert resultado == {"perfiles": {1: (10, 6)}, "herrajes": {5: (1, 0)}}
+    reservas = [filas for query, filas in db_inventario.lotes_confirmados if "reservas_materiales" in query]
+    assert reservas == [[(1, 4, "12")]]
+
+def test_reserva_de_obra_informa_las_bases_ya_confirmadas_si_falla_un_commit():
+    from core.event_bus import event_bus
+    eventos = []
+    db_inventario = BaseStockFalsa({1: 10})
+    db_herrajes = BaseStockFalsa({5: 3})
+    db_inventario.falla_commit = True
+    event_bus.stock_modificado.connect(eventos.append)
+    try:
+        with pytest.raises(ReservaIncompleta) as error:
+            reservar_materiales_obra(12, [(db_inventario, "perfiles", [(1, 4)]), (db_herrajes, "herrajes", [(5, 1)])], "ana")
+    finally:
+        event_bus.stock_modificado.disconnect(eventos.append)
+    # No hay commit distribuido: los herrajes quedaron reservados y los perfiles se revirtieron
+    assert error.value.confirmados == ["herrajes"]
+    assert db_herrajes.stocks == {5: 2} and db_inventario.stocks == {1: 10}
+    assert eventos == [{'tipo': 'herrajes', 'cambios': {5: (3, 2)}}]
+
+def test_emite_stock_modificado_solo_despues_del_commit():
+    from core.event_bus import event_bus
+    eventos = []
+    event_bus.stock_modificado.connect(eventos.append)
+    try:
+        db = BaseStockFalsa({1: 5, 2: 1})
+        aplicar_movimientos(db, "perfiles", [(1, -2)], "ana")
+        with pytest.raises(StockInsuficiente):
+            reservar_para_obra(db, "perfiles", 3, [(2, 3)], "ana")
+        fijar_stock(db, "perfiles", 2, 4, "ana")
+    finally:
+        event_bus.stock_modificado.disconnect(eventos.append)
+    assert eventos == [{'tipo': 'perfiles', 'cambios': {1: (5, 3)}}, {'tipo': 'perfiles', 'cambios': {2: (1, 4)}}]
+
+def test_movimiento_con_tipo_y_referencia_por_ajuste():
+    db = BaseStockFalsa({1: 5, 2: 3})
+    aplicar_movimientos(db, "perfiles", [(1, 2, "Inventario físico"), (2, -1, "Rotura")], "ana", tipo_movimiento="ajuste")
+    lote = [(query, filas) for query, filas in db.lotes_confirmados if query.startswith("INSERT INTO movimientos_stock")]
+    assert "referencia" in lote[0][0]
+    assert lote[0][1] == [(1, "ajuste", 2, "ana", "Inventario físico"), (2, "ajuste", -1, "ana", "Rotura")]
+
+def test_ajustes_de_inventario_aplican_los_validos_e_informan_los_fallidos():
+    from modules.inventario.model import InventarioModel
+    db = BaseStockFalsa({1: 5, 2: 1})
+    aplicados, errores = InventarioModel(db).aplicar_ajustes_stock([("1", 3, "Conteo"), (2, -4, "Rotura"), (9, 1, "Alta")], "ana")
+    assert aplicados == {1: (5, 8)}
+    assert errores == {9: "material no encontrado", 2: "stock insuficiente (actual: 1)"}
+    assert db.stocks == {1: 8, 2: 1}
+    assert db.movimientos() == [(1, "ajuste", 3, "ana", "Conteo")]
@@ -0,0 +1,84 @@
+import sys
+import threading
+import time
+import pytest
+from PyQt6.QtWidgets import QApplication
+from core import workers
+from core.workers import ejecutar_en_segundo_plano, esperar_tareas
+
+"""
+Tests de la capa de tareas en segundo plano (core/workers.py).
+Se fuerza el modo asíncrono para verificar que la consulta corre fuera del hilo de la GUI
+y que los callbacks vuelven a él.
+"""
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+@pytest.fixture(autouse=True)
+def modo_asincronico(monkeypatch):
+    monkeypatch.setenv("TAREAS_SINCRONICAS", "0")
+
+class VistaFalsa:
+    def __init__(self):
+        self.eventos = []
+    def mostrar_feedback_carga(self, mensaje="Cargando..."):
+        self.eventos.append("mostrar")
+    def ocultar_feedback_carga(self):
+        self.eventos.append("ocultar")
+
+def _procesar_hasta(condicion, timeout=5):
+    limite = time.time() + timeout
+    while not condicion() and time.time() < limite:
+        app.processEvents()
+        time.sleep(0.005)
+
+def test_resultado_vuelve_al_hilo_de_la_gui_y_oculta_la_carga():
+    hilo_gui = threading.get_ident()
+    hilos = {}
+    recibido = []
+    vista = VistaFalsa()
+
+    def consulta():
+        hilos["consulta"] = threading.get_ident()
+        return [1, 2, 3]
+
+    def al_terminar(resultado):
+        hilos["callback"] = threading.get_ident()
+        recibido.append(resultado)
+
+    ejecutar_en_segundo_plano(consulta, al_terminar=al_terminar, vista=vista)
+    _procesar_hasta(lambda: vista.eventos == ["mostrar", "ocultar"])
+    assert recibido == [[1, 2, 3]]
+    assert hilos["consulta"] != hilo_gui
+    assert hilos["callback"] == hilo_gui
+    assert vista.eventos == ["mostrar", "ocultar"]
+
+def test_error_se_entrega_en_al_error():
+    errores = []
+    def consulta():
+        raise RuntimeError("timeout SQL")
+    ejecutar_en_segundo_plano(consulta, al_error=errores.append, mensaje_carga=None)
+    _procesar_hasta(lambda: errores)
+    assert isinstance(errores[0], RuntimeError)
+
+def test_nueva_tarea_con_misma_clave_cancela_la_anterior():
+    liberar = threading.Event()
+    recibidos = []
+    def lenta(valor):
+        liberar.wait(2)
+        return valor
+    primera = ejecutar_en_segundo_plano(lenta, args=("vieja",), al_terminar=recibidos.append, clave="test.refrescar")
+    segunda = ejecutar_en_segundo_plano(lenta, args=("nueva",), al_terminar=recibidos.append, clave="test.refrescar")
+    liberar.set()
+    assert esperar_tareas(3000)
+    _procesar_hasta(lambda: recibidos)
+    app.processEvents()
+    assert primera.cancelada and not segunda.cancelada
+    assert recibidos == ["nueva"]
+
+def test_modo_sincronico_ejecuta_en_linea(monkeypatch):
+    monkeypatch.setenv("TAREAS_SINCRONICAS", "1")
+    recibidos = []
+    tarea = ejecutar_en_segundo_plano(lambda: 42, al_terminar=recibidos.append)
+    assert recibidos == [42] and tarea.resultado == 42
+    assert not workers._TAREAS_ACTIVAS or all(t is not tarea for t in workers._TAREAS_ACTIVAS)
@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 from modules.vidrios.model import VidriosModel
 
 class TestVidriosModel(unittest.TestCase):
@@ -49,15 +49,17 @@ class TestVidriosModel(unittest.TestCase):
             None,      # UPDATE stock
             [(10,)],  # cantidad_reservada previa
             None,     # UPDATE cantidad_reservada
-            None,     # INSERT movimiento
-            None      # INSERT auditoría
+            None      # INSERT movimiento
         ]
-        result = self.model.devolver_vidrio("test", 1, 1, 5)
+        # La auditoría va al sink de auditoría después del commit (modules/auditoria/sink.py), no como INSERT
+        # en la transacción
+        with patch("modules.vidrios.model._registrar_evento_auditoria") as auditar:
+            result = self.model.devolver_vidrio("test", 1, 1, 5)
         self.assertTrue(result)
         self.mock_db.ejecutar_query.assert_any_call("UPDATE vidrios SET stock_actual = stock_actual + ? WHERE id_vidrio = ?", (5, 1))
         self.mock_db.ejecutar_query.assert_any_call("UPDATE vidrios_por_obra SET cantidad_reservada = ?, estado = 'Reservado' WHERE id_obra = ? AND id_vidrio = ?", (5, 1, 1))
         self.mock_db.ejecutar_query.assert_any_call("INSERT INTO movimientos_vidrios (id_vidrio, tipo_movimiento, cantidad, fecha, usuario) VALUES (?, 'Ingreso', ?, CURRENT_TIMESTAMP, ?)", (1, 5, "test"))
-        self.mock_db.ejecutar_query.assert_any_call("INSERT INTO auditorias_sistema (usuario, modulo, accion, fecha) VALUES (?, ?, ?, CURRENT_TIMESTAMP)", ("test", "Vidrios", "Devolvió 5 del vidrio 1 de la obra 1"))
+        auditar.assert_called_once_with("test", "Vidrios", "Devolvió 5 del vidrio 1 de la obra 1")
 
     def test_devolver_vidrio_sin_reserva(self):
         self.mock_db.ejecutar_query.side_effect = [
@@ -76,17 +78,15 @@ class TestVidriosModel(unittest.TestCase):
         self.assertIn("No se puede devolver más de lo reservado", str(cm.exception))
 
     def test_ajustar_stock_vidrio_ok(self):
-        self.mock_db.ejecutar_query.side_effect = [
-            [(7,)],   # stock_actual anterior
-            None,     # UPDATE stock
-            None,     # INSERT movimiento
-            None      # INSERT auditoría
-        ]
-        result = self.model.ajustar_stock_vidrio("test", 1, 10)
+        # ajustar_stock_vidrio usa core.stock_ledger.fijar_stock: un UPDATE ... OUTPUT devuelve el stock anterior
+        # y el movimiento va por ejecutar_lote; la auditoría, al sink después del commit
+        self.mock_db.ejecutar_query.return_value = [(7,)]  # OUTPUT deleted.stock_actual
+        with patch("modules.vidrios.model._registrar_evento_auditoria") as auditar:
+            result = self.model.ajustar_stock_vidrio("test", 1, 10)
         self.assertTrue(result)
-        self.mock_db.ejecutar_query.assert_any_call("UPDATE vidrios SET stock_actual = ? WHERE id_vidrio = ?", (10, 1))
-        self.mock_db.ejecutar_query.assert_any_call("INSERT INTO movimientos_vidrios (id_vidrio, tipo_movimiento, cantidad, fecha, usuario) VALUES (?, 'Ajuste', ?, CURRENT_TIMESTAMP, ?)", (1, 3, "test"))
-        self.mock_db.ejecutar_query.assert_any_call("INSERT INTO auditorias_sistema (usuario, modulo, accion, fecha) VALUES (?, ?, ?, CURRENT_TIMESTAMP)", ("test", "Vidrios", "Ajustó stock del vidrio 1 de 7 a 10"))
+        self.mock_db.ejecutar_query.assert_called_once_with("UPDATE vidrios SET stock_actual = ? OUTPUT deleted.stock_actual WHERE id_vidrio = ?", (10, 1))
+        self.mock_db.ejecutar_lote.assert_called_once_with("INSERT INTO movimientos_vidrios (id_vidrio, tipo_movimiento, cantidad, fecha, usuario) VALUES (?, 'Ajuste', ?, CURRENT_TIMESTAMP, ?)", [(1, 3, "test")])
+        auditar.assert_called_once_with("test", "Vidrios", "Ajustó stock del vidrio 1 de 7 a 10")
 
     def test_ajustar_stock_vidrio_invalido(self):
         with self.assertRaises(ValueError) as cm: